@@ -0,0 +1,31 @@
+"""
+Servidor HTTP del asistente sin la interfaz de Gradio (API JSON + SSE)
+
+Uso:
+    python api.py
+    SESSION_BACKEND=sqlite WEB_CONCURRENCY=4 uvicorn --factory src.api:create_app --host 0.0.0.0 --port 8000
+"""
+import os
+import uvicorn
+from src.config import Config
+from src.observability import get_logger
+
+logger = get_logger("src.api")  # Bajo el logger del paquete: __name__ aquí es "__main__"
+
+def main():
+    # Los workers son procesos distintos: las sesiones tienen que vivir en SQLite
+    if Config.API_WORKERS > 1 and Config.SESSION_BACKEND == "memory":
+        logger.warning("Varios workers: usando SESSION_BACKEND=sqlite para compartir las sesiones")
+        os.environ["SESSION_BACKEND"] = "sqlite"
+    
+    logger.info(f"API del asistente en http://{Config.API_HOST}:{Config.API_PORT} ({Config.API_WORKERS} workers)")
+    uvicorn.run(
+        "src.api:create_app",
+        factory=True,
+        host=Config.API_HOST,
+        port=Config.API_PORT,
+        workers=Config.API_WORKERS
+    )
+
+if __name__ == "__main__":
+    main()
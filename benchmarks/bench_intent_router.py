@@ -0,0 +1,101 @@
+"""
+Micro-benchmark del router de intenciones frente a la cascada de regex anterior
+
+Uso:
+    python -m benchmarks.bench_intent_router [--iterations N]
+"""
+import argparse
+import re
+import time
+from src.core.intent_router import IntentRouter
+
+# Mensajes realistas del chat: preguntas, emails en sus distintos formatos y confirmaciones
+CORPUS = [
+    "¿Qué experiencia tiene Diego con Python?",
+    "¿Ha trabajado con React y Node.js en producción?",
+    "Cuéntame sus proyectos de IA",
+    "¿Dónde estudió?",
+    "sí",
+    "Vale",
+    "ok",
+    "Quiero enviarte un mail para una oferta",
+    "¿Puedo escribirte para hablar de un proyecto?",
+    "Tengo una propuesta de colaboración para una startup",
+    "Email: ana.garcia@empresa.com Mensaje: Hola Diego, buscamos un desarrollador backend para un proyecto de 6 meses.",
+    "Email: recruiter@talent.io\nMensaje: Tenemos una vacante de Senior Python en remoto, ¿te interesa?",
+    "juan@startup.es me gustaría contratarte para una consultoría",
+    "maria@correo.com",
+    "Hola Diego\nTe escribo por lo de la charla del jueves\nmaria@correo.com",
+    "pablo@agencia.com\nNecesitamos presupuesto para una web\nCon pasarela de pago",
+    "¿Qué opina Diego del trabajo en remoto? Lo pregunto porque en mi empresa estamos valorando "
+    "abrir posiciones en remoto y me gustaría conocer su experiencia trabajando con equipos distribuidos.",
+    "Hola! " * 40 + "¿Sabe Docker?",
+]
+
+# Entradas patológicas: textos pegados muy largos, con y sin "@"
+PATHOLOGICAL = [
+    "Email: a@b.c " + "x" * 50_000,
+    "Email: a@b.c " + "palabra " * 20_000,
+    "@" * 500,
+    "a" * 5_000 + "@",
+]
+
+
+def legacy_route(message):
+    """Cascada de regex previa al router (solo clasificación, sin estado)"""
+    reply = message.strip().lower()
+    re.search(r'\S+@\S+', message)
+    email_pattern1 = r"(?:email|correo):\s*(\S+@\S+).*?(?:mensaje|message):\s*(.+)"
+    match1 = re.search(email_pattern1, message, re.IGNORECASE | re.DOTALL)
+    match2 = re.search(r'(\S+@\S+)\s+(.+)', message.strip())
+    lines = message.strip().split('\n')
+    email_match = None
+    for line in lines:
+        email_search = re.search(r'(\S+@\S+)', line.strip())
+        if email_search:
+            email_match = email_search.group(1)
+            break
+    if not email_match and len(lines) == 1:
+        re.search(r'^(\S+@\S+)$', message.strip())
+    contact_triggers = [
+        "quiero enviarte un mail", "escribirte", "mandarte un correo",
+        "tengo una propuesta", "puedo escribirte", "contactarte",
+        "enviar email", "enviar correo"
+    ]
+    return (
+        reply in ["sí", "si", "enviar", "confirmar", "ok"],
+        match1 or match2 or email_match,
+        any(trigger in message.lower() for trigger in contact_triggers)
+    )
+
+
+def measure(function, messages, iterations):
+    """Tiempo medio por mensaje en microsegundos"""
+    started = time.perf_counter()
+    for _ in range(iterations):
+        for message in messages:
+            function(message)
+    return (time.perf_counter() - started) / (iterations * len(messages)) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--iterations", type=int, default=2000)
+    args = parser.parse_args()
+
+    router = IntentRouter()
+    print(f"Corpus: {len(CORPUS)} mensajes x {args.iterations} iteraciones")
+    legacy = measure(legacy_route, CORPUS, args.iterations)
+    routed = measure(router.classify, CORPUS, args.iterations)
+    print(f"  cascada de regex : {legacy:8.2f} µs/mensaje")
+    print(f"  IntentRouter     : {routed:8.2f} µs/mensaje  ({legacy / routed:.1f}x)")
+
+    print("Entradas patológicas (peor caso, 1 iteración):")
+    for message in PATHOLOGICAL:
+        legacy = measure(legacy_route, [message], 1)
+        routed = measure(router.classify, [message], 1)
+        print(f"  {len(message):>7} caracteres: cascada {legacy / 1000:9.2f} ms | IntentRouter {routed / 1000:7.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
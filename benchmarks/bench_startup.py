@@ -0,0 +1,169 @@
+"""
+Benchmark del arranque: tiempo de importación, hasta escuchar y hasta estar listo
+
+Cada medida se hace en un intérprete nuevo. El servidor (api.py) arranca
+contra un OpenAI falso local con la caché de fuentes vacía (frío) o ya
+poblada (caliente), y se sondea /healthz (escucha) y /readyz (listo);
+"primera respuesta" es el tiempo desde el arranque hasta completar un
+primer turno que llama al LLM. "Secuencial" es el arranque anterior: todo
+se carga antes de escuchar.
+
+Uso (desde la raíz del repositorio):
+    python -m benchmarks.bench_startup [--runs N]
+"""
+import argparse
+import json
+import os
+import shutil
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+from benchmarks.fake_openai import FakeOpenAIServer
+
+IMPORTS = ("src.core", "src.api", "openai", "gradio")
+
+MODES = {
+    "segundo plano": {},
+    "secuencial": {"STARTUP_BACKGROUND": "false", "LLM_WARM_UP_ENABLED": "false"}
+}
+
+FIRST_MESSAGE = "¿Qué tecnologías usa Diego en sus proyectos de backend?"
+
+
+def import_seconds(module):
+    """
+    Segundos que tarda `import module` en un intérprete nuevo
+
+    Returns:
+        float | None: Segundos, o None si el módulo no está instalado
+    """
+    code = (
+        "import time; started = time.perf_counter()\n"
+        f"import {module}\n"
+        "print(time.perf_counter() - started)"
+    )
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True)
+    return float(result.stdout) if result.returncode == 0 else None
+
+
+def free_port():
+    """Puerto TCP libre en localhost"""
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def get_status(url):
+    """Código HTTP de un GET (None si aún no escucha)"""
+    try:
+        with urllib.request.urlopen(url, timeout=1) as response:
+            return response.status
+    except urllib.error.HTTPError as e:
+        return e.code
+    except OSError:
+        return None
+
+
+def wait_for(url, deadline):
+    """Sondea la URL hasta que responde 200; segundos en que lo hizo (perf_counter)"""
+    while time.perf_counter() < deadline:
+        if get_status(url) == 200:
+            return time.perf_counter()
+        time.sleep(0.005)
+    raise TimeoutError(f"{url} no respondió 200 a tiempo")
+
+
+def post_chat(base_url):
+    """Latencia del primer turno (POST /api/chat) en segundos"""
+    body = json.dumps({"message": FIRST_MESSAGE}).encode("utf-8")
+    request = urllib.request.Request(f"{base_url}/api/chat", data=body, headers={"Content-Type": "application/json"})
+    started = time.perf_counter()
+    with urllib.request.urlopen(request, timeout=30) as response:
+        response.read()
+    return time.perf_counter() - started
+
+
+def start_server(workdir, fake, overrides, timeout):
+    """
+    Arranca api.py en un proceso nuevo y mide sus tiempos
+
+    Returns:
+        dict: Segundos hasta escuchar, hasta estar listo y hasta la primera respuesta
+    """
+    port = free_port()
+    env = {
+        **os.environ,
+        "OPENAI_BASE_URL": fake.base_url,
+        "OPENAI_API_KEY": "sk-fake",
+        "API_HOST": "127.0.0.1",
+        "API_PORT": str(port),
+        "CACHE_DIR": os.path.join(workdir, "cache"),
+        "LEADS_DB_FILE": os.path.join(workdir, "leads.db"),
+        "EMAIL_JOURNAL_FILE": os.path.join(workdir, "outbox", "journal.jsonl"),
+        "PROFILES_DIR": os.path.join(workdir, "profiles"),
+        "API_SESSION_SECRET_FILE": os.path.join(workdir, "api_session_secret"),
+        "PROFILE_WATCH_ENABLED": "false",
+        "LOG_LEVEL": "WARNING",
+        **overrides
+    }
+    base_url = f"http://127.0.0.1:{port}"
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "api.py"], env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        deadline = started + timeout
+        listening = wait_for(f"{base_url}/healthz", deadline)
+        ready = wait_for(f"{base_url}/readyz", deadline)
+        first_turn = post_chat(base_url)
+    finally:
+        process.terminate()
+        process.wait(timeout=10)
+    return {"listen": listening - started, "ready": ready - started, "first_reply": ready - started + first_turn}
+
+
+def median(runs, key):
+    return statistics.median(run[key] for run in runs) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--timeout", type=float, default=60.0)
+    args = parser.parse_args()
+
+    print(f"Importación en un intérprete nuevo (mediana de {args.runs}):")
+    for module in IMPORTS:
+        times = [import_seconds(module) for _ in range(args.runs)]
+        if None in times:
+            print(f"  {module:<10}: no instalado")
+        else:
+            print(f"  {module:<10}: {statistics.median(times) * 1000:8.1f} ms")
+
+    fake = FakeOpenAIServer().start()
+    workdir = tempfile.mkdtemp(prefix="bench-startup-")
+    try:
+        print(f"Arranque de api.py (mediana de {args.runs}):")
+        for mode, overrides in MODES.items():
+            for cache in ("frío", "caliente"):
+                runs = []
+                for _ in range(args.runs):
+                    if cache == "frío":
+                        shutil.rmtree(os.path.join(workdir, "cache"), ignore_errors=True)
+                    runs.append(start_server(workdir, fake, overrides, args.timeout))
+                print(
+                    f"  {mode:<13} caché {cache:<8}: escucha {median(runs, 'listen'):7.1f} ms | "
+                    f"listo {median(runs, 'ready'):7.1f} ms | primera respuesta {median(runs, 'first_reply'):7.1f} ms"
+                )
+    finally:
+        fake.stop()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,262 @@
+"""
+Servidor local que imita el endpoint chat/completions de OpenAI
+
+Responde en JSON o en streaming (SSE), con latencia configurable, llamadas
+a herramientas, respuestas demasiado largas que fuerzan la adaptación y
+errores 500 para simular una caída del proveedor.
+
+Uso independiente:
+    python -m benchmarks.fake_openai --port 8765 --ttft 0.2 --token-delay 0.01
+    OPENAI_BASE_URL=http://127.0.0.1:8765/v1 OPENAI_API_KEY=x python main.py
+"""
+import argparse
+import json
+import random
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+SHORT_ANSWER = (
+    "Diego es desarrollador de software con experiencia en Python, IA aplicada y "
+    "aplicaciones web. Ha trabajado en proyectos de automatización y asistentes conversacionales."
+)
+LONG_ANSWER = " ".join([SHORT_ANSWER] * 6)
+
+# Palabras del último mensaje del usuario que hacen que el modelo falso pida una herramienta
+TOOL_TRIGGERS = {
+    "record_unknown_question": ("coche", "mascota", "hobby", "deporte"),
+    "record_user_details": ("me llamo", "mi nombre es")
+}
+
+
+def usage(request, text):
+    """Recuento aproximado de tokens (una palabra = un token)"""
+    prompt = sum(len(str(m.get("content") or "").split()) for m in request.get("messages", []))
+    completion = len(text.split())
+    return {"prompt_tokens": prompt, "completion_tokens": completion, "total_tokens": prompt + completion}
+
+
+@dataclass
+class FakeSettings:
+    """Comportamiento del modelo falso"""
+
+    ttft: float = 0.15  # Segundos hasta el primer token
+    token_delay: float = 0.005  # Segundos entre tokens en streaming
+    long_ratio: float = 0.2  # Proporción de respuestas demasiado largas
+    error_rate: float = 0.0  # Proporción de peticiones que fallan con 500
+    seed: int = 42
+
+
+class FakeOpenAIServer:
+    """
+    Servidor HTTP en un hilo que responde como la API de chat completions
+
+    Cuenta las llamadas recibidas por tipo (streaming, herramientas,
+    auxiliares sin herramientas) para calcular llamadas al LLM por turno.
+    """
+
+    def __init__(self, host="127.0.0.1", port=0, settings=None):
+        self.settings = settings or FakeSettings()
+        self._random = random.Random(self.settings.seed)
+        self._lock = threading.Lock()
+        self.calls = {"total": 0, "stream": 0, "tool_calls": 0, "auxiliary": 0, "errors": 0}
+        handler = self._make_handler()
+        self._server = ThreadingHTTPServer((host, port), handler)
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self):
+        """URL base para OPENAI_BASE_URL"""
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self):
+        """Arranca el servidor en segundo plano"""
+        self._thread = threading.Thread(target=self._server.serve_forever, name="fake-openai", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Detiene el servidor"""
+        self._server.shutdown()
+        self._server.server_close()
+
+    def reset_counters(self):
+        """Pone a cero los contadores de llamadas"""
+        with self._lock:
+            for key in self.calls:
+                self.calls[key] = 0
+
+    def _count(self, *keys):
+        with self._lock:
+            for key in keys:
+                self.calls[key] += 1
+
+    def _long_answer(self):
+        with self._lock:
+            return self._random.random() < self.settings.long_ratio
+
+    def _fails(self):
+        with self._lock:
+            failed = self._random.random() < self.settings.error_rate
+            if failed:
+                self.calls["errors"] += 1
+            return failed
+
+    def respond(self, request):
+        """
+        Decide la respuesta para una petición
+
+        Returns:
+            tuple: (texto, llamadas a herramientas o None)
+        """
+        messages = request.get("messages", [])
+        last = messages[-1] if messages else {}
+        if not request.get("tools"):
+            # Llamadas auxiliares: adaptación de longitud, asunto, resumen del historial
+            self._count("total", "auxiliary")
+            return SHORT_ANSWER[:180], None
+
+        self._count("total")
+        if request.get("stream"):
+            self._count("stream")
+        if last.get("role") == "user" and request.get("tool_choice") != "none":
+            content = str(last.get("content", "")).lower()
+            for name, triggers in TOOL_TRIGGERS.items():
+                if any(trigger in content for trigger in triggers):
+                    self._count("tool_calls")
+                    arguments = {"question": content} if name == "record_unknown_question" else {
+                        "email": "visitante@example.com", "name": "Visitante"
+                    }
+                    return "", [{
+                        "id": f"call_{uuid.uuid4().hex[:12]}",
+                        "type": "function",
+                        "function": {"name": name, "arguments": json.dumps(arguments, ensure_ascii=False)}
+                    }]
+        return (LONG_ANSWER if self._long_answer() else SHORT_ANSWER), None
+
+    def _make_handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                pass
+
+            def do_GET(self):
+                # Listado de modelos: lo usa el precalentamiento de la conexión (no cuenta como llamada)
+                if not self.path.endswith("/models"):
+                    self._send_json(404, {"error": {"message": "not found"}})
+                    return
+                self._send_json(200, {"object": "list", "data": [{"id": "fake", "object": "model", "owned_by": "fake"}]})
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                request = json.loads(self.rfile.read(length) or b"{}")
+                if not self.path.endswith("/chat/completions"):
+                    self._send_json(404, {"error": {"message": "not found"}})
+                    return
+                if fake._fails():
+                    time.sleep(fake.settings.ttft)
+                    self._send_json(500, {"error": {"message": "fake outage", "type": "server_error"}})
+                    return
+                text, tool_calls = fake.respond(request)
+                time.sleep(fake.settings.ttft)
+                if request.get("stream"):
+                    self._stream(request, text, tool_calls)
+                else:
+                    self._send_json(200, self._completion(request, text, tool_calls))
+
+            def _completion(self, request, text, tool_calls):
+                message = {"role": "assistant", "content": text or None}
+                if tool_calls:
+                    message["tool_calls"] = tool_calls
+                return {
+                    "id": f"chatcmpl-{uuid.uuid4().hex[:12]}",
+                    "object": "chat.completion",
+                    "created": int(time.time()),
+                    "model": request.get("model", "fake"),
+                    "choices": [{
+                        "index": 0,
+                        "message": message,
+                        "finish_reason": "tool_calls" if tool_calls else "stop"
+                    }],
+                    "usage": usage(request, text)
+                }
+
+            def _stream(self, request, text, tool_calls):
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Cache-Control", "no-cache")
+                self.send_header("Connection", "close")
+                self.end_headers()
+                base = {
+                    "id": f"chatcmpl-{uuid.uuid4().hex[:12]}",
+                    "object": "chat.completion.chunk",
+                    "created": int(time.time()),
+                    "model": request.get("model", "fake")
+                }
+                try:
+                    if tool_calls:
+                        calls = [{"index": i, **call} for i, call in enumerate(tool_calls)]
+                        self._event({**base, "choices": [{"index": 0, "delta": {"tool_calls": calls}, "finish_reason": None}]})
+                        finish_reason = "tool_calls"
+                    else:
+                        max_tokens = request.get("max_tokens") or 10_000
+                        words = text.split(" ")
+                        finish_reason = "length" if len(words) > max_tokens else "stop"
+                        for i, word in enumerate(words[:max_tokens]):
+                            piece = word if i == 0 else " " + word
+                            self._event({**base, "choices": [{"index": 0, "delta": {"content": piece}, "finish_reason": None}]})
+                            time.sleep(fake.settings.token_delay)
+                        text = " ".join(words[:max_tokens])
+                    self._event({**base, "choices": [{"index": 0, "delta": {}, "finish_reason": finish_reason}]})
+                    if (request.get("stream_options") or {}).get("include_usage"):
+                        self._event({**base, "choices": [], "usage": usage(request, text)})
+                    self.wfile.write(b"data: [DONE]\n\n")
+                    self.wfile.flush()
+                except (BrokenPipeError, ConnectionResetError):
+                    pass  # El cliente cortó el stream (p. ej. al llenar el espacio disponible)
+                self.close_connection = True
+
+            def _event(self, payload):
+                self.wfile.write(f"data: {json.dumps(payload, ensure_ascii=False)}\n\n".encode("utf-8"))
+                self.wfile.flush()
+
+            def _send_json(self, status, payload):
+                body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Servidor local que imita chat/completions de OpenAI")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--ttft", type=float, default=FakeSettings.ttft)
+    parser.add_argument("--token-delay", type=float, default=FakeSettings.token_delay)
+    parser.add_argument("--long-ratio", type=float, default=FakeSettings.long_ratio)
+    parser.add_argument("--error-rate", type=float, default=FakeSettings.error_rate)
+    args = parser.parse_args()
+    settings = FakeSettings(
+        ttft=args.ttft, token_delay=args.token_delay, long_ratio=args.long_ratio, error_rate=args.error_rate
+    )
+    server = FakeOpenAIServer(port=args.port, settings=settings).start()
+    print(f"Fake OpenAI escuchando en {server.base_url}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
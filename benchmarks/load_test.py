@@ -0,0 +1,358 @@
+"""
+Prueba de carga offline de PersonalAssistant
+
+Levanta un OpenAI falso y un sumidero SMTP locales, simula N sesiones
+concurrentes con guiones realistas (preguntas de la FAQ, flujos de email,
+historiales largos) y muestra latencias p50/p95/p99, peticiones por
+segundo, llamadas al LLM por turno y memoria por sesión.
+
+Uso (desde la raíz del repositorio):
+    python -m benchmarks.load_test --sessions 50 --turns 6
+    python -m benchmarks.load_test --mode sync --no-stream --json resultados.json
+
+Para medir solo el coste del lado de Python, grabar una vez y reproducir sin
+latencia (con --no-cache, para que las mismas peticiones lleguen al modelo):
+    python -m benchmarks.load_test --no-cache --llm record --cassette /tmp/llm.jsonl.gz
+    python -m benchmarks.load_test --no-cache --llm replay --cassette /tmp/llm.jsonl.gz
+"""
+import argparse
+import asyncio
+import gc
+import json
+import os
+import shutil
+import tempfile
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from benchmarks.fake_openai import FakeOpenAIServer, FakeSettings
+from benchmarks.smtp_sink import SMTPSink
+
+PROFILE_QUESTIONS = [
+    "¿Qué experiencia tiene Diego con Python?",
+    "¿En qué proyectos de inteligencia artificial ha trabajado?",
+    "¿Qué estudios tiene?",
+    "¿Ha trabajado con React o con frameworks de frontend?",
+    "¿Qué opina del trabajo en remoto?",
+    "¿Tiene coche?",  # Dispara record_unknown_question en el modelo falso
+    "Me llamo Laura y trabajo en una consultora",  # Dispara record_user_details
+    "¿Cuál ha sido su proyecto más complejo?",
+    "¿Qué tecnologías cloud conoce?",
+    "¿Sabe desplegar modelos en producción?"
+]
+
+
+def faq_questions(path="data/me/faq.json"):
+    """Preguntas de la FAQ del perfil (respondidas sin LLM si el atajo está activo)"""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return [item["pregunta"] for item in json.load(f)["faq"]]
+    except (OSError, KeyError, ValueError):
+        return PROFILE_QUESTIONS[:3]
+
+
+def build_scripts(turns):
+    """
+    Guiones de conversación por tipo de sesión
+
+    Returns:
+        dict: Tipo -> función (índice de sesión) -> lista de mensajes
+    """
+    faq = faq_questions()
+    return {
+        "faq": lambda n: [faq[(n + i) % len(faq)] for i in range(turns)],
+        "profile": lambda n: [PROFILE_QUESTIONS[(n + i) % len(PROFILE_QUESTIONS)] for i in range(turns)],
+        "email": lambda n: [
+            PROFILE_QUESTIONS[n % len(PROFILE_QUESTIONS)],
+            "quiero escribirte",
+            f"visitante{n}@example.com",
+            "Me gustaría proponerte un proyecto de IA para nuestra empresa",
+            "sí"
+        ][:max(turns, 5)],
+        "long": lambda n: [
+            f"{PROFILE_QUESTIONS[(n + i) % len(PROFILE_QUESTIONS)]} (turno {i})" for i in range(turns * 3)
+        ]
+    }
+
+
+def create_profiles(root, count, source="data/me"):
+    """
+    Crea `count` perfiles sintéticos copiando data/me/ con otro nombre en el CV
+
+    El contexto, la FAQ y LinkedIn son iguales en todos (como en un equipo que
+    comparte contexto), de modo que el registro los guarda una sola vez.
+
+    Returns:
+        list: Ids de los perfiles creados
+    """
+    with open(os.path.join(source, "cv.json"), "r", encoding="utf-8") as f:
+        cv = json.load(f)
+    ids = []
+    for n in range(count):
+        profile_id = f"p{n}"
+        directory = os.path.join(root, profile_id)
+        shutil.copytree(source, directory)
+        with open(os.path.join(directory, "cv.json"), "w", encoding="utf-8") as f:
+            json.dump({**cv, "nombre": f"Persona {n}"}, f, ensure_ascii=False)
+        with open(os.path.join(directory, "perfil.json"), "w", encoding="utf-8") as f:
+            json.dump({"email": f"{profile_id}@example.com"}, f)
+        ids.append(profile_id)
+    return ids
+
+
+def percentile(values, p):
+    """Percentil por rango más cercano"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, round(p / 100 * len(ordered) + 0.5) - 1))
+    return ordered[index]
+
+
+def configure(workdir, fake, sink, args):
+    """Apunta la configuración a los servicios locales y a un directorio temporal"""
+    from src.config import Config
+
+    os.environ["OPENAI_BASE_URL"] = fake.base_url
+    os.environ["OPENAI_API_KEY"] = "sk-fake"
+    host, port = sink.address
+    Config.SMTP_HOST, Config.SMTP_PORT = host, str(port)
+    Config.SMTP_EMAIL, Config.SMTP_PASSWORD = "diego@example.com", "fake"
+    Config.SMTP_STARTTLS = False
+    Config.EMAIL_JOURNAL_FILE = os.path.join(workdir, "outbox", "journal.jsonl")
+    Config.CACHE_DIR = os.path.join(workdir, "cache")
+    Config.LEADS_DB_FILE = os.path.join(workdir, "leads.db")
+    Config.LEADS_FILE = os.path.join(workdir, "leads.txt")
+    Config.UNKNOWN_QUESTIONS_FILE = os.path.join(workdir, "unknown_questions.txt")
+    Config.SESSION_DB_FILE = os.path.join(workdir, "sessions.db")
+    Config.PROFILE_WATCH_ENABLED = False
+    Config.LOG_LEVEL = args.log_level
+    Config.LLM_BACKEND = args.llm
+    Config.LLM_CASSETTE_FILE = args.cassette or os.path.join(workdir, "llm.jsonl.gz")
+    Config.LLM_REPLAY_TIMING = args.replay_timing
+    Config.STREAM_RESPONSES = not args.no_stream
+    Config.RESPONSE_CACHE_ENABLED = not args.no_cache
+    Config.FAQ_FAST_PATH_ENABLED = not args.no_faq
+    Config.ADMISSION_ENABLED = not args.no_admission
+    Config.COALESCE_ENABLED = not args.no_coalesce
+    Config.PROFILES_DIR = os.path.join(workdir, "profiles")
+    if args.profile_budget_kb:
+        Config.PROFILE_ARTIFACTS_MAX_BYTES = int(args.profile_budget_kb * 1024)
+    if args.max_llm:
+        Config.ADMISSION_MAX_CONCURRENT_LLM = args.max_llm
+    if args.session_rate:
+        Config.SESSION_RATE_PER_MINUTE = args.session_rate
+    return Config
+
+
+class Recorder:
+    """Acumula las medidas de cada turno"""
+
+    def __init__(self):
+        self.latencies = []
+        self.first_chunk = []
+        self.errors = 0
+
+    def add(self, started, first, finished):
+        self.latencies.append(finished - started)
+        self.first_chunk.append((first or finished) - started)
+
+
+async def run_async_session(assistant, session_id, messages, recorder, profile_id=None):
+    """Una sesión secuencial sobre achat_stream()"""
+    history = []
+    for message in messages:
+        started = time.perf_counter()
+        first = None
+        reply = ""
+        try:
+            async for partial in assistant.achat_stream(message, history, session_id=session_id, profile_id=profile_id):
+                first = first or time.perf_counter()
+                reply = partial
+        except Exception as e:
+            recorder.errors += 1
+            print(f"[ERROR] Sesión {session_id}: {type(e).__name__}: {e}")
+            continue
+        recorder.add(started, first, time.perf_counter())
+        history += [{"role": "user", "content": message}, {"role": "assistant", "content": reply}]
+
+
+def run_sync_session(assistant, session_id, messages, recorder, profile_id=None):
+    """Una sesión secuencial sobre chat_stream()"""
+    history = []
+    for message in messages:
+        started = time.perf_counter()
+        first = None
+        reply = ""
+        try:
+            for partial in assistant.chat_stream(message, history, session_id=session_id, profile_id=profile_id):
+                first = first or time.perf_counter()
+                reply = partial
+        except Exception as e:
+            recorder.errors += 1
+            print(f"[ERROR] Sesión {session_id}: {type(e).__name__}: {e}")
+            continue
+        recorder.add(started, first, time.perf_counter())
+        history += [{"role": "user", "content": message}, {"role": "assistant", "content": reply}]
+
+
+def run(args):
+    """Ejecuta la prueba de carga y devuelve el informe"""
+    fake = FakeOpenAIServer(settings=FakeSettings(
+        ttft=args.ttft, token_delay=args.token_delay, long_ratio=args.long_ratio, error_rate=args.error_rate
+    )).start()
+    sink = SMTPSink(delay=args.smtp_delay).start()
+    workdir = tempfile.mkdtemp(prefix="assistant-load-")
+    configure(workdir, fake, sink, args)
+    profile_ids = create_profiles(os.path.join(workdir, "profiles"), args.profiles) or [None]
+
+    from src.core import PersonalAssistant
+    from src.observability import STAGE_SECONDS, TURN_SECONDS, LLM_TOKENS, MODEL_CHOICES
+    from src.tools import get_email_queue
+
+    assistant = PersonalAssistant()
+    # El arranque se mide aparte (benchmarks.bench_startup): perfil cargado y openai importado
+    assistant.startup.wait()
+    assistant.llm.prepare()
+    scripts = build_scripts(args.turns)
+    kinds = list(scripts)
+    sessions = [
+        (f"load-{n}", scripts[kinds[n % len(kinds)]](n), profile_ids[n % len(profile_ids)])
+        for n in range(args.sessions)
+    ]
+    if args.burst:
+        # Todas las sesiones abren a la vez con la misma pregunta (p. ej. tras compartir el enlace)
+        sessions = [(session_id, [PROFILE_QUESTIONS[0]] + messages, profile) for session_id, messages, profile in sessions]
+    fake.reset_counters()
+    STAGE_SECONDS.reset()
+    TURN_SECONDS.reset()
+    recorder = Recorder()
+
+    gc.collect()
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    started = time.perf_counter()
+    if args.mode == "async":
+        async def main():
+            await asyncio.gather(*(
+                run_async_session(assistant, session_id, messages, recorder, profile)
+                for session_id, messages, profile in sessions
+            ))
+        asyncio.run(main())
+    else:
+        with ThreadPoolExecutor(max_workers=args.sessions) as pool:
+            for session_id, messages, profile in sessions:
+                pool.submit(run_sync_session, assistant, session_id, messages, recorder, profile)
+    elapsed = time.perf_counter() - started
+    gc.collect()
+    retained = tracemalloc.get_traced_memory()[0] - baseline
+    tracemalloc.stop()
+
+    # Esperar a que la cola de emails entregue al sumidero
+    deadline = time.time() + 10
+    while get_email_queue().pending() and time.time() < deadline:
+        time.sleep(0.05)
+    time.sleep(0.2)
+
+    turns = len(recorder.latencies)
+    report = {
+        "mode": args.mode,
+        "stream": not args.no_stream,
+        "sessions": args.sessions,
+        "turns": turns,
+        "errors": recorder.errors,
+        "elapsed_s": round(elapsed, 3),
+        "rps": round(turns / elapsed, 2) if elapsed else 0.0,
+        "latency_ms": {
+            f"p{p}": round(percentile(recorder.latencies, p) * 1000, 1) for p in (50, 95, 99)
+        },
+        "first_chunk_ms": {
+            f"p{p}": round(percentile(recorder.first_chunk, p) * 1000, 1) for p in (50, 95, 99)
+        },
+        "llm_calls": dict(fake.calls),
+        "llm_calls_per_turn": round(fake.calls["total"] / turns, 3) if turns else 0.0,
+        "memory_per_session_kb": round(retained / max(args.sessions, 1) / 1024, 1),
+        "emails_delivered": sink.messages,
+        "response_cache": assistant.response_cache.stats(),
+        "faq": assistant.faq_matcher().stats(),
+        "tools": assistant.tool_dispatcher.stats(),
+        "llm": assistant.llm.stats(),
+        "admission": assistant.admission.stats() if assistant.admission else None,
+        "coalescing": assistant.single_flight.stats(),
+        "profiles": assistant.profiles.stats(),
+        "stages": STAGE_SECONDS.summary(),
+        "paths": {path: data["count"] for path, data in TURN_SECONDS.summary().items()},
+        "llm_tokens": {kind: LLM_TOKENS.total(kind=kind) for kind in ("prompt", "completion")},
+        "model_tiers": {tier: MODEL_CHOICES.total(tier=tier) for tier in assistant.model_router.tiers},
+        "workdir": workdir
+    }
+    assistant.llm.close()
+    fake.stop()
+    sink.stop()
+    return report
+
+
+def print_report(report):
+    """Muestra el informe en formato legible"""
+    print("\n=== Prueba de carga ===")
+    print(f"Modo: {report['mode']} | streaming: {report['stream']} | sesiones: {report['sessions']}")
+    print(f"Turnos: {report['turns']} ({report['errors']} errores) en {report['elapsed_s']} s -> {report['rps']} turnos/s")
+    latency, first = report["latency_ms"], report["first_chunk_ms"]
+    print(f"Latencia (ms):        p50 {latency['p50']:>8} | p95 {latency['p95']:>8} | p99 {latency['p99']:>8}")
+    print(f"Primer fragmento (ms): p50 {first['p50']:>7} | p95 {first['p95']:>8} | p99 {first['p99']:>8}")
+    print(f"Llamadas al LLM: {report['llm_calls']} -> {report['llm_calls_per_turn']} por turno")
+    print(f"Memoria retenida por sesión: {report['memory_per_session_kb']} KB")
+    print(f"Emails entregados al sumidero: {report['emails_delivered']}")
+    print(f"Caché de respuestas: {report['response_cache']}")
+    print(f"FAQ: {report['faq']}")
+    print(f"Herramientas: {report['tools']}")
+    print(f"Cliente LLM: {report['llm']} | tokens: {report['llm_tokens']}")
+    print(f"Admisión: {report['admission']}")
+    print(f"Turnos coalescidos: {report['coalescing']}")
+    print(f"Perfiles: {report['profiles']}")
+    print(f"Niveles de modelo elegidos: {report['model_tiers']}")
+    print(f"Turnos por camino: {report['paths']}")
+    print("Etapas (media por ejecución):")
+    for stage, data in sorted(report["stages"].items(), key=lambda item: -item[1]["total_s"]):
+        print(f"  {stage:<32} {data['avg_ms']:>9.2f} ms x {data['count']:<5} = {data['total_s']:>8.3f} s")
+    print(f"Ficheros generados (diario, leads, caché): {report['workdir']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prueba de carga offline del asistente")
+    parser.add_argument("--sessions", type=int, default=20, help="Sesiones concurrentes")
+    parser.add_argument("--turns", type=int, default=5, help="Turnos por sesión (x3 en las sesiones largas)")
+    parser.add_argument("--mode", choices=["async", "sync"], default="async")
+    parser.add_argument("--no-stream", action="store_true", help="Usa el camino bloqueante con adaptación por IA")
+    parser.add_argument("--no-cache", action="store_true", help="Desactiva la caché de respuestas")
+    parser.add_argument("--no-faq", action="store_true", help="Desactiva el atajo de la FAQ")
+    parser.add_argument("--no-admission", action="store_true", help="Desactiva el control de admisión")
+    parser.add_argument("--no-coalesce", action="store_true", help="Desactiva la coalescencia de turnos idénticos")
+    parser.add_argument("--burst", action="store_true", help="Todas las sesiones empiezan con la misma pregunta")
+    parser.add_argument("--profiles", type=int, default=0, help="Perfiles sintéticos entre los que se reparten las sesiones")
+    parser.add_argument("--profile-budget-kb", type=float, help="Memoria para artefactos de perfiles (PROFILE_ARTIFACTS_MAX_BYTES)")
+    parser.add_argument("--max-llm", type=int, help="Turnos con LLM concurrentes (ADMISSION_MAX_CONCURRENT_LLM)")
+    parser.add_argument("--session-rate", type=float, help="Llamadas al LLM por minuto y sesión")
+    parser.add_argument("--ttft", type=float, default=FakeSettings.ttft)
+    parser.add_argument("--token-delay", type=float, default=FakeSettings.token_delay)
+    parser.add_argument("--long-ratio", type=float, default=FakeSettings.long_ratio)
+    parser.add_argument("--error-rate", type=float, default=FakeSettings.error_rate,
+                        help="Proporción de llamadas que fallan con 500 (caída del proveedor)")
+    parser.add_argument("--smtp-delay", type=float, default=0.05)
+    parser.add_argument("--llm", choices=["openai", "record", "replay"], default="openai",
+                        help="record graba las respuestas del modelo falso; replay las sirve sin red")
+    parser.add_argument("--cassette", help="Fichero de la cassette (por defecto, en el directorio temporal)")
+    parser.add_argument("--replay-timing", action="store_true", help="Reproduce la latencia grabada")
+    parser.add_argument("--log-level", default="WARNING", help="Nivel de log del asistente (INFO muestra cada turno)")
+    parser.add_argument("--json", help="Guarda el informe en este fichero")
+    args = parser.parse_args()
+
+    report = run(args)
+    print_report(report)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Servidor SMTP local que acepta y descarta los correos (para pruebas de carga)
+
+Implementa lo mínimo del protocolo (EHLO/HELO, AUTH PLAIN, MAIL, RCPT,
+DATA, RSET, NOOP, QUIT) sin TLS: con SMTP_STARTTLS=false el cliente no lo
+necesita. AUTH acepta cualquier credencial y cuenta los inicios de sesión.
+"""
+import socketserver
+import threading
+import time
+
+
+class SMTPSink:
+    """Sumidero SMTP en un hilo que cuenta los mensajes recibidos"""
+
+    def __init__(self, host="127.0.0.1", port=0, delay=0.0):
+        """
+        Args:
+            host (str): Interfaz de escucha
+            port (int): Puerto (0 elige uno libre)
+            delay (float): Segundos de espera antes de aceptar cada mensaje
+        """
+        self.delay = delay
+        self.messages = 0
+        self.connections = 0
+        self.logins = 0
+        self._lock = threading.Lock()
+        self._server = socketserver.ThreadingTCPServer((host, port), self._make_handler())
+        self._server.daemon_threads = True
+
+    @property
+    def address(self):
+        """(host, puerto) en el que escucha"""
+        return self._server.server_address[:2]
+
+    def start(self):
+        """Arranca el servidor en segundo plano"""
+        threading.Thread(target=self._server.serve_forever, name="smtp-sink", daemon=True).start()
+        return self
+
+    def stop(self):
+        """Detiene el servidor"""
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _make_handler(self):
+        sink = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def reply(self, line):
+                self.wfile.write(f"{line}\r\n".encode("ascii"))
+
+            def handle(self):
+                with sink._lock:
+                    sink.connections += 1
+                self.reply("220 smtp-sink listo")
+                while True:
+                    line = self.rfile.readline()
+                    if not line:
+                        return
+                    command = line.decode("utf-8", "replace").strip().upper()
+                    if command.startswith("EHLO"):
+                        self.reply("250-smtp-sink")
+                        self.reply("250-AUTH PLAIN")
+                        self.reply("250 8BITMIME")
+                    elif command.startswith("AUTH PLAIN"):
+                        with sink._lock:
+                            sink.logins += 1
+                        self.reply("235 Autenticado")
+                    elif command.startswith(("HELO", "MAIL", "RCPT", "RSET", "NOOP")):
+                        self.reply("250 OK")
+                    elif command == "DATA":
+                        self.reply("354 Fin con <CRLF>.<CRLF>")
+                        while self.rfile.readline() not in (b".\r\n", b".\n", b""):
+                            pass
+                        if sink.delay:
+                            time.sleep(sink.delay)
+                        with sink._lock:
+                            sink.messages += 1
+                        self.reply("250 OK en cola")
+                    elif command == "QUIT":
+                        self.reply("221 Adios")
+                        return
+                    else:
+                        self.reply("502 Comando no implementado")
+
+        return Handler
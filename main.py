@@ -1,15 +1,24 @@
 """
 Archivo principal del asistente personal
 """
-import gradio as gr
+from src.config import Config
 from src.core import PersonalAssistant
+from src.observability import MetricsServer
 
 def main():
     print("🚀 Iniciando Mi Asistente Personal...")
     
-    # Crear instancia del asistente
+    # Crear instancia del asistente: el perfil se carga en segundo plano mientras se importa Gradio
     assistant = PersonalAssistant()
     
+    # Métricas en formato Prometheus y sondas (/healthz, /readyz) en un puerto aparte de la interfaz
+    if Config.METRICS_ENABLED:
+        metrics = MetricsServer(Config.METRICS_HOST, Config.METRICS_PORT, readiness=assistant.startup.status).start()
+        host, port = metrics.address
+        print(f"📈 Métricas en http://{host}:{port}/metrics (readiness en /readyz)")
+    
+    import gradio as gr  # Varios segundos de importación: solo al montar la interfaz
+    
     # Mensaje de bienvenida que aparece al abrir el chat
     welcome_message = """¡Hola! 👋 Soy el asistente personal de **Diego Arnanz Lozano**.
 
@@ -23,16 +32,23 @@ Estoy aquí **24/7** para responder **cualquier pregunta** que tengas sobre Dieg
 
 **Pregúntame lo que quieras** - desde lo más general hasta lo más específico. ¡Estoy aquí para ayudarte! 😊"""
     
+    async def respond(message, history, request: gr.Request):
+        """Enruta cada mensaje al estado de la sesión del visitante"""
+        session_id = request.session_hash if request else None
+        async for partial in assistant.achat_stream(message, history, session_id=session_id):
+            yield partial
+    
     # Configurar y lanzar la interfaz de Gradio
     interface = gr.ChatInterface(
-        assistant.chat, 
+        respond, 
         type="messages",
         title="🤖 Asistente Profesional de Diego Arnanz Lozano",
         chatbot=gr.Chatbot(
             value=[{"role": "assistant", "content": welcome_message}],
             height=600,
             type="messages"
-        )
+        ),
+        concurrency_limit=None  # El camino asíncrono no bloquea hilos del worker
     )
     
     print("✅ Asistente listo. Abriendo interfaz web...")
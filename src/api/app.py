@@ -0,0 +1,287 @@
+"""
+API HTTP (ASGI) del asistente: JSON y streaming por Server-Sent Events
+
+Pensada para integrar el asistente en otras webs sin la interfaz de Gradio.
+Cada worker de uvicorn crea su propio PersonalAssistant; el estado de las
+sesiones se comparte entre workers con SESSION_BACKEND=sqlite y el historial
+lo envía el cliente en cada petición, igual que hace Gradio. Un mismo
+proceso sirve todos los perfiles: cada petición elige el suyo con
+"profile_id" (o la cabecera X-Profile-Id).
+
+Los identificadores de sesión los emite el servidor firmados con HMAC
+(ver sessions.py): un cliente no puede elegir el de otra sesión para
+gastar su cupo de llamadas al LLM ni confirmar el email que tenga pendiente.
+
+El servidor escucha en cuanto se crea la aplicación: /healthz responde
+desde el principio (liveness) y /readyz devuelve 503 hasta que el perfil
+por defecto está cargado (readiness). La conexión con el LLM se abre
+mientras tanto en segundo plano.
+"""
+import asyncio
+import json
+import re
+from contextlib import asynccontextmanager
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.middleware.cors import CORSMiddleware
+from starlette.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from starlette.routing import Route
+from src.api.sessions import SessionIssuer, is_issued_session_id, session_secret
+from src.config import Config
+from src.observability import get_logger, REGISTRY
+from src.observability.metrics import CONTENT_TYPE
+
+logger = get_logger(__name__)
+
+SESSION_ID_PATTERN = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+SESSION_HEADER = "X-Session-Id"
+PROFILE_HEADER = "X-Profile-Id"
+HISTORY_ROLES = frozenset(["user", "assistant"])
+
+TOO_MANY_SESSIONS = "Demasiadas sesiones nuevas desde este cliente: reutiliza tu session_id"
+
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+
+class RequestError(ValueError):
+    """Petición mal formada (se responde con 400/413)"""
+
+    def __init__(self, message, status_code=400):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+def client_address(request):
+    """IP del cliente (tras un proxy, la de X-Forwarded-For con uvicorn --proxy-headers)"""
+    return request.client.host if request.client else "desconocido"
+
+
+async def parse_chat_request(request, profiles, issuer):
+    """
+    Valida el cuerpo de /api/chat y /api/chat/stream
+
+    El identificador de sesión puede venir en el cuerpo o en la cabecera
+    X-Session-Id; si no viene, se crea uno nuevo (con el límite por cliente
+    de issuer) y se devuelve al cliente. Uno que no haya emitido el servidor
+    (firma inválida) se rechaza con 403.
+    El perfil, en el cuerpo o en X-Profile-Id; si no viene, el de por defecto.
+
+    Args:
+        request (Request): Petición HTTP
+        profiles (ProfileRegistry): Perfiles disponibles
+        issuer (SessionIssuer): Emisor de identificadores nuevos
+
+    Returns:
+        tuple: (mensaje, historial, id de sesión, id de perfil o None)
+
+    Raises:
+        RequestError: Si el cuerpo no es válido o el cliente pide demasiadas sesiones
+    """
+    try:
+        body = await request.json()
+    except (ValueError, UnicodeDecodeError):
+        raise RequestError("El cuerpo debe ser JSON")
+    if not isinstance(body, dict):
+        raise RequestError("El cuerpo debe ser un objeto JSON")
+
+    message = body.get("message")
+    if not isinstance(message, str) or not message.strip():
+        raise RequestError("Falta 'message'")
+    if len(message) > Config.API_MAX_MESSAGE_CHARS:
+        raise RequestError(f"'message' supera {Config.API_MAX_MESSAGE_CHARS} caracteres", 413)
+
+    history = body.get("history") or []
+    if not isinstance(history, list):
+        raise RequestError("'history' debe ser una lista de mensajes")
+    history = [
+        {"role": item["role"], "content": item["content"]}
+        for item in history[-Config.API_MAX_HISTORY_MESSAGES:]
+        if isinstance(item, dict) and item.get("role") in HISTORY_ROLES and isinstance(item.get("content"), str)
+    ]
+
+    session_id = body.get("session_id") or request.headers.get(SESSION_HEADER)
+    if not session_id:
+        session_id = issuer.issue(client_address(request))
+        if session_id is None:
+            raise RequestError(TOO_MANY_SESSIONS, 429)
+    if not isinstance(session_id, str) or not SESSION_ID_PATTERN.match(session_id):
+        raise RequestError("'session_id' inválido (1-64 caracteres alfanuméricos, '-' o '_')")
+    if not is_issued_session_id(session_id):
+        raise RequestError("'session_id' no emitido por el servidor: pide uno en POST /api/sessions", 403)
+
+    profile_id = body.get("profile_id") or request.headers.get(PROFILE_HEADER)
+    if profile_id is not None and (not isinstance(profile_id, str) or not SESSION_ID_PATTERN.match(profile_id)):
+        raise RequestError("'profile_id' inválido (1-64 caracteres alfanuméricos, '-' o '_')")
+    if not profiles.exists(profile_id):
+        raise RequestError(f"Perfil desconocido: {profile_id}", 404)
+    return message, history, session_id, profile_id
+
+
+def check_worker_config():
+    """
+    Comprueba que la configuración admite varios workers
+
+    Cada worker es un proceso: con SESSION_BACKEND=memory cada uno tendría sus
+    propias sesiones (emails pendientes y cupos incluidos).
+
+    Raises:
+        RuntimeError: Si hay varios workers y las sesiones no se comparten
+    """
+    if Config.API_WORKERS > 1 and Config.SESSION_BACKEND == "memory":
+        raise RuntimeError(
+            f"{Config.API_WORKERS} workers con SESSION_BACKEND=memory: "
+            "las sesiones no se compartirían entre procesos; usa SESSION_BACKEND=sqlite"
+        )
+
+
+def sse_event(event, data):
+    """Evento SSE con datos JSON"""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+def create_app(assistant=None):
+    """
+    Crea la aplicación ASGI
+
+    Uso con varios workers (cada uno crea su asistente; uvicorn lee el número
+    de workers de WEB_CONCURRENCY, que también ve create_app):
+        SESSION_BACKEND=sqlite WEB_CONCURRENCY=4 uvicorn --factory src.api:create_app
+
+    Raises:
+        RuntimeError: Si hay varios workers sin sesiones compartidas
+
+    Args:
+        assistant (PersonalAssistant): Asistente a exponer (por defecto se crea uno)
+
+    Returns:
+        Starlette: Aplicación ASGI
+    """
+    check_worker_config()
+    session_secret()  # Crea o lee el secreto compartido antes de atender peticiones
+    if assistant is None:
+        from src.core import PersonalAssistant
+        assistant = PersonalAssistant()
+
+    issuer = SessionIssuer()
+
+    async def create_session(request):
+        session_id = issuer.issue(client_address(request))
+        if session_id is None:
+            return JSONResponse({"error": TOO_MANY_SESSIONS}, status_code=429)
+        return JSONResponse({"session_id": session_id}, status_code=201)
+
+    async def list_profiles(request):
+        return JSONResponse({"profiles": assistant.profiles.ids(), "default": assistant.profiles.default_id})
+
+    async def chat(request):
+        try:
+            message, history, session_id, profile_id = await parse_chat_request(request, assistant.profiles, issuer)
+        except RequestError as e:
+            return JSONResponse({"error": str(e)}, status_code=e.status_code)
+        try:
+            reply = await asyncio.wait_for(
+                assistant.achat(message, history, session_id=session_id, profile_id=profile_id),
+                Config.API_REQUEST_TIMEOUT_SECONDS
+            )
+        except asyncio.TimeoutError:
+            logger.warning(f"Timeout de la petición de la sesión {session_id}")
+            return JSONResponse({"error": "timeout", "session_id": session_id}, status_code=504)
+        except Exception as e:
+            logger.error(f"Error procesando la petición de la sesión {session_id}: {type(e).__name__}: {e}")
+            return JSONResponse({"error": "internal_error", "session_id": session_id}, status_code=500)
+        return JSONResponse({"session_id": session_id, "reply": reply}, headers={SESSION_HEADER: session_id})
+
+    async def chat_stream(request):
+        try:
+            message, history, session_id, profile_id = await parse_chat_request(request, assistant.profiles, issuer)
+        except RequestError as e:
+            return JSONResponse({"error": str(e)}, status_code=e.status_code)
+
+        async def events():
+            """
+            Eventos: "delta" (texto añadido), "replace" (el texto se recortó o
+            cambió), "done" (respuesta final) y "error"
+            """
+            yield sse_event("session", {"session_id": session_id})
+            # Un único task consume achat_stream() (misma traza y contexto durante todo el turno)
+            updates = asyncio.Queue()
+
+            async def produce():
+                try:
+                    async for partial in assistant.achat_stream(
+                        message, history, session_id=session_id, profile_id=profile_id
+                    ):
+                        updates.put_nowait(("partial", partial))
+                    updates.put_nowait(("done", None))
+                except Exception as e:
+                    updates.put_nowait(("error", e))
+
+            loop = asyncio.get_running_loop()
+            deadline = loop.time() + Config.API_REQUEST_TIMEOUT_SECONDS
+            producer = asyncio.create_task(produce())
+            sent = ""
+            try:
+                while True:
+                    kind, value = await asyncio.wait_for(updates.get(), max(deadline - loop.time(), 0))
+                    if kind == "done":
+                        yield sse_event("done", {"session_id": session_id, "reply": sent})
+                        break
+                    if kind == "error":
+                        logger.error(f"Error en el streaming de la sesión {session_id}: {type(value).__name__}: {value}")
+                        yield sse_event("error", {"error": "internal_error"})
+                        break
+                    if value.startswith(sent):
+                        if len(value) > len(sent):
+                            yield sse_event("delta", {"text": value[len(sent):]})
+                    else:
+                        yield sse_event("replace", {"text": value})
+                    sent = value
+            except asyncio.TimeoutError:
+                logger.warning(f"Timeout del streaming de la sesión {session_id}")
+                yield sse_event("error", {"error": "timeout"})
+            finally:
+                # Cliente desconectado, timeout o fin: el turno guarda su estado al cancelarse
+                producer.cancel()
+
+        headers = {**SSE_HEADERS, SESSION_HEADER: session_id}
+        return StreamingResponse(events(), media_type="text/event-stream", headers=headers)
+
+    async def health(request):
+        return JSONResponse({"status": "ok"})
+
+    async def ready(request):
+        status = assistant.startup.status()
+        return JSONResponse(status, status_code=200 if status["status"] == "ready" else 503)
+
+    async def metrics(request):
+        return PlainTextResponse(REGISTRY.render(), media_type=CONTENT_TYPE)
+
+    routes = [
+        Route("/api/sessions", create_session, methods=["POST"]),
+        Route("/api/profiles", list_profiles, methods=["GET"]),
+        Route("/api/chat", chat, methods=["POST"]),
+        Route("/api/chat/stream", chat_stream, methods=["POST"]),
+        Route("/healthz", health, methods=["GET"]),
+        Route("/readyz", ready, methods=["GET"]),
+        Route("/metrics", metrics, methods=["GET"])
+    ]
+    middleware = []
+    if Config.API_CORS_ORIGINS:
+        middleware.append(Middleware(
+            CORSMiddleware,
+            allow_origins=Config.API_CORS_ORIGINS,
+            allow_methods=["GET", "POST"],
+            allow_headers=["Content-Type", SESSION_HEADER, PROFILE_HEADER],
+            expose_headers=[SESSION_HEADER]
+        ))
+
+    @asynccontextmanager
+    async def lifespan(app):
+        # Sin bloquear el arranque: la conexión se abre en el bucle que atenderá las peticiones
+        warm_up = asyncio.create_task(assistant.awarm_up())
+        yield
+        warm_up.cancel()
+
+    app = Starlette(routes=routes, middleware=middleware, lifespan=lifespan)
+    app.state.assistant = assistant
+    return app
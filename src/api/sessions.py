@@ -0,0 +1,141 @@
+"""
+Identificadores de sesión de la API: emitidos por el servidor y firmados con HMAC
+"""
+import hashlib
+import hmac
+import os
+import secrets
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from src.config import Config
+from src.observability import get_logger, API_SESSIONS_CREATED
+
+logger = get_logger(__name__)
+
+SESSION_SIGNATURE_CHARS = 24  # 96 bits de HMAC-SHA256
+
+_secret = None
+_secret_lock = threading.Lock()
+
+
+def session_secret():
+    """
+    Secreto con el que se firman los identificadores de sesión
+
+    API_SESSION_SECRET si está definido; si no, el guardado en
+    API_SESSION_SECRET_FILE, que se crea la primera vez. Todos los workers y
+    los reinicios leen el mismo fichero, así que un identificador emitido por
+    un worker vale en cualquier otro.
+
+    Returns:
+        str: Secreto compartido
+    """
+    if Config.API_SESSION_SECRET:
+        return Config.API_SESSION_SECRET
+    global _secret
+    if _secret is None:
+        with _secret_lock:
+            if _secret is None:
+                _secret = _load_or_create_secret(Config.API_SESSION_SECRET_FILE)
+    return _secret
+
+
+def _load_or_create_secret(path):
+    """Lee el secreto del fichero o lo crea de forma atómica si no existe"""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return f.read().strip()
+    except FileNotFoundError:
+        pass
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        os.chmod(temp_path, 0o600)
+        f.write(secrets.token_hex(32))
+    try:
+        # link() no sobrescribe: si otro worker lo creó antes, se usa el suyo
+        os.link(temp_path, path)
+        logger.info(f"Creado el secreto de sesiones de la API en {path}")
+    except FileExistsError:
+        pass
+    finally:
+        os.remove(temp_path)
+    with open(path, "r", encoding="utf-8") as f:
+        return f.read().strip()
+
+
+def session_signature(nonce):
+    """Firma HMAC (truncada) de la parte aleatoria de un identificador de sesión"""
+    digest = hmac.new(session_secret().encode("utf-8"), nonce.encode("utf-8"), hashlib.sha256)
+    return digest.hexdigest()[:SESSION_SIGNATURE_CHARS]
+
+
+def new_session_id():
+    """Identificador de sesión aleatorio y firmado (<hex aleatorio>-<firma>)"""
+    nonce = uuid.uuid4().hex
+    return f"{nonce}-{session_signature(nonce)}"
+
+
+def is_issued_session_id(session_id):
+    """
+    Comprueba que el identificador de sesión lo emitió este servidor
+
+    Args:
+        session_id (str): Identificador enviado por el cliente
+
+    Returns:
+        bool: True si la firma corresponde al secreto compartido
+    """
+    nonce, _, signature = session_id.rpartition("-")
+    return bool(nonce) and hmac.compare_digest(signature, session_signature(nonce))
+
+
+class SessionIssuer:
+    """
+    Emite identificadores de sesión con un límite por cliente (token bucket por IP)
+
+    El cupo de llamadas al LLM es por sesión; sin este límite, pedir un
+    identificador nuevo en cada mensaje lo evitaría. Como el control de
+    admisión, el límite es por proceso, y solo se recuerdan los max_clients
+    clientes más recientes.
+    """
+
+    def __init__(self, rate_per_minute=None, burst=None, max_clients=None):
+        """
+        Args:
+            rate_per_minute (float): Sesiones nuevas por minuto y cliente
+            burst (int): Sesiones seguidas que puede pedir un cliente
+            max_clients (int): Cubos de clientes que se conservan
+        """
+        self.rate = (rate_per_minute or Config.API_SESSIONS_PER_MINUTE) / 60.0
+        self.burst = burst or Config.API_SESSIONS_BURST
+        self.max_clients = max_clients or Config.API_SESSIONS_MAX_CLIENTS
+        self._buckets = OrderedDict()  # cliente -> (tokens, instante)
+        self._lock = threading.Lock()
+
+    def issue(self, client, now=None):
+        """
+        Emite un identificador nuevo si el cliente tiene cupo
+
+        Args:
+            client (str): Dirección del cliente
+            now (float): Instante actual (time.monotonic())
+
+        Returns:
+            str | None: Identificador firmado, o None si el cliente agotó su cupo
+        """
+        now = now or time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.pop(client, (self.burst, now))
+            tokens = min(self.burst, tokens + (now - updated) * self.rate)
+            allowed = tokens >= 1
+            self._buckets[client] = (tokens - 1 if allowed else tokens, now)
+            while len(self._buckets) > self.max_clients:
+                self._buckets.popitem(last=False)
+        API_SESSIONS_CREATED.inc(result="issued" if allowed else "rate_limited")
+        if not allowed:
+            logger.warning(f"Límite de sesiones nuevas alcanzado para {client}")
+            return None
+        return new_session_id()
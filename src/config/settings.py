@@ -13,21 +13,181 @@ class Config:
     # OpenAI
     OPENAI_MODEL = "gpt-4o-mini"
     
+    # Cliente LLM: "openai" (en directo), "record" (graba en la cassette) o "replay" (sin red)
+    LLM_BACKEND = os.getenv("LLM_BACKEND", "openai")
+    LLM_CASSETTE_FILE = os.getenv("LLM_CASSETTE_FILE", "data/cassettes/llm.jsonl.gz")
+    LLM_REPLAY_TIMING = os.getenv("LLM_REPLAY_TIMING", "false").lower() == "true"
+    
     # SMTP Configuration
     SMTP_EMAIL = os.getenv("SMTP_EMAIL")
     SMTP_HOST = os.getenv("SMTP_HOST")
     SMTP_PORT = os.getenv("SMTP_PORT")
     SMTP_PASSWORD = os.getenv("SMTP_PASSWORD")
+    SMTP_STARTTLS = os.getenv("SMTP_STARTTLS", "true").lower() == "true"
+    SMTP_TIMEOUT = 30
+    
+    # Cola de envío de emails en segundo plano
+    EMAIL_QUEUE_ENABLED = os.getenv("EMAIL_QUEUE_ENABLED", "true").lower() == "true"
+    EMAIL_JOURNAL_FILE = os.getenv("EMAIL_JOURNAL_FILE", "data/outbox/journal.jsonl")
+    EMAIL_BATCH_SIZE = 20
+    EMAIL_MAX_ATTEMPTS = 5
+    EMAIL_RETRY_BASE_SECONDS = 2.0
+    EMAIL_SMTP_IDLE_SECONDS = 60
+    EMAIL_STATUS_TTL_SECONDS = 3600  # Estados finales (enviado/fallido) consultables durante este tiempo
+    EMAIL_STATUS_MAX_ENTRIES = 10000
+    EMAIL_JOURNAL_COMPACT_ENTRIES = 500  # Emails terminados que se anotan antes de compactar el diario
+    EMAIL_JOURNAL_COMPACT_BYTES = 4 * 1024 * 1024
     
     # Archivos de datos
-    LEADS_FILE = "data/leads.txt"
-    UNKNOWN_QUESTIONS_FILE = "data/unknown_questions.txt"
+    LEADS_FILE = "data/leads.txt"  # Formato anterior, se migra a LEADS_DB_FILE
+    UNKNOWN_QUESTIONS_FILE = "data/unknown_questions.txt"  # Formato anterior, se migra a LEADS_DB_FILE
+    LEADS_DB_FILE = os.getenv("LEADS_DB_FILE", "data/leads.db")
+    LEAD_STORE_BATCH_SIZE = 100
     LINKEDIN_PDF = "data/me/linkedin.pdf"
+    CACHE_DIR = os.getenv("CACHE_DIR", "data/cache")
+    PROFILE_WATCH_ENABLED = os.getenv("PROFILE_WATCH_ENABLED", "true").lower() == "true"
+    PROFILE_WATCH_INTERVAL = float(os.getenv("PROFILE_WATCH_INTERVAL", "2.0"))
+    PDF_PARALLEL_MIN_PAGES = 8  # A partir de aquí se extraen páginas en paralelo
+    PDF_MAX_WORKERS = 4
+    
+    # Perfiles: varias personas servidas desde un solo proceso
+    DEFAULT_PROFILE_ID = os.getenv("DEFAULT_PROFILE_ID", "me")
+    DEFAULT_PROFILE_DIR = "data/me"  # Directorio del perfil por defecto (LinkedIn en LINKEDIN_PDF)
+    PROFILES_DIR = os.getenv("PROFILES_DIR", "data/profiles")  # Un subdirectorio por perfil adicional
+    PROFILE_MANIFEST = "perfil.json"  # Opcional: {"nombre", "rol", "email"} del perfil
+    PROFILE_ARTIFACTS_MAX_BYTES = int(os.getenv("PROFILE_ARTIFACTS_MAX_BYTES", str(64 * 1024 * 1024)))
+    
+    # Resiliencia del LLM: plazo por llamada, reintentos con backoff y circuit breaker
+    LLM_RESILIENCE_ENABLED = os.getenv("LLM_RESILIENCE_ENABLED", "true").lower() == "true"
+    LLM_TIMEOUT_SECONDS = float(os.getenv("LLM_TIMEOUT_SECONDS", "20"))  # Por intento y presupuesto de reintentos
+    LLM_STREAM_DEADLINE_SECONDS = float(os.getenv("LLM_STREAM_DEADLINE_SECONDS", "45"))
+    LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "2"))
+    LLM_RETRY_BACKOFF_SECONDS = 0.5
+    LLM_RETRY_BACKOFF_MAX_SECONDS = 4.0
+    CIRCUIT_WINDOW = 20  # Últimas llamadas consideradas
+    CIRCUIT_MIN_CALLS = 5
+    CIRCUIT_FAILURE_RATE = float(os.getenv("CIRCUIT_FAILURE_RATE", "0.5"))
+    CIRCUIT_SLOW_CALL_SECONDS = float(os.getenv("CIRCUIT_SLOW_CALL_SECONDS", "10"))
+    CIRCUIT_SLOW_CALL_RATE = 0.8
+    CIRCUIT_OPEN_SECONDS = float(os.getenv("CIRCUIT_OPEN_SECONDS", "30"))
+    OFFLINE_MIN_RETRIEVAL_SCORE = 2.0  # Puntuación BM25 mínima para responder sin LLM
+    
+    # Observabilidad: logging asíncrono con niveles y endpoint /metrics (Prometheus)
+    LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+    LOG_FORMAT = "%(asctime)s [%(levelname)s] %(name)s: %(message)s"
+    METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+    METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1")
+    METRICS_PORT = int(os.getenv("METRICS_PORT", "9464"))
+    
+    # API HTTP (ASGI) para integrar el asistente sin Gradio
+    API_HOST = os.getenv("API_HOST", "127.0.0.1")
+    API_PORT = int(os.getenv("API_PORT", "8000"))
+    API_WORKERS = int(os.getenv("API_WORKERS", os.getenv("WEB_CONCURRENCY", "1")))  # uvicorn usa WEB_CONCURRENCY
+    API_REQUEST_TIMEOUT_SECONDS = float(os.getenv("API_REQUEST_TIMEOUT_SECONDS", "60"))
+    API_MAX_MESSAGE_CHARS = 4000
+    API_MAX_HISTORY_MESSAGES = 50
+    API_CORS_ORIGINS = [origin for origin in os.getenv("API_CORS_ORIGINS", "").split(",") if origin]
+    # Firma de los session_id que emite la API; sin definir, se genera uno y se guarda
+    # en API_SESSION_SECRET_FILE para que lo compartan todos los workers y reinicios
+    API_SESSION_SECRET = os.getenv("API_SESSION_SECRET")
+    API_SESSION_SECRET_FILE = os.getenv("API_SESSION_SECRET_FILE", "data/api_session_secret")
+    # Sesiones nuevas por cliente (IP): sin límite, pedir una por mensaje evitaría el cupo por sesión
+    API_SESSIONS_PER_MINUTE = float(os.getenv("API_SESSIONS_PER_MINUTE", "6"))
+    API_SESSIONS_BURST = int(os.getenv("API_SESSIONS_BURST", "10"))
+    API_SESSIONS_MAX_CLIENTS = 10000  # Clientes recordados por proceso (los menos recientes se olvidan)
+    
+    # Control de admisión: concurrencia de turnos con LLM, cola acotada y límite por sesión
+    ADMISSION_ENABLED = os.getenv("ADMISSION_ENABLED", "true").lower() == "true"
+    ADMISSION_MAX_CONCURRENT_LLM = int(os.getenv("ADMISSION_MAX_CONCURRENT_LLM", "16"))  # Por proceso
+    ADMISSION_MAX_QUEUE = int(os.getenv("ADMISSION_MAX_QUEUE", "64"))
+    ADMISSION_QUEUE_TIMEOUT_SECONDS = float(os.getenv("ADMISSION_QUEUE_TIMEOUT_SECONDS", "5"))
+    ADMISSION_FAQ_FALLBACK_THRESHOLD = 0.45  # Umbral relajado de la FAQ en modo degradado
+    SESSION_RATE_PER_MINUTE = float(os.getenv("SESSION_RATE_PER_MINUTE", "12"))
+    SESSION_RATE_BURST = int(os.getenv("SESSION_RATE_BURST", "5"))
+    
+    # Coalescencia: turnos idénticos en curso comparten una sola llamada al LLM
+    COALESCE_ENABLED = os.getenv("COALESCE_ENABLED", "true").lower() == "true"
+    COALESCE_WAIT_SECONDS = float(os.getenv("COALESCE_WAIT_SECONDS", "30"))  # Espera máxima al turno líder
+    
+    # Arranque: perfil por defecto y cliente LLM se preparan en segundo plano (readiness en /readyz)
+    STARTUP_BACKGROUND = os.getenv("STARTUP_BACKGROUND", "true").lower() == "true"
+    STARTUP_LOAD_WORKERS = 4  # Fuentes de un perfil leídas en paralelo
+    LLM_WARM_UP_ENABLED = os.getenv("LLM_WARM_UP_ENABLED", "true").lower() == "true"
+    LLM_WARM_UP_TIMEOUT_SECONDS = float(os.getenv("LLM_WARM_UP_TIMEOUT_SECONDS", "5"))
     
     # Configuración del asistente
     MAX_RESPONSE_LENGTH = 400
     EMAIL_SUGGESTION_RESET_INTERVAL = 3
     
+    ROUTER_MAX_INPUT_CHARS = 4000  # Caracteres analizados por el router de intenciones
+    
+    # Streaming de respuestas (el límite de longitud se aplica durante el stream)
+    STREAM_RESPONSES = os.getenv("STREAM_RESPONSES", "true").lower() == "true"
+    STREAM_MAX_TOKENS = int(os.getenv("STREAM_MAX_TOKENS", "256"))
+    
+    # Enrutado de modelos: cada llamada usa el nivel más barato que basta
+    MODEL_ROUTING_ENABLED = os.getenv("MODEL_ROUTING_ENABLED", "true").lower() == "true"
+    # Niveles de menor a mayor coste; un fallo escala al siguiente. Por defecto el nivel
+    # rápido usa el mismo modelo: un modelo más barato (p. ej. MODEL_FAST=gpt-4.1-nano) es opcional
+    MODEL_TIERS = {
+        "fast": os.getenv("MODEL_FAST", OPENAI_MODEL),
+        "standard": os.getenv("MODEL_STANDARD", OPENAI_MODEL)
+    }
+    MODEL_ROUTES = {  # Motivo de la llamada -> (nivel, max_tokens)
+        "chat": ("standard", STREAM_MAX_TOKENS),
+        "chat.simple": ("fast", 160),
+        "subject": ("fast", 50),
+        "adapt": ("fast", 200),
+        "summary": ("fast", 250)
+    }
+    MODEL_SIMPLE_MAX_CHARS = 160  # Mensajes más largos van al nivel estándar
+    MODEL_SHORT_MESSAGE_CHARS = 40  # Saludos y mensajes breves: nivel rápido sin mirar la recuperación
+    MODEL_SIMPLE_MIN_RETRIEVAL_SCORE = float(os.getenv("MODEL_SIMPLE_MIN_RETRIEVAL_SCORE", "4.0"))
+    
+    # Asuntos de email: generación local y refinamiento opcional con IA en segundo plano
+    SUBJECT_LLM_REFINEMENT = os.getenv("SUBJECT_LLM_REFINEMENT", "false").lower() == "true"
+    SUBJECT_REFINEMENT_WAIT_SECONDS = 0.5
+    
+    # Herramientas: rondas máximas por petición y tiempos límite
+    TOOL_MAX_ROUNDS = int(os.getenv("TOOL_MAX_ROUNDS", "3"))
+    TOOL_DEADLINE_SECONDS = float(os.getenv("TOOL_DEADLINE_SECONDS", "30"))
+    TOOL_TIMEOUT_SECONDS = float(os.getenv("TOOL_TIMEOUT_SECONDS", "10"))
+    TOOL_MAX_WORKERS = 8
+    
+    # Ventana del historial: turnos recientes literales y resumen de los anteriores
+    HISTORY_TOKEN_BUDGET = int(os.getenv("HISTORY_TOKEN_BUDGET", "1500"))
+    HISTORY_KEEP_TURNS = int(os.getenv("HISTORY_KEEP_TURNS", "4"))
+    HISTORY_SUMMARY_BATCH_TURNS = 4  # Turnos que se acumulan antes de volver a resumir
+    HISTORY_SUMMARY_MAX_CHARS = 800
+    # Por defecto el resumen es local (sin coste); el resumen con LLM es opcional
+    HISTORY_SUMMARY_USE_LLM = os.getenv("HISTORY_SUMMARY_USE_LLM", "false").lower() == "true"
+    
+    # Recuperación local: solo se envían las secciones del perfil relevantes
+    RETRIEVAL_ENABLED = os.getenv("RETRIEVAL_ENABLED", "true").lower() == "true"
+    RETRIEVAL_TOP_K = int(os.getenv("RETRIEVAL_TOP_K", "4"))
+    RETRIEVAL_CHUNK_CHARS = 600
+    RETRIEVAL_CORE_SECTIONS = ["cv.nombre", "cv.contacto", "cv.resumen", "contexto.perfil_profesional"]
+    
+    # Respuestas directas desde faq.json sin llamar al LLM
+    FAQ_FAST_PATH_ENABLED = os.getenv("FAQ_FAST_PATH_ENABLED", "true").lower() == "true"
+    FAQ_MATCH_THRESHOLD = float(os.getenv("FAQ_MATCH_THRESHOLD", "0.7"))
+    FAQ_MIN_SHARED_TERMS = 2  # Términos de la pregunta que el mensaje debe contener (o todos si tiene menos)
+    
+    # Caché de respuestas para preguntas repetidas
+    RESPONSE_CACHE_ENABLED = os.getenv("RESPONSE_CACHE_ENABLED", "true").lower() == "true"
+    RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "2000"))
+    RESPONSE_CACHE_MAX_BYTES = int(os.getenv("RESPONSE_CACHE_MAX_BYTES", str(16 * 1024 * 1024)))
+    RESPONSE_CACHE_TTL_SECONDS = int(os.getenv("RESPONSE_CACHE_TTL_SECONDS", "86400"))
+    RESPONSE_CACHE_FUZZY_THRESHOLD = float(os.getenv("RESPONSE_CACHE_FUZZY_THRESHOLD", "0.85"))
+    RESPONSE_CACHE_VECTOR_BUCKETS = 2 ** 18
+    RESPONSE_CACHE_FUZZY_CANDIDATES = 64  # Entradas comparadas como máximo en el nivel aproximado
+    
+    # Estado por sesión ("memory" o "sqlite")
+    SESSION_BACKEND = os.getenv("SESSION_BACKEND", "memory")
+    SESSION_DB_FILE = os.getenv("SESSION_DB_FILE", "data/sessions.db")
+    SESSION_TTL_SECONDS = int(os.getenv("SESSION_TTL_SECONDS", "3600"))
+    SESSION_MAX_ENTRIES = int(os.getenv("SESSION_MAX_ENTRIES", "10000"))
+    
     @classmethod
     def validate_smtp_config(cls):
         """Valida que la configuración SMTP esté completa"""
@@ -1,4 +1,6 @@
 from .assistant import PersonalAssistant
 from .data_loader import DataLoader
+from .profile_registry import ProfileRegistry, UnknownProfileError
+from .startup import Startup
 
-__all__ = ['PersonalAssistant', 'DataLoader'] 
\ No newline at end of file
+__all__ = ['PersonalAssistant', 'DataLoader', 'ProfileRegistry', 'UnknownProfileError', 'Startup'] 
\ No newline at end of file
@@ -0,0 +1,207 @@
+"""
+Control de admisión delante del LLM: concurrencia global, cola acotada y límite por sesión
+"""
+import asyncio
+import threading
+import time
+from collections import deque
+from src.config import Config
+from src.observability import get_logger, ADMISSION_IN_FLIGHT, ADMISSION_QUEUE_DEPTH, ADMISSION_SHED, ADMISSION_WAIT_SECONDS
+
+logger = get_logger(__name__)
+
+SHED_RATE_LIMITED = "rate_limited"
+SHED_QUEUE_FULL = "queue_full"
+SHED_TIMEOUT = "timeout"
+
+
+def take_session_token(state, rate_per_minute=None, burst=None, now=None):
+    """
+    Consume un token del cubo de la sesión (token bucket guardado en SessionState)
+
+    Al vivir en el estado de la sesión, el límite se comparte entre workers
+    cuando las sesiones están en SQLite.
+
+    Args:
+        state (SessionState): Estado de la sesión
+        rate_per_minute (float): Tokens que se recuperan por minuto
+        burst (int): Capacidad del cubo (ráfaga máxima)
+        now (float): Instante actual (time.time())
+
+    Returns:
+        bool: True si la sesión tiene cupo para una llamada al LLM
+    """
+    rate = (rate_per_minute or Config.SESSION_RATE_PER_MINUTE) / 60.0
+    capacity = burst or Config.SESSION_RATE_BURST
+    now = now or time.time()
+    tokens = capacity if state.rate_tokens is None else state.rate_tokens
+    tokens = min(capacity, tokens + (now - state.rate_updated_at) * rate)
+    state.rate_updated_at = now
+    if tokens < 1:
+        state.rate_tokens = tokens
+        return False
+    state.rate_tokens = tokens - 1
+    return True
+
+
+class _Waiter:
+    """Petición en cola: un Event (hilo) o un Future (event loop)"""
+
+    __slots__ = ("event", "future", "loop", "granted")
+
+    def __init__(self, event=None, future=None, loop=None):
+        self.event = event
+        self.future = future
+        self.loop = loop
+        self.granted = False
+
+    def wake(self):
+        if self.event is not None:
+            self.event.set()
+        else:
+            self.loop.call_soon_threadsafe(self._resolve)
+
+    def _resolve(self):
+        if not self.future.done():
+            self.future.set_result(True)
+
+
+class AdmissionController:
+    """
+    Semáforo FIFO de turnos con LLM compartido por el camino síncrono y el asíncrono
+
+    Como máximo max_concurrent turnos llaman al LLM a la vez (cada turno hace
+    sus llamadas en secuencia). El resto espera en una cola de tamaño
+    max_queue durante queue_timeout segundos como mucho; si la cola está
+    llena o vence el plazo, el turno se descarta y el asistente responde en
+    modo degradado en lugar de esperar. Los límites son por proceso.
+    """
+
+    def __init__(self, max_concurrent=None, max_queue=None, queue_timeout=None):
+        self.max_concurrent = max_concurrent or Config.ADMISSION_MAX_CONCURRENT_LLM
+        self.max_queue = Config.ADMISSION_MAX_QUEUE if max_queue is None else max_queue
+        self.queue_timeout = queue_timeout or Config.ADMISSION_QUEUE_TIMEOUT_SECONDS
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._waiters = deque()
+        self.admitted = 0
+        self.shed = {SHED_RATE_LIMITED: 0, SHED_QUEUE_FULL: 0, SHED_TIMEOUT: 0}
+
+    def acquire(self, timeout=None):
+        """
+        Espera un hueco bloqueando el hilo actual
+
+        Args:
+            timeout (float): Espera máxima en cola (por defecto queue_timeout)
+
+        Returns:
+            bool: True si se obtuvo el hueco (hay que llamar a release())
+        """
+        started = time.perf_counter()
+        waiter = self._enter(lambda: _Waiter(event=threading.Event()))
+        if waiter is None or waiter is True:
+            return self._admitted(waiter, started)
+        waiter.event.wait(self.queue_timeout if timeout is None else timeout)
+        return self._admitted(self._leave(waiter), started)
+
+    async def aacquire(self, timeout=None):
+        """
+        Variante asíncrona de acquire() que no bloquea el event loop
+
+        Returns:
+            bool: True si se obtuvo el hueco (hay que llamar a release())
+        """
+        started = time.perf_counter()
+        loop = asyncio.get_running_loop()
+        waiter = self._enter(lambda: _Waiter(future=loop.create_future(), loop=loop))
+        if waiter is None or waiter is True:
+            return self._admitted(waiter, started)
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter.future), self.queue_timeout if timeout is None else timeout)
+        except asyncio.TimeoutError:
+            pass
+        except asyncio.CancelledError:
+            # Cliente desconectado: devolver el hueco si ya se nos había concedido
+            if self._leave(waiter):
+                self.release()
+            raise
+        return self._admitted(self._leave(waiter), started)
+
+    def release(self):
+        """Libera el hueco, cediéndolo directamente al primero de la cola"""
+        with self._lock:
+            if self._waiters:
+                waiter = self._waiters.popleft()
+                waiter.granted = True
+                waiter.wake()
+            else:
+                self._in_flight -= 1
+            self._publish()
+
+    def record_rate_limited(self):
+        """Contabiliza un turno rechazado por el límite de la sesión"""
+        self._record_shed(SHED_RATE_LIMITED)
+
+    def stats(self):
+        """
+        Estado del control de admisión
+
+        Returns:
+            dict: Turnos en curso, en cola, admitidos y descartados por motivo
+        """
+        with self._lock:
+            return {
+                "in_flight": self._in_flight,
+                "queued": len(self._waiters),
+                "admitted": self.admitted,
+                "shed": dict(self.shed)
+            }
+
+    def _enter(self, make_waiter):
+        """
+        Entra directamente si hay hueco y nadie esperando; si no, se pone en cola
+
+        Returns:
+            True si entró, None si la cola está llena, o el _Waiter encolado
+        """
+        with self._lock:
+            if self._in_flight < self.max_concurrent and not self._waiters:
+                self._in_flight += 1
+                self._publish()
+                return True
+            if len(self._waiters) >= self.max_queue:
+                return None
+            waiter = make_waiter()
+            self._waiters.append(waiter)
+            self._publish()
+            return waiter
+
+    def _leave(self, waiter):
+        """Sale de la cola tras despertar o vencer el plazo; True si se le concedió el hueco"""
+        with self._lock:
+            if waiter.granted:
+                return True
+            self._waiters.remove(waiter)
+            self._publish()
+            return False
+
+    def _admitted(self, result, started):
+        """Contabiliza el resultado de una admisión"""
+        if result is True:
+            ADMISSION_WAIT_SECONDS.observe(time.perf_counter() - started)
+            with self._lock:
+                self.admitted += 1
+            return True
+        self._record_shed(SHED_QUEUE_FULL if result is None else SHED_TIMEOUT)
+        return False
+
+    def _record_shed(self, reason):
+        with self._lock:
+            self.shed[reason] += 1
+        ADMISSION_SHED.inc(reason=reason)
+        logger.warning(f"Turno descartado por saturación ({reason}), respuesta degradada")
+
+    def _publish(self):
+        """Exporta cola y turnos en curso (con el lock tomado)"""
+        ADMISSION_IN_FLIGHT.set(self._in_flight)
+        ADMISSION_QUEUE_DEPTH.set(len(self._waiters))
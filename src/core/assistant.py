@@ -1,42 +1,165 @@
 """
 Clase principal del asistente personal
 """
+import asyncio
 import json
 import re
-from openai import OpenAI
+import threading
+import time
+import uuid
 from src.config import Config
-from src.core.data_loader import DataLoader
-from src.tools import send_email_to_me, record_user_details, record_unknown_question, get_all_tools
+from src.core.admission import AdmissionController, take_session_token
+from src.core.history import HistoryManager, local_summary, message_text
+from src.core.intent_router import IntentRouter, INTENT_EMAIL_MESSAGE, INTENT_EMAIL_ONLY
+from src.core.llm_client import create_llm_client
+from src.core.model_router import ModelRouter
+from src.core.offline_answerer import OfflineAnswerer
+from src.core.profile_registry import ProfileRegistry
+from src.core.response_cache import ResponseCache
+from src.core.session_store import create_session_store, DEFAULT_SESSION_ID
+from src.core.single_flight import SingleFlight
+from src.core.startup import Startup
+from src.core.subject_generator import SubjectGenerator
+from src.core.streaming import StreamRound, tool_calls_message
+from src.tools import send_email_to_me, get_all_tools, get_email_queue, ToolDispatcher
+from src.observability import (
+    get_logger, span, begin_turn, end_turn, mark_path, record_llm_call, CACHE_LOOKUPS
+)
+
+logger = get_logger(__name__)
+
+EMAIL_SUGGESTION = "\n\n💬 También puedes escribirme por email si prefieres."
+
+# Respuestas degradadas cuando no se admite la llamada al LLM
+BUSY_REPLY = "Ahora mismo estoy atendiendo muchas conversaciones. ¿Puedes repetirme la pregunta en unos segundos?"
+RATE_LIMITED_REPLY = "Vas muy rápido 😅 Dame unos segundos y vuelve a preguntarme."
+OFFLINE_REPLY = "Ahora mismo no puedo responder con detalle. Vuelve a intentarlo en unos minutos o escríbeme por email."
+
+# Final de frase: signo de cierre seguido de espacio/fin, o salto de línea
+SENTENCE_END_PATTERN = re.compile(r"[.!?…](?=\s|$)|\n")
 
 class PersonalAssistant:
     """Asistente personal conversacional con capacidades de email y registro de leads"""
     
-    def __init__(self):
-        self.openai = OpenAI()
-        self.name = "Diego Arnanz Lozano"
-        self.pending_email = None
-        self.last_email_suggestion = False
-        self.interaction_count = 0
-        self.waiting_for_message = None  # Para recordar email cuando esperamos mensaje
+    def __init__(self, llm=None):
+        """
+        Args:
+            llm (LLMClient): Cliente LLM (por defecto el de Config.LLM_BACKEND)
+        """
+        self.llm = llm or create_llm_client()
+        self.model_router = ModelRouter()
+        
+        # Estado de conversación por sesión (email pendiente, sugerencias...)
+        self.sessions = create_session_store()
         
-        # Cargar datos del perfil
-        self.data_loader = DataLoader()
+        # Perfiles servidos por este proceso; el de por defecto se carga al arrancar
+        self.profiles = ProfileRegistry()
+        self.response_cache = ResponseCache()
+        self.admission = AdmissionController() if Config.ADMISSION_ENABLED else None
+        self.offline_answerer = OfflineAnswerer()
+        self.single_flight = SingleFlight()
+        self.history_manager = HistoryManager(
+            summarize=self._summarize_history if Config.HISTORY_SUMMARY_USE_LLM else local_summary
+        )
+        
+        # Recarga en caliente: nuevos snapshots de datos y artefactos sin reiniciar
+        if Config.PROFILE_WATCH_ENABLED:
+            self.profiles.start_watching()
         
         # Obtener herramientas disponibles
+        self.subject_generator = SubjectGenerator()
+        self.intent_router = IntentRouter()
         self.tools = get_all_tools()
+        self.tool_dispatcher = ToolDispatcher.from_definitions(self.tools)
+        self.tool_dispatcher.register("send_email_to_me", self._prepare_email, with_state=True)
         
-        print(f"[INFO] Asistente {self.name} inicializado correctamente")
+        # Perfil por defecto, artefactos y cliente LLM: en segundo plano si STARTUP_BACKGROUND.
+        # Los turnos que llegan antes esperan a la carga en curso del perfil, no la repiten.
+        self.startup = Startup()
+        self.startup.expect("profile", "artifacts")
+        if Config.STARTUP_BACKGROUND:
+            threading.Thread(target=self._warm_up, name="startup", daemon=True).start()
+            logger.info("Asistente inicializado; cargando el perfil en segundo plano")
+        else:
+            self._warm_up()
+            logger.info(f"Asistente {self.name} inicializado correctamente")
+
+    def _warm_up(self):
+        """
+        Etapas del arranque: datos del perfil por defecto, prompt e índice y FAQ
+
+        Después, sin retrasar la readiness, importa openai y crea el cliente LLM.
+        """
+        profile = None
+        with self.startup.stage("profile"):
+            profile = self.profiles.get()
+        if profile is None:
+            return  # /readyz ya informa del fallo
+        with self.startup.stage("artifacts"):
+            profile.prompt_builder.artifacts()
+            profile.faq_matcher()
+        with self.startup.stage("llm_client", required=False):
+            self.llm.prepare()
+
+    async def awarm_up(self):
+        """
+        Abre la conexión con el LLM desde el bucle que atenderá las peticiones
+
+        Se llama al arrancar el servidor ASGI, en segundo plano: un fallo solo
+        se registra y la primera llamada real abrirá la conexión.
+        """
+        if not Config.LLM_WARM_UP_ENABLED:
+            return
+        with self.startup.stage("llm_pool", required=False):
+            await self.llm.awarm_up()
+
+    def ready(self):
+        """Si el arranque ha terminado y el asistente puede atender tráfico"""
+        return self.startup.ready()
+
+    @property
+    def name(self):
+        """Nombre de la persona del perfil por defecto"""
+        return self.profiles.get().name
 
-    def infer_subject_from_context(self, message, history):
+    def infer_subject_from_context(self, message, history, name=None, state=None):
         """
-        Infiere el asunto del email usando IA basándose en el contexto de la conversación
+        Infiere el asunto del email en local, sin esperar al LLM
+        
+        Si SUBJECT_LLM_REFINEMENT está activo y se pasa el estado de la sesión,
+        lanza además un refinamiento con IA en segundo plano que sustituye el
+        asunto antes del envío. El refinamiento depende del historial y del
+        perfil, así que se identifica con un id propio guardado en la sesión y
+        no con el texto del mensaje, que puede repetirse en otras sesiones.
+        
+        Args:
+            message (str): Mensaje actual (cuerpo del email)
+            history (list): Historial de conversación
+            name (str): Destinatario del email (por defecto, la persona del perfil por defecto)
+            state (SessionState): Sesión del email pendiente
+            
+        Returns:
+            str: Asunto generado
+        """
+        subject = self.subject_generator.generate(message, history)
+        if Config.SUBJECT_LLM_REFINEMENT and state is not None:
+            history = list(history or [])
+            name = name or self.name
+            state.subject_refinement_id = uuid.uuid4().hex
+            self.subject_generator.refine(state.subject_refinement_id, lambda: self._llm_subject(message, history, name))
+        return subject
+
+    def _llm_subject(self, message, history, name):
+        """
+        Genera el asunto del email con IA basándose en el contexto de la conversación
         
         Args:
             message (str): Mensaje actual
             history (list): Historial de conversación
+            name (str): Destinatario del email
             
         Returns:
-            str: Asunto generado por IA
+            str | None: Asunto generado por IA, o None si no se pudo generar
         """
         try:
             # Construir contexto completo
@@ -55,7 +178,7 @@ class PersonalAssistant:
             subject_prompt = f"""
 Eres un asistente que genera asuntos de email profesionales y concisos.
 
-Basándote en el siguiente mensaje que alguien quiere enviar a Diego Arnanz Lozano (desarrollador/consultor), genera un asunto de email profesional de máximo 8 palabras.
+Basándote en el siguiente mensaje que alguien quiere enviar a {name}, genera un asunto de email profesional de máximo 8 palabras.
 
 Mensaje:
 {full_context}
@@ -64,10 +187,9 @@ Genera SOLO el asunto del email, sin comillas ni explicaciones adicionales. Debe
 """
             
             # Llamar a la IA para generar el asunto
-            response = self.openai.chat.completions.create(
-                model=Config.OPENAI_MODEL,
+            response = self._complete(
+                "subject",
                 messages=[{"role": "user", "content": subject_prompt}],
-                max_tokens=50,
                 temperature=0.3
             )
             
@@ -78,60 +200,16 @@ Genera SOLO el asunto del email, sin comillas ni explicaciones adicionales. Debe
             
             # Validar que no esté vacío y no sea muy largo
             if generated_subject and len(generated_subject) <= 100:
-                print(f"[INFO] Asunto generado por IA: {generated_subject}")
+                logger.info(f"Asunto generado por IA: {generated_subject}")
                 return generated_subject
             else:
-                print(f"[WARNING] Asunto generado inválido, usando fallback")
-                return "Nuevo mensaje desde el asistente web"
+                logger.warning(f"Asunto generado inválido, se mantiene el asunto local")
+                return None
                 
         except Exception as e:
-            print(f"[ERROR] Error generando asunto con IA: {e}")
-            # Fallback a sistema de palabras clave
-            return self._fallback_subject_inference(message, history)
+            logger.error(f"Error generando asunto con IA: {e}")
+            return None
     
-    def _fallback_subject_inference(self, message, history):
-        """
-        Sistema de fallback para generar asuntos basado en palabras clave
-        
-        Args:
-            message (str): Mensaje actual
-            history (list): Historial de conversación
-            
-        Returns:
-            str: Asunto basado en palabras clave
-        """
-        keywords_map = {
-            "trabajo": "Consulta sobre oportunidades laborales",
-            "oferta laboral": "Consulta sobre oportunidades laborales",
-            "oferta": "Consulta sobre oportunidades laborales",
-            "empleo": "Consulta sobre oportunidades laborales",
-            "proyecto": "Propuesta de proyecto",
-            "colaboración": "Propuesta de colaboración",
-            "consultoría": "Consulta sobre servicios",
-            "freelance": "Consulta sobre trabajo freelance",
-            "contrato": "Consulta sobre contratación",
-            "contratar": "Consulta sobre contratación",
-            "contratarte": "Consulta sobre contratación",
-            "propuesta": "Nueva propuesta comercial",
-            "presupuesto": "Solicitud de presupuesto",
-            "servicio": "Consulta sobre servicios"
-        }
-        
-        # Revisar el mensaje actual y el historial reciente
-        full_context = message.lower()
-        if history:
-            recent_messages = history[-3:] if len(history) > 3 else history
-            for msg in recent_messages:
-                if isinstance(msg, dict) and msg.get("content"):
-                    full_context += " " + msg["content"].lower()
-        
-        # Buscar coincidencias
-        for keyword, subject in keywords_map.items():
-            if keyword in full_context:
-                return subject
-        
-        return "Nuevo mensaje desde el asistente web"
-
     def _adapt_long_response(self, original_response, max_length):
         """
         Adapta una respuesta larga usando IA para que quepa en el límite de caracteres
@@ -163,30 +241,29 @@ INSTRUCCIONES ESPECÍFICAS:
 Genera una versión que mantenga el poder persuasivo y la coherencia del mensaje original:
 """
             
-            print(f"[DEBUG] Enviando a IA para resumen: {len(original_response)} → {max_length} caracteres")
+            logger.debug(f"Enviando a IA para resumen: {len(original_response)} → {max_length} caracteres")
             
-            response = self.openai.chat.completions.create(
-                model=Config.OPENAI_MODEL,
+            response = self._complete(
+                "adapt",
                 messages=[{"role": "user", "content": adaptation_prompt}],
-                max_tokens=200,  # Aumentado para dar más espacio
                 temperature=0.1  # Más determinístico
             )
             
             adapted = response.choices[0].message.content.strip()
-            print(f"[DEBUG] IA devolvió: {len(adapted)} caracteres")
+            logger.debug(f"IA devolvió: {len(adapted)} caracteres")
             
             # Verificar que realmente quepa
             if len(adapted) <= max_length:
-                print(f"[INFO] ✅ Respuesta adaptada por IA: {len(adapted)}/{max_length} caracteres")
+                logger.info(f"✅ Respuesta adaptada por IA: {len(adapted)}/{max_length} caracteres")
                 return adapted
             else:
                 # Si aún es muy larga, cortar de forma inteligente
-                print(f"[WARNING] ⚠️ Respuesta de IA aún muy larga ({len(adapted)}), aplicando corte inteligente")
+                logger.warning(f"⚠️ Respuesta de IA aún muy larga ({len(adapted)}), aplicando corte inteligente")
                 return self._smart_truncate(adapted, max_length)
                 
         except Exception as e:
-            print(f"[ERROR] ❌ Error adaptando respuesta con IA: {e}")
-            print(f"[DEBUG] Aplicando fallback: corte inteligente")
+            logger.error(f"❌ Error adaptando respuesta con IA: {e}")
+            logger.debug(f"Aplicando fallback: corte inteligente")
             # Fallback a corte inteligente
             return self._smart_truncate(original_response, max_length)
     
@@ -214,120 +291,488 @@ Genera una versión que mantenga el poder persuasivo y la coherencia del mensaje
             # Si no hay espacios cerca, cortar y agregar puntos suspensivos
             return truncated[:max_length-3] + "..."
 
-    def handle_tool_call(self, tool_calls):
+    def handle_tool_call(self, tool_calls, state, deadline=None):
         """
         Maneja las llamadas a herramientas
         
         Args:
             tool_calls: Lista de llamadas a herramientas de OpenAI
+            state (SessionState): Estado de la sesión actual
+            deadline (float): Instante (time.monotonic) límite de la petición
             
         Returns:
             list: Resultados de las herramientas
         """
-        results = []
-        for tool_call in tool_calls:
-            tool_name = tool_call.function.name
-            arguments = json.loads(tool_call.function.arguments)
-            print(f"[TOOL] Ejecutando herramienta: {tool_name}")
+        with span("tools"):
+            results = self.tool_dispatcher.dispatch(tool_calls, state, deadline)
+        return results + self._email_confirmation(tool_calls, state)
 
-            if tool_name == "send_email_to_me":
-                # Si no hay asunto, inferirlo del contexto
-                if "subject" not in arguments or not arguments["subject"]:
-                    arguments["subject"] = self.infer_subject_from_context(arguments.get("body", ""), [])
-                
-                self.pending_email = arguments
-                confirmation_message = (
-                    f"📧 Mensaje listo:\n"
-                    f"De: {arguments['sender_email']}\n"
-                    f"Asunto: {arguments['subject']}\n"
-                    f"¿Enviar? (responde 'sí')"
-                )
-                results.append({
-                    "role": "tool",
-                    "content": json.dumps({"status": "esperando_confirmacion"}),
-                    "tool_call_id": tool_call.id
-                })
-                results.append({
-                    "role": "assistant",
-                    "content": confirmation_message[:Config.MAX_RESPONSE_LENGTH]
-                })
-                return results
-
-            # Mapear nombres de herramientas a funciones
-            tool_functions = {
-                "record_user_details": record_user_details,
-                "record_unknown_question": record_unknown_question,
-                "send_email_to_me": send_email_to_me
-            }
+    async def ahandle_tool_call(self, tool_calls, state, deadline=None):
+        """
+        Maneja las llamadas a herramientas sin bloquear el event loop
+        
+        Args:
+            tool_calls: Lista de llamadas a herramientas de OpenAI
+            state (SessionState): Estado de la sesión actual
+            deadline (float): Instante (time.monotonic) límite de la petición
             
-            tool_function = tool_functions.get(tool_name)
-            result = tool_function(**arguments) if tool_function else {}
-            results.append({
-                "role": "tool",
-                "content": json.dumps(result),
-                "tool_call_id": tool_call.id
-            })
-        return results
+        Returns:
+            list: Resultados de las herramientas, en el orden de las llamadas
+        """
+        with span("tools"):
+            results = await self.tool_dispatcher.adispatch(tool_calls, state, deadline)
+        return results + self._email_confirmation(tool_calls, state)
 
-    def system_prompt(self):
+    def _prepare_email(self, state, sender_email, body, subject=None):
         """
-        Genera el prompt del sistema para el asistente
+        Implementación de send_email_to_me: prepara el email y pide confirmación
         
         Returns:
-            str: Prompt del sistema
-        """
-        return (
-            f"Eres {self.name}, desarrollador fullstack especializado en Angular, Spring Boot y asistentes de IA. "
-            f"Estás respondiendo en tu página web personal como asistente profesional. "
-            f"Tu función es contestar preguntas sobre tu carrera, formación, habilidades, proyectos y experiencia. "
-            f"Debes sonar profesional, auténtico y técnicamente competente, como si hablaras con un posible cliente o empleador. "
-            f"IMPORTANTE: Cuando respondas preguntas sobre contratación o valor profesional, estructura tu respuesta de forma persuasiva: "
-            f"1) Destaca beneficios concretos y diferenciadores, 2) Menciona experiencia relevante con ejemplos, "
-            f"3) Conecta habilidades con valor para el empleador, 4) Termina con una propuesta de acción. "
-            f"Si no sabes responder, usa la herramienta 'record_unknown_question'. "
-            f"Si el usuario parece interesado, pide su email y usa 'record_user_details'. "
-            f"Cuando el usuario quiera enviarte un email, usa 'send_email_to_me' con un asunto apropiado basado en el contexto. "
-            f"Responde siempre con menos de {Config.MAX_RESPONSE_LENGTH} caracteres.\n\n"
-            f"## CV Completo:\n{self.data_loader.get_cv_content()}\n\n"
-            f"## Contexto Profesional:\n{self.data_loader.get_contexto_content()}\n\n"
-            f"## Preguntas Frecuentes:\n{self.data_loader.get_faq_content()}\n\n"
-            f"## Perfil de LinkedIn:\n{self.data_loader.get_linkedin_content()}\n\n"
-            f"Con este contexto completo, chatea representando a {self.name} de forma fiel y profesional."
+            dict: Resultado para el modelo
+        """
+        # Si no hay asunto, inferirlo del contexto
+        if not subject:
+            subject = self.infer_subject_from_context(body, [], self._profile(state).name, state)
+        state.pending_email = {"sender_email": sender_email, "subject": subject, "body": body}
+        return {"status": "esperando_confirmacion"}
+
+    def _email_confirmation(self, tool_calls, state):
+        """Mensaje de confirmación si el lote preparó un email (tras todos los resultados)"""
+        if not state.pending_email or not any(tc.function.name == "send_email_to_me" for tc in tool_calls):
+            return []
+        email = state.pending_email
+        confirmation_message = (
+            f"📧 Mensaje listo:\n"
+            f"De: {email['sender_email']}\n"
+            f"Asunto: {email['subject']}\n"
+            f"¿Enviar? (responde 'sí')"
         )
+        return [{"role": "assistant", "content": confirmation_message[:Config.MAX_RESPONSE_LENGTH]}]
 
-    def chat(self, message, history):
+    def _tool_options(self, rounds, deadline):
+        """
+        Parámetros de herramientas para la siguiente llamada al LLM
+        
+        Agotadas las rondas o el tiempo, se pide al modelo una respuesta final
+        sin más herramientas.
+        """
+        if rounds >= Config.TOOL_MAX_ROUNDS or time.monotonic() >= deadline:
+            logger.warning(f"Límite de herramientas alcanzado ({rounds} rondas), forzando respuesta final")
+            return {"tools": self.tools, "tool_choice": "none"}
+        return {"tools": self.tools}
+
+    def system_prompt(self, profile_id=None):
+        """
+        Genera el prompt del sistema para el asistente
+        
+        Args:
+            profile_id (str): Perfil (por defecto, Config.DEFAULT_PROFILE_ID)
+        
+        Returns:
+            str: Prompt del sistema (prefijo estable compilado por versión de datos)
+        """
+        return self.profiles.get(profile_id).prompt_builder.get_system_prompt()
+
+    def chat(self, message, history, session_id=None, profile_id=None):
         """
         Procesa un mensaje del usuario y genera una respuesta
         
         Args:
             message (str): Mensaje del usuario
             history (list): Historial de conversación
+            session_id (str): Identificador de la sesión del visitante
+            profile_id (str): Perfil que responde (por defecto, Config.DEFAULT_PROFILE_ID)
+            
+        Returns:
+            str: Respuesta del asistente
+            
+        Raises:
+            UnknownProfileError: Si no existe el perfil
+        """
+        reply = ""
+        for reply in self.chat_stream(message, history, session_id, profile_id):
+            pass
+        return reply
+
+    def chat_stream(self, message, history, session_id=None, profile_id=None):
+        """
+        Variante de chat() que devuelve la respuesta mientras se genera
+        
+        Args:
+            message (str): Mensaje del usuario
+            history (list): Historial de conversación
+            session_id (str): Identificador de la sesión del visitante
+            profile_id (str): Perfil que responde (por defecto, Config.DEFAULT_PROFILE_ID)
+            
+        Yields:
+            str: Respuesta acumulada del asistente (parcial mientras llega el streaming)
             
+        Raises:
+            UnknownProfileError: Si no existe el perfil
+        """
+        profile = self.profiles.get(profile_id)
+        session_id = self._session_key(session_id, profile)
+        state = self.sessions.get(session_id)
+        state.profile_id = profile.profile_id
+        trace = begin_turn()
+        try:
+            notice = self._delivery_notice(state)
+            for partial in self._chat(message, history, state):
+                yield notice + partial
+        finally:
+            self.sessions.save(session_id, state)
+            self._end_turn(trace)
+
+    async def achat(self, message, history, session_id=None, profile_id=None):
+        """
+        Variante asíncrona de chat()
+        
         Returns:
             str: Respuesta del asistente
         """
+        reply = ""
+        async for reply in self.achat_stream(message, history, session_id, profile_id):
+            pass
+        return reply
 
+    async def achat_stream(self, message, history, session_id=None, profile_id=None):
+        """
+        Variante asíncrona de chat_stream() sobre el cliente LLM asíncrono
+        
+        El trabajo bloqueante (flujos de email, FAQ, caché, respuestas sin LLM,
+        herramientas, carga de un perfil frío) se ejecuta fuera del event loop,
+        de modo que un solo proceso atiende muchas conversaciones.
         
+        Args:
+            message (str): Mensaje del usuario
+            history (list): Historial de conversación
+            session_id (str): Identificador de la sesión del visitante
+            profile_id (str): Perfil que responde (por defecto, Config.DEFAULT_PROFILE_ID)
+            
+        Yields:
+            str: Respuesta acumulada del asistente
+            
+        Raises:
+            UnknownProfileError: Si no existe el perfil
+        """
+        profile = self.profiles.get(profile_id, load=False) or await asyncio.to_thread(self.profiles.get, profile_id)
+        session_id = self._session_key(session_id, profile)
+        state = self.sessions.get(session_id)
+        state.profile_id = profile.profile_id
+        trace = begin_turn()
+        try:
+            notice = self._delivery_notice(state)
+            routed = self._classify(message)
+            # La FAQ y la caché pueden construir los artefactos del perfil: fuera del event loop
+            reply = await asyncio.to_thread(self._local_reply, message, history, state, routed)
+            if reply is not None:
+                yield notice + reply
+                return
+            
+            if not self.llm.available():
+                yield notice + await asyncio.to_thread(self._degraded_reply, message, state, OFFLINE_REPLY, "offline")
+                return
+            flight, leader = self._join_flight(message, history, state)
+            if flight is not None and not leader:
+                await flight.await_done(Config.COALESCE_WAIT_SECONDS)
+                reply = await asyncio.to_thread(self._coalesced_reply, message, history, state)
+                if reply is not None:
+                    yield notice + reply
+                    return
+            try:
+                async for partial in self._allm_turn(message, history, state, routed):
+                    yield notice + partial
+            finally:
+                if leader:
+                    self.single_flight.finish(flight)
+        finally:
+            self.sessions.save(session_id, state)
+            self._end_turn(trace)
+
+    def _session_key(self, session_id, profile):
+        """Clave de la sesión en el almacén: las de otros perfiles llevan el id del perfil delante"""
+        session_id = session_id or DEFAULT_SESSION_ID
+        if profile.profile_id == self.profiles.default_id:
+            return session_id
+        return f"{profile.profile_id}:{session_id}"
+
+    def _profile(self, state):
+        """Perfil de la sesión"""
+        return self.profiles.get(state.profile_id)
+
+    def _end_turn(self, trace):
+        """Registra la duración del turno y escribe su desglose por etapas"""
+        elapsed = end_turn(trace)
+        logger.info(f"Turno resuelto por {trace.path} en {elapsed * 1000:.0f} ms: {trace.breakdown()}")
+
+    def _delivery_notice(self, state):
+        """
+        Informa del resultado de entrega del último email en cola de la sesión
+        
+        Args:
+            state (SessionState): Estado de la sesión
+            
+        Returns:
+            str: Aviso a anteponer a la respuesta (vacío si no hay nada que contar)
+        """
+        if not state.outbound_email_id:
+            return ""
+        status = get_email_queue().status(state.outbound_email_id)
+        if status is None or status["status"] == "sent":
+            state.outbound_email_id = None
+            return ""
+        if status["status"] == "failed":
+            state.outbound_email_id = None
+            return f"❌ Tu último correo no pudo enviarse: {(status['error'] or '')[:100]}\n\n"
+        return ""
+
+    def _chat(self, message, history, state):
+        """
+        Lógica de conversación sobre el estado de una sesión concreta
+        
+        Args:
+            message (str): Mensaje del usuario
+            history (list): Historial de conversación
+            state (SessionState): Estado de la sesión
+            
+        Yields:
+            str: Respuesta acumulada del asistente
+        """
+        routed = self._classify(message)
+        reply = self._local_reply(message, history, state, routed)
+        if reply is not None:
+            yield reply
+            return
+        
+        if not self.llm.available():
+            yield self._degraded_reply(message, state, OFFLINE_REPLY, "offline")
+            return
+        flight, leader = self._join_flight(message, history, state)
+        if flight is not None and not leader:
+            flight.wait(Config.COALESCE_WAIT_SECONDS)
+            reply = self._coalesced_reply(message, history, state)
+            if reply is not None:
+                yield reply
+                return
+        try:
+            yield from self._llm_turn(message, history, state, routed)
+        finally:
+            if leader:
+                self.single_flight.finish(flight)
+
+    def _local_reply(self, message, history, state, routed):
+        """
+        Respuesta sin LLM: flujos del router, FAQ o caché de respuestas
+        
+        Es bloqueante (la primera vez puede construir el emparejador de la FAQ
+        o los artefactos del perfil), así que el camino asíncrono la ejecuta
+        en un hilo.
+        
+        Returns:
+            str | None: Respuesta, o None si hay que consultar al LLM
+        """
+        reply = self._route_message(message, history, state, routed)
+        if reply is not None:
+            mark_path("router")
+            return reply
+        reply = self._faq_reply(message, state)
+        if reply is None:
+            reply = self._cached_reply(message, history, state)
+        return reply
+
+    def _llm_turn(self, message, history, state, routed):
+        """
+        Turno con LLM tras el límite de la sesión y el control de admisión
+        
+        Args:
+            message (str): Mensaje del usuario
+            history (list): Historial de conversación
+            state (SessionState): Estado de la sesión
+            routed (RoutedMessage): Clasificación del mensaje hecha al enrutarlo
+        
+        Yields:
+            str: Respuesta acumulada del asistente (o la degradada si no se admite o el LLM falla)
+        """
+        if self._rate_limited(state):
+            yield self._degraded_reply(message, state, RATE_LIMITED_REPLY)
+            return
+        if self.admission is not None and not self.admission.acquire():
+            yield self._degraded_reply(message, state, BUSY_REPLY)
+            return
+        try:
+            if Config.STREAM_RESPONSES:
+                yield from self._stream_llm_reply(message, history, state, routed)
+            else:
+                yield self._llm_reply(message, history, state, routed)
+        except Exception as e:
+            logger.error(f"Fallo del LLM, respuesta sin LLM: {type(e).__name__}: {e}")
+            yield self._degraded_reply(message, state, OFFLINE_REPLY, "offline")
+        finally:
+            if self.admission is not None:
+                self.admission.release()
+
+    async def _allm_turn(self, message, history, state, routed):
+        """
+        Variante asíncrona de _llm_turn
+        
+        Yields:
+            str: Respuesta acumulada del asistente
+        """
+        if self._rate_limited(state):
+            yield await asyncio.to_thread(self._degraded_reply, message, state, RATE_LIMITED_REPLY)
+            return
+        if self.admission is not None and not await self.admission.aacquire():
+            yield await asyncio.to_thread(self._degraded_reply, message, state, BUSY_REPLY)
+            return
+        try:
+            if Config.STREAM_RESPONSES:
+                async for partial in self._astream_llm_reply(message, history, state, routed):
+                    yield partial
+            else:
+                yield await asyncio.to_thread(self._llm_reply, message, history, state, routed)
+        except Exception as e:
+            logger.error(f"Fallo del LLM, respuesta sin LLM: {type(e).__name__}: {e}")
+            yield await asyncio.to_thread(self._degraded_reply, message, state, OFFLINE_REPLY, "offline")
+        finally:
+            if self.admission is not None:
+                self.admission.release()
+
+    def _join_flight(self, message, history, state):
+        """
+        Se une a un turno idéntico en curso (misma clave que la caché de respuestas)
+        
+        Solo se coalescen los turnos que podrían servirse desde la caché: el
+        líder guarda allí su respuesta y los seguidores la leen al terminar.
+        
+        Returns:
+            tuple: (Flight o None si el turno no es compartible, True si es el líder)
+        """
+        if not Config.COALESCE_ENABLED or self._cache_bypassed(state):
+            return None, False
+        key = self.response_cache.key(message, history, self._profile(state).data_version())
+        if key is None:
+            return None, False
+        return self.single_flight.join(key)
+
+    def _coalesced_reply(self, message, history, state):
+        """
+        Respuesta que dejó el turno líder en la caché
+        
+        Returns:
+            str | None: Respuesta compartida, o None si el líder no la guardó
+                (usó herramientas, falló o no terminó a tiempo)
+        """
+        reply = self._cached_reply(message, history, state)
+        self.single_flight.record(reply is not None)
+        if reply is not None:
+            mark_path("coalesced")
+        return reply
+
+    def _rate_limited(self, state):
+        """
+        Comprueba el límite de llamadas al LLM de la sesión (token bucket)
+        
+        Args:
+            state (SessionState): Estado de la sesión
+            
+        Returns:
+            bool: True si la sesión ha agotado su cupo
+        """
+        if self.admission is None or take_session_token(state):
+            return False
+        self.admission.record_rate_limited()
+        return True
+
+    def _degraded_reply(self, message, state, fallback, path="shed"):
+        """
+        Respuesta sin LLM para un turno no admitido o con el LLM caído
+        
+        Se responde con la FAQ (umbral más permisivo que el del camino rápido)
+        o con las secciones del perfil más parecidas; si nada se parece lo
+        suficiente, con el mensaje de reserva. Nunca lanza: es la respuesta de
+        los caminos de fallo y descarte, así que cualquier error en el perfil o
+        en sus artefactos se registra y se responde con el mensaje de reserva.
+        
+        Args:
+            message (str): Mensaje del usuario
+            state (SessionState): Estado de la sesión
+            fallback (str): Mensaje si el perfil no tiene respuesta
+            path (str): Camino con el que se anota el turno ("shed" u "offline")
+            
+        Returns:
+            str: Respuesta degradada
+        """
+        mark_path(path)
+        try:
+            profile = self._profile(state)
+            index = profile.prompt_builder.artifacts().index
+            answer = self.offline_answerer.answer(message, profile.faq_matcher(), index)
+            if answer is None:
+                return fallback
+            available_space, will_add_email_suggestion = self._available_space(state)
+            return self._finalize_response(self._smart_truncate(answer, available_space), state, will_add_email_suggestion)
+        except Exception as e:
+            logger.error(f"Fallo de la respuesta sin LLM, usando el mensaje de reserva: {type(e).__name__}: {e}")
+            return fallback
+
+    def _classify(self, message):
+        """
+        Clasifica el mensaje una sola vez por turno
+        
+        La misma clasificación sirve a los flujos sin LLM y a la elección del
+        nivel de modelo.
+        
+        Returns:
+            RoutedMessage: Intención y datos extraídos
+        """
+        with span("route"):
+            return self.intent_router.classify(message)
+
+    def _route_message(self, message, history, state, routed):
+        """
+        Resuelve los flujos que no necesitan al LLM (confirmaciones y emails)
+        
+        Args:
+            message (str): Mensaje del usuario
+            history (list): Historial de conversación
+            state (SessionState): Estado de la sesión
+            routed (RoutedMessage): Clasificación del mensaje (ver _classify)
+            
+        Returns:
+            str | None: Respuesta directa, o None si hay que consultar al LLM
+        """
         # Incrementar contador de interacciones y resetear sugerencia cada N interacciones
-        self.interaction_count += 1
-        if self.interaction_count % Config.EMAIL_SUGGESTION_RESET_INTERVAL == 0:
-            self.last_email_suggestion = False
+        state.interaction_count += 1
+        if state.interaction_count % Config.EMAIL_SUGGESTION_RESET_INTERVAL == 0:
+            state.last_email_suggestion = False
         
         # Confirmación de envío pendiente
-        if self.pending_email and message.strip().lower() in ["sí", "si", "enviar", "confirmar", "ok"]:
-            result = send_email_to_me(**self.pending_email)
-            self.pending_email = None
-            self.waiting_for_message = None  # Reset estado
-            self.last_email_suggestion = False  # Reset después de enviar
+        if state.pending_email and routed.confirms_send:
+            # Asunto refinado por IA si el refinamiento en segundo plano terminó
+            state.pending_email["subject"] = self.subject_generator.resolve(
+                state.subject_refinement_id, state.pending_email["subject"]
+            )
+            state.subject_refinement_id = None
+            recipient = self._profile(state).email
+            if Config.EMAIL_QUEUE_ENABLED and Config.validate_smtp_config():
+                # Se confirma en cuanto el email queda anotado en el diario
+                state.outbound_email_id = get_email_queue().enqueue(**state.pending_email, recipient=recipient)
+                state.pending_email = None
+                state.waiting_for_message = None
+                state.last_email_suggestion = False
+                return "✅ Correo recibido, se enviará en unos segundos."
+            result = send_email_to_me(**state.pending_email, recipient=recipient)
+            state.pending_email = None
+            state.waiting_for_message = None  # Reset estado
+            state.last_email_suggestion = False  # Reset después de enviar
             if "Error" in result.get("status", ""):
                 return f"❌ {result['status'][:140]}"
             else:
                 return "✅ Correo enviado correctamente."
         
         # Detectar respuesta afirmativa a sugerencia de email
-        if (self.last_email_suggestion and 
-            message.strip().lower() in ["sí", "si", "ok", "vale", "perfecto", "claro"]):
-            self.last_email_suggestion = True  # Mantener marcado
+        if state.last_email_suggestion and routed.is_affirmative:
+            state.last_email_suggestion = True  # Mantener marcado
             return (
                 "¡Perfecto! Solo necesito tu email y tu mensaje:\n\n"
                 "📧 Formato:\n"
@@ -336,19 +781,19 @@ Genera una versión que mantenga el poder persuasivo y la coherencia del mensaje
             )
         
         # Si estamos esperando un mensaje después de recibir solo el email
-        if self.waiting_for_message:
+        if state.waiting_for_message:
             # Verificar que el mensaje no contenga otro email (para evitar confusiones)
-            if not re.search(r'\S+@\S+', message):
-                sender_email = self.waiting_for_message
+            if not routed.email:
+                sender_email = state.waiting_for_message
                 body = message.strip()
-                subject = self.infer_subject_from_context(body, history)
+                subject = self.infer_subject_from_context(body, history, self._profile(state).name, state)
                 
-                self.pending_email = {
+                state.pending_email = {
                     "sender_email": sender_email,
                     "subject": subject,
                     "body": body
                 }
-                self.waiting_for_message = None  # Reset
+                state.waiting_for_message = None  # Reset
                 
                 return (
                     f"📧 Mensaje listo:\n"
@@ -358,113 +803,35 @@ Genera una versión que mantenga el poder persuasivo y la coherencia del mensaje
                 )[:Config.MAX_RESPONSE_LENGTH]
             else:
                 # Si el usuario envía otro email, resetear y procesar normalmente
-                self.waiting_for_message = None
-
-        # Detectar patrones de email más flexibles
-        
-        # Patrón 1: "Email: ... Mensaje: ..."
-        email_pattern1 = r"(?:email|correo):\s*(\S+@\S+).*?(?:mensaje|message):\s*(.+)"
-        match1 = re.search(email_pattern1, message, re.IGNORECASE | re.DOTALL)
-        
-        # Patrón 2: Email seguido de texto en la misma línea
-        email_pattern2 = r'(\S+@\S+)\s+(.+)'
-        match2 = re.search(email_pattern2, message.strip())
-        
-        # Patrón 3: Email en una línea y mensaje en otra (líneas separadas) O email solo
-        lines = message.strip().split('\n')
-        email_match = None
-        message_text = ""
-        
-        # Buscar email en cualquier línea
-        for i, line in enumerate(lines):
-            email_search = re.search(r'(\S+@\S+)', line.strip())
-            if email_search:
-                email_match = email_search.group(1)
-                # Si hay más líneas, el resto son el mensaje
-                if len(lines) > 1:
-                    remaining_lines = lines[i+1:] if i+1 < len(lines) else []
-                    if remaining_lines:
-                        message_text = '\n'.join(remaining_lines).strip()
-                    elif i > 0:
-                        # Si el email está en la última línea, tomar las anteriores como mensaje
-                        message_text = '\n'.join(lines[:i]).strip()
-                break
-        
-        # Si no encontramos email en múltiples líneas, buscar email solo en línea única
-        if not email_match and len(lines) == 1:
-            email_search = re.search(r'^(\S+@\S+)$', message.strip())
-            if email_search:
-                email_match = email_search.group(1)
-                message_text = ""  # No hay mensaje, solo email
-        
-        # Si encontramos patrón 1 (formato estructurado)
-        if match1:
-            sender_email = match1.group(1).strip()
-            body = match1.group(2).strip()
-            subject = self.infer_subject_from_context(body, history)
-            
-            self.pending_email = {
-                "sender_email": sender_email,
-                "subject": subject,
-                "body": body
-            }
-            return (
-                f"📧 Mensaje listo:\n"
-                f"De: {sender_email}\n"
-                f"Asunto: {subject}\n"
-                f"¿Enviar? (responde 'sí')"
-            )[:Config.MAX_RESPONSE_LENGTH]
-        
-        # Si encontramos patrón 2 (email + texto en la misma línea)
-        elif match2:
-            sender_email = match2.group(1).strip()
-            body = match2.group(2).strip()
-            subject = self.infer_subject_from_context(body, history)
-            
-            self.pending_email = {
-                "sender_email": sender_email,
-                "subject": subject,
-                "body": body
-            }
-            return (
-                f"📧 Mensaje listo:\n"
-                f"De: {sender_email}\n"
-                f"Asunto: {subject}\n"
-                f"¿Enviar? (responde 'sí')"
-            )[:Config.MAX_RESPONSE_LENGTH]
-        
-        # Si encontramos patrón 3 (email + mensaje en líneas separadas)
-        elif email_match and message_text:
-            subject = self.infer_subject_from_context(message_text, history)
+                state.waiting_for_message = None
+
+        # Email y mensaje ("Email: ... Mensaje: ...", misma línea o líneas separadas)
+        if routed.intent == INTENT_EMAIL_MESSAGE:
+            subject = self.infer_subject_from_context(routed.body, history, self._profile(state).name, state)
             
-            self.pending_email = {
-                "sender_email": email_match,
+            state.pending_email = {
+                "sender_email": routed.email,
                 "subject": subject,
-                "body": message_text
+                "body": routed.body
             }
             return (
                 f"📧 Mensaje listo:\n"
-                f"De: {email_match}\n"
+                f"De: {routed.email}\n"
                 f"Asunto: {subject}\n"
                 f"¿Enviar? (responde 'sí')"
             )[:Config.MAX_RESPONSE_LENGTH]
         
         # Si solo encontramos email sin mensaje, pedir el mensaje
-        elif email_match and not message_text:
-            self.waiting_for_message = email_match
+        if routed.intent == INTENT_EMAIL_ONLY:
+            state.waiting_for_message = routed.email
             return (
-                f"Perfecto, tengo tu email: {email_match}\n\n"
+                f"Perfecto, tengo tu email: {routed.email}\n\n"
                 f"Ahora solo necesito tu mensaje. ¿Qué quieres contarme?"
             )
 
         # Detectar intención de contacto y pedir solo email y mensaje
-        contact_triggers = [
-            "quiero enviarte un mail", "escribirte", "mandarte un correo", 
-            "tengo una propuesta", "puedo escribirte", "contactarte",
-            "enviar email", "enviar correo"
-        ]
-        if any(trigger in message.lower() for trigger in contact_triggers):
-            self.last_email_suggestion = True  # Marcamos que ya sugerimos
+        if routed.contact_request:
+            state.last_email_suggestion = True  # Marcamos que ya sugerimos
             return (
                 "¡Perfecto! Solo necesito tu email y tu mensaje:\n\n"
                 "📧 Formato:\n"
@@ -472,51 +839,438 @@ Genera una versión que mantenga el poder persuasivo y la coherencia del mensaje
                 "Mensaje: Tu mensaje aquí"
             )[:Config.MAX_RESPONSE_LENGTH]
 
-        # Construcción del mensaje normal a la API
-        messages = [{"role": "system", "content": self.system_prompt()}] + history + [{"role": "user", "content": message}]
+        return None
+
+    def faq_matcher(self, profile_id=None):
+        """
+        Retorna el emparejador de FAQ de un perfil para la versión actual de sus datos
+        
+        Args:
+            profile_id (str): Perfil (por defecto, Config.DEFAULT_PROFILE_ID)
+        
+        Returns:
+            FaqMatcher: Emparejador precalculado
+        """
+        return self.profiles.get(profile_id).faq_matcher()
+
+    def _faq_reply(self, message, state):
+        """
+        Responde directamente con la FAQ si el mensaje coincide con una pregunta conocida
+        
+        Args:
+            message (str): Mensaje del usuario
+            state (SessionState): Estado de la sesión
+            
+        Returns:
+            str | None: Respuesta de la FAQ, o None si hay que consultar al LLM
+        """
+        if not Config.FAQ_FAST_PATH_ENABLED:
+            return None
+        with span("faq"):
+            answer = self._profile(state).faq_matcher().match(message)
+        CACHE_LOOKUPS.inc(cache="faq", result="miss" if answer is None else "hit")
+        if answer is None:
+            return None
+        mark_path("faq")
+        available_space, will_add_email_suggestion = self._available_space(state)
+        return self._finalize_response(self._smart_truncate(answer, available_space), state, will_add_email_suggestion)
+
+    def _cache_bypassed(self, state):
+        """La caché no se usa mientras hay un flujo de email en curso"""
+        return not Config.RESPONSE_CACHE_ENABLED or bool(state.pending_email or state.waiting_for_message)
+
+    def _cached_reply(self, message, history, state):
+        """
+        Responde con una respuesta cacheada para una pregunta equivalente
+        
+        Args:
+            message (str): Mensaje del usuario
+            history (list): Historial de conversación
+            state (SessionState): Estado de la sesión
+            
+        Returns:
+            str | None: Respuesta cacheada, o None si hay que consultar al LLM
+        """
+        if self._cache_bypassed(state):
+            return None
+        with span("cache"):
+            cached = self.response_cache.get(message, history, self._profile(state).data_version())
+        CACHE_LOOKUPS.inc(cache="response", result="miss" if cached is None else "hit")
+        if cached is None:
+            return None
+        mark_path("cache")
+        logger.debug(f"Respuesta servida desde caché")
+        available_space, will_add_email_suggestion = self._available_space(state)
+        return self._finalize_response(self._cut_at_sentence(cached, available_space), state, will_add_email_suggestion)
+
+    def _store_reply(self, message, history, response, used_tools, state):
+        """Guarda la respuesta en caché salvo que el turno haya usado herramientas o email"""
+        if used_tools or self._cache_bypassed(state):
+            return
+        self.response_cache.put(message, history, self._profile(state).data_version(), response)
+
+    def _summarize_history(self, previous_summary, messages):
+        """
+        Incorpora al resumen de la conversación los mensajes que salen de la ventana
+        
+        Args:
+            previous_summary (str): Resumen acumulado hasta ahora
+            messages (list): Mensajes que dejan de enviarse literalmente
+            
+        Returns:
+            str: Resumen actualizado
+        """
+        transcript = "\n".join(
+            f"{m.get('role', '')}: {message_text(m)}" for m in messages if isinstance(m, dict)
+        )
+        summary_prompt = f"""
+Actualiza el resumen de una conversación entre un visitante y un asistente profesional.
+
+Resumen actual:
+{previous_summary or "(vacío)"}
+
+Nuevos mensajes:
+{transcript}
+
+Devuelve solo el resumen actualizado, en viñetas breves, con un máximo de {Config.HISTORY_SUMMARY_MAX_CHARS} caracteres.
+Conserva nombres, empresas, emails y preguntas pendientes del visitante.
+"""
+        response = self._complete(
+            "summary",
+            messages=[{"role": "user", "content": summary_prompt}],
+            temperature=0
+        )
+        summary = (response.choices[0].message.content or "").strip()
+        return self._smart_truncate(summary, Config.HISTORY_SUMMARY_MAX_CHARS)
+
+    def _complete(self, purpose, choice=None, **request):
+        """
+        Llamada bloqueante al LLM, medida y con sus tokens contabilizados
+        
+        Si el nivel de modelo elegido falla o devuelve una respuesta vacía, se
+        repite la llamada en el nivel siguiente.
+        
+        Args:
+            purpose (str): Motivo de la llamada (chat, subject, adapt, summary)
+            choice (ModelChoice): Modelo elegido (por defecto, el de la tabla para el motivo)
+            **request: Parámetros de chat.completions salvo el modelo y max_tokens
+            
+        Returns:
+            ChatCompletion: Respuesta de la API
+        """
+        choice = choice or self.model_router.route(purpose)
+        while True:
+            started = time.perf_counter()
+            with span(f"llm.{purpose}"):
+                try:
+                    response = self.llm.create(model=choice.model, max_tokens=choice.max_tokens, **request)
+                except Exception:
+                    record_llm_call(purpose, status="error")
+                    self.model_router.observe(choice, time.perf_counter() - started, "error")
+                    choice = self.model_router.escalate(choice) if self.llm.available() else None
+                    if choice is None:
+                        raise
+                    continue
+            record_llm_call(purpose, getattr(response, "usage", None))
+            reply = response.choices[0]
+            status = "ok" if reply.finish_reason == "tool_calls" or (reply.message.content or "").strip() else "empty"
+            self.model_router.observe(choice, time.perf_counter() - started, status)
+            escalated = self.model_router.escalate(choice) if status == "empty" else None
+            if escalated is None:
+                return response
+            choice = escalated
+
+    def _build_messages(self, message, history, state):
+        """
+        Construye la lista de mensajes para la API
+        
+        Returns:
+            tuple: (mensajes, mejor puntuación de la recuperación)
+        """
+        with span("prompt"):
+            # Un único snapshot de artefactos por turno, aunque haya una recarga en paralelo
+            prompt_builder = self._profile(state).prompt_builder
+            artifacts = prompt_builder.artifacts()
+            messages = [{"role": "system", "content": artifacts.system_prompt}]
+            messages += self.history_manager.window(history, state)
+            results = prompt_builder.retrieve(message, artifacts)
+            relevant_context = prompt_builder.relevant_context(message, artifacts, results)
+            if relevant_context:
+                messages.append({"role": "system", "content": relevant_context})
+            retrieval_score = results[0][0] if results else 0.0
+            return messages + [{"role": "user", "content": message}], retrieval_score
+
+    def _route_turn(self, message, routed, state, retrieval_score):
+        """
+        Elige el nivel de modelo del turno con el clasificador local
+        
+        Args:
+            message (str): Mensaje del usuario
+            routed (RoutedMessage): Clasificación del mensaje hecha al enrutarlo
+            state (SessionState): Estado de la sesión
+            retrieval_score (float): Mejor puntuación de la recuperación
+            
+        Returns:
+            ModelChoice: Modelo y max_tokens de las llamadas de chat del turno
+        """
+        email_flow = bool(state.pending_email or state.waiting_for_message)
+        return self.model_router.route_turn(message, routed.intent, retrieval_score, email_flow)
+
+    def _available_space(self, state):
+        """
+        Calcula el espacio disponible para la respuesta del LLM
+        
+        Returns:
+            tuple: (espacio disponible, si se añadirá la sugerencia de email)
+        """
+        will_add_email_suggestion = not state.pending_email and not state.last_email_suggestion
+        if will_add_email_suggestion:
+            available_space = Config.MAX_RESPONSE_LENGTH - len(EMAIL_SUGGESTION)
+            logger.debug(f"Espacio disponible (con email): {available_space}")
+        else:
+            available_space = Config.MAX_RESPONSE_LENGTH
+            logger.debug(f"Espacio disponible (sin email): {available_space}")
+        return available_space, will_add_email_suggestion
+
+    def _finalize_response(self, response, state, will_add_email_suggestion):
+        """Agrega la sugerencia de email si es necesario"""
+        if will_add_email_suggestion:
+            response += EMAIL_SUGGESTION
+            state.last_email_suggestion = True
+        
+        logger.debug(f"Respuesta final: {len(response)} caracteres")
+        return response
+
+    def _llm_reply(self, message, history, state, routed):
+        """
+        Genera la respuesta con llamadas bloqueantes y adaptación posterior por IA
+        
+        Returns:
+            str: Respuesta del asistente
+        """
+        user_message = message
+        messages, retrieval_score = self._build_messages(message, history, state)
+        choice = self._route_turn(message, routed, state, retrieval_score)
+        deadline = time.monotonic() + Config.TOOL_DEADLINE_SECONDS
+        used_tools = False
+        rounds = 0
         done = False
         while not done:
-            response = self.openai.chat.completions.create(
-                model=Config.OPENAI_MODEL,
-                messages=messages,
-                tools=self.tools
-            )
-            if response.choices[0].finish_reason == "tool_calls":
+            tool_options = self._tool_options(rounds, deadline)
+            response = self._complete("chat", choice, messages=messages, **tool_options)
+            # Con tool_choice="none" no se ejecutan más herramientas aunque el modelo las pida
+            if response.choices[0].finish_reason == "tool_calls" and tool_options.get("tool_choice") != "none":
                 message = response.choices[0].message
                 tool_calls = message.tool_calls
-                results = self.handle_tool_call(tool_calls)
+                results = self.handle_tool_call(tool_calls, state, deadline)
                 messages.append(message)
                 messages.extend(results)
+                used_tools = True
+                rounds += 1
             else:
                 done = True
 
-        full_response = response.choices[0].message.content
-        print(f"[DEBUG] Respuesta original: {len(full_response)} caracteres")
+        full_response = response.choices[0].message.content or ""
+        logger.debug(f"Respuesta original: {len(full_response)} caracteres")
         
         # Verificar si necesitamos adaptar la respuesta por longitud
-        email_suggestion = "\n\n💬 También puedes escribirme por email si prefieres."
-        will_add_email_suggestion = not self.pending_email and not self.last_email_suggestion
-        
-        # Calcular espacio disponible
-        if will_add_email_suggestion:
-            available_space = Config.MAX_RESPONSE_LENGTH - len(email_suggestion)
-            print(f"[DEBUG] Espacio disponible (con email): {available_space}")
-        else:
-            available_space = Config.MAX_RESPONSE_LENGTH
-            print(f"[DEBUG] Espacio disponible (sin email): {available_space}")
+        available_space, will_add_email_suggestion = self._available_space(state)
         
         # Si la respuesta es muy larga, usar IA para resumirla inteligentemente
         if len(full_response) > available_space:
-            print(f"[DEBUG] Respuesta muy larga, aplicando resumen IA")
-            adapted_response = self._adapt_long_response(full_response, available_space)
+            logger.debug(f"Respuesta muy larga, aplicando resumen IA")
+            with span("adapt"):
+                adapted_response = self._adapt_long_response(full_response, available_space)
         else:
-            print(f"[DEBUG] Respuesta cabe, no necesita resumen")
+            logger.debug(f"Respuesta cabe, no necesita resumen")
             adapted_response = full_response
         
-        # Agregar sugerencia de email si es necesario
-        if will_add_email_suggestion:
-            adapted_response += email_suggestion
-            self.last_email_suggestion = True
+        self._store_reply(user_message, history, adapted_response, used_tools, state)
+        return self._finalize_response(adapted_response, state, will_add_email_suggestion)
+
+    def _stream_llm_reply(self, message, history, state, routed):
+        """
+        Genera la respuesta en streaming, aplicando el límite de longitud sobre la marcha
+        
+        En lugar de adaptar la respuesta con una segunda llamada a la IA, se limita
+        la generación con max_tokens y se corta en el último final de frase que
+        quepa en el espacio disponible.
+        
+        Yields:
+            str: Respuesta acumulada del asistente
+        """
+        messages, retrieval_score = self._build_messages(message, history, state)
+        choice = self._route_turn(message, routed, state, retrieval_score)
+        deadline = time.monotonic() + Config.TOOL_DEADLINE_SECONDS
+        rounds = 0
+        while True:
+            stream_round = self._stream_round(state, choice, rounds, deadline)
+            yield from self._stream_completion(messages, stream_round)
+            choice = stream_round.choice
+            if not stream_round.tool_calls:
+                break
+            messages.append(tool_calls_message(stream_round.text, stream_round.tool_calls))
+            messages.extend(self.handle_tool_call(stream_round.tool_calls, state, deadline))
+            rounds += 1
+        yield self._finish_stream_reply(message, history, state, stream_round.text, rounds > 0)
+
+    async def _astream_llm_reply(self, message, history, state, routed):
+        """
+        Variante asíncrona de _stream_llm_reply (misma lógica, E/S asíncrona)
+        
+        Yields:
+            str: Respuesta acumulada del asistente
+        """
+        # Puede resumir el historial con una llamada bloqueante: fuera del event loop
+        messages, retrieval_score = await asyncio.to_thread(self._build_messages, message, history, state)
+        choice = self._route_turn(message, routed, state, retrieval_score)
+        deadline = time.monotonic() + Config.TOOL_DEADLINE_SECONDS
+        rounds = 0
+        while True:
+            stream_round = self._stream_round(state, choice, rounds, deadline)
+            async for partial in self._astream_completion(messages, stream_round):
+                yield partial
+            choice = stream_round.choice
+            if not stream_round.tool_calls:
+                break
+            messages.append(tool_calls_message(stream_round.text, stream_round.tool_calls))
+            messages.extend(await self.ahandle_tool_call(stream_round.tool_calls, state, deadline))
+            rounds += 1
+        yield self._finish_stream_reply(message, history, state, stream_round.text, rounds > 0)
+
+    def _stream_round(self, state, choice, rounds, deadline):
+        """Prepara una ronda de streaming con el espacio disponible y las herramientas de ese momento"""
+        available_space, _ = self._available_space(state)
+        return StreamRound(choice, available_space, self._cut_at_sentence, self._tool_options(rounds, deadline))
+
+    def _finish_stream_reply(self, message, history, state, text, used_tools):
+        """Guarda en caché y añade la sugerencia de email a la respuesta final del streaming"""
+        _, will_add_email_suggestion = self._available_space(state)
+        self._store_reply(message, history, text, used_tools, state)
+        return self._finalize_response(text, state, will_add_email_suggestion)
+
+    def _stream_completion(self, messages, stream_round):
+        """
+        Ejecuta una ronda de streaming contra la API
+        
+        Si el nivel de modelo falla antes de emitir texto, o no devuelve nada,
+        la ronda se repite en el nivel siguiente. El resultado queda en
+        stream_round (ver StreamRound).
+        
+        Args:
+            messages (list): Mensajes de la conversación
+            stream_round (StreamRound): Ronda a ejecutar
+            
+        Yields:
+            str: Texto acumulado mientras cabe en el espacio disponible
+        """
+        while True:
+            accumulator = stream_round.start()
+            with span("llm.chat"):
+                try:
+                    stream = self.llm.create(**stream_round.request(messages))
+                    try:
+                        for chunk in stream:
+                            partial = accumulator.feed(chunk)
+                            if partial is not None:
+                                yield partial
+                            if accumulator.truncated:
+                                break
+                    finally:
+                        stream.close()
+                except Exception:
+                    if not self._retry_stream_round(stream_round, failed=True):
+                        raise
+                    continue
+            if not self._retry_stream_round(stream_round):
+                return
+
+    async def _astream_completion(self, messages, stream_round):
+        """
+        Variante asíncrona de _stream_completion (misma lógica, E/S asíncrona)
+        
+        Yields:
+            str: Texto acumulado mientras cabe en el espacio disponible
+        """
+        while True:
+            accumulator = stream_round.start()
+            with span("llm.chat"):
+                try:
+                    stream = await self.llm.acreate(**stream_round.request(messages))
+                    try:
+                        async for chunk in stream:
+                            partial = accumulator.feed(chunk)
+                            if partial is not None:
+                                yield partial
+                            if accumulator.truncated:
+                                break
+                    finally:
+                        await stream.close()
+                except Exception:
+                    if not self._retry_stream_round(stream_round, failed=True):
+                        raise
+                    continue
+            if not self._retry_stream_round(stream_round):
+                return
+
+    def _retry_stream_round(self, stream_round, failed=False):
+        """
+        Registra un intento de la ronda y decide si repetirlo en otro nivel
+        
+        Solo se escala si el intento falló o vino vacío sin haber emitido
+        texto, y nunca con el circuito abierto. Si termina bien, deja en
+        stream_round el texto y las llamadas a herramientas (ninguna en la
+        ronda final, aunque el modelo las pida).
+        
+        Args:
+            stream_round (StreamRound): Ronda en curso
+            failed (bool): Si el intento lanzó una excepción
+            
+        Returns:
+            bool: True si hay que repetir la ronda (stream_round.choice ya es el nuevo nivel)
+        """
+        accumulator = stream_round.accumulator
+        if failed:
+            record_llm_call("chat", status="error")
+            status = "error"
+        else:
+            record_llm_call("chat", accumulator.usage, first_token_seconds=accumulator.first_token_seconds)
+            stream_round.text, stream_round.tool_calls = accumulator.result()
+            if stream_round.final and stream_round.tool_calls:
+                logger.warning("El modelo pidió herramientas en la ronda final, se ignoran")
+                stream_round.tool_calls = []
+            status = "ok" if stream_round.text or stream_round.tool_calls else "empty"
+        self.model_router.observe(stream_round.choice, time.perf_counter() - accumulator.started, status)
+        if status == "ok" or accumulator.emitted or not self.llm.available():
+            return False
+        escalated = self.model_router.escalate(stream_round.choice)
+        if escalated is None:
+            return False
+        stream_round.choice = escalated
+        return True
+
+    def _cut_at_sentence(self, text, max_length, incomplete=False):
+        """
+        Corta el texto en el último final de frase que quepa en el límite
+        
+        Args:
+            text (str): Texto a cortar
+            max_length (int): Longitud máxima
+            incomplete (bool): Si el texto quedó a medias (finish_reason "length"):
+                se recorta a la última frase completa aunque quepa en el límite
+            
+        Returns:
+            str: Texto cortado en un final de frase, o corte inteligente si no hay ninguno cerca
+        """
+        if len(text) <= max_length and not incomplete:
+            return text
         
-        print(f"[DEBUG] Respuesta final: {len(adapted_response)} caracteres")
-        return adapted_response 
\ No newline at end of file
+        window = text[:max_length]
+        boundaries = [m.end() for m in SENTENCE_END_PATTERN.finditer(window)]
+        if boundaries and boundaries[-1] > (0 if incomplete else max_length * 0.5):
+            return window[:boundaries[-1]].rstrip()
+        if len(text) > max_length:
+            return self._smart_truncate(text, max_length)
+        # Sin ningún final de frase: se descarta la última palabra, quizá cortada
+        last_space = window.rstrip().rfind(" ")
+        return (window[:last_space] if last_space > 0 else window).rstrip() + "..."
@@ -2,113 +2,278 @@
 Cargador de datos del perfil personal
 """
 import os
-import json
-from pypdf import PdfReader
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
 from src.config import Config
+from src.core.source_cache import SourceCache, extract_pdf_text, extract_compact_json
+from src.observability import get_logger
+
+logger = get_logger(__name__)
+
+# Orden en el que se combinan las fuentes para calcular la versión de los datos
+SOURCE_NAMES = ("cv", "contexto", "faq", "linkedin")
+
+
+@dataclass(frozen=True)
+class ProfileSnapshot:
+    """
+    Vista inmutable de los datos del perfil en un momento dado
+
+    Las recargas publican un snapshot nuevo en lugar de modificar el actual,
+    de modo que una conversación en curso siempre ve datos coherentes.
+    """
+
+    cv_content: str
+    contexto_content: str
+    faq_content: str
+    linkedin_content: str
+    signatures: dict = field(default_factory=dict)  # fuente -> (tamaño, mtime_ns)
+    source_versions: dict = field(default_factory=dict)  # fuente -> hash del contenido
+    version: str = ""
+
+    @classmethod
+    def create(cls, contents, signatures):
+        """
+        Construye un snapshot calculando las versiones de cada fuente y del conjunto
+
+        Args:
+            contents (dict): Contenido por fuente
+            signatures (dict): Firma en disco por fuente
+
+        Returns:
+            ProfileSnapshot: Snapshot inmutable
+        """
+        digest = hashlib.sha256()
+        source_versions = {}
+        for name in SOURCE_NAMES:
+            encoded = contents[name].encode("utf-8")
+            source_versions[name] = hashlib.sha256(encoded).hexdigest()
+            digest.update(encoded)
+            digest.update(b"\0")
+        return cls(
+            cv_content=contents["cv"],
+            contexto_content=contents["contexto"],
+            faq_content=contents["faq"],
+            linkedin_content=contents["linkedin"],
+            signatures=dict(signatures),
+            source_versions=source_versions,
+            version=digest.hexdigest()
+        )
+
+    def content(self, name):
+        """Contenido de una fuente por nombre"""
+        return getattr(self, f"{name}_content")
+
 
 class DataLoader:
     """Maneja la carga de datos del perfil personal"""
-    
-    def __init__(self):
-        self.linkedin_content = ""
-        self.cv_content = ""
-        self.contexto_content = ""
-        self.faq_content = ""
+
+    def __init__(self, directory=None, source_cache=None, share=None):
+        """
+        Args:
+            directory (str): Directorio del perfil (por defecto Config.DEFAULT_PROFILE_DIR)
+            source_cache (SourceCache): Caché de extracción, compartida entre perfiles
+            share (callable): Texto -> copia compartida, para no duplicar contenidos iguales
+        """
+        self.directory = directory or Config.DEFAULT_PROFILE_DIR
+        self.source_cache = source_cache or SourceCache()
+        self.share = share
+        self.snapshot = None
+        self._reload_lock = threading.Lock()
         self._load_data()
-    
-    def _load_data(self):
-        """Carga todos los datos del perfil"""
-        self._load_linkedin_pdf()
-        self._load_cv_json()
-        self._load_contexto_json()
-        self._load_faq_json()
-    
+
+    def source_paths(self):
+        """
+        Rutas de las fuentes del perfil
+
+        Returns:
+            dict: Fuente -> ruta del fichero
+        """
+        linkedin = Config.LINKEDIN_PDF
+        if os.path.normpath(self.directory) != os.path.normpath(Config.DEFAULT_PROFILE_DIR):
+            linkedin = os.path.join(self.directory, "linkedin.pdf")
+        return {
+            "cv": os.path.join(self.directory, "cv.json"),
+            "contexto": os.path.join(self.directory, "contexto-asistente.json"),
+            "faq": os.path.join(self.directory, "faq.json"),
+            "linkedin": linkedin
+        }
+
+    def source_signatures(self):
+        """Firma (tamaño, mtime) de cada fuente en disco; None si no existe"""
+        signatures = {}
+        for name, path in self.source_paths().items():
+            try:
+                stat = os.stat(path)
+                signatures[name] = (stat.st_size, stat.st_mtime_ns)
+            except OSError:
+                signatures[name] = None
+        return signatures
+
+    def _load_data(self, changed=None):
+        """
+        Carga los datos del perfil y publica un snapshot nuevo
+
+        Las fuentes que hay que leer se cargan en paralelo: en frío, el PDF
+        de LinkedIn deja de bloquear la lectura de los JSON.
+
+        Args:
+            changed (set): Fuentes a recargar; None recarga todas
+        """
+        loaders = {
+            "linkedin": self._load_linkedin_pdf,
+            "cv": self._load_cv_json,
+            "contexto": self._load_contexto_json,
+            "faq": self._load_faq_json
+        }
+        signatures = self.source_signatures()
+        previous = self.snapshot
+        stale = [name for name in loaders if previous is None or changed is None or name in changed]
+        contents = {name: previous.content(name) for name in loaders if name not in stale}
+        if len(stale) > 1:
+            workers = min(len(stale), Config.STARTUP_LOAD_WORKERS)
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="profile-load") as pool:
+                contents.update(zip(stale, pool.map(lambda name: loaders[name](), stale)))
+        else:
+            contents.update((name, loaders[name]()) for name in stale)
+        if self.share is not None:
+            contents = {name: self.share(content) for name, content in contents.items()}
+
+        # Publicación atómica: una sola asignación de referencia
+        self.snapshot = ProfileSnapshot.create(contents, signatures)
+
     def _load_linkedin_pdf(self):
         """Carga el contenido del PDF de LinkedIn"""
         try:
+            linkedin_path = self.source_paths()["linkedin"]
             # Crear directorio si no existe
-            os.makedirs(os.path.dirname(Config.LINKEDIN_PDF), exist_ok=True)
-            
-            if os.path.exists(Config.LINKEDIN_PDF):
-                reader = PdfReader(Config.LINKEDIN_PDF)
-                self.linkedin_content = ""
-                for page in reader.pages:
-                    text = page.extract_text()
-                    if text:
-                        self.linkedin_content += text
-                print(f"[INFO] LinkedIn PDF cargado: {len(self.linkedin_content)} caracteres")
+            os.makedirs(os.path.dirname(linkedin_path), exist_ok=True)
+
+            if os.path.exists(linkedin_path):
+                content = self.source_cache.get(linkedin_path, "pdf", extract_pdf_text)
+                logger.info(f"LinkedIn PDF cargado: {len(content)} caracteres")
+                return content
             else:
-                print(f"[WARNING] No se encontró el archivo: {Config.LINKEDIN_PDF}")
-                self.linkedin_content = "Perfil de LinkedIn no disponible"
+                logger.warning(f"No se encontró el archivo: {linkedin_path}")
+                return "Perfil de LinkedIn no disponible"
         except Exception as e:
-            print(f"[ERROR] Error cargando LinkedIn PDF: {e}")
-            self.linkedin_content = "Error cargando perfil de LinkedIn"
-    
+            logger.error(f"Error cargando LinkedIn PDF: {e}")
+            return "Error cargando perfil de LinkedIn"
+
     def _load_cv_json(self):
         """Carga el CV en formato JSON"""
         try:
-            cv_path = "data/me/cv.json"
+            cv_path = self.source_paths()["cv"]
             if os.path.exists(cv_path):
-                with open(cv_path, "r", encoding="utf-8") as f:
-                    cv_data = json.load(f)
-                    self.cv_content = json.dumps(cv_data, indent=2, ensure_ascii=False)
-                print(f"[INFO] CV JSON cargado: {len(self.cv_content)} caracteres")
+                content = self.source_cache.get(cv_path, "json", extract_compact_json)
+                logger.info(f"CV JSON cargado: {len(content)} caracteres")
+                return content
             else:
-                print(f"[WARNING] No se encontró el archivo: {cv_path}")
-                self.cv_content = "CV no disponible"
+                logger.warning(f"No se encontró el archivo: {cv_path}")
+                return "CV no disponible"
         except Exception as e:
-            print(f"[ERROR] Error cargando CV JSON: {e}")
-            self.cv_content = "Error cargando CV"
-    
+            logger.error(f"Error cargando CV JSON: {e}")
+            return "Error cargando CV"
+
     def _load_contexto_json(self):
         """Carga el contexto del asistente"""
         try:
-            contexto_path = "data/me/contexto-asistente.json"
+            contexto_path = self.source_paths()["contexto"]
             if os.path.exists(contexto_path):
-                with open(contexto_path, "r", encoding="utf-8") as f:
-                    contexto_data = json.load(f)
-                    self.contexto_content = json.dumps(contexto_data, indent=2, ensure_ascii=False)
-                print(f"[INFO] Contexto cargado: {len(self.contexto_content)} caracteres")
+                content = self.source_cache.get(contexto_path, "json", extract_compact_json)
+                logger.info(f"Contexto cargado: {len(content)} caracteres")
+                return content
             else:
-                print(f"[WARNING] No se encontró el archivo: {contexto_path}")
-                self.contexto_content = "Contexto no disponible"
+                logger.warning(f"No se encontró el archivo: {contexto_path}")
+                return "Contexto no disponible"
         except Exception as e:
-            print(f"[ERROR] Error cargando contexto: {e}")
-            self.contexto_content = "Error cargando contexto"
-    
+            logger.error(f"Error cargando contexto: {e}")
+            return "Error cargando contexto"
+
     def _load_faq_json(self):
         """Carga las preguntas frecuentes"""
         try:
-            faq_path = "data/me/faq.json"
+            faq_path = self.source_paths()["faq"]
             if os.path.exists(faq_path):
-                with open(faq_path, "r", encoding="utf-8") as f:
-                    faq_data = json.load(f)
-                    self.faq_content = json.dumps(faq_data, indent=2, ensure_ascii=False)
-                print(f"[INFO] FAQ cargado: {len(self.faq_content)} caracteres")
+                content = self.source_cache.get(faq_path, "json", extract_compact_json)
+                logger.info(f"FAQ cargado: {len(content)} caracteres")
+                return content
             else:
-                print(f"[WARNING] No se encontró el archivo: {faq_path}")
-                self.faq_content = "FAQ no disponible"
+                logger.warning(f"No se encontró el archivo: {faq_path}")
+                return "FAQ no disponible"
         except Exception as e:
-            print(f"[ERROR] Error cargando FAQ: {e}")
-            self.faq_content = "Error cargando FAQ"
-    
+            logger.error(f"Error cargando FAQ: {e}")
+            return "Error cargando FAQ"
+
+    @property
+    def linkedin_content(self):
+        return self.snapshot.linkedin_content
+
+    @property
+    def cv_content(self):
+        return self.snapshot.cv_content
+
+    @property
+    def contexto_content(self):
+        return self.snapshot.contexto_content
+
+    @property
+    def faq_content(self):
+        return self.snapshot.faq_content
+
     def get_linkedin_content(self):
         """Retorna el contenido del LinkedIn"""
-        return self.linkedin_content
-    
+        return self.snapshot.linkedin_content
+
     def get_cv_content(self):
         """Retorna el contenido del CV"""
-        return self.cv_content
-    
+        return self.snapshot.cv_content
+
     def get_contexto_content(self):
         """Retorna el contexto del asistente"""
-        return self.contexto_content
-    
+        return self.snapshot.contexto_content
+
     def get_faq_content(self):
         """Retorna las preguntas frecuentes"""
-        return self.faq_content
-    
+        return self.snapshot.faq_content
+
+    def data_version(self):
+        """
+        Versión de los datos calculada a partir de su contenido
+
+        Returns:
+            str: Hash SHA-256 (hex) del contenido cargado
+        """
+        return self.snapshot.version
+
+    def changed_sources(self):
+        """
+        Fuentes cuyo fichero cambió en disco desde el último snapshot
+
+        Returns:
+            set: Nombres de las fuentes modificadas
+        """
+        current = self.source_signatures()
+        return {name for name, signature in current.items() if self.snapshot.signatures.get(name) != signature}
+
+    def refresh(self):
+        """
+        Recarga solo las fuentes modificadas y publica un snapshot nuevo
+
+        Returns:
+            set: Fuentes recargadas (vacío si no había cambios)
+        """
+        with self._reload_lock:
+            changed = self.changed_sources()
+            if changed:
+                logger.info(f"Recargando fuentes modificadas: {', '.join(sorted(changed))}")
+                self._load_data(changed)
+            return changed
+
     def reload_data(self):
         """Recarga todos los datos"""
-        print("[INFO] Recargando datos del perfil...")
-        self._load_data() 
\ No newline at end of file
+        logger.info("Recargando datos del perfil...")
+        with self._reload_lock:
+            self._load_data()
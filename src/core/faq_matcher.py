@@ -0,0 +1,152 @@
+"""
+Emparejador de preguntas frecuentes para responder sin llamar al LLM
+"""
+import json
+import math
+import sys
+import threading
+from collections import Counter
+from src.config import Config
+from src.core.text_utils import tokenize, is_negated
+from src.observability import get_logger
+
+logger = get_logger(__name__)
+
+# Estimación de memoria: entrada de diccionario por término y estructura de cada pregunta
+TERM_ENTRY_BYTES = 64
+ENTRY_OVERHEAD_BYTES = 300
+
+
+def _stem(token):
+    """Reduce plurales simples para que "tecnologias" y "tecnologia" coincidan"""
+    if len(token) > 4 and token.endswith("es"):
+        return token[:-2]
+    if len(token) > 3 and token.endswith("s"):
+        return token[:-1]
+    return token
+
+
+def _terms(text):
+    """Tokens normalizados, sin tildes ni palabras vacías y con plurales reducidos"""
+    return Counter(_stem(token) for token in tokenize(text))
+
+
+class FaqMatcher:
+    """
+    Empareja mensajes con las preguntas de faq.json mediante similitud coseno TF-IDF
+
+    Los vectores de las preguntas se precalculan al construir el emparejador,
+    por lo que cada consulta cuesta unas pocas operaciones sobre diccionarios.
+    Una pregunta solo es candidata si comparte al menos FAQ_MIN_SHARED_TERMS
+    términos con el mensaje (o todos los suyos, si tiene menos) y si ambos
+    están igual de negados: una sola palabra clave o un "no" no bastan.
+    """
+
+    def __init__(self, faq_content, threshold=None):
+        self.threshold = Config.FAQ_MATCH_THRESHOLD if threshold is None else threshold
+        self.entries = self._parse(faq_content)
+        self.hits = 0
+        self.misses = 0
+        self._stats_lock = threading.Lock()
+
+        document_frequency = Counter()
+        question_terms = [
+            Counter({sys.intern(term): freq for term, freq in _terms(entry["pregunta"]).items()})
+            for entry in self.entries
+        ]
+        for terms in question_terms:
+            document_frequency.update(terms.keys())
+        total = len(self.entries)
+        self.idf = {term: math.log((total + 1) / (freq + 1)) + 1 for term, freq in document_frequency.items()}
+        self.unknown_idf = math.log(total + 1) + 1
+        self.vectors = [self._vectorize(terms) for terms in question_terms]
+        self.negated = [is_negated(entry["pregunta"]) for entry in self.entries]
+
+    @staticmethod
+    def _parse(faq_content):
+        """Extrae los pares pregunta/respuesta del JSON de FAQ"""
+        try:
+            data = json.loads(faq_content)
+        except (json.JSONDecodeError, TypeError):
+            logger.warning("FAQ no disponible para el emparejador")
+            return []
+        items = data.get("faq", []) if isinstance(data, dict) else data
+        return [
+            item for item in items
+            if isinstance(item, dict) and item.get("pregunta") and item.get("respuesta")
+        ]
+
+    def _vectorize(self, terms):
+        """Convierte frecuencias de términos en un vector TF-IDF normalizado"""
+        vector = {term: freq * self.idf.get(term, self.unknown_idf) for term, freq in terms.items()}
+        norm = math.sqrt(sum(weight * weight for weight in vector.values()))
+        if norm:
+            vector = {term: weight / norm for term, weight in vector.items()}
+        return vector
+
+    def best_match(self, message):
+        """
+        Busca la pregunta frecuente más parecida al mensaje
+
+        Args:
+            message (str): Mensaje del usuario
+
+        Returns:
+            tuple: (puntuación, entrada) o (0.0, None) si no hay candidatos
+        """
+        query = self._vectorize(_terms(message))
+        negated = is_negated(message)
+        best_score, best_entry = 0.0, None
+        for entry, vector, entry_negated in zip(self.entries, self.vectors, self.negated):
+            if entry_negated != negated:
+                continue
+            shared = sum(1 for term in query if term in vector)
+            if shared < min(Config.FAQ_MIN_SHARED_TERMS, len(vector)):
+                continue
+            score = sum(weight * vector.get(term, 0.0) for term, weight in query.items())
+            if score > best_score:
+                best_score, best_entry = score, entry
+        return best_score, best_entry
+
+    def match(self, message):
+        """
+        Retorna la respuesta almacenada si el mensaje supera el umbral de confianza
+
+        Args:
+            message (str): Mensaje del usuario
+
+        Returns:
+            str | None: Respuesta de la FAQ, o None si no hay coincidencia fiable
+        """
+        score, entry = self.best_match(message)
+        hit = entry is not None and score >= self.threshold
+        with self._stats_lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+        if hit:
+            logger.info(f"FAQ fast path: '{entry['pregunta']}' (similitud {score:.2f})")
+            return entry["respuesta"]
+        return None
+
+    def estimated_bytes(self):
+        """Memoria aproximada del emparejador (preguntas, respuestas y vectores)"""
+        text = sum(sys.getsizeof(entry["pregunta"]) + sys.getsizeof(entry["respuesta"]) for entry in self.entries)
+        terms = sum(len(vector) for vector in self.vectors) + len(self.idf)
+        return text + terms * TERM_ENTRY_BYTES + len(self.entries) * ENTRY_OVERHEAD_BYTES
+
+    def stats(self):
+        """
+        Estadísticas de aciertos del emparejador
+
+        Returns:
+            dict: Aciertos, fallos y tasa de acierto
+        """
+        with self._stats_lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0
+            }
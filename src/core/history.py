@@ -0,0 +1,169 @@
+"""
+Ventana del historial con presupuesto de tokens y resumen incremental
+"""
+import hashlib
+import math
+from src.config import Config
+from src.observability import get_logger
+
+logger = get_logger(__name__)
+
+# Tokens fijos que añade la API por cada mensaje (rol, separadores)
+MESSAGE_OVERHEAD_TOKENS = 4
+
+SUMMARY_HEADER = "Resumen de la conversación anterior con este visitante:\n"
+
+
+def estimate_tokens(text):
+    """
+    Estimación rápida y local del número de tokens de un texto
+
+    Cuenta ~4 caracteres por token (algo menos en texto con muchas palabras
+    cortas) sin cargar ningún tokenizador.
+
+    Args:
+        text (str): Texto a medir
+
+    Returns:
+        int: Tokens estimados
+    """
+    if not text:
+        return 0
+    return max(math.ceil(len(text) / 4), math.ceil(len(text.split()) * 1.3))
+
+
+def message_text(message):
+    """Contenido textual de un mensaje del historial (Gradio puede enviar otros tipos)"""
+    content = message.get("content") if isinstance(message, dict) else getattr(message, "content", None)
+    if content is None:
+        return ""
+    return content if isinstance(content, str) else str(content)
+
+
+def estimate_message_tokens(message):
+    """Tokens estimados de un mensaje, incluida la sobrecarga por mensaje"""
+    return estimate_tokens(message_text(message)) + MESSAGE_OVERHEAD_TOKENS
+
+
+def _message_fingerprint(message):
+    """Huella de un mensaje para detectar si el historial cambió (reintentos, ediciones)"""
+    role = message.get("role", "") if isinstance(message, dict) else ""
+    return hashlib.sha1(f"{role}\0{message_text(message)}".encode("utf-8")).hexdigest()[:16]
+
+
+def local_summary(previous_summary, messages, max_chars=None):
+    """
+    Resumen extractivo sin llamar al LLM: una línea recortada por mensaje
+
+    Args:
+        previous_summary (str): Resumen acumulado hasta ahora
+        messages (list): Mensajes que salen de la ventana
+        max_chars (int): Longitud máxima del resumen
+
+    Returns:
+        str: Resumen actualizado (se conservan las líneas más recientes)
+    """
+    max_chars = max_chars or Config.HISTORY_SUMMARY_MAX_CHARS
+    labels = {"user": "Visitante", "assistant": "Asistente"}
+    lines = previous_summary.splitlines() if previous_summary else []
+    for message in messages:
+        text = " ".join(message_text(message).split())
+        if not text:
+            continue
+        role = message.get("role", "") if isinstance(message, dict) else ""
+        lines.append(f"- {labels.get(role, role)}: {text[:160]}")
+    while lines and sum(len(line) + 1 for line in lines) > max_chars:
+        lines.pop(0)
+    return "\n".join(lines)
+
+
+class HistoryManager:
+    """
+    Limita el historial enviado al LLM a un presupuesto de tokens
+
+    Los últimos turnos se envían literalmente; los anteriores se condensan en
+    un resumen guardado en el estado de la sesión. El resumen solo se
+    recalcula cuando la ventana avanza, y lo hace por bloques de turnos para
+    no pagar una llamada de resumen en cada mensaje.
+    """
+
+    def __init__(self, summarize=None, token_budget=None, keep_turns=None, batch_turns=None):
+        """
+        Args:
+            summarize (callable): (resumen previo, mensajes) -> resumen nuevo
+            token_budget (int): Tokens máximos del historial (resumen incluido)
+            keep_turns (int): Turnos recientes que se envían literalmente
+            batch_turns (int): Turnos extra que se acumulan antes de resumir
+        """
+        self.summarize = summarize or local_summary
+        self.token_budget = token_budget or Config.HISTORY_TOKEN_BUDGET
+        self.keep_messages = 2 * (keep_turns or Config.HISTORY_KEEP_TURNS)
+        self.batch_messages = 2 * (batch_turns or Config.HISTORY_SUMMARY_BATCH_TURNS)
+
+    def window(self, history, state):
+        """
+        Construye los mensajes de historial a enviar y actualiza el resumen de la sesión
+
+        Args:
+            history (list): Historial completo de Gradio
+            state (SessionState): Estado de la sesión (guarda el resumen)
+
+        Returns:
+            list: Mensaje de resumen (si lo hay) seguido de los turnos recientes
+        """
+        history = list(history or [])
+        if not self._summary_matches(history, state):
+            state.history_summary = ""
+            state.summarized_count = 0
+            state.summary_anchor = None
+
+        recent = history[state.summarized_count:]
+        recent_tokens = [estimate_message_tokens(m) for m in recent]
+        summary_tokens = estimate_tokens(state.history_summary)
+        over_budget = sum(recent_tokens) + summary_tokens > self.token_budget
+        if len(recent) > self.keep_messages + self.batch_messages or (over_budget and len(recent) > self.keep_messages):
+            self._slide(history, state)
+            recent = history[state.summarized_count:]
+            recent_tokens = [estimate_message_tokens(m) for m in recent]
+
+        messages = []
+        budget = self.token_budget
+        if state.history_summary:
+            summary_message = {"role": "system", "content": SUMMARY_HEADER + state.history_summary}
+            messages.append(summary_message)
+            budget -= estimate_message_tokens(summary_message)
+
+        # Si los turnos recientes siguen sin caber, se descartan los más antiguos
+        start = len(recent)
+        while start > 0 and recent_tokens[start - 1] <= budget:
+            start -= 1
+            budget -= recent_tokens[start]
+        if start:
+            logger.debug(f"Historial recortado: {start} mensajes recientes no caben en el presupuesto")
+        messages.extend(recent[start:])
+        return messages
+
+    def _slide(self, history, state):
+        """Condensa en el resumen los mensajes que salen de la ventana literal"""
+        cutoff = max(state.summarized_count, len(history) - self.keep_messages)
+        leaving = history[state.summarized_count:cutoff]
+        if not leaving:
+            return
+        try:
+            summary = self.summarize(state.history_summary, leaving)
+        except Exception as e:
+            logger.warning(f"Error resumiendo el historial, usando resumen local: {e}")
+            summary = local_summary(state.history_summary, leaving)
+        state.history_summary = summary
+        state.summarized_count = cutoff
+        state.summary_anchor = _message_fingerprint(history[cutoff - 1])
+        logger.debug(f"Historial resumido: {cutoff} mensajes en {len(summary)} caracteres")
+
+    @staticmethod
+    def _summary_matches(history, state):
+        """Comprueba que el resumen guardado corresponde a este historial"""
+        if not state.summarized_count:
+            return True
+        if len(history) < state.summarized_count:
+            return False
+        return _message_fingerprint(history[state.summarized_count - 1]) == state.summary_anchor
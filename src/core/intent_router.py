@@ -0,0 +1,219 @@
+"""
+Clasificación de intenciones previa al LLM (confirmaciones, emails, contacto)
+"""
+import re
+from collections import deque
+from dataclasses import dataclass
+from src.config import Config
+from src.core.text_utils import TOKEN_PATTERN as WORD_PATTERN, fold_accents
+
+INTENT_EMAIL_MESSAGE = "email_message"  # Email del visitante y mensaje para Diego
+INTENT_EMAIL_ONLY = "email_only"  # Solo el email: falta el mensaje
+INTENT_CONTACT = "contact_request"  # Quiere escribir a Diego pero aún no dio los datos
+INTENT_CONFIRMATION = "confirmation"  # Respuesta corta afirmativa ("sí", "ok"...)
+INTENT_NONE = "none"
+
+# Respuestas exactas (tras strip y lower) que confirman el envío de un email pendiente
+SEND_CONFIRMATIONS = frozenset(["sí", "si", "enviar", "confirmar", "ok"])
+# Respuestas exactas que aceptan la sugerencia de escribir por email
+AFFIRMATIVE_REPLIES = frozenset(["sí", "si", "ok", "vale", "perfecto", "claro"])
+
+CONTACT_TRIGGERS = [
+    "quiero enviarte un mail", "escribirte", "mandarte un correo",
+    "tengo una propuesta", "puedo escribirte", "contactarte",
+    "enviar email", "enviar correo"
+]
+
+EMAIL_LABEL_PATTERN = re.compile(r"^(?:email|correo):", re.IGNORECASE)
+EMAIL_PREFIX_PATTERN = re.compile(r"(?:email|correo):\s*$", re.IGNORECASE)
+BODY_LABEL_PATTERN = re.compile(r"(?:mensaje|message):\s*", re.IGNORECASE)
+LEADING_BODY_LABEL_PATTERN = re.compile(r"\s*(?:mensaje|message):\s*", re.IGNORECASE)
+TOKEN_PATTERN = re.compile(r"\S+")
+
+# Signos que rodean a veces el email ("<ana@x.com>", "ana@x.com,") y no forman parte de él
+EMAIL_TRIM_CHARS = "<>()[]{}\"',;:."
+
+
+def words(text):
+    """
+    Palabras normalizadas (minúsculas, sin tildes) de un texto
+
+    Args:
+        text (str): Texto original
+
+    Returns:
+        list: Palabras normalizadas
+    """
+    text = text.lower()
+    if not text.isascii():
+        text = fold_accents(text)
+    return WORD_PATTERN.findall(text)
+
+
+class AhoCorasick:
+    """
+    Autómata de Aho–Corasick para buscar muchos patrones en una sola pasada
+
+    El coste de búsqueda es lineal en la longitud de la entrada,
+    independientemente del número de patrones. El alfabeto son palabras
+    normalizadas en lugar de caracteres: los disparadores son frases, y así
+    hay un paso por palabra en vez de uno por carácter.
+    """
+
+    def __init__(self, patterns):
+        """
+        Args:
+            patterns (list): Secuencias de palabras a buscar (ya normalizadas)
+        """
+        self.patterns = list(patterns)
+        self._goto = [{}]
+        self._fail = [0]
+        self._output = [()]
+        for index, pattern in enumerate(self.patterns):
+            node = 0
+            for symbol in pattern:
+                next_node = self._goto[node].get(symbol)
+                if next_node is None:
+                    next_node = len(self._goto)
+                    self._goto[node][symbol] = next_node
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._output.append(())
+                node = next_node
+            self._output[node] += (index,)
+
+        # Enlaces de fallo en anchura: el sufijo propio más largo que también es prefijo
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for symbol, child in self._goto[node].items():
+                queue.append(child)
+                fallback = self._fail[node]
+                while fallback and symbol not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[child] = self._goto[fallback].get(symbol, 0)
+                self._output[child] += self._output[self._fail[child]]
+
+    def search(self, symbols):
+        """
+        Patrones presentes en la entrada
+
+        Args:
+            symbols (list): Palabras normalizadas en las que buscar
+
+        Returns:
+            set: Índices de los patrones encontrados
+        """
+        found = set()
+        node = 0
+        goto = self._goto
+        for symbol in symbols:
+            while node and symbol not in goto[node]:
+                node = self._fail[node]
+            node = goto[node].get(symbol, 0)
+            if self._output[node]:
+                found.update(self._output[node])
+        return found
+
+
+@dataclass(frozen=True, slots=True)
+class RoutedMessage:
+    """Resultado de clasificar un mensaje"""
+
+    intent: str
+    reply: str  # Mensaje con strip() y en minúsculas, para las respuestas cortas
+    email: str | None = None
+    body: str = ""
+    contact_request: bool = False
+
+    @property
+    def confirms_send(self):
+        """Si confirma el envío de un email pendiente"""
+        return self.reply in SEND_CONFIRMATIONS
+
+    @property
+    def is_affirmative(self):
+        """Si acepta la sugerencia de escribir por email"""
+        return self.reply in AFFIRMATIVE_REPLIES
+
+
+class IntentRouter:
+    """
+    Clasifica un mensaje en una única pasada antes de consultar al LLM
+
+    Sustituye a la cascada de expresiones regulares: los patrones se compilan
+    una vez, los disparadores de contacto se buscan con un autómata sobre el
+    texto normalizado y el email se localiza recorriendo los tokens una sola
+    vez. Solo se analizan los primeros ROUTER_MAX_INPUT_CHARS caracteres, de
+    modo que un texto pegado muy largo no dispara la latencia.
+    """
+
+    def __init__(self, triggers=None, max_chars=None):
+        self.max_chars = max_chars or Config.ROUTER_MAX_INPUT_CHARS
+        self._triggers = AhoCorasick(tuple(words(trigger)) for trigger in (triggers or CONTACT_TRIGGERS))
+
+    def classify(self, message):
+        """
+        Clasifica un mensaje y extrae el email y el cuerpo si los hay
+
+        Args:
+            message (str): Mensaje del visitante
+
+        Returns:
+            RoutedMessage: Intención y datos extraídos
+        """
+        text = message.strip()
+        reply = text.lower()
+        head = text[:self.max_chars]
+
+        if "@" in head:
+            email, body = self._extract_email(head, text)
+            if email and body:
+                return RoutedMessage(INTENT_EMAIL_MESSAGE, reply, email, body)
+            if email:
+                return RoutedMessage(INTENT_EMAIL_ONLY, reply, email)
+        if reply in SEND_CONFIRMATIONS or reply in AFFIRMATIVE_REPLIES:
+            return RoutedMessage(INTENT_CONFIRMATION, reply)
+        if self._triggers.search(words(reply[:self.max_chars])):
+            return RoutedMessage(INTENT_CONTACT, reply, contact_request=True)
+        return RoutedMessage(INTENT_NONE, reply)
+
+    def _extract_email(self, head, text):
+        """
+        Localiza el primer email y el mensaje que lo acompaña
+
+        El mensaje es, por orden: lo que sigue a una etiqueta "Mensaje:", el
+        texto posterior al email o, si el email va en la última línea, las
+        líneas anteriores. La etiqueta "Mensaje:" puede estar en cualquier
+        punto si el email venía etiquetado ("Email: ..."); si no, solo justo
+        después del email.
+
+        Returns:
+            tuple: (email o None, cuerpo del mensaje)
+        """
+        for match in TOKEN_PATTERN.finditer(head):
+            token = match.group(0)
+            if "@" not in token[1:-1]:
+                continue
+            labelled = bool(EMAIL_LABEL_PATTERN.match(token)) or bool(
+                EMAIL_PREFIX_PATTERN.search(head, max(0, match.start() - 16), match.start())
+            )
+            email = EMAIL_LABEL_PATTERN.sub("", token).strip(EMAIL_TRIM_CHARS)
+            if "@" not in email[1:-1]:
+                continue
+
+            after = text[match.end():]
+            if labelled:
+                label = BODY_LABEL_PATTERN.search(after, 0, self.max_chars)
+            else:
+                label = LEADING_BODY_LABEL_PATTERN.match(after, 0, self.max_chars)
+            if label:
+                return email, after[label.end():].strip()
+            if after.strip():
+                return email, after.strip()
+            before = text[:match.start()]
+            if "\n" in before:
+                # Email en la última línea: las líneas anteriores son el mensaje
+                return email, before[:before.rfind("\n")].strip()
+            return email, ""
+        return None, ""
@@ -0,0 +1,444 @@
+"""
+Cliente LLM intercambiable: OpenAI en directo, grabación y reproducción
+
+Todas las llamadas del asistente a chat.completions pasan por un LLMClient.
+El backend de grabación guarda cada par petición/respuesta en una "cassette"
+(JSON Lines comprimido con gzip) indexada por un hash canónico de la
+petición; el de reproducción las sirve sin red, opcionalmente con los
+tiempos grabados, para perfilar solo el coste del lado de Python.
+
+El paquete openai (más de medio segundo de importación) no se importa
+hasta que hace falta: al crear el primer cliente o al reproducir una
+cassette.
+"""
+import asyncio
+import atexit
+import gzip
+import hashlib
+import json
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import defaultdict
+from src.config import Config
+from src.observability import get_logger
+
+logger = get_logger(__name__)
+
+
+class CassetteMiss(LookupError):
+    """La petición no está grabada en la cassette"""
+
+
+def _plain(value):
+    """Convierte mensajes y objetos de la API a tipos JSON (None se omite)"""
+    if hasattr(value, "model_dump"):
+        return value.model_dump(exclude_none=True)
+    if isinstance(value, dict):
+        return {k: _plain(v) for k, v in value.items() if v is not None}
+    if isinstance(value, (list, tuple)):
+        return [_plain(v) for v in value]
+    return value
+
+
+def request_key(request):
+    """
+    Hash canónico de una petición a chat.completions
+
+    Args:
+        request (dict): Parámetros de create() (model, messages, tools...)
+
+    Returns:
+        str: SHA-256 del JSON canónico (claves ordenadas, sin espacios)
+    """
+    canonical = json.dumps(_plain(request), sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class Cassette:
+    """
+    Pares petición/respuesta grabados, en memoria y en disco
+
+    Cada línea del fichero es una respuesta: la clave de la petición, la
+    respuesta completa o los chunks del stream (solo los campos que cambian
+    respecto al primero) y los tiempos en milisegundos. Una misma petición
+    puede aparecer varias veces; se reproducen en el orden en que se grabaron.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._entries = defaultdict(list)
+        self._served = defaultdict(int)
+        self._lock = threading.Lock()
+        self._count = 0
+        self.hits = 0
+        self.misses = 0
+
+    def load(self):
+        """Lee la cassette de disco (si existe)"""
+        if not os.path.exists(self.path):
+            return self
+        with gzip.open(self.path, "rt", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    entry = json.loads(line)
+                    self._entries[entry["key"]].append(entry)
+                    self._count = max(self._count, entry["seq"] + 1)
+        logger.info(f"Cassette cargada: {len(self)} respuestas de {self.path}")
+        return self
+
+    def save(self):
+        """Escribe la cassette de forma atómica (fichero temporal + rename)"""
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with self._lock:
+            entries = [entry for group in self._entries.values() for entry in group]
+        with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+            for entry in sorted(entries, key=lambda e: e["seq"]):
+                f.write(json.dumps(entry, ensure_ascii=False, separators=(",", ":")) + "\n")
+        os.replace(tmp_path, self.path)
+        logger.info(f"Cassette guardada: {len(entries)} respuestas en {self.path}")
+
+    def add(self, key, entry):
+        """Añade una respuesta grabada para la petición con esta clave"""
+        with self._lock:
+            entry["key"] = key
+            entry["seq"] = self._count
+            self._count += 1
+            self._entries[key].append(entry)
+
+    def next(self, key):
+        """
+        Siguiente respuesta grabada para la petición
+
+        Agotadas las grabaciones de una petición repetida, se repite la última.
+
+        Raises:
+            CassetteMiss: Si la petición nunca se grabó
+        """
+        with self._lock:
+            entries = self._entries.get(key)
+            if not entries:
+                self.misses += 1
+                raise CassetteMiss(f"Petición no grabada en {self.path} (clave {key[:12]})")
+            index = min(self._served[key], len(entries) - 1)
+            self._served[key] += 1
+            self.hits += 1
+            return entries[index]
+
+    def __len__(self):
+        return sum(len(group) for group in self._entries.values())
+
+
+def _compact_chunks(chunks):
+    """Chunks del stream -> (campos comunes, diferencias de cada chunk)"""
+    if not chunks:
+        return {}, []
+    base = {k: v for k, v in chunks[0].items() if k != "choices"}
+    return base, [{k: v for k, v in chunk.items() if base.get(k) != v} for chunk in chunks]
+
+
+def _expand_chunks(entry):
+    """Inversa de _compact_chunks: objetos ChatCompletionChunk"""
+    from openai.types.chat import ChatCompletionChunk
+    base = entry["base"]
+    return [ChatCompletionChunk.model_validate({**base, **chunk}) for chunk in entry["chunks"]]
+
+
+class LLMClient(ABC):
+    """
+    Interfaz de los backends: create()/acreate() con los parámetros de chat.completions
+
+    Con stream=True devuelven un iterable de chunks con close(); en otro caso,
+    un ChatCompletion.
+    """
+
+    @abstractmethod
+    def create(self, **request):
+        """Llamada síncrona a chat.completions"""
+
+    @abstractmethod
+    async def acreate(self, **request):
+        """Llamada asíncrona a chat.completions"""
+
+    def close(self):
+        """Libera recursos y persiste lo que haga falta"""
+
+    def available(self):
+        """Si merece la pena intentar una llamada ahora (False con el circuito abierto)"""
+        return True
+
+    def prepare(self):
+        """Importa y construye lo necesario para la primera llamada (arranque en segundo plano)"""
+
+    async def awarm_up(self):
+        """Abre por adelantado la conexión del cliente asíncrono con el proveedor"""
+
+    def stats(self):
+        """Estadísticas del backend"""
+        return {"backend": type(self).__name__}
+
+
+class OpenAIClient(LLMClient):
+    """Llamadas reales a la API (los clientes se crean en el primer uso)"""
+
+    def __init__(self, sync_client=None, async_client=None, **client_options):
+        """
+        Args:
+            sync_client (OpenAI): Cliente síncrono ya creado
+            async_client (AsyncOpenAI): Cliente asíncrono ya creado
+            **client_options: Opciones de los clientes que se creen (timeout, max_retries...)
+        """
+        self._sync_client = sync_client
+        self._async_client = async_client
+        self._client_options = client_options
+        self._lock = threading.Lock()
+
+    def create(self, **request):
+        if self._sync_client is None:
+            self.prepare()
+        return self._sync_client.chat.completions.create(**request)
+
+    async def acreate(self, **request):
+        if self._async_client is None:
+            self.prepare()
+        return await self._async_client.chat.completions.create(**request)
+
+    def prepare(self):
+        from openai import OpenAI, AsyncOpenAI
+        with self._lock:
+            if self._sync_client is None:
+                self._sync_client = OpenAI(**self._client_options)
+            if self._async_client is None:
+                self._async_client = AsyncOpenAI(**self._client_options)
+
+    async def awarm_up(self):
+        """
+        Lista los modelos con el cliente asíncrono para dejar una conexión abierta en su pool
+
+        La conexión pertenece al bucle de eventos desde el que se llama, así
+        que debe hacerse desde el bucle que atenderá las peticiones. Un fallo
+        solo se registra: la primera llamada real abrirá la conexión.
+        """
+        if self._async_client is None:
+            await asyncio.to_thread(self.prepare)
+        try:
+            await self._async_client.with_options(timeout=Config.LLM_WARM_UP_TIMEOUT_SECONDS,
+                                                  max_retries=0).models.list()
+            logger.debug("Conexión con el proveedor del LLM abierta")
+        except Exception as e:
+            logger.debug(f"No se pudo precalentar la conexión con el LLM: {type(e).__name__}: {e}")
+
+    def stats(self):
+        return {"backend": "openai"}
+
+
+class _RecordingStream:
+    """Envuelve un stream síncrono y graba sus chunks al cerrarse"""
+
+    def __init__(self, stream, commit, started):
+        self._stream = stream
+        self._commit = commit
+        self._last = started
+        self._chunks = []
+        self._delays = []
+
+    def __iter__(self):
+        for chunk in self._stream:
+            self._record(chunk)
+            yield chunk
+        self._finish()
+
+    def _record(self, chunk):
+        now = time.perf_counter()
+        self._chunks.append(chunk.model_dump(exclude_none=True))
+        self._delays.append(round((now - self._last) * 1000, 1))
+        self._last = now
+
+    def _finish(self):
+        if self._commit:
+            self._commit(self._chunks, self._delays)
+            self._commit = None
+
+    def close(self):
+        self._finish()
+        self._stream.close()
+
+
+class _AsyncRecordingStream(_RecordingStream):
+    """Variante asíncrona de _RecordingStream"""
+
+    async def __aiter__(self):
+        async for chunk in self._stream:
+            self._record(chunk)
+            yield chunk
+        self._finish()
+
+    async def close(self):
+        self._finish()
+        await self._stream.close()
+
+
+class RecordingClient(LLMClient):
+    """
+    Reenvía las peticiones a otro cliente y graba las respuestas
+
+    Un stream cortado antes de tiempo (límite de longitud) se graba solo
+    hasta donde se consumió, que es lo que se reproducirá.
+    """
+
+    def __init__(self, inner, cassette):
+        self.inner = inner
+        self.cassette = cassette
+
+    def create(self, **request):
+        key = request_key(request)
+        started = time.perf_counter()
+        response = self.inner.create(**request)
+        if request.get("stream"):
+            return _RecordingStream(response, self._stream_commit(key), started)
+        self._add_completion(key, response, started)
+        return response
+
+    async def acreate(self, **request):
+        key = request_key(request)
+        started = time.perf_counter()
+        response = await self.inner.acreate(**request)
+        if request.get("stream"):
+            return _AsyncRecordingStream(response, self._stream_commit(key), started)
+        self._add_completion(key, response, started)
+        return response
+
+    def _add_completion(self, key, response, started):
+        latency = round((time.perf_counter() - started) * 1000, 1)
+        self.cassette.add(key, {"response": response.model_dump(exclude_none=True), "delays": [latency]})
+
+    def _stream_commit(self, key):
+        def commit(chunks, delays):
+            base, compact = _compact_chunks(chunks)
+            self.cassette.add(key, {"base": base, "chunks": compact, "delays": delays})
+        return commit
+
+    def close(self):
+        self.cassette.save()
+
+    def available(self):
+        return self.inner.available()
+
+    def prepare(self):
+        self.inner.prepare()
+
+    async def awarm_up(self):
+        await self.inner.awarm_up()
+
+    def stats(self):
+        return {"backend": "record", "recorded": len(self.cassette)}
+
+
+class _ReplayStream:
+    """Stream reproducido desde la cassette, con los tiempos grabados si se piden"""
+
+    def __init__(self, chunks, delays):
+        self._chunks = chunks
+        self._delays = delays
+
+    def __iter__(self):
+        for chunk, delay in zip(self._chunks, self._delays):
+            if delay:
+                time.sleep(delay / 1000)
+            yield chunk
+
+    def close(self):
+        pass
+
+
+class _AsyncReplayStream(_ReplayStream):
+    """Variante asíncrona de _ReplayStream"""
+
+    async def __aiter__(self):
+        for chunk, delay in zip(self._chunks, self._delays):
+            if delay:
+                await asyncio.sleep(delay / 1000)
+            yield chunk
+
+    async def close(self):
+        pass
+
+
+class ReplayClient(LLMClient):
+    """Sirve las respuestas grabadas sin red; una petición no grabada lanza CassetteMiss"""
+
+    def __init__(self, cassette, timing=False):
+        """
+        Args:
+            cassette (Cassette): Cassette cargada
+            timing (bool): Reproducir la latencia grabada (si no, respuesta inmediata)
+        """
+        self.cassette = cassette
+        self.timing = timing
+
+    def prepare(self):
+        from openai.types.chat import ChatCompletion, ChatCompletionChunk  # noqa: F401
+
+    def _replay(self, request):
+        from openai.types.chat import ChatCompletion
+        entry = self.cassette.next(request_key(request))
+        delays = entry["delays"] if self.timing else [0] * max(len(entry.get("chunks", [])), 1)
+        if "response" in entry:
+            return ChatCompletion.model_validate(entry["response"]), delays
+        return _expand_chunks(entry), delays
+
+    def create(self, **request):
+        response, delays = self._replay(request)
+        if request.get("stream"):
+            return _ReplayStream(response, delays)
+        if delays[0]:
+            time.sleep(delays[0] / 1000)
+        return response
+
+    async def acreate(self, **request):
+        response, delays = self._replay(request)
+        if request.get("stream"):
+            return _AsyncReplayStream(response, delays)
+        if delays[0]:
+            await asyncio.sleep(delays[0] / 1000)
+        return response
+
+    def stats(self):
+        return {"backend": "replay", "hits": self.cassette.hits, "misses": self.cassette.misses}
+
+
+def create_llm_client(backend=None, cassette_path=None):
+    """
+    Crea el cliente LLM configurado
+
+    Args:
+        backend (str): "openai", "record" o "replay" (por defecto Config.LLM_BACKEND)
+        cassette_path (str): Fichero de la cassette (por defecto Config.LLM_CASSETTE_FILE)
+
+    Returns:
+        LLMClient: Cliente LLM
+    """
+    backend = (backend or Config.LLM_BACKEND).lower()
+    cassette_path = cassette_path or Config.LLM_CASSETTE_FILE
+    if backend == "replay":
+        return ReplayClient(Cassette(cassette_path).load(), timing=Config.LLM_REPLAY_TIMING)
+    client = _openai_client()
+    if backend == "record":
+        logger.info(f"Grabando llamadas al LLM en {cassette_path}")
+        client = RecordingClient(client, Cassette(cassette_path))
+        atexit.register(client.close)
+        return client
+    if backend != "openai":
+        logger.warning(f"Backend LLM desconocido '{backend}', usando OpenAI")
+    return client
+
+
+def _openai_client():
+    """Cliente de OpenAI, con plazos, reintentos y circuit breaker si LLM_RESILIENCE_ENABLED"""
+    if not Config.LLM_RESILIENCE_ENABLED:
+        return OpenAIClient()
+    from src.core.resilience import ResilientClient
+    # Los reintentos los gestiona ResilientClient (con jitter y contando para el breaker)
+    return ResilientClient(OpenAIClient(timeout=Config.LLM_TIMEOUT_SECONDS, max_retries=0))
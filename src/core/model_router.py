@@ -0,0 +1,144 @@
+"""
+Enrutado de modelos: elige nivel de modelo y max_tokens para cada llamada al LLM
+"""
+from dataclasses import dataclass, replace
+from src.config import Config
+from src.core.intent_router import INTENT_NONE, INTENT_CONFIRMATION
+from src.observability import get_logger, MODEL_CHOICES, LLM_CALL_SECONDS
+
+logger = get_logger(__name__)
+
+REASON_DISABLED = "disabled"
+REASON_FIXED = "fixed"  # Llamadas auxiliares: nivel fijo según la tabla
+REASON_TOOLS = "tools"
+REASON_LONG = "long"
+REASON_MULTI_QUESTION = "multi_question"
+REASON_SHORT = "short"
+REASON_GROUNDED = "grounded"
+REASON_LOW_RETRIEVAL = "low_retrieval"
+
+
+@dataclass(frozen=True, slots=True)
+class ModelChoice:
+    """Modelo elegido para una llamada y por qué"""
+
+    purpose: str
+    tier: str
+    model: str
+    max_tokens: int | None
+    reason: str
+    retrieval_score: float | None = None
+    escalated: bool = False
+
+    def describe(self):
+        """Texto breve para el log"""
+        score = "" if self.retrieval_score is None else f", recuperación {self.retrieval_score:.2f}"
+        escalated = ", escalado" if self.escalated else ""
+        return f"{self.purpose} -> {self.tier} ({self.model}): {self.reason}{score}{escalated}"
+
+
+class ModelRouter:
+    """
+    Clasificador local (sin LLM) del nivel de modelo de cada llamada
+
+    Las llamadas auxiliares (asunto, adaptación, resumen) usan el nivel fijo de
+    Config.MODEL_ROUTES. Los turnos de chat van al nivel rápido solo si son
+    breves, de una sola pregunta, sin flujo de email ni herramientas a la
+    vista, y son un saludo o la recuperación encontró secciones relevantes;
+    en otro caso, al nivel estándar. Si el nivel elegido falla, se escala al
+    siguiente de Config.MODEL_TIERS con otro modelo, y con el max_tokens que
+    la tabla da a ese nivel para el mismo motivo (chat.simple escala con el
+    presupuesto de chat).
+    """
+
+    def __init__(self, tiers=None, routes=None, enabled=None):
+        self.tiers = dict(tiers or Config.MODEL_TIERS)
+        self.order = list(self.tiers)
+        self.routes = dict(routes or Config.MODEL_ROUTES)
+        self.enabled = Config.MODEL_ROUTING_ENABLED if enabled is None else enabled
+
+    def route(self, purpose, reason=REASON_FIXED, retrieval_score=None):
+        """
+        Modelo y max_tokens de la tabla para un motivo de llamada
+
+        Args:
+            purpose (str): Motivo (chat, chat.simple, subject, adapt, summary)
+            reason (str): Motivo de la elección, para métricas y log
+            retrieval_score (float): Puntuación de la recuperación, si se usó
+
+        Returns:
+            ModelChoice: Elección
+        """
+        tier, max_tokens = self.routes.get(purpose, self.routes["chat"])
+        if not self.enabled:
+            tier, reason = self.order[-1], REASON_DISABLED
+        return self._record(ModelChoice(
+            purpose.split(".")[0], tier, self.tiers[tier], max_tokens, reason, retrieval_score
+        ))
+
+    def route_turn(self, message, intent, retrieval_score, email_flow=False):
+        """
+        Elige el modelo de un turno de chat
+
+        Args:
+            message (str): Mensaje del usuario
+            intent (str): Intención del IntentRouter
+            retrieval_score (float): Mejor puntuación BM25 de las secciones del perfil
+            email_flow (bool): Si la sesión tiene un email en curso
+
+        Returns:
+            ModelChoice: Elección
+        """
+        text = message.strip()
+        if email_flow or intent not in (INTENT_NONE, INTENT_CONFIRMATION):
+            return self.route("chat", REASON_TOOLS, retrieval_score)
+        if len(text) > Config.MODEL_SIMPLE_MAX_CHARS:
+            return self.route("chat", REASON_LONG, retrieval_score)
+        if text.count("?") > 1:
+            return self.route("chat", REASON_MULTI_QUESTION, retrieval_score)
+        if len(text) <= Config.MODEL_SHORT_MESSAGE_CHARS:
+            return self.route("chat.simple", REASON_SHORT, retrieval_score)
+        if (retrieval_score or 0.0) >= Config.MODEL_SIMPLE_MIN_RETRIEVAL_SCORE:
+            return self.route("chat.simple", REASON_GROUNDED, retrieval_score)
+        return self.route("chat", REASON_LOW_RETRIEVAL, retrieval_score)
+
+    def escalate(self, choice):
+        """
+        Siguiente nivel tras un fallo del nivel elegido
+
+        Los niveles con el mismo modelo se saltan: repetir la llamada no es
+        escalar (de los reintentos ya se encarga la capa de resiliencia).
+
+        Returns:
+            ModelChoice | None: Elección en el nivel superior, o None si no hay ningún modelo mejor
+        """
+        higher = self.order[self.order.index(choice.tier) + 1:]
+        tier = next((tier for tier in higher if self.tiers[tier] != choice.model), None)
+        if tier is None:
+            return None
+        max_tokens = next(
+            (tokens for purpose, (route_tier, tokens) in self.routes.items()
+             if route_tier == tier and purpose.split(".")[0] == choice.purpose),
+            choice.max_tokens
+        )
+        logger.warning(f"Escalando {choice.purpose} de {choice.tier} a {tier}")
+        return self._record(replace(
+            choice, tier=tier, model=self.tiers[tier], max_tokens=max_tokens, escalated=True
+        ))
+
+    def observe(self, choice, seconds, status="ok"):
+        """
+        Registra la latencia de una llamada con el modelo elegido
+
+        Args:
+            choice (ModelChoice): Elección usada
+            seconds (float): Duración de la llamada
+            status (str): "ok", "error" o "empty"
+        """
+        LLM_CALL_SECONDS.observe(seconds, purpose=choice.purpose, tier=choice.tier, status=status)
+        logger.info(f"Modelo {choice.describe()} en {seconds * 1000:.0f} ms ({status})")
+
+    def _record(self, choice):
+        reason = "escalated" if choice.escalated else choice.reason
+        MODEL_CHOICES.inc(purpose=choice.purpose, tier=choice.tier, reason=reason)
+        return choice
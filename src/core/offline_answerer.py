@@ -0,0 +1,82 @@
+"""
+Respuestas sin LLM a partir de los datos del perfil (modo degradado)
+"""
+import json
+from src.config import Config
+from src.observability import get_logger
+
+logger = get_logger(__name__)
+
+OFFLINE_PREFIX = "Ahora mismo no puedo elaborar la respuesta, pero esto es lo que tengo en mi perfil:\n\n"
+
+
+def _readable(value):
+    """Valor JSON como texto corrido ("clave: valor; ...", listas separadas por comas)"""
+    if isinstance(value, dict):
+        return "; ".join(f"{key.replace('_', ' ')}: {_readable(item)}" for key, item in value.items())
+    if isinstance(value, list):
+        return ", ".join(_readable(item) for item in value)
+    return str(value)
+
+
+def readable_chunk(chunk):
+    """
+    Texto legible de un fragmento del índice ("título: JSON compacto")
+
+    Args:
+        chunk (dict): Fragmento {"id", "text", "source"}
+
+    Returns:
+        str: "Título: contenido" sin sintaxis JSON
+    """
+    title, _, body = chunk["text"].partition(": ")
+    try:
+        body = _readable(json.loads(body))
+    except (json.JSONDecodeError, TypeError):
+        pass
+    return f"{title.replace('_', ' ').capitalize()}: {body}"
+
+
+class OfflineAnswerer:
+    """
+    Contesta con la FAQ o con las secciones del perfil que más se parecen a la pregunta
+
+    Primero se busca en la FAQ con un umbral más permisivo que el del camino
+    rápido; si no hay nada, se usan los fragmentos de cv.json y del contexto
+    mejor puntuados por el índice BM25.
+    """
+
+    def __init__(self, faq_threshold=None, min_score=None, sources=("cv", "contexto"), max_sections=2):
+        self.faq_threshold = faq_threshold or Config.ADMISSION_FAQ_FALLBACK_THRESHOLD
+        self.min_score = min_score or Config.OFFLINE_MIN_RETRIEVAL_SCORE
+        self.sources = frozenset(sources)
+        self.max_sections = max_sections
+
+    def answer(self, message, faq_matcher, index):
+        """
+        Respuesta sin LLM
+
+        Args:
+            message (str): Mensaje del usuario
+            faq_matcher (FaqMatcher): Emparejador de la FAQ
+            index (ProfileIndex): Índice BM25 del perfil (None con RETRIEVAL_ENABLED=false)
+
+        Returns:
+            str | None: Respuesta, o None si nada del perfil se parece a la pregunta
+        """
+        score, entry = faq_matcher.best_match(message)
+        if entry is not None and score >= self.faq_threshold:
+            logger.debug(f"Respuesta sin LLM desde la FAQ: '{entry['pregunta']}' ({score:.2f})")
+            return entry["respuesta"]
+        if index is None:
+            return None
+
+        sections = [
+            readable_chunk(chunk)
+            for score, chunk in index.search(message, top_k=Config.RETRIEVAL_TOP_K * 2)
+            if chunk.get("source") in self.sources and score >= self.min_score
+        ][:self.max_sections]
+        if not sections:
+            return None
+        logger.debug(f"Respuesta sin LLM con {len(sections)} secciones del perfil")
+        return OFFLINE_PREFIX + "\n".join(sections)
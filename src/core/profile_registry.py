@@ -0,0 +1,350 @@
+"""
+Registro de perfiles: varias personas servidas desde un mismo proceso
+"""
+import json
+import os
+import re
+import sys
+import threading
+import time
+from src.config import Config
+from src.core.data_loader import DataLoader
+from src.core.faq_matcher import FaqMatcher
+from src.core.profile_watcher import ProfileWatcher
+from src.core.prompt_builder import PromptBuilder
+from src.core.source_cache import SourceCache
+from src.observability import get_logger, PROFILES_LOADED, PROFILE_ARTIFACT_BYTES, PROFILE_EVICTIONS
+
+logger = get_logger(__name__)
+
+PROFILE_ID_PATTERN = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+
+
+class UnknownProfileError(LookupError):
+    """No hay ningún perfil con ese identificador"""
+
+
+class SharedStrings:
+    """
+    Una sola copia en memoria de cada contenido repetido entre perfiles
+
+    Típicamente el contexto o la FAQ comunes a todo un equipo: cada perfil
+    los lee de su directorio, pero todos apuntan a la misma cadena.
+    """
+
+    def __init__(self):
+        self._strings = {}
+        self._lock = threading.Lock()
+
+    def share(self, text):
+        """
+        Args:
+            text (str): Contenido leído
+
+        Returns:
+            str: La copia compartida de un contenido igual, o el propio texto
+        """
+        with self._lock:
+            return self._strings.setdefault(text, text)
+
+    def prune(self, live):
+        """
+        Olvida los contenidos que ya no usa ningún perfil
+
+        Args:
+            live (iterable): Contenidos en uso
+        """
+        live_ids = {id(text) for text in live}
+        with self._lock:
+            self._strings = {text: text for text in self._strings if id(text) in live_ids}
+
+    def __len__(self):
+        return len(self._strings)
+
+
+def read_manifest(directory):
+    """
+    Lee el manifiesto opcional del perfil (Config.PROFILE_MANIFEST)
+
+    Returns:
+        dict: {"nombre", "rol", "email"} si existen; vacío si no hay manifiesto
+    """
+    path = os.path.join(directory, Config.PROFILE_MANIFEST)
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+        return manifest if isinstance(manifest, dict) else {}
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError) as e:
+        logger.warning(f"Manifiesto de perfil inválido en {path}: {e}")
+        return {}
+
+
+def profile_name(manifest, cv_content, default):
+    """Nombre de la persona: manifiesto, campo "nombre" del CV o el valor por defecto"""
+    if manifest.get("nombre"):
+        return manifest["nombre"]
+    try:
+        cv = json.loads(cv_content)
+    except (json.JSONDecodeError, TypeError):
+        return default
+    name = cv.get("nombre") if isinstance(cv, dict) else None
+    return name if isinstance(name, str) and name.strip() else default
+
+
+class Profile:
+    """
+    Datos de una persona y sus artefactos derivados
+
+    El snapshot de datos queda cargado; el prompt compilado, el índice BM25 y
+    el emparejador de la FAQ se pueden liberar (evict) y se reconstruyen
+    desde data/cache/ cuando se vuelven a necesitar.
+    """
+
+    def __init__(self, profile_id, directory, source_cache=None, share=None):
+        self.profile_id = profile_id
+        self.directory = directory
+        self.data_loader = DataLoader(directory, source_cache, share)
+        manifest = read_manifest(directory)
+        self.name = profile_name(manifest, self.data_loader.cv_content, profile_id)
+        self.email = manifest.get("email")  # Destinatario de los correos (None = Config.SMTP_EMAIL)
+        self.prompt_builder = PromptBuilder(self.data_loader, self.name, role=manifest.get("rol"))
+        self.watcher = ProfileWatcher(self.data_loader, on_reload=[self._rebuild])
+        self.last_used = time.monotonic()
+        self._faq_matcher = None
+        self._faq_version = None
+        self._sized = (None, None, 0)  # (artefactos, FAQ, bytes) de la última medida
+        self.last_bytes = 0  # Última medida con artefactos, para estimar la recarga
+
+    def data_version(self):
+        """
+        Versión de los datos cualificada con el perfil
+
+        Es la que entra en las claves de la caché de respuestas, compartida por
+        todos los perfiles: dos perfiles con los mismos datos no se mezclan.
+        """
+        return f"{self.profile_id}:{self.data_loader.data_version()}"
+
+    def faq_matcher(self):
+        """
+        Retorna el emparejador de FAQ para la versión actual de los datos
+
+        Returns:
+            FaqMatcher: Emparejador (se reconstruye si faq.json cambió)
+        """
+        snapshot = self.data_loader.snapshot
+        version = snapshot.source_versions.get("faq")
+        matcher = self._faq_matcher
+        if matcher is None or self._faq_version != version:
+            matcher = FaqMatcher(snapshot.faq_content)
+            self._faq_matcher, self._faq_version = matcher, version
+        return matcher
+
+    def resident(self):
+        """Si el prompt compilado y el índice están en memoria"""
+        return self.prompt_builder.cached() is not None
+
+    def resident_bytes(self):
+        """Memoria estimada de los artefactos en memoria (se mide una vez por versión)"""
+        artifacts, matcher = self.prompt_builder.cached(), self._faq_matcher
+        sized_artifacts, sized_matcher, size = self._sized
+        if artifacts is sized_artifacts and matcher is sized_matcher:
+            return size
+        size = 0
+        if artifacts is not None:
+            size += sys.getsizeof(artifacts.system_prompt)
+            if artifacts.index is not None:
+                size += artifacts.index.estimated_bytes()
+        if matcher is not None:
+            size += matcher.estimated_bytes()
+        self._sized = (artifacts, matcher, size)
+        if artifacts is not None:
+            self.last_bytes = size
+        return size
+
+    def evict(self):
+        """
+        Libera los artefactos derivados
+
+        Returns:
+            int: Bytes estimados liberados
+        """
+        freed = self.resident_bytes()
+        self.prompt_builder.evict()
+        self._faq_matcher = self._faq_version = None
+        return freed
+
+    def contents(self):
+        """Contenidos del snapshot actual (para SharedStrings.prune)"""
+        snapshot = self.data_loader.snapshot
+        return [snapshot.content(name) for name in ("cv", "contexto", "faq", "linkedin")]
+
+    def _rebuild(self):
+        """Tras una recarga en caliente: recompila solo si los artefactos estaban en memoria"""
+        if self.resident():
+            self.prompt_builder.rebuild()
+
+
+class ProfileRegistry:
+    """
+    Perfiles disponibles, cargados bajo demanda
+
+    El perfil por defecto vive en Config.DEFAULT_PROFILE_DIR y cada
+    subdirectorio de Config.PROFILES_DIR es un perfil más (mismos ficheros
+    que data/me/ y un perfil.json opcional). Los datos de un perfil se cargan
+    la primera vez que se pide; sus artefactos derivados se liberan, del menos
+    usado al más reciente, cuando el total supera PROFILE_ARTIFACTS_MAX_BYTES.
+    La caché de extracción y los contenidos iguales se comparten entre perfiles.
+    """
+
+    def __init__(self, root=None, default_id=None, default_dir=None, max_bytes=None):
+        self.root = root or Config.PROFILES_DIR
+        self.default_id = default_id or Config.DEFAULT_PROFILE_ID
+        self.default_dir = default_dir or Config.DEFAULT_PROFILE_DIR
+        self.max_bytes = max_bytes or Config.PROFILE_ARTIFACTS_MAX_BYTES
+        self.source_cache = SourceCache()
+        self.strings = SharedStrings()
+        self._profiles = {}
+        self._directories = {}
+        self._scanned_at = None
+        self._load_lock = threading.Lock()
+        self._evict_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self.loads = 0
+        self.evictions = 0
+
+    def ids(self):
+        """
+        Identificadores de los perfiles disponibles
+
+        Returns:
+            list: Ids ordenados (el directorio se vuelve a leer como mucho cada PROFILE_WATCH_INTERVAL)
+        """
+        return sorted(self._scan())
+
+    def exists(self, profile_id):
+        """Si hay un perfil con ese identificador (o es el perfil por defecto)"""
+        return profile_id is None or profile_id in self._profiles or profile_id in self._scan()
+
+    def get(self, profile_id=None, load=True):
+        """
+        Perfil por identificador, cargándolo si hace falta
+
+        Args:
+            profile_id (str): Identificador (None = perfil por defecto)
+            load (bool): Si es False y el perfil no está cargado, devuelve None
+
+        Returns:
+            Profile | None: Perfil
+
+        Raises:
+            UnknownProfileError: Si no existe el perfil
+        """
+        profile_id = profile_id or self.default_id
+        profile = self._profiles.get(profile_id)
+        if profile is None:
+            if not load:
+                return None
+            profile = self._load(profile_id)
+        profile.last_used = time.monotonic()
+        if not profile.resident():
+            self._make_room(profile)
+        return profile
+
+    def stats(self):
+        """Perfiles conocidos, cargados y residentes, memoria de artefactos y expulsiones"""
+        profiles = list(self._profiles.values())
+        return {
+            "known": len(self._scan()),
+            "loaded": len(profiles),
+            "resident": sum(1 for profile in profiles if profile.resident()),
+            "artifact_bytes": sum(profile.resident_bytes() for profile in profiles),
+            "max_bytes": self.max_bytes,
+            "shared_strings": len(self.strings),
+            "loads": self.loads,
+            "evictions": self.evictions
+        }
+
+    def start_watching(self, interval=None):
+        """Arranca un único hilo que vigila los cambios de todos los perfiles cargados"""
+        if self._thread is None:
+            interval = interval or Config.PROFILE_WATCH_INTERVAL
+            self._thread = threading.Thread(target=self._watch, args=(interval,), name="profile-watcher", daemon=True)
+            self._thread.start()
+            logger.info(f"Vigilando cambios en los datos de los perfiles cada {interval}s")
+        return self
+
+    def stop_watching(self):
+        """Detiene el hilo de vigilancia"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(Config.PROFILE_WATCH_INTERVAL * 2)
+            self._thread = None
+
+    def _scan(self):
+        """Directorios de perfil por id, releyendo PROFILES_DIR como mucho cada PROFILE_WATCH_INTERVAL"""
+        now = time.monotonic()
+        if self._scanned_at is not None and now - self._scanned_at < Config.PROFILE_WATCH_INTERVAL:
+            return self._directories
+        directories = {self.default_id: self.default_dir}
+        try:
+            with os.scandir(self.root) as entries:
+                for entry in entries:
+                    if entry.is_dir() and PROFILE_ID_PATTERN.match(entry.name):
+                        directories.setdefault(entry.name, entry.path)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.warning(f"No se pudo leer el directorio de perfiles {self.root}: {e}")
+        self._directories, self._scanned_at = directories, now
+        return directories
+
+    def _load(self, profile_id):
+        """Carga los datos de un perfil (una sola vez aunque lleguen varias peticiones a la vez)"""
+        directory = self._scan().get(profile_id)
+        if directory is None:
+            raise UnknownProfileError(f"Perfil desconocido: {profile_id}")
+        with self._load_lock:
+            profile = self._profiles.get(profile_id)
+            if profile is None:
+                profile = Profile(profile_id, directory, self.source_cache, self.strings.share)
+                self._profiles[profile_id] = profile
+                self.loads += 1
+                PROFILES_LOADED.set(len(self._profiles))
+                logger.info(f"Perfil {profile_id} cargado: {profile.name} ({directory})")
+            return profile
+
+    def _make_room(self, profile):
+        """
+        Libera artefactos de los perfiles menos usados antes de que `profile` compile los suyos
+
+        Se estima lo que ocupará con su última medida o con la media de los residentes.
+        """
+        with self._evict_lock:
+            profiles = list(self._profiles.values())
+            sizes = {p.profile_id: p.resident_bytes() for p in profiles}
+            resident = [size for size in sizes.values() if size]
+            needed = profile.last_bytes or (sum(resident) // len(resident) if resident else 0)
+            total = sum(sizes.values())
+            for cold in sorted(profiles, key=lambda p: p.last_used):
+                if total + needed <= self.max_bytes:
+                    break
+                if cold is profile or not sizes[cold.profile_id]:
+                    continue
+                total -= cold.evict()
+                self.evictions += 1
+                PROFILE_EVICTIONS.inc()
+                logger.debug(f"Artefactos del perfil {cold.profile_id} liberados ({sizes[cold.profile_id]} bytes)")
+            PROFILE_ARTIFACT_BYTES.set(total)
+
+    def _watch(self, interval):
+        """Bucle de sondeo de los perfiles cargados; tras una recarga se olvidan los contenidos sin uso"""
+        while not self._stop.wait(interval):
+            profiles = list(self._profiles.values())
+            versions = [profile.data_loader.data_version() for profile in profiles]
+            for profile in profiles:
+                profile.watcher.poll()
+            if versions != [profile.data_loader.data_version() for profile in profiles]:
+                self.strings.prune(text for profile in profiles for text in profile.contents())
@@ -0,0 +1,86 @@
+"""
+Vigilancia de los datos del perfil para recargarlos en caliente
+"""
+import threading
+from src.config import Config
+from src.observability import get_logger
+
+logger = get_logger(__name__)
+
+
+class ProfileWatcher:
+    """
+    Vigila por sondeo los ficheros de data/me/ y recarga solo los modificados
+
+    Se usa sondeo de (tamaño, mtime) en lugar de inotify para no añadir
+    dependencias y funcionar igual en cualquier sistema. Un cambio se aplica
+    cuando la firma se mantiene estable entre dos sondeos, para no recargar
+    un fichero a medio escribir.
+    """
+
+    def __init__(self, data_loader, on_reload=None, interval=None):
+        """
+        Args:
+            data_loader (DataLoader): Cargador cuyos datos se vigilan
+            on_reload (list): Funciones a llamar tras publicar un snapshot nuevo
+            interval (float): Segundos entre sondeos
+        """
+        self.data_loader = data_loader
+        self.on_reload = list(on_reload or [])
+        self.interval = interval or Config.PROFILE_WATCH_INTERVAL
+        self._stop = threading.Event()
+        self._thread = None
+        self._pending = None
+
+    def start(self):
+        """Arranca el hilo de vigilancia"""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="profile-watcher", daemon=True)
+            self._thread.start()
+            logger.info(f"Vigilando cambios en los datos del perfil cada {self.interval}s")
+        return self
+
+    def stop(self):
+        """Detiene el hilo de vigilancia"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(self.interval * 2)
+            self._thread = None
+
+    def _run(self):
+        """Bucle de sondeo"""
+        while not self._stop.wait(self.interval):
+            self.poll()
+
+    def poll(self):
+        """
+        Un sondeo: recarga si un cambio se mantuvo estable desde el sondeo anterior
+
+        Permite que un solo hilo vigile varios perfiles (ver ProfileRegistry).
+        """
+        try:
+            changed = self.data_loader.changed_sources()
+            signatures = self.data_loader.source_signatures() if changed else None
+            if not changed:
+                self._pending = None
+            elif self._pending != signatures:
+                self._pending = signatures  # Esperar a que el fichero deje de cambiar
+            else:
+                self._pending = None
+                self.check_now()
+        except Exception as e:
+            logger.error(f"Error vigilando los datos del perfil: {e}")
+
+    def check_now(self):
+        """
+        Recarga las fuentes modificadas y reconstruye los artefactos derivados
+
+        Returns:
+            set: Fuentes recargadas
+        """
+        changed = self.data_loader.refresh()
+        if changed:
+            for callback in self.on_reload:
+                callback()
+            logger.info(f"✅ Datos del perfil actualizados en caliente ({', '.join(sorted(changed))})")
+        return changed
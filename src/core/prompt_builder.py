@@ -0,0 +1,243 @@
+"""
+Compilación y caché del prompt del sistema
+"""
+import hashlib
+import os
+import threading
+from dataclasses import dataclass
+from src.config import Config
+from src.core.retrieval import load_or_build_index
+from src.observability import get_logger
+
+logger = get_logger(__name__)
+
+# Incrementar al cambiar la plantilla para invalidar los artefactos en disco
+PROMPT_FORMAT_VERSION = 1
+
+# Rol del perfil por defecto; otros perfiles lo indican en "rol" de su perfil.json
+DEFAULT_ROLE = "desarrollador fullstack especializado en Angular, Spring Boot y asistentes de IA"
+
+
+@dataclass(frozen=True)
+class PromptArtifacts:
+    """Artefactos derivados de un snapshot de datos, publicados de forma atómica"""
+
+    version: str
+    data_version: str
+    system_prompt: str
+    index: object = None
+
+
+class PromptBuilder:
+    """
+    Compila el prompt del sistema una vez por versión de los datos
+
+    El prompt resultante es un prefijo estable, byte a byte idéntico entre
+    turnos, para que la caché de prompts del proveedor acierte siempre. Las
+    partes volátiles (estado de la sesión, sugerencias) nunca entran aquí.
+    """
+
+    def __init__(self, data_loader, name, cache_dir=None, use_retrieval=None, role=None):
+        self.data_loader = data_loader
+        self.name = name
+        self.role = role or DEFAULT_ROLE
+        self.cache_dir = cache_dir or Config.CACHE_DIR
+        self.use_retrieval = Config.RETRIEVAL_ENABLED if use_retrieval is None else use_retrieval
+        self._artifacts = None
+        self._lock = threading.Lock()
+
+    def prompt_version(self, snapshot=None):
+        """
+        Calcula la versión del prompt (plantilla + configuración + datos)
+
+        Args:
+            snapshot (ProfileSnapshot): Datos del perfil (por defecto el snapshot actual)
+
+        Returns:
+            str: Identificador corto de la versión
+        """
+        snapshot = snapshot or self.data_loader.snapshot
+        retrieval = ",".join(Config.RETRIEVAL_CORE_SECTIONS) if self.use_retrieval else "-"
+        key = (
+            f"{PROMPT_FORMAT_VERSION}|{self.name}|{self.role}|{Config.MAX_RESPONSE_LENGTH}|"
+            f"{retrieval}|{snapshot.version}"
+        )
+        return hashlib.sha256(key.encode("utf-8")).hexdigest()[:16]
+
+    def artifacts(self):
+        """
+        Retorna los artefactos compilados para el snapshot de datos actual
+
+        Si los datos cambiaron se compilan los nuevos artefactos y se publican
+        con una sola asignación; quien ya tenga los anteriores los sigue usando.
+
+        Returns:
+            PromptArtifacts: Prompt del sistema e índice de recuperación
+        """
+        snapshot = self.data_loader.snapshot
+        current = self._artifacts
+        if current is not None and current.data_version == snapshot.version:
+            return current
+
+        with self._lock:
+            current = self._artifacts
+            if current is None or current.data_version != snapshot.version:
+                current = self._compile_artifacts(snapshot, current)
+                self._artifacts = current
+            return current
+
+    def rebuild(self):
+        """Compila por adelantado los artefactos del snapshot actual"""
+        return self.artifacts()
+
+    def cached(self):
+        """Artefactos en memoria, sin compilarlos (None si no hay o se liberaron)"""
+        return self._artifacts
+
+    def evict(self):
+        """
+        Libera los artefactos en memoria
+
+        Se vuelven a cargar desde data/cache/ la próxima vez que se pidan; quien
+        ya los tenga en un turno en curso los sigue usando.
+        """
+        with self._lock:
+            self._artifacts = None
+
+    def get_system_prompt(self):
+        """
+        Retorna el prompt del sistema compilado para la versión actual de los datos
+
+        Returns:
+            str: Prompt del sistema
+        """
+        return self.artifacts().system_prompt
+
+    def retrieve(self, message, artifacts=None):
+        """
+        Busca las secciones del perfil (fuera del núcleo fijo) relevantes para el mensaje
+
+        Args:
+            message (str): Mensaje del usuario
+            artifacts (PromptArtifacts): Artefactos a usar (por defecto los actuales)
+
+        Returns:
+            list: Tuplas (puntuación BM25, fragmento); vacía si la recuperación está desactivada
+        """
+        if not self.use_retrieval:
+            return []
+        artifacts = artifacts or self.artifacts()
+        return artifacts.index.search(message, Config.RETRIEVAL_TOP_K, exclude=Config.RETRIEVAL_CORE_SECTIONS)
+
+    def relevant_context(self, message, artifacts=None, results=None):
+        """
+        Selecciona las secciones del perfil relevantes para el mensaje actual
+        
+        Se envía como un mensaje aparte, después del prefijo estable, para no
+        romper la caché de prompts del proveedor.
+
+        Args:
+            message (str): Mensaje del usuario
+            artifacts (PromptArtifacts): Artefactos a usar (por defecto los actuales)
+            results (list): Resultado de retrieve() si ya se calculó
+
+        Returns:
+            str | None: Secciones relevantes, o None si la recuperación está desactivada
+        """
+        if not self.use_retrieval:
+            return None
+        if results is None:
+            results = self.retrieve(message, artifacts)
+        if not results:
+            return None
+        sections = "\n\n".join(chunk["text"] for _, chunk in results)
+        return f"## Secciones relevantes del perfil para esta pregunta:\n{sections}"
+
+    def _compile_artifacts(self, snapshot, previous):
+        """Construye índice y prompt para un snapshot, reutilizando lo que no cambió"""
+        version = self.prompt_version(snapshot)
+        index = None
+        if self.use_retrieval:
+            index = load_or_build_index(snapshot, self.cache_dir, previous.index if previous else None)
+        prompt = self._load_artifact(version) or self._compile(version, snapshot, index)
+        return PromptArtifacts(version, snapshot.version, prompt, index)
+
+    def _artifact_path(self, version):
+        """Ruta del artefacto en disco para una versión"""
+        return os.path.join(self.cache_dir, f"system_prompt-{version}.txt")
+
+    def _load_artifact(self, version):
+        """Carga el prompt compilado desde disco si existe"""
+        path = self._artifact_path(version)
+        try:
+            with open(path, "r", encoding="utf-8", newline="") as f:
+                prompt = f.read()
+            logger.info(f"Prompt del sistema reutilizado desde caché: {path}")
+            return prompt
+        except FileNotFoundError:
+            return None
+        except OSError as e:
+            logger.warning(f"No se pudo leer el prompt en caché: {e}")
+            return None
+
+    def _compile(self, version, snapshot, index):
+        """Construye el prompt y lo guarda en disco de forma atómica"""
+        prompt = self._render(snapshot, index)
+        path = self._artifact_path(version)
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8", newline="") as f:
+                f.write(prompt)
+            os.replace(tmp_path, path)
+            logger.info(f"Prompt del sistema compilado: {len(prompt)} caracteres (versión {version})")
+        except OSError as e:
+            logger.warning(f"No se pudo guardar el prompt en caché: {e}")
+        return prompt
+
+    def _render(self, snapshot, index):
+        """
+        Renderiza la plantilla del prompt con los datos del perfil
+
+        Args:
+            snapshot (ProfileSnapshot): Datos del perfil
+            index (ProfileIndex): Índice de recuperación (si está activada)
+
+        Returns:
+            str: Prompt del sistema
+        """
+        return (
+            f"Eres {self.name}, {self.role}. "
+            f"Estás respondiendo en tu página web personal como asistente profesional. "
+            f"Tu función es contestar preguntas sobre tu carrera, formación, habilidades, proyectos y experiencia. "
+            f"Debes sonar profesional, auténtico y técnicamente competente, como si hablaras con un posible cliente o empleador. "
+            f"IMPORTANTE: Cuando respondas preguntas sobre contratación o valor profesional, estructura tu respuesta de forma persuasiva: "
+            f"1) Destaca beneficios concretos y diferenciadores, 2) Menciona experiencia relevante con ejemplos, "
+            f"3) Conecta habilidades con valor para el empleador, 4) Termina con una propuesta de acción. "
+            f"Si no sabes responder, usa la herramienta 'record_unknown_question'. "
+            f"Si el usuario parece interesado, pide su email y usa 'record_user_details'. "
+            f"Cuando el usuario quiera enviarte un email, usa 'send_email_to_me' con un asunto apropiado basado en el contexto. "
+            f"Responde siempre con menos de {Config.MAX_RESPONSE_LENGTH} caracteres.\n\n"
+            f"{self._render_profile(snapshot, index)}"
+            f"Con este contexto completo, chatea representando a {self.name} de forma fiel y profesional."
+        )
+
+    def _render_profile(self, snapshot, index):
+        """
+        Renderiza los datos del perfil incluidos en el prefijo
+        
+        Returns:
+            str: Perfil completo, o solo el núcleo fijo si se usa recuperación
+        """
+        if self.use_retrieval:
+            core = "\n".join(chunk["text"] for chunk in index.get_chunks(Config.RETRIEVAL_CORE_SECTIONS))
+            return (
+                f"## Perfil esencial:\n{core}\n\n"
+                f"En cada pregunta recibirás además las secciones del perfil relevantes para responderla.\n\n"
+            )
+        return (
+            f"## CV Completo:\n{snapshot.cv_content}\n\n"
+            f"## Contexto Profesional:\n{snapshot.contexto_content}\n\n"
+            f"## Preguntas Frecuentes:\n{snapshot.faq_content}\n\n"
+            f"## Perfil de LinkedIn:\n{snapshot.linkedin_content}\n\n"
+        )
@@ -0,0 +1,312 @@
+"""
+Resiliencia de las llamadas al LLM: plazos, reintentos con backoff y circuit breaker
+"""
+import asyncio
+import random
+import threading
+import time
+from collections import deque
+from functools import cache
+from src.config import Config
+from src.core.llm_client import LLMClient
+from src.observability import get_logger, LLM_CIRCUIT_OPEN, LLM_RETRIES
+
+logger = get_logger(__name__)
+
+STATE_CLOSED = "closed"
+STATE_OPEN = "open"
+STATE_HALF_OPEN = "half_open"
+
+
+@cache
+def transient_errors():
+    """
+    Errores transitorios del proveedor: se reintentan y cuentan para el breaker
+
+    Un 400 o una cassette sin la petición no dicen nada de la salud del
+    proveedor. Es una función para no importar openai al cargar el módulo.
+
+    Returns:
+        tuple: Clases de excepción
+    """
+    from openai import APIConnectionError, InternalServerError, RateLimitError
+    return APIConnectionError, InternalServerError, RateLimitError, TimeoutError, ConnectionError
+
+
+class CircuitOpenError(RuntimeError):
+    """El circuit breaker está abierto: la llamada no se intenta"""
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker por tasa de errores y de llamadas lentas
+
+    Cuenta el resultado de las últimas `window` llamadas. Con al menos
+    `min_calls`, se abre si la proporción de errores alcanza `failure_rate` o
+    la de llamadas más lentas que `slow_call_seconds` alcanza `slow_call_rate`.
+    Abierto, rechaza las llamadas durante `open_seconds`; después deja pasar
+    una sola llamada de prueba (semiabierto) que lo cierra o lo vuelve a abrir.
+    """
+
+    def __init__(self, window=None, min_calls=None, failure_rate=None, slow_call_seconds=None,
+                 slow_call_rate=None, open_seconds=None):
+        self.window = window or Config.CIRCUIT_WINDOW
+        self.min_calls = min_calls or Config.CIRCUIT_MIN_CALLS
+        self.failure_rate = failure_rate or Config.CIRCUIT_FAILURE_RATE
+        self.slow_call_seconds = slow_call_seconds or Config.CIRCUIT_SLOW_CALL_SECONDS
+        self.slow_call_rate = slow_call_rate or Config.CIRCUIT_SLOW_CALL_RATE
+        self.open_seconds = open_seconds or Config.CIRCUIT_OPEN_SECONDS
+        self._lock = threading.Lock()
+        self._outcomes = deque(maxlen=self.window)  # (falló, lenta)
+        self._state = STATE_CLOSED
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self.trips = 0
+
+    @property
+    def state(self):
+        """Estado actual (closed, open o half_open)"""
+        with self._lock:
+            self._maybe_half_open()
+            return self._state
+
+    def available(self):
+        """Si una llamada se intentaría ahora (sin consumir la llamada de prueba)"""
+        with self._lock:
+            self._maybe_half_open()
+            return self._state == STATE_CLOSED or (self._state == STATE_HALF_OPEN and not self._probe_in_flight)
+
+    def allow(self):
+        """
+        Pide permiso para una llamada
+
+        Returns:
+            bool: True si la llamada puede hacerse (en semiabierto, solo la de prueba)
+        """
+        with self._lock:
+            self._maybe_half_open()
+            if self._state == STATE_CLOSED:
+                return True
+            if self._state == STATE_HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return True
+            return False
+
+    def record(self, failed, seconds):
+        """
+        Registra el resultado de una llamada permitida
+
+        Args:
+            failed (bool): Si falló con un error transitorio
+            seconds (float): Duración de la llamada
+        """
+        slow = seconds >= self.slow_call_seconds
+        with self._lock:
+            if self._state == STATE_HALF_OPEN:
+                self._probe_in_flight = False
+                if failed or slow:
+                    self._open()
+                else:
+                    self._state = STATE_CLOSED
+                    self._outcomes.clear()
+                    LLM_CIRCUIT_OPEN.set(0)
+                    logger.info("Circuit breaker del LLM cerrado: el proveedor responde de nuevo")
+                return
+            self._outcomes.append((failed, slow))
+            if self._state != STATE_CLOSED or len(self._outcomes) < self.min_calls:
+                return
+            failures = sum(1 for f, _ in self._outcomes if f) / len(self._outcomes)
+            slow_calls = sum(1 for _, s in self._outcomes if s) / len(self._outcomes)
+            if failures >= self.failure_rate or slow_calls >= self.slow_call_rate:
+                self._open()
+
+    def release(self):
+        """Libera la llamada de prueba si se abandonó sin resultado (cancelación)"""
+        with self._lock:
+            self._probe_in_flight = False
+
+    def stats(self):
+        """Estado, aperturas y ventana actual"""
+        with self._lock:
+            self._maybe_half_open()
+            return {
+                "state": self._state,
+                "trips": self.trips,
+                "window_calls": len(self._outcomes),
+                "window_failures": sum(1 for f, _ in self._outcomes if f),
+                "window_slow": sum(1 for _, s in self._outcomes if s)
+            }
+
+    def _open(self):
+        """Abre el circuito (con el lock tomado)"""
+        self._state = STATE_OPEN
+        self._opened_at = time.monotonic()
+        self._outcomes.clear()
+        self.trips += 1
+        LLM_CIRCUIT_OPEN.set(1)
+        logger.warning(f"Circuit breaker del LLM abierto durante {self.open_seconds:.0f} s: respuestas sin LLM")
+
+    def _maybe_half_open(self):
+        """Pasa a semiabierto cuando vence el tiempo de apertura (con el lock tomado)"""
+        if self._state == STATE_OPEN and time.monotonic() - self._opened_at >= self.open_seconds:
+            self._state = STATE_HALF_OPEN
+            self._probe_in_flight = False
+
+
+def backoff_delay(attempt, base=None, cap=None):
+    """
+    Espera antes del reintento `attempt` (0, 1, ...): backoff exponencial con jitter completo
+
+    Returns:
+        float: Segundos de espera, entre 0 y min(cap, base * 2^attempt)
+    """
+    base = base or Config.LLM_RETRY_BACKOFF_SECONDS
+    cap = cap or Config.LLM_RETRY_BACKOFF_MAX_SECONDS
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+class _GuardedStream:
+    """Stream que cuenta los fallos a mitad de respuesta y aplica el plazo total"""
+
+    def __init__(self, stream, breaker, deadline):
+        self._stream = stream
+        self._breaker = breaker
+        self._deadline = deadline
+
+    def __iter__(self):
+        try:
+            for chunk in self._stream:
+                self._check_deadline()
+                yield chunk
+        except transient_errors():
+            self._breaker.record(True, 0.0)
+            raise
+
+    def _check_deadline(self):
+        if time.monotonic() > self._deadline:
+            raise TimeoutError(f"Streaming del LLM por encima de {Config.LLM_STREAM_DEADLINE_SECONDS:.0f} s")
+
+    def close(self):
+        self._stream.close()
+
+
+class _AsyncGuardedStream(_GuardedStream):
+    """Variante asíncrona de _GuardedStream"""
+
+    async def __aiter__(self):
+        try:
+            async for chunk in self._stream:
+                self._check_deadline()
+                yield chunk
+        except transient_errors():
+            self._breaker.record(True, 0.0)
+            raise
+
+    async def close(self):
+        await self._stream.close()
+
+
+class ResilientClient(LLMClient):
+    """
+    Envuelve un cliente LLM con reintentos, plazos y circuit breaker
+
+    Los errores transitorios se reintentan con backoff exponencial y jitter
+    mientras quede presupuesto (LLM_TIMEOUT_SECONDS desde el primer intento),
+    de modo que una llamada nunca tarda mucho más que dos plazos. En streaming
+    solo se reintenta la apertura del stream, nunca a mitad de respuesta.
+    """
+
+    def __init__(self, inner, breaker=None, max_retries=None, timeout=None):
+        self.inner = inner
+        self.breaker = breaker or CircuitBreaker()
+        self.max_retries = Config.LLM_MAX_RETRIES if max_retries is None else max_retries
+        self.timeout = timeout or Config.LLM_TIMEOUT_SECONDS
+        self.retries = 0
+
+    def available(self):
+        return self.breaker.available()
+
+    def prepare(self):
+        transient_errors()
+        self.inner.prepare()
+
+    async def awarm_up(self):
+        await self.inner.awarm_up()
+
+    def create(self, **request):
+        started = time.monotonic()
+        attempt = 0
+        while True:
+            self._admit()
+            call_started = time.monotonic()
+            try:
+                response = self.inner.create(**request)
+            except transient_errors() as e:
+                self.breaker.record(True, time.monotonic() - call_started)
+                delay = self._retry_delay(e, attempt, started)
+                time.sleep(delay)
+                attempt += 1
+                continue
+            except BaseException as e:
+                self._not_transient(e, call_started)
+                raise
+            return self._succeeded(response, request, call_started, _GuardedStream)
+
+    async def acreate(self, **request):
+        started = time.monotonic()
+        attempt = 0
+        while True:
+            self._admit()
+            call_started = time.monotonic()
+            try:
+                remaining = max(self.timeout - (call_started - started), 0.1)
+                response = await asyncio.wait_for(self.inner.acreate(**request), remaining)
+            except (asyncio.TimeoutError, *transient_errors()) as e:
+                self.breaker.record(True, time.monotonic() - call_started)
+                delay = self._retry_delay(e, attempt, started)
+                await asyncio.sleep(delay)
+                attempt += 1
+                continue
+            except BaseException as e:
+                self._not_transient(e, call_started)
+                raise
+            return self._succeeded(response, request, call_started, _AsyncGuardedStream)
+
+    def close(self):
+        self.inner.close()
+
+    def stats(self):
+        return {**self.inner.stats(), "retries": self.retries, "circuit": self.breaker.stats()}
+
+    def _admit(self):
+        if not self.breaker.allow():
+            raise CircuitOpenError("Circuit breaker del LLM abierto")
+
+    def _not_transient(self, error, call_started):
+        """Un error no transitorio cuenta como respuesta del proveedor; una cancelación, como nada"""
+        if isinstance(error, Exception):
+            self.breaker.record(False, time.monotonic() - call_started)
+        else:
+            self.breaker.release()
+
+    def _succeeded(self, response, request, call_started, stream_type):
+        self.breaker.record(False, time.monotonic() - call_started)
+        if request.get("stream"):
+            return stream_type(response, self.breaker, call_started + Config.LLM_STREAM_DEADLINE_SECONDS)
+        return response
+
+    def _retry_delay(self, error, attempt, started):
+        """
+        Espera antes de reintentar, o relanza el error si no quedan intentos o presupuesto
+
+        Returns:
+            float: Segundos a esperar
+        """
+        delay = backoff_delay(attempt)
+        out_of_budget = time.monotonic() - started + delay > self.timeout
+        if attempt >= self.max_retries or out_of_budget or not self.breaker.available():
+            raise error
+        self.retries += 1
+        LLM_RETRIES.inc(error=type(error).__name__)
+        logger.warning(f"Reintento {attempt + 1} de la llamada al LLM en {delay:.2f} s: {type(error).__name__}")
+        return delay
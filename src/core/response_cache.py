@@ -0,0 +1,262 @@
+"""
+Caché semántica de respuestas para preguntas repetidas
+"""
+import hashlib
+import math
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from dataclasses import dataclass
+from src.config import Config
+from src.core.text_utils import normalize_text, tokenize, is_negated
+
+# Coste aproximado en memoria de cada componente del vector disperso
+VECTOR_ENTRY_BYTES = 64
+ENTRY_OVERHEAD_BYTES = 256
+
+
+def hash_vectorize(text, buckets=None):
+    """
+    Vectoriza texto con el truco del hashing, sin vocabulario ni palabras vacías
+
+    Las negaciones se conservan aunque sean palabras vacías: "¿no X?" no
+    debe parecerse tanto a "¿X?" como para compartir respuesta.
+
+    Args:
+        text (str): Texto original
+        buckets (int): Número de posiciones del vector
+
+    Returns:
+        dict: Vector disperso normalizado {posición: peso}
+    """
+    buckets = buckets or Config.RESPONSE_CACHE_VECTOR_BUCKETS
+    vector = {}
+    for feature in tokenize(text, keep_negation=True):
+        bucket = zlib.crc32(feature.encode("utf-8")) % buckets
+        vector[bucket] = vector.get(bucket, 0.0) + 1.0
+    norm = math.sqrt(sum(weight * weight for weight in vector.values()))
+    if norm:
+        vector = {bucket: weight / norm for bucket, weight in vector.items()}
+    return vector
+
+
+def _cosine(a, b):
+    """Similitud coseno entre dos vectores dispersos normalizados"""
+    if len(a) > len(b):
+        a, b = b, a
+    return sum(weight * b.get(bucket, 0.0) for bucket, weight in a.items())
+
+
+@dataclass(slots=True)
+class CacheEntry:
+    """Respuesta cacheada junto con los datos para el emparejamiento aproximado"""
+
+    response: str
+    context_key: str
+    vector: dict
+    negated: bool
+    size: int
+    created_at: float
+
+
+class ResponseCache:
+    """
+    Caché LRU con caducidad por TTL y límite de memoria
+
+    La clave combina la pregunta normalizada, la versión de los datos del
+    perfil y una huella de todo el historial: una ventana reciente no basta,
+    porque dos conversaciones con distinto contexto anterior compartirían
+    respuesta. En la práctica se reutilizan los primeros turnos y las
+    conversaciones idénticas. Si no hay coincidencia
+    exacta, se busca la pregunta más parecida con el mismo contexto y la
+    misma negación. Los candidatos salen de un índice invertido por posición
+    del vector (primero las menos frecuentes) y se limitan a
+    RESPONSE_CACHE_FUZZY_CANDIDATES; la similitud se calcula fuera del lock.
+    """
+
+    def __init__(self, max_entries=None, max_bytes=None, ttl_seconds=None, fuzzy_threshold=None):
+        self.max_entries = max_entries or Config.RESPONSE_CACHE_MAX_ENTRIES
+        self.max_bytes = max_bytes or Config.RESPONSE_CACHE_MAX_BYTES
+        self.ttl_seconds = ttl_seconds or Config.RESPONSE_CACHE_TTL_SECONDS
+        self.fuzzy_threshold = fuzzy_threshold or Config.RESPONSE_CACHE_FUZZY_THRESHOLD
+        self._entries = OrderedDict()
+        self._postings = {}  # (context_key, posición del vector) -> set de claves, para el nivel aproximado
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.exact_hits = 0
+        self.fuzzy_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def _context_key(data_version, history):
+        """Resume la versión de los datos y el historial completo"""
+        digest = hashlib.sha256(data_version.encode("utf-8"))
+        for msg in history or []:
+            if isinstance(msg, dict):
+                digest.update(f"\0{msg.get('role')}\0{normalize_text(str(msg.get('content') or ''))}".encode("utf-8"))
+        return digest.hexdigest()
+
+    def key(self, message, history, data_version):
+        """
+        Clave exacta de una pregunta: versión de datos, historial y pregunta normalizada
+
+        Returns:
+            str | None: Clave, o None si la pregunta queda vacía al normalizarla
+        """
+        question = normalize_text(message)
+        if not question:
+            return None
+        return f"{self._context_key(data_version, history)}:{question}"
+
+    def get(self, message, history, data_version):
+        """
+        Busca una respuesta cacheada para la pregunta
+
+        Args:
+            message (str): Mensaje del usuario
+            history (list): Historial de conversación
+            data_version (str): Versión de los datos del perfil
+
+        Returns:
+            str | None: Respuesta cacheada, o None si no hay coincidencia
+        """
+        key = self.key(message, history, data_version)
+        if key is None:
+            return None
+        context_key = key.partition(":")[0]
+        now = time.time()
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and now - entry.created_at <= self.ttl_seconds:
+                self._entries.move_to_end(key)
+                self.exact_hits += 1
+                return entry.response
+
+        vector = hash_vectorize(message)
+        negated = is_negated(message)
+        with self._lock:
+            candidates = self._candidates(context_key, vector)
+
+        # Similitud fuera del lock: las entradas son inmutables una vez guardadas
+        best_key, best_entry, best_score = None, None, 0.0
+        for candidate_key, candidate in candidates:
+            if candidate.negated != negated or now - candidate.created_at > self.ttl_seconds:
+                continue
+            score = _cosine(vector, candidate.vector)
+            if score > best_score:
+                best_key, best_entry, best_score = candidate_key, candidate, score
+
+        with self._lock:
+            if best_entry is not None and best_score >= self.fuzzy_threshold:
+                if self._entries.get(best_key) is best_entry:
+                    self._entries.move_to_end(best_key)
+                self.fuzzy_hits += 1
+                return best_entry.response
+            self.misses += 1
+            return None
+
+    def _candidates(self, context_key, vector):
+        """
+        Entradas del mismo contexto que comparten alguna posición con el vector (con el lock tomado)
+
+        Se recorren primero las posiciones con menos entradas, que son las que
+        más discriminan, hasta reunir RESPONSE_CACHE_FUZZY_CANDIDATES.
+
+        Returns:
+            list: Pares (clave, CacheEntry)
+        """
+        postings = [self._postings.get((context_key, bucket)) for bucket in vector]
+        postings = sorted((keys for keys in postings if keys), key=len)
+        limit = Config.RESPONSE_CACHE_FUZZY_CANDIDATES
+        selected = {}
+        for keys in postings:
+            for candidate_key in keys:
+                if candidate_key not in selected:
+                    selected[candidate_key] = self._entries[candidate_key]
+                    if len(selected) >= limit:
+                        return list(selected.items())
+        return list(selected.items())
+
+    def put(self, message, history, data_version, response):
+        """
+        Guarda una respuesta en la caché
+
+        Args:
+            message (str): Mensaje del usuario
+            history (list): Historial de conversación
+            data_version (str): Versión de los datos del perfil
+            response (str): Respuesta generada
+        """
+        key = self.key(message, history, data_version)
+        if key is None or not response:
+            return
+        context_key = key.partition(":")[0]
+        vector = hash_vectorize(message)
+        negated = is_negated(message)
+        size = (
+            len(response.encode("utf-8")) + len(key) + len(vector) * VECTOR_ENTRY_BYTES + ENTRY_OVERHEAD_BYTES
+        )
+        if size > self.max_bytes:
+            return
+
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = CacheEntry(response, context_key, vector, negated, size, time.time())
+            for bucket in vector:
+                self._postings.setdefault((context_key, bucket), set()).add(key)
+            self._bytes += size
+            self._evict()
+
+    def _remove(self, key):
+        """Elimina una entrada manteniendo los índices auxiliares"""
+        entry = self._entries.pop(key)
+        self._bytes -= entry.size
+        for bucket in entry.vector:
+            posting = (entry.context_key, bucket)
+            keys = self._postings.get(posting)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._postings[posting]
+
+    def _evict(self):
+        """Expulsa entradas caducadas o las menos usadas hasta cumplir los límites"""
+        cutoff = time.time() - self.ttl_seconds
+        while self._entries:
+            oldest_key, oldest = next(iter(self._entries.items()))
+            within_limits = len(self._entries) <= self.max_entries and self._bytes <= self.max_bytes
+            if within_limits and oldest.created_at >= cutoff:
+                break
+            self._remove(oldest_key)
+            self.evictions += 1
+
+    def clear(self):
+        """Vacía la caché"""
+        with self._lock:
+            self._entries.clear()
+            self._postings.clear()
+            self._bytes = 0
+
+    def stats(self):
+        """
+        Estadísticas de uso de la caché
+
+        Returns:
+            dict: Aciertos, fallos, tasa de acierto, memoria usada y expulsiones
+        """
+        with self._lock:
+            hits = self.exact_hits + self.fuzzy_hits
+            total = hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "exact_hits": self.exact_hits,
+                "fuzzy_hits": self.fuzzy_hits,
+                "misses": self.misses,
+                "hit_rate": hits / total if total else 0.0,
+                "evictions": self.evictions
+            }
@@ -0,0 +1,249 @@
+"""
+Índice de recuperación local (BM25) sobre los datos del perfil
+"""
+import json
+import math
+import os
+import sys
+from collections import Counter
+from src.config import Config
+from src.core.text_utils import compact_json, tokenize
+from src.observability import get_logger
+
+logger = get_logger(__name__)
+
+# Incrementar al cambiar el troceado o el formato para invalidar los índices en disco
+INDEX_FORMAT_VERSION = 2
+
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+# Estimación de memoria: entrada de diccionario por término y estructura de cada fragmento
+TERM_ENTRY_BYTES = 64
+CHUNK_OVERHEAD_BYTES = 400
+
+
+def chunk_json(source, content, max_chars=None):
+    """
+    Trocea un documento JSON por secciones, bajando de nivel si una sección es muy larga
+
+    Args:
+        source (str): Nombre de la fuente ("cv", "contexto", "faq")
+        content (str): JSON serializado
+        max_chars (int): Tamaño máximo orientativo de cada fragmento
+
+    Returns:
+        list: Fragmentos {"id", "text"}
+    """
+    max_chars = max_chars or Config.RETRIEVAL_CHUNK_CHARS
+    try:
+        data = json.loads(content)
+    except (json.JSONDecodeError, TypeError):
+        return chunk_text(source, content, max_chars)
+
+    chunks = []
+
+    def walk(path, title, value):
+        serialized = compact_json(value)
+        if len(serialized) > max_chars and isinstance(value, (dict, list)) and value:
+            items = value.items() if isinstance(value, dict) else enumerate(value)
+            for key, child in items:
+                child_path = f"{path}.{key}" if isinstance(value, dict) else f"{path}[{key}]"
+                child_title = f"{title} > {key}" if isinstance(value, dict) else title
+                walk(child_path, child_title, child)
+        else:
+            chunks.append({"id": path, "text": f"{title}: {serialized}"})
+
+    if isinstance(data, dict):
+        for key, value in data.items():
+            walk(f"{source}.{key}", key, value)
+    else:
+        walk(source, source, data)
+    return chunks
+
+
+def chunk_text(source, content, max_chars=None):
+    """
+    Trocea texto plano agrupando líneas consecutivas hasta el tamaño máximo
+
+    Args:
+        source (str): Nombre de la fuente
+        content (str): Texto plano
+        max_chars (int): Tamaño máximo de cada fragmento
+
+    Returns:
+        list: Fragmentos {"id", "text"}
+    """
+    max_chars = max_chars or Config.RETRIEVAL_CHUNK_CHARS
+    chunks = []
+    current = []
+    size = 0
+    for line in content.splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        if current and size + len(line) > max_chars:
+            chunks.append({"id": f"{source}#{len(chunks)}", "text": "\n".join(current)})
+            current, size = [], 0
+        current.append(line)
+        size += len(line) + 1
+    if current:
+        chunks.append({"id": f"{source}#{len(chunks)}", "text": "\n".join(current)})
+    return chunks
+
+
+class ProfileIndex:
+    """
+    Índice BM25 en memoria, serializable a JSON
+
+    Los términos se internan: el vocabulario es casi el mismo en todos los
+    fragmentos y perfiles, y cada palabra se guarda una sola vez en memoria.
+    """
+
+    def __init__(self, chunks, version, source_versions=None):
+        self.version = version
+        self.source_versions = dict(source_versions or {})
+        self.chunks = chunks
+        for chunk in chunks:
+            if "source" in chunk:
+                chunk["source"] = sys.intern(chunk["source"])
+        self.doc_terms = [Counter(map(sys.intern, tokenize(chunk["text"]))) for chunk in chunks]
+        self.doc_lengths = [sum(terms.values()) for terms in self.doc_terms]
+        self.avg_length = (sum(self.doc_lengths) / len(self.doc_lengths)) if chunks else 0.0
+        document_frequency = Counter()
+        for terms in self.doc_terms:
+            document_frequency.update(terms.keys())
+        total = len(chunks)
+        self.idf = {
+            term: math.log(1 + (total - freq + 0.5) / (freq + 0.5))
+            for term, freq in document_frequency.items()
+        }
+
+    def search(self, query, top_k=None, exclude=()):
+        """
+        Busca los fragmentos más relevantes para una consulta
+
+        Args:
+            query (str): Consulta del usuario
+            top_k (int): Número máximo de resultados
+            exclude (iterable): Prefijos de ids de fragmentos a omitir
+
+        Returns:
+            list: Tuplas (puntuación, fragmento) ordenadas por relevancia
+        """
+        top_k = top_k or Config.RETRIEVAL_TOP_K
+        query_terms = [t for t in set(tokenize(query)) if t in self.idf]
+        if not query_terms:
+            return []
+
+        excluded = tuple(exclude)
+        scored = []
+        for i, terms in enumerate(self.doc_terms):
+            if excluded and self.chunks[i]["id"].startswith(excluded):
+                continue
+            norm = BM25_K1 * (1 - BM25_B + BM25_B * self.doc_lengths[i] / self.avg_length)
+            score = 0.0
+            for term in query_terms:
+                freq = terms.get(term)
+                if freq:
+                    score += self.idf[term] * freq * (BM25_K1 + 1) / (freq + norm)
+            if score > 0:
+                scored.append((score, self.chunks[i]))
+        scored.sort(key=lambda item: item[0], reverse=True)
+        return scored[:top_k]
+
+    def estimated_bytes(self):
+        """Memoria aproximada del índice (textos de los fragmentos y tablas de términos)"""
+        terms = sum(len(terms) for terms in self.doc_terms) + len(self.idf)
+        text = sum(sys.getsizeof(chunk["text"]) for chunk in self.chunks)
+        return text + terms * TERM_ENTRY_BYTES + len(self.chunks) * CHUNK_OVERHEAD_BYTES
+
+    def get_chunks(self, chunk_ids):
+        """Retorna los fragmentos cuyo id empieza por alguno de los prefijos dados"""
+        return [c for c in self.chunks if c["id"].startswith(tuple(chunk_ids))]
+
+    def to_dict(self):
+        """Serializa el índice (solo los fragmentos; las estadísticas se recalculan)"""
+        return {
+            "format": INDEX_FORMAT_VERSION,
+            "version": self.version,
+            "source_versions": self.source_versions,
+            "chunks": self.chunks
+        }
+
+
+def chunk_source(name, content):
+    """
+    Trocea una fuente del perfil según su tipo
+
+    Args:
+        name (str): Nombre de la fuente ("cv", "contexto", "faq", "linkedin")
+        content (str): Contenido extraído
+
+    Returns:
+        list: Fragmentos de la fuente, marcados con su origen
+    """
+    chunks = chunk_text(name, content) if name == "linkedin" else chunk_json(name, content)
+    for chunk in chunks:
+        chunk["source"] = name
+    return chunks
+
+
+def build_chunks(snapshot, previous=None):
+    """
+    Trocea todas las fuentes del perfil, reutilizando las que no cambiaron
+
+    Args:
+        snapshot (ProfileSnapshot): Datos del perfil
+        previous (ProfileIndex): Índice anterior cuyos fragmentos pueden reutilizarse
+
+    Returns:
+        list: Fragmentos de todas las fuentes
+    """
+    chunks = []
+    for name in ("cv", "contexto", "faq", "linkedin"):
+        if previous is not None and previous.source_versions.get(name) == snapshot.source_versions.get(name):
+            chunks.extend(c for c in previous.chunks if c.get("source") == name)
+        else:
+            chunks.extend(chunk_source(name, snapshot.content(name)))
+    return chunks
+
+
+def load_or_build_index(snapshot, cache_dir=None, previous=None):
+    """
+    Carga el índice persistido para la versión actual de los datos o lo construye
+
+    Args:
+        snapshot (ProfileSnapshot): Datos del perfil
+        cache_dir (str): Directorio donde se persiste el índice
+        previous (ProfileIndex): Índice anterior, para trocear solo las fuentes modificadas
+
+    Returns:
+        ProfileIndex: Índice de recuperación
+    """
+    cache_dir = cache_dir or Config.CACHE_DIR
+    version = snapshot.version
+    path = os.path.join(cache_dir, f"profile_index-{version[:16]}.json")
+
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            stored = json.load(f)
+        if stored.get("format") == INDEX_FORMAT_VERSION and stored.get("version") == version:
+            logger.info(f"Índice de perfil cargado desde caché: {len(stored['chunks'])} fragmentos")
+            return ProfileIndex(stored["chunks"], version, stored.get("source_versions"))
+    except FileNotFoundError:
+        pass
+    except (OSError, ValueError, KeyError) as e:
+        logger.warning(f"Índice en caché inválido, reconstruyendo: {e}")
+
+    index = ProfileIndex(build_chunks(snapshot, previous), version, snapshot.source_versions)
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(index.to_dict(), f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(tmp_path, path)
+    except OSError as e:
+        logger.warning(f"No se pudo guardar el índice de perfil: {e}")
+    logger.info(f"Índice de perfil construido: {len(index.chunks)} fragmentos")
+    return index
@@ -0,0 +1,188 @@
+"""
+Almacén de estado de conversación por sesión
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, asdict
+from src.config import Config
+from src.observability import get_logger
+
+logger = get_logger(__name__)
+
+DEFAULT_SESSION_ID = "default"
+
+
+@dataclass(slots=True)
+class SessionState:
+    """Estado compacto de una sesión de chat (un visitante)"""
+
+    pending_email: dict | None = None
+    subject_refinement_id: str | None = None  # Refinamiento con IA del asunto del email pendiente
+    waiting_for_message: str | None = None  # Email recibido mientras esperamos el mensaje
+    last_email_suggestion: bool = False
+    interaction_count: int = 0
+    outbound_email_id: str | None = None  # Último email en cola, para informar de su entrega
+    history_summary: str = ""  # Resumen de los turnos que ya no se envían literalmente
+    summarized_count: int = 0  # Mensajes del historial incluidos en el resumen
+    summary_anchor: str | None = None  # Huella del último mensaje resumido
+    rate_tokens: float | None = None  # Cupo de llamadas al LLM (None = cubo lleno)
+    rate_updated_at: float = 0.0
+    profile_id: str | None = None  # Perfil que atiende la sesión (None = el de por defecto)
+    updated_at: float = 0.0
+
+    def to_json(self):
+        """Serializa el estado a JSON compacto"""
+        return json.dumps(asdict(self), ensure_ascii=False, separators=(",", ":"))
+
+    @classmethod
+    def from_json(cls, raw):
+        """Reconstruye el estado desde JSON, ignorando campos desconocidos"""
+        data = json.loads(raw)
+        return cls(**{k: v for k, v in data.items() if k in cls.__slots__})
+
+
+class InMemorySessionStore:
+    """
+    Almacén en memoria con expulsión LRU y caducidad por TTL
+
+    El lock solo protege las operaciones sobre el diccionario, nunca
+    la llamada al LLM, por lo que sesiones distintas avanzan en paralelo.
+    """
+
+    def __init__(self, max_sessions=None, ttl_seconds=None):
+        self.max_sessions = max_sessions or Config.SESSION_MAX_ENTRIES
+        self.ttl_seconds = ttl_seconds or Config.SESSION_TTL_SECONDS
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, session_id):
+        """
+        Obtiene el estado de una sesión, creándolo si no existe o ha caducado
+
+        Args:
+            session_id (str): Identificador de la sesión
+
+        Returns:
+            SessionState: Estado de la sesión
+        """
+        now = time.time()
+        with self._lock:
+            state = self._sessions.get(session_id)
+            if state is not None and now - state.updated_at > self.ttl_seconds:
+                del self._sessions[session_id]
+                state = None
+            if state is None:
+                state = SessionState(updated_at=now)
+                self._sessions[session_id] = state
+            self._sessions.move_to_end(session_id)
+            return state
+
+    def save(self, session_id, state):
+        """Guarda el estado de una sesión y expulsa las más antiguas si hace falta"""
+        state.updated_at = time.time()
+        with self._lock:
+            self._sessions[session_id] = state
+            self._sessions.move_to_end(session_id)
+            self._evict()
+
+    def delete(self, session_id):
+        """Elimina una sesión"""
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def _evict(self):
+        """Expulsa sesiones caducadas (las más antiguas primero) y aplica el límite LRU"""
+        cutoff = time.time() - self.ttl_seconds
+        while self._sessions:
+            oldest_id, oldest = next(iter(self._sessions.items()))
+            if oldest.updated_at >= cutoff and len(self._sessions) <= self.max_sessions:
+                break
+            del self._sessions[oldest_id]
+
+    def __len__(self):
+        return len(self._sessions)
+
+
+class SQLiteSessionStore:
+    """
+    Almacén persistente en SQLite, compartible entre procesos
+
+    Cada hilo usa su propia conexión; SQLite en modo WAL permite lecturas
+    concurrentes mientras otro proceso escribe.
+    """
+
+    def __init__(self, db_path=None, ttl_seconds=None):
+        self.db_path = db_path or Config.SESSION_DB_FILE
+        self.ttl_seconds = ttl_seconds or Config.SESSION_TTL_SECONDS
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+        conn = self._connection()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS sessions ("
+            "session_id TEXT PRIMARY KEY, data TEXT NOT NULL, updated_at REAL NOT NULL)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_sessions_updated ON sessions(updated_at)")
+        conn.commit()
+
+    def _connection(self):
+        """Devuelve la conexión del hilo actual, creándola si no existe"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=10)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, session_id):
+        """Obtiene el estado de una sesión, creándolo si no existe o ha caducado"""
+        now = time.time()
+        row = self._connection().execute(
+            "SELECT data, updated_at FROM sessions WHERE session_id = ?", (session_id,)
+        ).fetchone()
+        if row is None or now - row[1] > self.ttl_seconds:
+            return SessionState(updated_at=now)
+        return SessionState.from_json(row[0])
+
+    def save(self, session_id, state):
+        """Guarda el estado de una sesión y purga las caducadas"""
+        state.updated_at = time.time()
+        conn = self._connection()
+        conn.execute(
+            "INSERT INTO sessions (session_id, data, updated_at) VALUES (?, ?, ?) "
+            "ON CONFLICT(session_id) DO UPDATE SET data = excluded.data, updated_at = excluded.updated_at",
+            (session_id, state.to_json(), state.updated_at)
+        )
+        conn.execute("DELETE FROM sessions WHERE updated_at < ?", (state.updated_at - self.ttl_seconds,))
+        conn.commit()
+
+    def delete(self, session_id):
+        """Elimina una sesión"""
+        conn = self._connection()
+        conn.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+        conn.commit()
+
+    def __len__(self):
+        return self._connection().execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+
+
+def create_session_store(backend=None):
+    """
+    Crea el almacén de sesiones configurado
+
+    Args:
+        backend (str): "memory" o "sqlite" (por defecto Config.SESSION_BACKEND)
+
+    Returns:
+        InMemorySessionStore | SQLiteSessionStore: Almacén de sesiones
+    """
+    backend = (backend or Config.SESSION_BACKEND).lower()
+    if backend == "sqlite":
+        return SQLiteSessionStore()
+    if backend != "memory":
+        logger.warning(f"Backend de sesiones desconocido '{backend}', usando memoria")
+    return InMemorySessionStore()
@@ -0,0 +1,122 @@
+"""
+Coalescencia de turnos idénticos en curso (single-flight)
+"""
+import asyncio
+import threading
+from src.observability import get_logger, COALESCED_TURNS
+
+logger = get_logger(__name__)
+
+
+class Flight:
+    """Turno en curso al que se pueden unir otros con la misma clave"""
+
+    __slots__ = ("key", "followers", "_done", "_waiters", "_lock")
+
+    def __init__(self, key):
+        self.key = key
+        self.followers = 0
+        self._done = threading.Event()
+        self._waiters = []  # (loop, future) de los seguidores asíncronos
+        self._lock = threading.Lock()
+
+    def wait(self, timeout):
+        """
+        Espera a que termine el turno líder bloqueando el hilo
+
+        Returns:
+            bool: True si terminó dentro del plazo
+        """
+        return self._done.wait(timeout)
+
+    async def await_done(self, timeout):
+        """Variante asíncrona de wait()"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        with self._lock:
+            if self._done.is_set():
+                return True
+            self._waiters.append((loop, future))
+        try:
+            await asyncio.wait_for(future, timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    def finish(self):
+        """Despierta a todos los seguidores"""
+        with self._lock:
+            self._done.set()
+            waiters, self._waiters = self._waiters, []
+        for loop, future in waiters:
+            loop.call_soon_threadsafe(_resolve, future)
+
+
+def _resolve(future):
+    if not future.done():
+        future.set_result(True)
+
+
+class SingleFlight:
+    """
+    Registro de turnos en curso por clave
+
+    El primero que llega con una clave es el líder y hace la llamada al LLM;
+    los que llegan mientras tanto esperan a que termine y reutilizan su
+    respuesta. Sirve igual para hilos y para corrutinas.
+    """
+
+    def __init__(self):
+        self._flights = {}
+        self._lock = threading.Lock()
+        self.leaders = 0
+        self.followers = 0
+
+    def join(self, key):
+        """
+        Se une al turno en curso con esta clave o inicia uno nuevo
+
+        Args:
+            key (str): Clave canónica del turno
+
+        Returns:
+            tuple: (Flight, True si es el líder y debe llamar a finish())
+        """
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is None:
+                flight = self._flights[key] = Flight(key)
+                self.leaders += 1
+                return flight, True
+            flight.followers += 1
+            self.followers += 1
+            return flight, False
+
+    def finish(self, flight):
+        """Cierra el turno del líder y despierta a sus seguidores"""
+        with self._lock:
+            if self._flights.get(flight.key) is flight:
+                del self._flights[flight.key]
+        if flight.followers:
+            logger.debug(f"Turno líder terminado con {flight.followers} seguidores")
+        flight.finish()
+
+    def record(self, shared):
+        """
+        Contabiliza el resultado de un seguidor
+
+        Args:
+            shared (bool): True si reutilizó la respuesta del líder (una llamada ahorrada)
+        """
+        COALESCED_TURNS.inc(result="shared" if shared else "fallback")
+
+    def stats(self):
+        """Turnos en curso, líderes y seguidores"""
+        with self._lock:
+            return {
+                "in_flight": len(self._flights),
+                "leaders": self.leaders,
+                "followers": self.followers,
+                "shared": COALESCED_TURNS.value(result="shared"),
+                "fallback": COALESCED_TURNS.value(result="fallback")
+            }
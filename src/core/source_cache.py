@@ -0,0 +1,173 @@
+"""
+Caché en disco del contenido extraído de las fuentes del perfil
+"""
+import hashlib
+import json
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from src.config import Config
+from src.core.text_utils import compact_json
+from src.observability import get_logger
+
+logger = get_logger(__name__)
+
+# Incrementar al cambiar la extracción o la normalización para invalidar la caché
+EXTRACTOR_VERSION = 1
+
+
+def normalize_extracted_text(text):
+    """
+    Normaliza el texto extraído: sin espacios finales ni líneas vacías repetidas
+
+    Args:
+        text (str): Texto extraído
+
+    Returns:
+        str: Texto normalizado
+    """
+    lines = [line.rstrip() for line in text.replace("\r\n", "\n").split("\n")]
+    normalized = []
+    for line in lines:
+        if not line and normalized and not normalized[-1]:
+            continue
+        normalized.append(line)
+    return "\n".join(normalized).strip()
+
+
+def _extract_pages(path, start, end):
+    """Extrae el texto de un rango de páginas (se ejecuta en un proceso del pool)"""
+    from pypdf import PdfReader
+
+    reader = PdfReader(path)
+    return [reader.pages[i].extract_text() or "" for i in range(start, end)]
+
+
+def extract_pdf_text(path):
+    """
+    Extrae el texto de un PDF, repartiendo las páginas entre procesos si es grande
+
+    Args:
+        path (str): Ruta del PDF
+
+    Returns:
+        str: Texto normalizado de todas las páginas
+    """
+    from pypdf import PdfReader
+
+    reader = PdfReader(path)
+    page_count = len(reader.pages)
+    workers = min(os.cpu_count() or 1, Config.PDF_MAX_WORKERS)
+    if page_count < Config.PDF_PARALLEL_MIN_PAGES or workers < 2:
+        pages = [page.extract_text() or "" for page in reader.pages]
+    else:
+        step = -(-page_count // workers)
+        ranges = [(start, min(start + step, page_count)) for start in range(0, page_count, step)]
+        # spawn y no fork: el proceso ya tiene hilos (vigilancia de perfiles, cola de emails...)
+        # y un hijo creado con fork podría heredar un lock tomado
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=len(ranges), mp_context=context) as pool:
+            futures = [pool.submit(_extract_pages, path, start, end) for start, end in ranges]
+            pages = [text for future in futures for text in future.result()]
+        logger.info(f"PDF extraído en paralelo: {page_count} páginas, {len(ranges)} procesos")
+    return normalize_extracted_text("\n".join(text for text in pages if text))
+
+
+def extract_compact_json(path):
+    """
+    Parsea un JSON y lo serializa de forma compacta
+
+    Args:
+        path (str): Ruta del JSON
+
+    Returns:
+        str: JSON compacto
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    return compact_json(data)
+
+
+class SourceCache:
+    """
+    Caché direccionada por contenido del texto extraído de cada fuente
+
+    Un índice asocia (ruta, tamaño, mtime) con el hash SHA-256 del fichero:
+    si el fichero no ha cambiado ni siquiera se vuelve a leer. Si solo
+    cambió el mtime, el hash permite reutilizar el resultado existente.
+    """
+
+    def __init__(self, cache_dir=None):
+        self.cache_dir = cache_dir or os.path.join(Config.CACHE_DIR, "sources")
+        self.index_path = os.path.join(self.cache_dir, "index.json")
+        self._lock = threading.Lock()
+        self._index = self._read_index()
+
+    def _read_index(self):
+        """Carga el índice de la caché"""
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _write_index(self):
+        """Guarda el índice de forma atómica"""
+        tmp_path = f"{self.index_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self._index, f, separators=(",", ":"))
+        os.replace(tmp_path, self.index_path)
+
+    def _blob_path(self, digest, kind):
+        """Ruta del contenido extraído para un hash y un tipo de extracción"""
+        return os.path.join(self.cache_dir, f"{digest}-{kind}-v{EXTRACTOR_VERSION}.txt")
+
+    def _read_blob(self, path):
+        """Lee un contenido cacheado, o None si no existe"""
+        try:
+            with open(path, "r", encoding="utf-8", newline="") as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def get(self, path, kind, extract):
+        """
+        Retorna el contenido extraído de una fuente, extrayéndolo solo si cambió
+
+        Args:
+            path (str): Ruta del fichero fuente
+            kind (str): Tipo de extracción ("pdf", "json"), parte de la clave
+            extract (callable): Función (ruta) -> texto para los fallos de caché
+
+        Returns:
+            str: Contenido extraído
+        """
+        stat = os.stat(path)
+        key = os.path.abspath(path)
+        entry = self._index.get(key)
+        if entry and entry["size"] == stat.st_size and entry["mtime_ns"] == stat.st_mtime_ns:
+            cached = self._read_blob(self._blob_path(entry["sha256"], kind))
+            if cached is not None:
+                return cached
+
+        with open(path, "rb") as f:
+            digest = hashlib.sha256(f.read()).hexdigest()
+        blob_path = self._blob_path(digest, kind)
+        content = self._read_blob(blob_path)
+        if content is None:
+            content = extract(path)
+            os.makedirs(self.cache_dir, exist_ok=True)
+            tmp_path = f"{blob_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8", newline="") as f:
+                f.write(content)
+            os.replace(tmp_path, blob_path)
+            logger.info(f"Fuente extraída y cacheada: {path}")
+
+        with self._lock:
+            self._index[key] = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "sha256": digest}
+            try:
+                self._write_index()
+            except OSError as e:
+                logger.warning(f"No se pudo guardar el índice de la caché de fuentes: {e}")
+        return content
@@ -0,0 +1,108 @@
+"""
+Arranque en segundo plano y estado de preparación (liveness frente a readiness)
+"""
+import threading
+import time
+from contextlib import contextmanager
+from src.observability import get_logger, STARTUP_SECONDS, STARTUP_READY
+
+logger = get_logger(__name__)
+
+
+class Startup:
+    """
+    Etapas del arranque y sus tiempos
+
+    El proceso está vivo en cuanto escucha y listo cuando terminan las etapas
+    declaradas con expect() (los datos del perfil). Las demás, como preparar
+    el cliente del LLM, siguen calentando sin retrasar la readiness: la FAQ y
+    la caché no las necesitan, y un turno que llame al LLM antes espera a la
+    importación en curso en lugar de repetirla. Una etapa obligatoria que
+    falla deja el proceso sin preparar; una opcional solo se registra.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.ready_after = None  # Segundos hasta quedar listo
+        self._condition = threading.Condition()
+        self._pending = set()
+        self._running = set()
+        self._stages = {}  # etapa -> segundos
+        self._errors = {}  # etapa -> error de una etapa obligatoria
+        STARTUP_READY.set(0)
+
+    def expect(self, *stages):
+        """Declara etapas que deben terminar antes de estar listo"""
+        with self._condition:
+            self._pending.update(stages)
+            if self.ready_after is None:
+                STARTUP_READY.set(0)
+
+    @contextmanager
+    def stage(self, name, required=True):
+        """
+        Ejecuta una etapa del arranque midiendo su duración
+
+        Los errores no se propagan: se registran y, si la etapa es
+        obligatoria, el proceso queda sin preparar.
+
+        Args:
+            name (str): Etapa (si se declaró con expect(), la readiness la espera)
+            required (bool): Si su fallo impide estar listo
+        """
+        with self._condition:
+            self._running.add(name)
+        started = time.perf_counter()
+        error = None
+        try:
+            yield
+        except Exception as e:
+            error = e
+            log = logger.error if required else logger.warning
+            log(f"Etapa de arranque '{name}' fallida: {type(e).__name__}: {e}")
+        seconds = time.perf_counter() - started
+        STARTUP_SECONDS.set(seconds, stage=name)
+        with self._condition:
+            self._stages[name] = round(seconds, 3)
+            self._running.discard(name)
+            self._pending.discard(name)
+            if error is not None and required:
+                self._errors[name] = f"{type(error).__name__}: {error}"
+            if not self._pending and not self._errors and self.ready_after is None:
+                self.ready_after = time.perf_counter() - self.started
+                STARTUP_READY.set(1)
+                logger.info(f"Asistente listo en {self.ready_after:.2f} s ({self._describe()})")
+            self._condition.notify_all()
+
+    def ready(self):
+        """Si todas las etapas esperadas han terminado sin errores"""
+        with self._condition:
+            return not self._pending and not self._errors
+
+    def wait(self, timeout=None):
+        """
+        Espera a que el arranque termine (con éxito o no)
+
+        Returns:
+            bool: True si está listo
+        """
+        with self._condition:
+            self._condition.wait_for(lambda: not self._pending, timeout)
+            return not self._pending and not self._errors
+
+    def status(self):
+        """Estado para /readyz: listo, etapas pendientes, tiempos y errores"""
+        with self._condition:
+            ready = not self._pending and not self._errors
+            return {
+                "status": "ready" if ready else ("failed" if self._errors else "starting"),
+                "uptime_s": round(time.perf_counter() - self.started, 3),
+                "ready_after_s": round(self.ready_after, 3) if self.ready_after is not None else None,
+                "pending": sorted(self._pending),
+                "warming": sorted(self._running - self._pending),
+                "stages": dict(self._stages),
+                "errors": dict(self._errors)
+            }
+
+    def _describe(self):
+        return ", ".join(f"{name} {seconds:.2f} s" for name, seconds in self._stages.items())
@@ -0,0 +1,171 @@
+"""
+Acumulación de respuestas en streaming de la API de OpenAI
+"""
+import time
+from types import SimpleNamespace
+from src.observability import get_logger
+
+logger = get_logger(__name__)
+
+
+class StreamAccumulator:
+    """
+    Reconstruye texto y llamadas a herramientas a partir de los chunks del stream
+
+    Compartido por el camino síncrono y el asíncrono para que ambos apliquen
+    el mismo límite de longitud durante el streaming.
+    """
+
+    def __init__(self, available_space, cut):
+        """
+        Args:
+            available_space (int): Máximo de caracteres de la respuesta
+            cut (callable): Función (texto, longitud, incomplete=False) que recorta en un final de frase
+        """
+        self.available_space = available_space
+        self.cut = cut
+        self.text = ""
+        self.finish_reason = None
+        self.truncated = False
+        self.partial_calls = {}
+        self.emitted = False  # Si ya se mostró texto (entonces la ronda no se puede repetir)
+        self.usage = None
+        self.started = time.perf_counter()
+        self.first_token_seconds = None
+
+    def feed(self, chunk):
+        """
+        Procesa un chunk del stream
+
+        Args:
+            chunk: Chunk de chat.completions en modo stream
+
+        Returns:
+            str | None: Texto acumulado a mostrar, o None si no hay nada nuevo
+        """
+        if getattr(chunk, "usage", None) is not None:
+            self.usage = chunk.usage  # Último chunk con stream_options include_usage
+        if not chunk.choices:
+            return None
+        if self.first_token_seconds is None:
+            self.first_token_seconds = time.perf_counter() - self.started
+        choice = chunk.choices[0]
+        delta = choice.delta
+        for call_delta in delta.tool_calls or []:
+            call = self.partial_calls.setdefault(call_delta.index, {"id": "", "name": "", "arguments": ""})
+            if call_delta.id:
+                call["id"] = call_delta.id
+            if call_delta.function:
+                call["name"] += call_delta.function.name or ""
+                call["arguments"] += call_delta.function.arguments or ""
+        if choice.finish_reason:
+            self.finish_reason = choice.finish_reason
+        if not delta.content:
+            return None
+
+        self.text += delta.content
+        if len(self.text) > self.available_space:
+            logger.debug(f"Streaming supera {self.available_space} caracteres, cortando")
+            self.text = self.cut(self.text, self.available_space)
+            self.truncated = True
+            return None
+        if self.partial_calls:
+            return None
+        self.emitted = True
+        return self.text
+
+    def result(self):
+        """
+        Resultado final de la ronda de streaming
+
+        Returns:
+            tuple: (texto final, lista de llamadas a herramientas)
+        """
+        if self.finish_reason == "length" and not self.partial_calls and not self.truncated:
+            # La última frase quedó a medias aunque el texto quepa en el límite de caracteres
+            logger.debug(f"Límite de tokens alcanzado, cortando en final de frase")
+            self.text = self.cut(self.text, self.available_space, incomplete=True)
+
+        tool_calls = [
+            SimpleNamespace(
+                id=call["id"],
+                function=SimpleNamespace(name=call["name"], arguments=call["arguments"])
+            )
+            for _, call in sorted(self.partial_calls.items())
+        ]
+        return self.text.strip(), tool_calls
+
+
+class StreamRound:
+    """
+    Una ronda de streaming de un turno: petición, acumulador y resultado
+
+    La comparten el camino síncrono y el asíncrono, que solo difieren en la
+    E/S. Como un generador asíncrono no puede devolver un valor, el resultado
+    de la ronda queda en text y tool_calls, y choice en el nivel de modelo con
+    el que terminó (si hubo que escalar).
+    """
+
+    __slots__ = ("choice", "available_space", "cut", "tool_options", "accumulator", "text", "tool_calls")
+
+    def __init__(self, choice, available_space, cut, tool_options):
+        """
+        Args:
+            choice (ModelChoice): Modelo y max_tokens de la ronda
+            available_space (int): Máximo de caracteres de la respuesta
+            cut (callable): Función de corte del StreamAccumulator
+            tool_options (dict): Parámetros de herramientas de la petición
+        """
+        self.choice = choice
+        self.available_space = available_space
+        self.cut = cut
+        self.tool_options = tool_options
+        self.accumulator = None
+        self.text = ""
+        self.tool_calls = []
+
+    @property
+    def final(self):
+        """Si la ronda pide la respuesta final, sin más herramientas"""
+        return self.tool_options.get("tool_choice") == "none"
+
+    def start(self):
+        """Acumulador nuevo para un intento de la ronda"""
+        self.accumulator = StreamAccumulator(self.available_space, self.cut)
+        return self.accumulator
+
+    def request(self, messages):
+        """Parámetros de chat.completions del intento (iguales para create y acreate)"""
+        return {
+            "model": self.choice.model,
+            "messages": messages,
+            "max_tokens": self.choice.max_tokens,
+            "stream": True,
+            "stream_options": {"include_usage": True},
+            **self.tool_options
+        }
+
+
+def tool_calls_message(text, tool_calls):
+    """
+    Construye el mensaje del asistente que acompaña a las llamadas a herramientas
+
+    Args:
+        text (str): Texto emitido junto a las llamadas (puede estar vacío)
+        tool_calls (list): Llamadas reconstruidas por StreamAccumulator
+
+    Returns:
+        dict: Mensaje en formato de la API
+    """
+    return {
+        "role": "assistant",
+        "content": text or None,
+        "tool_calls": [
+            {
+                "id": call.id,
+                "type": "function",
+                "function": {"name": call.function.name, "arguments": call.function.arguments}
+            }
+            for call in tool_calls
+        ]
+    }
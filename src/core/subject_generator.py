@@ -0,0 +1,174 @@
+"""
+Generación local de asuntos de email a partir del mensaje del visitante
+"""
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from src.config import Config
+from src.core.text_utils import SPANISH_STOPWORDS, fold_accents, normalize_text
+from src.observability import get_logger
+
+logger = get_logger(__name__)
+
+DEFAULT_SUBJECT = "Nuevo mensaje desde el asistente web"
+MAX_SUBJECT_WORDS = 8
+
+# (intención, plantilla, palabras clave sin tildes); el orden desempata a igual puntuación
+INTENTS = [
+    ("empleo", "Consulta sobre oportunidades laborales", [
+        "trabajo", "oferta laboral", "oferta", "empleo", "vacante", "puesto", "entrevista",
+        "proceso de seleccion", "reclutador", "recruiter"
+    ]),
+    ("proyecto", "Propuesta de proyecto", ["proyecto", "desarrollar", "aplicacion", "app"]),
+    ("colaboracion", "Propuesta de colaboración", ["colaboracion", "colaborar", "colaboremos"]),
+    ("consultoria", "Consulta sobre servicios", ["consultoria", "asesoria", "servicio", "servicios"]),
+    ("freelance", "Consulta sobre trabajo freelance", ["freelance", "autonomo"]),
+    ("contratacion", "Consulta sobre contratación", ["contrato", "contratar", "contratarte", "contratacion"]),
+    ("propuesta", "Nueva propuesta comercial", ["propuesta"]),
+    ("presupuesto", "Solicitud de presupuesto", ["presupuesto", "tarifa", "tarifas", "cotizacion"]),
+    ("reunion", "Solicitud de reunión", ["reunion", "llamada", "videollamada", "quedar"]),
+    ("formacion", "Consulta sobre formación", ["charla", "curso", "formacion", "mentoria", "ponencia"])
+]
+
+# Palabras que no aportan al asunto aunque no sean palabras vacías
+FILLER_WORDS = frozenset("""
+hola buenas buenos dias tardes noches gracias saludos diego quiero queria quisiera gustaria
+escribo escribirte contactarte mensaje email correo favor poder puedes podrias hablar comentar
+saber estoy estamos tengo tenemos algo pedirte comentarte preguntarte contarte enviarte mandarte
+ofrecerte proponerte presentarte
+""".split())
+
+WORD_PATTERN = re.compile(r"[\w+#.-]+")
+
+
+class SubjectGenerator:
+    """
+    Genera asuntos de email en local, sin llamar al LLM
+
+    Un único patrón precompilado detecta las palabras clave de cada intención
+    (el mensaje pesa más que el historial) y una pasada extractiva añade las
+    palabras más informativas del mensaje a la plantilla de la intención.
+    Opcionalmente, un refinamiento con el LLM se ejecuta en segundo plano y
+    sustituye el asunto antes del envío si termina a tiempo.
+    """
+
+    def __init__(self, intents=None):
+        self.intents = intents or INTENTS
+        self._keyword_intent = {}
+        for index, (intent, _, keywords) in enumerate(self.intents):
+            for keyword in keywords:
+                self._keyword_intent.setdefault(keyword, index)
+        # Alternativas más largas primero para que "oferta laboral" gane a "oferta"
+        alternatives = sorted(self._keyword_intent, key=len, reverse=True)
+        self._pattern = re.compile(r"\b(?:" + "|".join(re.escape(k) for k in alternatives) + r")\b")
+        self._refinements = {}
+        self._refinements_lock = threading.Lock()
+        self._executor = None
+
+    def generate(self, message, history=None):
+        """
+        Genera un asunto de como máximo ocho palabras
+
+        Args:
+            message (str): Cuerpo del email
+            history (list): Historial de conversación
+
+        Returns:
+            str: Asunto del email
+        """
+        intent = self._detect_intent(message, history)
+        phrase = self._key_phrase(message)
+        if intent is not None:
+            subject = self.intents[intent][1]
+            if phrase:
+                subject = f"{subject}: {phrase}"
+        elif phrase:
+            subject = f"Mensaje sobre {phrase}"
+        else:
+            subject = DEFAULT_SUBJECT
+        subject = " ".join(subject.split()[:MAX_SUBJECT_WORDS])
+        logger.info(f"Asunto generado localmente: {subject}")
+        return subject
+
+    def _detect_intent(self, message, history):
+        """Índice de la intención con más coincidencias, o None"""
+        scores = {}
+        for index in self._matches(message):
+            scores[index] = scores.get(index, 0) + 2
+        for msg in (history or [])[-3:]:
+            if isinstance(msg, dict) and isinstance(msg.get("content"), str):
+                for index in self._matches(msg["content"]):
+                    scores[index] = scores.get(index, 0) + 1
+        if not scores:
+            return None
+        return min(scores, key=lambda index: (-scores[index], index))
+
+    def _matches(self, text):
+        """Intenciones de las palabras clave encontradas en el texto"""
+        return [self._keyword_intent[m.group(0)] for m in self._pattern.finditer(normalize_text(text))]
+
+    def _key_phrase(self, message, max_words=3):
+        """
+        Pasada extractiva: palabras más informativas del mensaje, en su orden original
+
+        Se priorizan nombres propios y términos técnicos (mayúsculas, dígitos o
+        símbolos como en "C#" o "Node.js") y después las palabras más largas.
+        """
+        candidates = []
+        seen = set()
+        for position, match in enumerate(WORD_PATTERN.finditer(message)):
+            word = match.group(0).strip(".-")
+            folded = fold_accents(word.lower())
+            if (len(folded) < 3 or folded in seen or folded in SPANISH_STOPWORDS
+                    or folded in FILLER_WORDS or folded in self._keyword_intent or "@" in word):
+                continue
+            seen.add(folded)
+            technical = (position > 0 and word[:1].isupper()) or any(c.isdigit() or c in "+#." for c in word)
+            candidates.append((not technical, -len(word), position, word))
+        chosen = sorted(candidates)[:max_words]
+        return " ".join(word for *_, word in sorted(chosen, key=lambda c: c[2]))
+
+    def refine(self, key, refine_function):
+        """
+        Lanza un refinamiento del asunto en segundo plano
+
+        Args:
+            key (str): Identificador del refinamiento (único por email pendiente)
+            refine_function (callable): Función sin argumentos que devuelve el asunto o None
+        """
+        with self._refinements_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="subject")
+            if len(self._refinements) >= 256:
+                # Descartar los refinamientos más antiguos que nadie recogió
+                for old_key in list(self._refinements)[:128]:
+                    del self._refinements[old_key]
+            self._refinements[key] = self._executor.submit(refine_function)
+
+    def resolve(self, key, default, timeout=None):
+        """
+        Asunto refinado para un email, o el asunto local si no llegó a tiempo
+
+        Args:
+            key (str): Identificador usado en refine()
+            default (str): Asunto generado localmente
+            timeout (float): Segundos máximos de espera
+
+        Returns:
+            str: Asunto a usar en el envío
+        """
+        if key is None:
+            return default
+        with self._refinements_lock:
+            future = self._refinements.pop(key, None)
+        if future is None:
+            return default
+        try:
+            refined = future.result(timeout=Config.SUBJECT_REFINEMENT_WAIT_SECONDS if timeout is None else timeout)
+        except FutureTimeoutError:
+            logger.warning("El refinamiento del asunto no terminó a tiempo, se usa el asunto local")
+            return default
+        except Exception as e:
+            logger.error(f"Error refinando el asunto: {e}")
+            return default
+        return refined or default
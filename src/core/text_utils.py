@@ -0,0 +1,95 @@
+"""
+Utilidades de normalización y tokenización de texto en español
+"""
+import json
+import re
+import unicodedata
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+# Palabras vacías más frecuentes (ya sin tildes) que no aportan al emparejamiento
+SPANISH_STOPWORDS = frozenset("""
+a al algo algun alguna algunas alguno algunos ante antes como con contra cual cuales cuando de del desde
+donde durante e el ella ellas ellos en entre era es esa esas ese eso esos esta estas este esto estos
+fue ha han has hay he la las le les lo los mas me mi mis mucho muy ni no nos o os otra otro para pero
+poco por porque que quien se ser si sin sobre son su sus tambien te tiene tu tus un una uno unos y ya yo
+the of and to in is for on with
+""".split())
+
+# Negaciones: invierten el sentido de la pregunta, así que "¿Qué NO ha hecho?" no
+# puede compartir respuesta con "¿Qué ha hecho?" aunque el resto de palabras coincida
+NEGATION_WORDS = frozenset("no nunca jamas tampoco ni ningun ninguna ninguno nada".split())
+
+
+def compact_json(data):
+    """
+    Serializa JSON de forma compacta y determinista (sin espacios de indentación)
+
+    Args:
+        data: Datos a serializar
+
+    Returns:
+        str: JSON compacto
+    """
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+
+
+def fold_accents(text):
+    """
+    Elimina tildes y diacríticos (conserva la ñ como n)
+
+    Args:
+        text (str): Texto original
+
+    Returns:
+        str: Texto sin diacríticos
+    """
+    decomposed = unicodedata.normalize("NFKD", text)
+    return "".join(c for c in decomposed if not unicodedata.combining(c))
+
+
+def normalize_text(text):
+    """
+    Normaliza texto para comparaciones: minúsculas, sin tildes ni signos
+
+    Args:
+        text (str): Texto original
+
+    Returns:
+        str: Texto normalizado con palabras separadas por un espacio
+    """
+    return " ".join(TOKEN_PATTERN.findall(fold_accents(text.lower())))
+
+
+def tokenize(text, keep_stopwords=False, keep_negation=False):
+    """
+    Divide el texto en tokens normalizados
+
+    Args:
+        text (str): Texto original
+        keep_stopwords (bool): Si se conservan las palabras vacías
+        keep_negation (bool): Si se conservan las negaciones aunque sean palabras vacías
+
+    Returns:
+        list: Tokens normalizados
+    """
+    tokens = TOKEN_PATTERN.findall(fold_accents(text.lower()))
+    if keep_stopwords:
+        return tokens
+    return [
+        t for t in tokens
+        if (t not in SPANISH_STOPWORDS and len(t) > 1) or (keep_negation and t in NEGATION_WORDS)
+    ]
+
+
+def is_negated(text):
+    """
+    Indica si el texto contiene alguna negación ("no", "nunca", "tampoco"...)
+
+    Args:
+        text (str): Texto original
+
+    Returns:
+        bool: True si aparece alguna palabra de NEGATION_WORDS
+    """
+    return not NEGATION_WORDS.isdisjoint(TOKEN_PATTERN.findall(fold_accents(text.lower())))
@@ -0,0 +1,42 @@
+from .log import get_logger, setup_logging
+from .metrics import (
+    REGISTRY, MetricsServer, span, begin_turn, end_turn, mark_path, record_llm_call,
+    STAGE_SECONDS, TURN_SECONDS, LLM_CALLS, LLM_TOKENS, CACHE_LOOKUPS, TOOL_CALLS, EMAILS,
+    MODEL_CHOICES, LLM_CALL_SECONDS, LLM_RETRIES, LLM_CIRCUIT_OPEN, COALESCED_TURNS,
+    ADMISSION_IN_FLIGHT, ADMISSION_QUEUE_DEPTH, ADMISSION_WAIT_SECONDS, ADMISSION_SHED, API_SESSIONS_CREATED,
+    PROFILES_LOADED, PROFILE_ARTIFACT_BYTES, PROFILE_EVICTIONS, STARTUP_SECONDS, STARTUP_READY
+)
+
+__all__ = [
+    'get_logger',
+    'setup_logging',
+    'REGISTRY',
+    'MetricsServer',
+    'span',
+    'begin_turn',
+    'end_turn',
+    'mark_path',
+    'record_llm_call',
+    'STAGE_SECONDS',
+    'TURN_SECONDS',
+    'LLM_CALLS',
+    'LLM_TOKENS',
+    'CACHE_LOOKUPS',
+    'TOOL_CALLS',
+    'EMAILS',
+    'MODEL_CHOICES',
+    'LLM_CALL_SECONDS',
+    'LLM_RETRIES',
+    'LLM_CIRCUIT_OPEN',
+    'COALESCED_TURNS',
+    'ADMISSION_IN_FLIGHT',
+    'ADMISSION_QUEUE_DEPTH',
+    'ADMISSION_WAIT_SECONDS',
+    'ADMISSION_SHED',
+    'API_SESSIONS_CREATED',
+    'PROFILES_LOADED',
+    'PROFILE_ARTIFACT_BYTES',
+    'PROFILE_EVICTIONS',
+    'STARTUP_SECONDS',
+    'STARTUP_READY'
+]
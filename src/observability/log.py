@@ -0,0 +1,56 @@
+"""
+Logging asíncrono con niveles
+
+Los módulos escriben con get_logger(__name__); los registros se encolan y un
+hilo aparte los escribe en stdout, de modo que el camino de cada turno no
+espera a la E/S de la consola.
+"""
+import atexit
+import logging
+import queue
+import sys
+import threading
+from logging.handlers import QueueHandler, QueueListener
+from src.config import Config
+
+ROOT_LOGGER = "src"
+
+_listener = None
+_setup_lock = threading.Lock()
+
+
+def setup_logging(level=None):
+    """
+    Configura una sola vez el logger raíz del paquete (idempotente)
+
+    Args:
+        level (str): Nivel mínimo (por defecto Config.LOG_LEVEL)
+    """
+    global _listener
+    with _setup_lock:
+        if _listener is not None:
+            return
+        handler = logging.StreamHandler(sys.stdout)
+        handler.setFormatter(logging.Formatter(Config.LOG_FORMAT))
+        log_queue = queue.SimpleQueue()
+        root = logging.getLogger(ROOT_LOGGER)
+        root.setLevel((level or Config.LOG_LEVEL).upper())
+        root.addHandler(QueueHandler(log_queue))
+        root.propagate = False
+        _listener = QueueListener(log_queue, handler)
+        _listener.start()
+        atexit.register(_listener.stop)
+
+
+def get_logger(name):
+    """
+    Retorna un logger del paquete, configurando el logging si hace falta
+
+    Args:
+        name (str): Nombre del módulo (__name__)
+
+    Returns:
+        logging.Logger: Logger del módulo
+    """
+    setup_logging()
+    return logging.getLogger(name)
@@ -0,0 +1,430 @@
+"""
+Métricas en memoria con exposición en formato de texto de Prometheus
+"""
+import json
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+INF_BUCKET = 'le="+Inf"'
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value):
+    """Escapa el valor de una etiqueta"""
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names, values, extra=None):
+    """Etiquetas en formato {a="x",b="y"}"""
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter:
+    """Contador monotónico con etiquetas"""
+
+    kind = "counter"
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        """
+        Incrementa el contador
+
+        Args:
+            amount (float): Cantidad a sumar
+            **labels: Valor de cada etiqueta declarada
+        """
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        """Valor actual para una combinación de etiquetas"""
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        return self._values.get(key, 0)
+
+    def total(self, **labels):
+        """Suma de las series que coinciden con las etiquetas dadas"""
+        positions = [(self.labelnames.index(name), str(value)) for name, value in labels.items()]
+        with self._lock:
+            return sum(
+                value for key, value in self._values.items()
+                if all(key[i] == expected for i, expected in positions)
+            )
+
+    def render(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {value}" for key, value in items]
+
+
+class Gauge(Counter):
+    """Valor instantáneo con etiquetas (profundidad de cola, llamadas en curso...)"""
+
+    kind = "gauge"
+
+    def set(self, value, **labels):
+        """
+        Fija el valor actual
+
+        Args:
+            value (float): Valor
+            **labels: Valor de cada etiqueta declarada
+        """
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        with self._lock:
+            self._values[key] = value
+
+
+class Histogram:
+    """Histograma acumulativo con etiquetas (segundos)"""
+
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        """
+        Registra una observación
+
+        Args:
+            value (float): Valor observado (segundos)
+            **labels: Valor de cada etiqueta declarada
+        """
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = {"counts": [0] * len(self.buckets), "sum": 0.0, "count": 0}
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series["counts"][i] += 1
+                    break
+            series["sum"] += value
+            series["count"] += 1
+
+    def summary(self):
+        """
+        Resumen por serie para informes
+
+        Returns:
+            dict: Etiquetas de la serie -> {"count", "avg_ms", "total_s"}
+        """
+        with self._lock:
+            items = sorted(self._series.items())
+        return {
+            ",".join(key): {
+                "count": series["count"],
+                "avg_ms": round(series["sum"] / series["count"] * 1000, 2) if series["count"] else 0.0,
+                "total_s": round(series["sum"], 3)
+            }
+            for key, series in items
+        }
+
+    def reset(self):
+        """Borra todas las observaciones"""
+        with self._lock:
+            self._series.clear()
+
+    def render(self):
+        with self._lock:
+            items = [(key, list(s["counts"]), s["sum"], s["count"]) for key, s in sorted(self._series.items())]
+        lines = []
+        for key, counts, total, count in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                labels = _format_labels(self.labelnames, key, f'le="{bound}"')
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, INF_BUCKET)} {count}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {total}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    """Conjunto de métricas del proceso"""
+
+    def __init__(self):
+        self._metrics = []
+
+    def counter(self, name, documentation, labelnames=()):
+        metric = Counter(name, documentation, labelnames)
+        self._metrics.append(metric)
+        return metric
+
+    def gauge(self, name, documentation, labelnames=()):
+        metric = Gauge(name, documentation, labelnames)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        metric = Histogram(name, documentation, labelnames, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def render(self):
+        """
+        Exposición en formato de texto de Prometheus
+
+        Returns:
+            str: Todas las métricas con sus líneas HELP y TYPE
+        """
+        lines = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+STAGE_SECONDS = REGISTRY.histogram(
+    "assistant_stage_seconds", "Duración de cada etapa de un turno", ["stage"]
+)
+TURN_SECONDS = REGISTRY.histogram(
+    "assistant_turn_seconds", "Duración total de un turno según el camino que lo resolvió", ["path"]
+)
+LLM_FIRST_TOKEN_SECONDS = REGISTRY.histogram(
+    "assistant_llm_first_token_seconds", "Tiempo hasta el primer fragmento en streaming", ["purpose"]
+)
+LLM_CALLS = REGISTRY.counter(
+    "assistant_llm_calls_total", "Llamadas al LLM", ["purpose", "status"]
+)
+LLM_TOKENS = REGISTRY.counter(
+    "assistant_llm_tokens_total", "Tokens de prompt y de respuesta", ["purpose", "kind"]
+)
+CACHE_LOOKUPS = REGISTRY.counter(
+    "assistant_cache_lookups_total", "Consultas a la FAQ y a la caché de respuestas", ["cache", "result"]
+)
+TOOL_CALLS = REGISTRY.counter(
+    "assistant_tool_calls_total", "Ejecuciones de herramientas", ["tool", "status"]
+)
+EMAILS = REGISTRY.counter(
+    "assistant_emails_total", "Emails entregados o fallidos", ["status"]
+)
+MODEL_CHOICES = REGISTRY.counter(
+    "assistant_model_choices_total", "Nivel de modelo elegido por motivo de llamada y razón", ["purpose", "tier", "reason"]
+)
+LLM_CALL_SECONDS = REGISTRY.histogram(
+    "assistant_llm_call_seconds", "Duración de cada llamada al LLM por nivel de modelo", ["purpose", "tier", "status"]
+)
+LLM_RETRIES = REGISTRY.counter(
+    "assistant_llm_retries_total", "Reintentos de llamadas al LLM por tipo de error", ["error"]
+)
+LLM_CIRCUIT_OPEN = REGISTRY.gauge(
+    "assistant_llm_circuit_open", "1 si el circuit breaker del LLM está abierto"
+)
+COALESCED_TURNS = REGISTRY.counter(
+    "assistant_coalesced_turns_total", "Turnos unidos a uno idéntico en curso (shared = llamada ahorrada)", ["result"]
+)
+ADMISSION_IN_FLIGHT = REGISTRY.gauge(
+    "assistant_admission_in_flight", "Turnos llamando al LLM en este proceso"
+)
+ADMISSION_QUEUE_DEPTH = REGISTRY.gauge(
+    "assistant_admission_queue_depth", "Turnos esperando hueco para llamar al LLM"
+)
+ADMISSION_WAIT_SECONDS = REGISTRY.histogram(
+    "assistant_admission_wait_seconds", "Espera en cola de los turnos admitidos"
+)
+ADMISSION_SHED = REGISTRY.counter(
+    "assistant_admission_shed_total", "Turnos descartados por saturación o límite de sesión", ["reason"]
+)
+API_SESSIONS_CREATED = REGISTRY.counter(
+    "assistant_api_sessions_created_total", "Identificadores de sesión pedidos a la API (issued o rate_limited)", ["result"]
+)
+PROFILES_LOADED = REGISTRY.gauge(
+    "assistant_profiles_loaded", "Perfiles con los datos cargados en este proceso"
+)
+PROFILE_ARTIFACT_BYTES = REGISTRY.gauge(
+    "assistant_profile_artifact_bytes", "Memoria estimada de los artefactos (prompt, índice, FAQ) residentes"
+)
+PROFILE_EVICTIONS = REGISTRY.counter(
+    "assistant_profile_evictions_total", "Artefactos de perfiles fríos liberados por el presupuesto de memoria"
+)
+STARTUP_SECONDS = REGISTRY.gauge(
+    "assistant_startup_stage_seconds", "Duración de cada etapa del arranque en segundo plano", ["stage"]
+)
+STARTUP_READY = REGISTRY.gauge(
+    "assistant_ready", "1 cuando el arranque ha terminado y el proceso acepta tráfico"
+)
+
+
+class TurnTrace:
+    """Etapas de un turno, para el desglose que se escribe en el log"""
+
+    __slots__ = ("started", "path", "spans")
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.path = "llm"
+        self.spans = []
+
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+    def breakdown(self):
+        """Texto "etapa 12.3 ms, ..." con las etapas en orden de finalización"""
+        return ", ".join(f"{stage} {seconds * 1000:.1f} ms" for stage, seconds in self.spans)
+
+
+_current_trace = ContextVar("assistant_turn_trace", default=None)
+
+
+def begin_turn():
+    """
+    Inicia la traza del turno en el contexto actual
+
+    Returns:
+        TurnTrace: Traza a la que se añaden las etapas (span) del turno
+    """
+    trace = TurnTrace()
+    _current_trace.set(trace)
+    return trace
+
+
+def end_turn(trace):
+    """
+    Cierra la traza del turno y registra su duración
+
+    Returns:
+        float: Duración del turno en segundos
+    """
+    elapsed = trace.elapsed()
+    TURN_SECONDS.observe(elapsed, path=trace.path)
+    if _current_trace.get() is trace:
+        _current_trace.set(None)
+    return elapsed
+
+
+def mark_path(path):
+    """Anota qué camino resolvió el turno (router, faq, cache, llm)"""
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.path = path
+
+
+@contextmanager
+def span(stage):
+    """
+    Mide una etapa: histograma assistant_stage_seconds y traza del turno
+
+    Args:
+        stage (str): Nombre de la etapa (route, prompt, llm.chat, tool.x, smtp...)
+    """
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        STAGE_SECONDS.observe(elapsed, stage=stage)
+        trace = _current_trace.get()
+        if trace is not None:
+            trace.spans.append((stage, elapsed))
+
+
+def record_llm_call(purpose, usage=None, status="ok", first_token_seconds=None):
+    """
+    Contabiliza una llamada al LLM y sus tokens
+
+    Args:
+        purpose (str): Motivo de la llamada (chat, subject, adapt, summary)
+        usage: Objeto usage de la API (prompt_tokens, completion_tokens) o None
+        status (str): "ok" o "error"
+        first_token_seconds (float): Tiempo hasta el primer fragmento (streaming)
+    """
+    LLM_CALLS.inc(purpose=purpose, status=status)
+    if usage is not None:
+        LLM_TOKENS.inc(getattr(usage, "prompt_tokens", 0) or 0, purpose=purpose, kind="prompt")
+        LLM_TOKENS.inc(getattr(usage, "completion_tokens", 0) or 0, purpose=purpose, kind="completion")
+    if first_token_seconds is not None:
+        LLM_FIRST_TOKEN_SECONDS.observe(first_token_seconds, purpose=purpose)
+
+
+class MetricsServer:
+    """
+    Servidor HTTP en un hilo que expone /metrics junto a la interfaz de Gradio
+
+    También sirve las sondas del orquestador: /healthz (el proceso vive) y,
+    si se le pasa `readiness`, /readyz (503 hasta que el arranque termina).
+    """
+
+    def __init__(self, host="127.0.0.1", port=9464, registry=None, readiness=None):
+        """
+        Args:
+            host (str): Dirección de escucha
+            port (int): Puerto
+            registry (Registry): Registro de métricas (por defecto el global)
+            readiness (callable): Devuelve el estado del arranque ({"status": "ready"|...})
+        """
+        self.registry = registry or REGISTRY
+        self.readiness = readiness
+        self._server = ThreadingHTTPServer((host, port), self._make_handler())
+        self._server.daemon_threads = True
+
+    @property
+    def address(self):
+        """(host, puerto) en el que escucha"""
+        return self._server.server_address[:2]
+
+    def start(self):
+        """Arranca el servidor en segundo plano"""
+        threading.Thread(target=self._server.serve_forever, name="metrics", daemon=True).start()
+        return self
+
+    def stop(self):
+        """Detiene el servidor"""
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _make_handler(self):
+        registry = self.registry
+        readiness = self.readiness
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def do_GET(self):
+                path = self.path.split("?")[0]
+                if path == "/metrics":
+                    self._send(200, registry.render(), CONTENT_TYPE)
+                elif path == "/healthz":
+                    self._send(200, json.dumps({"status": "ok"}), "application/json")
+                elif path == "/readyz" and readiness is not None:
+                    status = readiness()
+                    code = 200 if status["status"] == "ready" else 503
+                    self._send(code, json.dumps(status), "application/json")
+                else:
+                    self.send_error(404)
+
+            def _send(self, code, text, content_type):
+                body = text.encode("utf-8")
+                self.send_response(code)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        return Handler
@@ -1,10 +1,18 @@
 from .email_tools import send_email_to_me
+from .email_queue import EmailQueue, get_email_queue
 from .data_tools import record_user_details, record_unknown_question
+from .lead_store import LeadStore, get_lead_store
 from .tool_definitions import get_all_tools
+from .dispatcher import ToolDispatcher
 
 __all__ = [
     'send_email_to_me',
+    'EmailQueue',
+    'get_email_queue',
     'record_user_details', 
     'record_unknown_question',
-    'get_all_tools'
+    'LeadStore',
+    'get_lead_store',
+    'get_all_tools',
+    'ToolDispatcher'
 ] 
\ No newline at end of file
@@ -1,12 +1,14 @@
 """
 Herramientas para el manejo de datos (leads, preguntas sin respuesta)
 """
-import os
-from src.config import Config
+from src.tools.lead_store import get_lead_store
+from src.observability import get_logger
+
+logger = get_logger(__name__)
 
 def record_user_details(email, name="Name not provided", notes="not provided"):
     """
-    Registra un lead en el archivo de leads
+    Registra (o actualiza) un lead en el almacén de leads
     
     Args:
         email (str): Correo del usuario
@@ -16,12 +18,9 @@ def record_user_details(email, name="Name not provided", notes="not provided"):
     Returns:
         dict: Confirmación del registro
     """
-    # Crear directorio data si no existe
-    os.makedirs(os.path.dirname(Config.LEADS_FILE), exist_ok=True)
-    
-    with open(Config.LEADS_FILE, "a", encoding="utf-8") as f:
-        f.write(f"{email} | {name} | {notes}\n")
-    print(f"[INFO] Lead registrado: {email} | {name} | {notes}")
+    # Alta o actualización por email; la escritura la hace el hilo del almacén
+    get_lead_store().record_lead(email, name, notes)
+    logger.info(f"Lead registrado: {email} | {name} | {notes}")
     return {"recorded": "ok"}
 
 def record_unknown_question(question):
@@ -34,10 +33,7 @@ def record_unknown_question(question):
     Returns:
         dict: Confirmación del registro
     """
-    # Crear directorio data si no existe
-    os.makedirs(os.path.dirname(Config.UNKNOWN_QUESTIONS_FILE), exist_ok=True)
-    
-    with open(Config.UNKNOWN_QUESTIONS_FILE, "a", encoding="utf-8") as f:
-        f.write(f"{question}\n")
-    print(f"[INFO] Pregunta sin respuesta registrada: {question}")
+    # Las preguntas repetidas (misma forma normalizada) solo incrementan su contador
+    get_lead_store().record_question(question)
+    logger.info(f"Pregunta sin respuesta registrada: {question}")
     return {"recorded": "ok"} 
\ No newline at end of file
@@ -0,0 +1,212 @@
+"""
+Despachador de llamadas a herramientas con límites de tiempo y métricas
+"""
+import asyncio
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from dataclasses import dataclass
+from src.config import Config
+from src.tools.data_tools import record_user_details, record_unknown_question
+from src.tools.email_tools import send_email_to_me
+from src.observability import get_logger, STAGE_SECONDS, TOOL_CALLS
+
+logger = get_logger(__name__)
+
+# Implementación por defecto de cada herramienta declarada en tool_definitions
+TOOL_FUNCTIONS = {
+    "record_user_details": record_user_details,
+    "record_unknown_question": record_unknown_question,
+    "send_email_to_me": send_email_to_me
+}
+
+
+@dataclass(frozen=True)
+class ToolSpec:
+    """Herramienta registrada en el despachador"""
+
+    name: str
+    function: object
+    timeout: float
+    with_state: bool = False  # Si recibe el estado de la sesión como argumento "state"
+
+
+class ToolDispatcher:
+    """
+    Ejecuta las llamadas a herramientas de un turno de forma concurrente
+
+    El registro se construye una sola vez. Cada llamada tiene un timeout
+    propio, acotado además por el deadline de la petición; una herramienta
+    que no termina a tiempo devuelve un error al modelo en lugar de bloquear
+    el turno. Se registra la latencia de cada herramienta.
+    """
+
+    def __init__(self, max_workers=None):
+        self._registry = {}
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers or Config.TOOL_MAX_WORKERS, thread_name_prefix="tool"
+        )
+        self._stats = {}
+        self._stats_lock = threading.Lock()
+
+    @classmethod
+    def from_definitions(cls, tools, functions=None):
+        """
+        Crea un despachador con las implementaciones de las herramientas declaradas
+
+        Args:
+            tools (list): Definiciones en formato OpenAI (get_all_tools())
+            functions (dict): Nombre -> función (por defecto TOOL_FUNCTIONS)
+
+        Returns:
+            ToolDispatcher: Despachador con las herramientas registradas
+        """
+        functions = functions or TOOL_FUNCTIONS
+        dispatcher = cls()
+        for tool in tools:
+            name = tool["function"]["name"]
+            if name in functions:
+                dispatcher.register(name, functions[name])
+            else:
+                logger.warning(f"Herramienta declarada sin implementación: {name}")
+        return dispatcher
+
+    def register(self, name, function, timeout=None, with_state=False):
+        """
+        Registra (o reemplaza) la implementación de una herramienta
+
+        Args:
+            name (str): Nombre de la herramienta
+            function (callable): Implementación; recibe los argumentos del modelo
+            timeout (float): Segundos máximos de ejecución
+            with_state (bool): Si la función recibe también el estado de la sesión
+        """
+        self._registry[name] = ToolSpec(name, function, timeout or Config.TOOL_TIMEOUT_SECONDS, with_state)
+
+    def dispatch(self, tool_calls, state=None, deadline=None):
+        """
+        Ejecuta las llamadas en paralelo y espera sus resultados
+
+        Args:
+            tool_calls: Llamadas a herramientas devueltas por OpenAI
+            state (SessionState): Estado de la sesión, para las herramientas que lo usan
+            deadline (float): Instante (time.monotonic) límite de la petición
+
+        Returns:
+            list: Mensajes "tool" en el orden de las llamadas
+        """
+        futures = [self._executor.submit(self._run, tool_call, state) for tool_call in tool_calls]
+        results = []
+        for tool_call, future in zip(tool_calls, futures):
+            try:
+                result = future.result(timeout=self._timeout(tool_call, deadline))
+            except FutureTimeoutError:
+                result = self._timed_out(tool_call)
+            results.append(self._tool_message(tool_call, result))
+        return results
+
+    async def adispatch(self, tool_calls, state=None, deadline=None):
+        """
+        Variante asíncrona de dispatch(): no bloquea el event loop
+
+        Returns:
+            list: Mensajes "tool" en el orden de las llamadas
+        """
+        loop = asyncio.get_running_loop()
+
+        async def run(tool_call):
+            future = loop.run_in_executor(self._executor, self._run, tool_call, state)
+            try:
+                return await asyncio.wait_for(future, self._timeout(tool_call, deadline))
+            except asyncio.TimeoutError:
+                return self._timed_out(tool_call)
+
+        outcomes = await asyncio.gather(*(run(tool_call) for tool_call in tool_calls))
+        return [self._tool_message(tool_call, result) for tool_call, result in zip(tool_calls, outcomes)]
+
+    def stats(self):
+        """
+        Métricas por herramienta
+
+        Returns:
+            dict: Nombre -> llamadas, errores, timeouts y latencias (ms)
+        """
+        with self._stats_lock:
+            return {
+                name: {
+                    "calls": s["calls"],
+                    "errors": s["errors"],
+                    "timeouts": s["timeouts"],
+                    "avg_ms": round(s["total_ms"] / s["calls"], 1) if s["calls"] else 0.0,
+                    "max_ms": round(s["max_ms"], 1)
+                }
+                for name, s in self._stats.items()
+            }
+
+    def shutdown(self):
+        """Libera el pool de hilos"""
+        self._executor.shutdown(wait=False)
+
+    def _timeout(self, tool_call, deadline):
+        """Timeout efectivo de una llamada: el de la herramienta acotado por el deadline"""
+        spec = self._registry.get(tool_call.function.name)
+        timeout = spec.timeout if spec else Config.TOOL_TIMEOUT_SECONDS
+        if deadline is not None:
+            timeout = min(timeout, deadline - time.monotonic())
+        return max(timeout, 0.0)
+
+    def _run(self, tool_call, state):
+        """Ejecuta una llamada en un hilo del pool y registra su latencia"""
+        name = tool_call.function.name
+        spec = self._registry.get(name)
+        logger.debug(f"Ejecutando herramienta: {name}")
+        started = time.perf_counter()
+        error = False
+        try:
+            if spec is None:
+                error = True
+                return {"error": f"Herramienta desconocida: {name}"}
+            arguments = json.loads(tool_call.function.arguments or "{}")
+            if spec.with_state:
+                return spec.function(state=state, **arguments)
+            return spec.function(**arguments)
+        except Exception as e:
+            error = True
+            logger.error(f"Error en la herramienta {name}: {e}")
+            return {"error": f"{type(e).__name__}: {e}"}
+        finally:
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            self._record(name, elapsed_ms, error=error)
+            logger.debug(f"{name} terminó en {elapsed_ms:.0f} ms")
+
+    def _timed_out(self, tool_call):
+        """Resultado para una llamada que superó su tiempo máximo"""
+        name = tool_call.function.name
+        self._record(name, 0.0, timeout=True)
+        logger.warning(f"La herramienta {name} superó su tiempo máximo")
+        return {"error": "timeout", "detail": f"{name} no respondió a tiempo"}
+
+    def _record(self, name, elapsed_ms, error=False, timeout=False):
+        """Acumula las métricas de una herramienta"""
+        TOOL_CALLS.inc(tool=name, status="timeout" if timeout else "error" if error else "ok")
+        if not timeout:
+            STAGE_SECONDS.observe(elapsed_ms / 1000, stage=f"tool.{name}")
+        with self._stats_lock:
+            s = self._stats.setdefault(name, {"calls": 0, "errors": 0, "timeouts": 0, "total_ms": 0.0, "max_ms": 0.0})
+            if timeout:
+                s["timeouts"] += 1
+                return
+            s["calls"] += 1
+            s["errors"] += int(error)
+            s["total_ms"] += elapsed_ms
+            s["max_ms"] = max(s["max_ms"], elapsed_ms)
+
+    @staticmethod
+    def _tool_message(tool_call, result):
+        """Mensaje "tool" con el resultado serializado"""
+        return {
+            "role": "tool",
+            "content": json.dumps(result, ensure_ascii=False),
+            "tool_call_id": tool_call.id
+        }
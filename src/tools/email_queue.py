@@ -0,0 +1,437 @@
+"""
+Cola de envío de emails en segundo plano con diario en disco
+"""
+import glob
+import json
+import os
+import queue
+import smtplib
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from src.config import Config
+from src.tools.email_tools import build_email_message, open_smtp_connection
+from src.observability import get_logger, span, EMAILS
+
+try:
+    import fcntl
+except ImportError:  # Windows: un único proceso por diario, sin bloqueo
+    fcntl = None
+
+logger = get_logger(__name__)
+
+STATUS_QUEUED = "queued"
+STATUS_RETRYING = "retrying"
+STATUS_SENT = "sent"
+STATUS_FAILED = "failed"
+
+# Errores que no se resuelven reintentando
+PERMANENT_ERRORS = (smtplib.SMTPAuthenticationError, smtplib.SMTPRecipientsRefused, smtplib.SMTPSenderRefused)
+
+
+def is_transient_error(error):
+    """
+    Indica si un error SMTP merece reintento
+
+    Args:
+        error (Exception): Error producido al enviar
+
+    Returns:
+        bool: True para desconexiones, timeouts y respuestas 4xx
+    """
+    if isinstance(error, PERMANENT_ERRORS):
+        return False
+    if isinstance(error, smtplib.SMTPResponseException):
+        return 400 <= error.smtp_code < 500
+    return isinstance(error, (smtplib.SMTPException, OSError))
+
+
+def journal_slot(base_path, index):
+    """
+    Ruta del diario número index de un mismo directorio de salida
+
+    Args:
+        base_path (str): Diario configurado (EMAIL_JOURNAL_FILE), que es el número 0
+        index (int): Número de diario
+
+    Returns:
+        str: "journal.jsonl", "journal.1.jsonl", "journal.2.jsonl"...
+    """
+    if index == 0:
+        return base_path
+    root, ext = os.path.splitext(base_path)
+    return f"{root}.{index}{ext}"
+
+
+def _try_lock(path):
+    """
+    Bloqueo exclusivo, sin esperar, del fichero path + ".lock"
+
+    Returns:
+        file | None: Fichero que mantiene el bloqueo, o None si otro proceso lo tiene
+    """
+    lock_file = open(f"{path}.lock", "a")
+    if fcntl is None:
+        return lock_file
+    try:
+        fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        lock_file.close()
+        return None
+    return lock_file
+
+
+class EmailQueue:
+    """
+    Cola duradera de emails salientes
+
+    Cada email se anota en un diario JSONL (append-only) antes de confirmarse
+    al visitante. Un único hilo trabajador mantiene viva una conexión SMTP
+    autenticada, envía en lotes y reintenta con backoff exponencial los fallos
+    transitorios. Al arrancar se reencolan los emails que quedaron pendientes,
+    y el diario se compacta (solo quedan los pendientes) al arrancar y cada
+    EMAIL_JOURNAL_COMPACT_ENTRIES emails terminados o EMAIL_JOURNAL_COMPACT_BYTES.
+
+    Con varios procesos (workers de la API) cada uno bloquea su propio diario
+    (journal.jsonl, journal.1.jsonl...) y adopta los de procesos que ya no existen.
+
+    Los estados finales (enviado o fallido) se conservan en memoria durante
+    EMAIL_STATUS_TTL_SECONDS y como mucho EMAIL_STATUS_MAX_ENTRIES, lo justo
+    para que la sesión se entere del resultado en su siguiente turno.
+    """
+
+    def __init__(self, journal_path=None):
+        base_path = journal_path or Config.EMAIL_JOURNAL_FILE
+        os.makedirs(os.path.dirname(base_path) or ".", exist_ok=True)
+        self.journal_path, self._journal_owner = self._claim_journal(base_path)
+        self._queue = queue.Queue()
+        self._statuses = {}  # Emails en cola o reintentándose
+        self._finished = OrderedDict()  # id -> (estado final, instante), del más antiguo al más reciente
+        self._journal_lock = threading.Lock()
+        self._finished_since_compaction = 0  # Emails terminados anotados desde la última compactación
+        self._status_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._server = None
+        self._last_used = 0.0
+        self._recover()
+        self._adopt_orphans(base_path)
+        self._worker = threading.Thread(target=self._run, name="email-queue", daemon=True)
+        self._worker.start()
+
+    def enqueue(self, sender_email, subject, body, recipient=None):
+        """
+        Anota un email en el diario y lo pone en cola
+
+        Args:
+            sender_email (str): Email del remitente
+            subject (str): Asunto del correo
+            body (str): Contenido del mensaje
+            recipient (str): Destinatario (por defecto, Config.SMTP_EMAIL)
+
+        Returns:
+            str: Identificador del email para consultar su estado
+        """
+        email = {
+            "id": uuid.uuid4().hex,
+            "sender_email": sender_email,
+            "subject": subject,
+            "body": body,
+            "recipient": recipient,
+            "attempts": 0,
+            "next_attempt": 0.0
+        }
+        self._journal({"type": "queued", "ts": time.time(), **self._public(email)})
+        self._set_status(email["id"], STATUS_QUEUED)
+        self._queue.put(email)
+        logger.info(f"Email en cola de envío: {email['id']}")
+        return email["id"]
+
+    def status(self, email_id):
+        """
+        Estado de entrega de un email
+
+        Args:
+            email_id (str): Identificador devuelto por enqueue()
+
+        Returns:
+            dict | None: {"status", "error", "attempts"} o None si no se conoce
+        """
+        with self._status_lock:
+            status = self._statuses.get(email_id)
+            if status is None and email_id in self._finished:
+                status = self._finished[email_id][0]
+            return dict(status) if status else None
+
+    def pending(self):
+        """Número de emails pendientes de envío"""
+        return self._queue.qsize()
+
+    def stop(self, timeout=5):
+        """Detiene el trabajador y cierra la conexión SMTP"""
+        self._stop.set()
+        self._queue.put(None)
+        self._worker.join(timeout)
+        if not self._worker.is_alive():
+            self._journal_owner.close()  # Otro proceso puede adoptar lo que quede pendiente
+
+    @staticmethod
+    def _public(email):
+        """Campos del email que se guardan en el diario"""
+        return {key: email.get(key) for key in ("id", "sender_email", "subject", "body", "recipient")}
+
+    def _journal(self, record):
+        """Añade un registro al diario, lo fuerza a disco y lo compacta si ha crecido"""
+        line = json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n"
+        with self._journal_lock:
+            with open(self.journal_path, "a", encoding="utf-8") as f:
+                f.write(line)
+                f.flush()
+                os.fsync(f.fileno())
+                size = f.tell()
+            if record.get("status") in (STATUS_SENT, STATUS_FAILED):
+                self._finished_since_compaction += 1
+            if self._finished_since_compaction and (
+                self._finished_since_compaction >= Config.EMAIL_JOURNAL_COMPACT_ENTRIES
+                or size >= Config.EMAIL_JOURNAL_COMPACT_BYTES
+            ):
+                self._compact()
+
+    def _compact(self):
+        """
+        Reescribe el diario con solo los emails pendientes (con el lock del diario tomado)
+
+        Returns:
+            dict | None: Emails pendientes, o None si no se pudo leer el diario
+        """
+        pending = self._read_pending(self.journal_path)
+        if pending is None:
+            return None
+        tmp_path = f"{self.journal_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            for record in pending.values():
+                f.write(json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.journal_path)
+        self._finished_since_compaction = 0
+        logger.debug(f"Diario de emails compactado: {len(pending)} pendientes")
+        return pending
+
+    def _set_status(self, email_id, status, error=None, attempts=0, journal=False):
+        """Actualiza el estado en memoria (y en el diario si es un cambio relevante)"""
+        record = {"status": status, "error": error, "attempts": attempts}
+        with self._status_lock:
+            if status in (STATUS_SENT, STATUS_FAILED):
+                self._statuses.pop(email_id, None)
+                self._finished[email_id] = (record, time.time())
+                self._finished.move_to_end(email_id)
+                self._prune_finished()
+            else:
+                self._statuses[email_id] = record
+        if journal:
+            self._journal({"type": "status", "ts": time.time(), "id": email_id, "status": status, "error": error})
+
+    def _prune_finished(self):
+        """Olvida los estados finales caducados o que superan el máximo (con el lock tomado)"""
+        cutoff = time.time() - Config.EMAIL_STATUS_TTL_SECONDS
+        while self._finished:
+            _, finished_at = next(iter(self._finished.values()))
+            if finished_at >= cutoff and len(self._finished) <= Config.EMAIL_STATUS_MAX_ENTRIES:
+                break
+            self._finished.popitem(last=False)
+
+    @staticmethod
+    def _claim_journal(base_path):
+        """
+        Bloquea el primer diario libre para este proceso
+
+        Returns:
+            tuple: (ruta del diario, fichero que mantiene el bloqueo)
+        """
+        index = 0
+        while True:
+            path = journal_slot(base_path, index)
+            owner = _try_lock(path)
+            if owner is not None:
+                return path, owner
+            index += 1
+
+    @staticmethod
+    def _read_pending(path):
+        """
+        Emails anotados en un diario que no llegaron a enviarse ni descartarse
+
+        Returns:
+            dict | None: id -> registro "queued", o None si no se pudo leer
+        """
+        pending = {}
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue  # Línea incompleta por una caída a mitad de escritura
+                    if record.get("type") == "queued":
+                        pending[record["id"]] = record
+                    elif record.get("status") in (STATUS_SENT, STATUS_FAILED):
+                        pending.pop(record.get("id"), None)
+        except OSError as e:
+            logger.error(f"No se pudo leer el diario de emails {path}: {e}")
+            return None
+        return pending
+
+    def _adopt_orphans(self, base_path):
+        """Reencola en este proceso los pendientes de diarios sin proceso dueño"""
+        if fcntl is None:
+            return
+        root, ext = os.path.splitext(base_path)
+        for path in [base_path] + sorted(glob.glob(f"{glob.escape(root)}.*{ext}")):
+            if path == self.journal_path or not os.path.exists(path):
+                continue
+            owner = _try_lock(path)
+            if owner is None:
+                continue  # Diario de otro proceso vivo
+            try:
+                pending = self._read_pending(path)
+                if pending is None:
+                    continue
+                for record in pending.values():
+                    self._journal(record)
+                    self._requeue(record)
+                os.remove(path)
+                if pending:
+                    logger.info(f"Adoptados {len(pending)} emails pendientes de {path}")
+            finally:
+                owner.close()
+
+    def _requeue(self, record):
+        """Pone en cola un email recuperado de un diario"""
+        email = {**self._public(record), "attempts": 0, "next_attempt": 0.0}
+        self._set_status(email["id"], STATUS_QUEUED)
+        self._queue.put(email)
+
+    def _recover(self):
+        """Reencola los emails pendientes del diario y lo compacta"""
+        if not os.path.exists(self.journal_path):
+            return
+        with self._journal_lock:
+            pending = self._compact()
+        if pending is None:
+            return
+
+        for record in pending.values():
+            self._requeue(record)
+        if pending:
+            logger.info(f"Reencolados {len(pending)} emails pendientes del diario")
+
+    def _run(self):
+        """Bucle del trabajador: agrupa, envía y programa reintentos"""
+        retries = []
+        while not self._stop.is_set():
+            now = time.time()
+            due = [email for email in retries if email["next_attempt"] <= now]
+            retries = [email for email in retries if email["next_attempt"] > now]
+
+            timeout = min((email["next_attempt"] for email in retries), default=now + 1.0) - now
+            batch = list(due)
+            try:
+                if not batch:
+                    email = self._queue.get(timeout=max(0.05, min(timeout, 1.0)))
+                    if email is None:
+                        break
+                    batch.append(email)
+                while len(batch) < Config.EMAIL_BATCH_SIZE:
+                    email = self._queue.get_nowait()
+                    if email is None:
+                        self._stop.set()
+                        break
+                    batch.append(email)
+            except queue.Empty:
+                pass
+
+            if batch:
+                retries.extend(self._send_batch(batch))
+            elif self._server and time.time() - self._last_used > Config.EMAIL_SMTP_IDLE_SECONDS:
+                self._close_connection()
+        self._close_connection()
+
+    def _send_batch(self, batch):
+        """
+        Envía un lote reutilizando la conexión SMTP
+
+        Returns:
+            list: Emails que deben reintentarse más tarde
+        """
+        retries = []
+        for email in batch:
+            email["attempts"] += 1
+            try:
+                with span("smtp"):
+                    server = self._connection()
+                    server.send_message(build_email_message(
+                        email["sender_email"], email["subject"], email["body"], email["recipient"]
+                    ))
+                self._last_used = time.time()
+                self._set_status(email["id"], STATUS_SENT, attempts=email["attempts"], journal=True)
+                EMAILS.inc(status="sent")
+                logger.info(f"✅ Email enviado correctamente desde {email['sender_email']}")
+            except Exception as e:
+                self._close_connection()
+                error = f"{type(e).__name__} - {e}"
+                if is_transient_error(e) and email["attempts"] < Config.EMAIL_MAX_ATTEMPTS:
+                    delay = Config.EMAIL_RETRY_BASE_SECONDS * 2 ** (email["attempts"] - 1)
+                    email["next_attempt"] = time.time() + delay
+                    self._set_status(email["id"], STATUS_RETRYING, error, email["attempts"])
+                    EMAILS.inc(status="retrying")
+                    logger.warning(f"Error transitorio enviando email, reintento en {delay:.0f}s: {error}")
+                    retries.append(email)
+                else:
+                    self._set_status(email["id"], STATUS_FAILED, error, email["attempts"], journal=True)
+                    EMAILS.inc(status="failed")
+                    logger.error(f"Email descartado tras {email['attempts']} intentos: {error}")
+        return retries
+
+    def _connection(self):
+        """Devuelve la conexión SMTP viva, reconectando si el servidor la cerró"""
+        if self._server is not None:
+            if time.time() - self._last_used < 5:
+                return self._server
+            try:
+                if self._server.noop()[0] == 250:
+                    return self._server
+            except smtplib.SMTPException:
+                pass
+            self._close_connection()
+        self._server = open_smtp_connection()
+        return self._server
+
+    def _close_connection(self):
+        """Cierra la conexión SMTP si está abierta"""
+        if self._server is None:
+            return
+        try:
+            self._server.quit()
+        except Exception:
+            self._server.close()
+        self._server = None
+
+
+_email_queue = None
+_email_queue_lock = threading.Lock()
+
+
+def get_email_queue():
+    """
+    Retorna la cola de emails compartida por el proceso, creándola si no existe
+
+    Returns:
+        EmailQueue: Cola de envío
+    """
+    global _email_queue
+    if _email_queue is None:
+        with _email_queue_lock:
+            if _email_queue is None:
+                _email_queue = EmailQueue()
+    return _email_queue
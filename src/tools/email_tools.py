@@ -4,28 +4,26 @@ Herramientas para el manejo de emails
 import smtplib
 from email.message import EmailMessage
 from src.config import Config
+from src.observability import get_logger, span, EMAILS
 
-def send_email_to_me(sender_email, subject, body):
+logger = get_logger(__name__)
+
+def build_email_message(sender_email, subject, body, recipient=None):
     """
-    Envía un correo real a Diego usando la configuración SMTP
+    Construye el mensaje que recibe la persona del perfil
     
     Args:
         sender_email (str): Email del remitente
         subject (str): Asunto del correo
         body (str): Contenido del mensaje
+        recipient (str): Destinatario (por defecto, Config.SMTP_EMAIL)
         
     Returns:
-        dict: Estado del envío
+        EmailMessage: Mensaje listo para enviar
     """
-    if not Config.validate_smtp_config():
-        error_msg = "Configuración SMTP incompleta. Faltan variables de entorno."
-        print(f"[ERROR] {error_msg}")
-        return {"status": f"Error: {error_msg}"}
-
-    # Crear mensaje
     msg = EmailMessage()
     msg["From"] = Config.SMTP_EMAIL
-    msg["To"] = Config.SMTP_EMAIL
+    msg["To"] = recipient or Config.SMTP_EMAIL
     msg["Subject"] = f"[Asistente Web] {subject}"
     msg["Reply-To"] = sender_email
     
@@ -39,27 +37,69 @@ def send_email_to_me(sender_email, subject, body):
     full_body += f"Para responder, usa Reply-To: {sender_email}"
     
     msg.set_content(full_body)
+    return msg
 
+def open_smtp_connection():
+    """
+    Abre una conexión SMTP autenticada con la configuración actual
+    
+    Returns:
+        smtplib.SMTP: Conexión lista para enviar
+    """
+    server = smtplib.SMTP(Config.SMTP_HOST, int(Config.SMTP_PORT), timeout=Config.SMTP_TIMEOUT)
     try:
-        with smtplib.SMTP(Config.SMTP_HOST, int(Config.SMTP_PORT)) as server:
+        if Config.SMTP_STARTTLS:
             server.starttls()
-            server.login(Config.SMTP_EMAIL, Config.SMTP_PASSWORD)
+        # Si el servidor no ofrece AUTH, login() falla en lugar de enviar sin credenciales
+        server.login(Config.SMTP_EMAIL, Config.SMTP_PASSWORD)
+    except Exception:
+        server.close()
+        raise
+    return server
+
+def send_email_to_me(sender_email, subject, body, recipient=None):
+    """
+    Envía un correo real a la persona del perfil usando la configuración SMTP
+    
+    Args:
+        sender_email (str): Email del remitente
+        subject (str): Asunto del correo
+        body (str): Contenido del mensaje
+        recipient (str): Destinatario (por defecto, Config.SMTP_EMAIL)
+        
+    Returns:
+        dict: Estado del envío
+    """
+    if not Config.validate_smtp_config():
+        error_msg = "Configuración SMTP incompleta. Faltan variables de entorno."
+        logger.error(error_msg)
+        return {"status": f"Error: {error_msg}"}
+
+    # Crear mensaje
+    msg = build_email_message(sender_email, subject, body, recipient)
+
+    try:
+        with span("smtp"), open_smtp_connection() as server:
             server.send_message(msg)
-            
-        print(f"[INFO] ✅ Email enviado correctamente desde {sender_email}")
+        
+        EMAILS.inc(status="sent")
+        logger.info(f"✅ Email enviado correctamente desde {sender_email}")
         return {"status": "Correo enviado correctamente"}
         
     except smtplib.SMTPAuthenticationError as e:
+        EMAILS.inc(status="failed")
         error_msg = f"Error de autenticación SMTP: {str(e)}"
-        print(f"[ERROR] {error_msg}")
+        logger.error(error_msg)
         return {"status": f"Error de autenticación: {error_msg}"}
         
     except smtplib.SMTPRecipientsRefused as e:
+        EMAILS.inc(status="failed")
         error_msg = f"Destinatario rechazado: {str(e)}"
-        print(f"[ERROR] {error_msg}")
+        logger.error(error_msg)
         return {"status": f"Error de destinatario: {error_msg}"}
         
     except Exception as e:
+        EMAILS.inc(status="failed")
         error_msg = f"Error al enviar correo: {type(e).__name__} - {str(e)}"
-        print(f"[ERROR] {error_msg}")
+        logger.error(error_msg)
         return {"status": f"Error: {error_msg}"} 
\ No newline at end of file
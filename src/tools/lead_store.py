@@ -0,0 +1,278 @@
+"""
+Almacén indexado de leads y preguntas sin respuesta (SQLite)
+"""
+import atexit
+import os
+import queue
+import re
+import sqlite3
+import threading
+import time
+from src.config import Config
+from src.observability import get_logger
+
+logger = get_logger(__name__)
+
+# Valores por defecto de record_user_details que no deben pisar datos reales
+PLACEHOLDERS = frozenset(["name not provided", "not provided", ""])
+
+SCHEMA = [
+    "CREATE TABLE IF NOT EXISTS leads ("
+    "email TEXT PRIMARY KEY, name TEXT, notes TEXT, "
+    "first_seen REAL NOT NULL, last_seen REAL NOT NULL, times_seen INTEGER NOT NULL DEFAULT 1)",
+    "CREATE INDEX IF NOT EXISTS idx_leads_first_seen ON leads(first_seen)",
+    "CREATE INDEX IF NOT EXISTS idx_leads_last_seen ON leads(last_seen)",
+    "CREATE TABLE IF NOT EXISTS unknown_questions ("
+    "normalized TEXT PRIMARY KEY, question TEXT NOT NULL, "
+    "first_seen REAL NOT NULL, last_seen REAL NOT NULL, times_asked INTEGER NOT NULL DEFAULT 1)",
+    "CREATE INDEX IF NOT EXISTS idx_questions_last_seen ON unknown_questions(last_seen)",
+    "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)"
+]
+
+UPSERT_LEAD = (
+    "INSERT INTO leads (email, name, notes, first_seen, last_seen, times_seen) VALUES (?, ?, ?, ?, ?, 1) "
+    "ON CONFLICT(email) DO UPDATE SET "
+    "name = COALESCE(excluded.name, leads.name), "
+    "notes = COALESCE(excluded.notes, leads.notes), "
+    "first_seen = MIN(leads.first_seen, excluded.first_seen), "
+    "last_seen = MAX(leads.last_seen, excluded.last_seen), "
+    "times_seen = leads.times_seen + 1"
+)
+
+UPSERT_QUESTION = (
+    "INSERT INTO unknown_questions (normalized, question, first_seen, last_seen, times_asked) "
+    "VALUES (?, ?, ?, ?, 1) "
+    "ON CONFLICT(normalized) DO UPDATE SET "
+    "first_seen = MIN(unknown_questions.first_seen, excluded.first_seen), "
+    "last_seen = MAX(unknown_questions.last_seen, excluded.last_seen), "
+    "times_asked = unknown_questions.times_asked + 1"
+)
+
+
+def normalize_email(email):
+    """Email en minúsculas y sin espacios, clave de deduplicación de leads"""
+    return email.strip().lower()
+
+
+def normalize_question(question):
+    """
+    Forma canónica de una pregunta: minúsculas, sin tildes ni signos
+
+    Args:
+        question (str): Pregunta original
+
+    Returns:
+        str: Pregunta normalizada, clave de deduplicación
+    """
+    # Importación diferida: src.core importa src.tools al cargar el asistente
+    from src.core.text_utils import normalize_text
+    return normalize_text(question)
+
+
+def _clean(value):
+    """None para los valores por defecto, para no sobrescribir datos previos"""
+    if value is None:
+        return None
+    value = value.strip()
+    return None if value.lower() in PLACEHOLDERS else value
+
+
+class LeadStore:
+    """
+    Leads y preguntas sin respuesta en SQLite (modo WAL)
+
+    Las escrituras se encolan y un único hilo escritor las aplica en lotes,
+    cada lote en una transacción, de modo que las herramientas del LLM
+    vuelven de inmediato. Los leads se deduplican por email y las preguntas
+    por su forma normalizada, con fecha de primera y última aparición.
+    """
+
+    def __init__(self, db_path=None, batch_size=None):
+        self.db_path = db_path or Config.LEADS_DB_FILE
+        self.batch_size = batch_size or Config.LEAD_STORE_BATCH_SIZE
+        self._local = threading.local()
+        self._queue = queue.Queue()
+        os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+        conn = self._connection()
+        for statement in SCHEMA:
+            conn.execute(statement)
+        conn.commit()
+        self._migrate_text_file(Config.LEADS_FILE, "leads", self._parse_lead_line)
+        self._migrate_text_file(Config.UNKNOWN_QUESTIONS_FILE, "unknown_questions", self._parse_question_line)
+        self._writer = threading.Thread(target=self._run, name="lead-store", daemon=True)
+        self._writer.start()
+
+    def record_lead(self, email, name=None, notes=None):
+        """
+        Encola el alta o actualización de un lead
+
+        Args:
+            email (str): Correo del usuario
+            name (str): Nombre del usuario
+            notes (str): Notas contextuales
+        """
+        now = time.time()
+        self._queue.put((UPSERT_LEAD, (normalize_email(email), _clean(name), _clean(notes), now, now)))
+
+    def record_question(self, question):
+        """
+        Encola una pregunta sin respuesta (las repetidas solo incrementan su contador)
+
+        Args:
+            question (str): La pregunta sin respuesta
+        """
+        normalized = normalize_question(question)
+        if not normalized:
+            return
+        now = time.time()
+        self._queue.put((UPSERT_QUESTION, (normalized, question.strip(), now, now)))
+
+    def flush(self):
+        """Espera a que el hilo escritor aplique todas las escrituras pendientes"""
+        self._queue.join()
+
+    def stop(self, timeout=5):
+        """Aplica las escrituras pendientes y detiene el hilo escritor"""
+        if self._writer.is_alive():
+            self._queue.put(None)
+            self._writer.join(timeout)
+
+    def count_leads(self, since=None):
+        """
+        Número de leads distintos
+
+        Args:
+            since (float): Solo leads vistos por primera vez desde este timestamp
+
+        Returns:
+            int: Número de leads
+        """
+        return self._connection().execute(
+            "SELECT COUNT(*) FROM leads WHERE first_seen >= ?", (since or 0,)
+        ).fetchone()[0]
+
+    def leads(self, since=None, limit=100):
+        """
+        Leads más recientes
+
+        Returns:
+            list: Diccionarios con email, name, notes, first_seen, last_seen, times_seen
+        """
+        rows = self._connection().execute(
+            "SELECT email, name, notes, first_seen, last_seen, times_seen FROM leads "
+            "WHERE last_seen >= ? ORDER BY last_seen DESC LIMIT ?", (since or 0, limit)
+        ).fetchall()
+        keys = ("email", "name", "notes", "first_seen", "last_seen", "times_seen")
+        return [dict(zip(keys, row)) for row in rows]
+
+    def unknown_questions(self, since=None, limit=100):
+        """
+        Preguntas sin respuesta, las más repetidas primero
+
+        Returns:
+            list: Diccionarios con question, times_asked, first_seen, last_seen
+        """
+        rows = self._connection().execute(
+            "SELECT question, times_asked, first_seen, last_seen FROM unknown_questions "
+            "WHERE last_seen >= ? ORDER BY times_asked DESC, last_seen DESC LIMIT ?", (since or 0, limit)
+        ).fetchall()
+        keys = ("question", "times_asked", "first_seen", "last_seen")
+        return [dict(zip(keys, row)) for row in rows]
+
+    def _connection(self):
+        """Devuelve la conexión del hilo actual, creándola si no existe"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=10)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _run(self):
+        """Bucle del hilo escritor: agrupa las escrituras en transacciones"""
+        conn = self._connection()
+        stopping = False
+        while not stopping:
+            batch = [self._queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            writes = [item for item in batch if item is not None]
+            stopping = len(writes) < len(batch)
+            try:
+                with conn:
+                    for statement, params in writes:
+                        conn.execute(statement, params)
+            except sqlite3.Error as e:
+                logger.error(f"Error guardando {len(writes)} registros de leads/preguntas: {e}")
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def _migrate_text_file(self, path, table, parse):
+        """
+        Importa una sola vez un fichero de texto del formato anterior
+
+        El fichero no se modifica; la importación queda anotada en la tabla meta.
+        Como fecha se usa la de modificación del fichero. La comprobación de la
+        marca, la importación y la marca van en una transacción BEGIN IMMEDIATE,
+        así que dos procesos que arrancan a la vez no importan dos veces.
+        """
+        if not path or not os.path.exists(path):
+            return
+        conn = self._connection()
+        key = f"migrated:{table}:{os.path.abspath(path)}"
+        timestamp = os.path.getmtime(path)
+        count = 0
+        with open(path, "r", encoding="utf-8") as f, conn:
+            conn.execute("BEGIN IMMEDIATE")
+            if conn.execute("SELECT 1 FROM meta WHERE key = ?", (key,)).fetchone():
+                return
+            for line in f:
+                write = parse(line.rstrip("\n"), timestamp)
+                if write:
+                    conn.execute(*write)
+                    count += 1
+            conn.execute("INSERT INTO meta (key, value) VALUES (?, ?)", (key, str(time.time())))
+        logger.info(f"Migradas {count} líneas de {path} a {self.db_path}")
+
+    @staticmethod
+    def _parse_lead_line(line, timestamp):
+        """Línea "email | nombre | notas" -> escritura"""
+        parts = [part.strip() for part in line.split(" | ", 2)]
+        if not parts[0] or "@" not in parts[0]:
+            return None
+        name = parts[1] if len(parts) > 1 else None
+        notes = parts[2] if len(parts) > 2 else None
+        return UPSERT_LEAD, (normalize_email(parts[0]), _clean(name), _clean(notes), timestamp, timestamp)
+
+    @staticmethod
+    def _parse_question_line(line, timestamp):
+        """Línea con una pregunta -> escritura"""
+        normalized = normalize_question(line)
+        if not normalized:
+            return None
+        return UPSERT_QUESTION, (normalized, line.strip(), timestamp, timestamp)
+
+
+_lead_store = None
+_lead_store_lock = threading.Lock()
+
+
+def get_lead_store():
+    """
+    Retorna el almacén de leads compartido por el proceso, creándolo si no existe
+
+    Returns:
+        LeadStore: Almacén de leads y preguntas
+    """
+    global _lead_store
+    if _lead_store is None:
+        with _lead_store_lock:
+            if _lead_store is None:
+                _lead_store = LeadStore()
+                atexit.register(_lead_store.stop)
+    return _lead_store
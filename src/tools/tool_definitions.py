@@ -35,7 +35,7 @@ record_unknown_question_json = {
 # Definición de la herramienta para enviar emails
 send_email_to_me_json = {
     "name": "send_email_to_me",
-    "description": "Permite al usuario enviar un correo a Diego. El asunto se infiere automáticamente del contexto.",
+    "description": "Permite al usuario enviarte un correo (a la persona que representas). El asunto se infiere automáticamente del contexto.",
     "parameters": {
         "type": "object",
         "properties": {
@@ -0,0 +1,129 @@
+"""
+Fixtures comunes: asistente aislado en un directorio temporal y clientes LLM falsos
+"""
+import json
+from types import SimpleNamespace
+import pytest
+from src.config import Config
+from src.core.llm_client import LLMClient
+
+
+class FailingClient(LLMClient):
+    """Cliente LLM que siempre falla como un proveedor caído"""
+
+    def __init__(self):
+        self.calls = 0
+
+    def create(self, **request):
+        self.calls += 1
+        raise ConnectionError("proveedor caído")
+
+    async def acreate(self, **request):
+        self.calls += 1
+        raise ConnectionError("proveedor caído")
+
+
+def _chunk(content=None, tool_calls=None, finish=None):
+    delta = SimpleNamespace(content=content, tool_calls=tool_calls)
+    return SimpleNamespace(usage=None, choices=[SimpleNamespace(delta=delta, finish_reason=finish)])
+
+
+def text_chunks(text, finish_reason="stop", size=8):
+    """Chunks de chat.completions en modo stream que componen el texto"""
+    return [_chunk(text[i:i + size]) for i in range(0, len(text), size)] + [_chunk(finish=finish_reason)]
+
+
+def tool_call_chunks(name, arguments, call_id="call_1"):
+    """Chunks de una ronda que solo pide una llamada a herramienta"""
+    function = SimpleNamespace(name=name, arguments=json.dumps(arguments))
+    call = SimpleNamespace(index=0, id=call_id, function=function)
+    return [_chunk(tool_calls=[call]), _chunk(finish="tool_calls")]
+
+
+class FakeStream:
+    """Stream síncrono y asíncrono sobre una lista de chunks"""
+
+    def __init__(self, chunks):
+        self.chunks = list(chunks)
+        self.closed = False
+
+    def __iter__(self):
+        return iter(self.chunks)
+
+    async def __aiter__(self):
+        for chunk in self.chunks:
+            yield chunk
+
+    def close(self):
+        self.closed = True
+
+    async def aclose(self):
+        self.closed = True
+
+
+class ScriptedClient(LLMClient):
+    """
+    Cliente LLM que responde en streaming con un texto fijo
+
+    Las rondas de script (listas de chunks) se sirven antes, en orden. Los
+    modelos de failing_models fallan como un proveedor caído.
+    """
+
+    def __init__(self, reply="Diego trabaja con Python y Django.", failing_models=(), script=()):
+        self.reply = reply
+        self.failing_models = set(failing_models)
+        self.script = list(script)
+        self.requests = []
+
+    def create(self, **request):
+        self.requests.append(request)
+        if request["model"] in self.failing_models:
+            raise ConnectionError("proveedor caído")
+        return FakeStream(self.script.pop(0) if self.script else text_chunks(self.reply))
+
+    async def acreate(self, **request):
+        stream = self.create(**request)
+        stream.close = stream.aclose
+        return stream
+
+
+@pytest.fixture
+def fake_openai():
+    """Servidor local con la API de chat completions, sin latencia"""
+    from benchmarks.fake_openai import FakeOpenAIServer, FakeSettings
+    server = FakeOpenAIServer(settings=FakeSettings(ttft=0, token_delay=0, long_ratio=0)).start()
+    yield server
+    server.stop()
+
+
+@pytest.fixture
+def isolated_config(tmp_path, monkeypatch):
+    """Config apuntando a ficheros temporales, sin hilos de fondo ni refinamientos con IA"""
+    settings = {
+        "CACHE_DIR": str(tmp_path / "cache"),
+        "LEADS_DB_FILE": str(tmp_path / "leads.db"),
+        "LEADS_FILE": str(tmp_path / "leads.txt"),
+        "UNKNOWN_QUESTIONS_FILE": str(tmp_path / "unknown_questions.txt"),
+        "EMAIL_JOURNAL_FILE": str(tmp_path / "outbox" / "journal.jsonl"),
+        "PROFILES_DIR": str(tmp_path / "profiles"),
+        "SESSION_BACKEND": "memory",
+        "PROFILE_WATCH_ENABLED": False,
+        "STARTUP_BACKGROUND": False,
+        "SUBJECT_LLM_REFINEMENT": False,
+        "HISTORY_SUMMARY_USE_LLM": False,
+        "LLM_RESILIENCE_ENABLED": False,
+        "COALESCE_ENABLED": False
+    }
+    for name, value in settings.items():
+        monkeypatch.setattr(Config, name, value)
+    return Config
+
+
+@pytest.fixture
+def make_assistant(isolated_config):
+    """Construye un PersonalAssistant con el cliente LLM indicado"""
+    from src.core import PersonalAssistant
+
+    def make(llm=None):
+        return PersonalAssistant(llm=llm or FailingClient())
+    return make
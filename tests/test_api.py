@@ -0,0 +1,93 @@
+"""
+API HTTP: sesiones, respuesta JSON y streaming SSE de extremo a extremo (ASGI en proceso)
+"""
+import asyncio
+import json
+import pytest
+from src.api import create_app, sessions
+from src.config import Config
+from tests.conftest import ScriptedClient
+
+
+def call(app, method, path, body=None, headers=None):
+    """Ejecuta una petición contra la aplicación ASGI y devuelve (estado, cabeceras, cuerpo)"""
+    payload = json.dumps(body).encode("utf-8") if body is not None else b""
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": method,
+        "scheme": "http", "path": path, "raw_path": path.encode(), "query_string": b"",
+        "root_path": "", "client": ("10.0.0.1", 40000), "server": ("testserver", 80),
+        "headers": [(b"content-type", b"application/json")]
+        + [(name.lower().encode(), value.encode()) for name, value in (headers or {}).items()],
+    }
+    response = {"status": None, "headers": {}, "body": b""}
+
+    async def run():
+        messages = [{"type": "http.request", "body": payload, "more_body": False}]
+        finished = asyncio.Event()
+
+        async def receive():
+            if messages:
+                return messages.pop(0)
+            await finished.wait()  # El cliente sigue conectado hasta recibir la respuesta completa
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            if message["type"] == "http.response.start":
+                response["status"] = message["status"]
+                response["headers"] = {k.decode(): v.decode() for k, v in message["headers"]}
+            elif message["type"] == "http.response.body":
+                response["body"] += message.get("body", b"")
+                if not message.get("more_body"):
+                    finished.set()
+
+        await app(scope, receive, send)
+
+    asyncio.run(run())
+    return response["status"], response["headers"], response["body"]
+
+
+def sse_events(body):
+    events = []
+    for block in body.decode("utf-8").strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.splitlines())
+        events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+
+@pytest.fixture
+def app(make_assistant, tmp_path, monkeypatch):
+    monkeypatch.setattr(Config, "API_SESSION_SECRET", None)
+    monkeypatch.setattr(Config, "API_SESSION_SECRET_FILE", str(tmp_path / "api_session_secret"))
+    monkeypatch.setattr(sessions, "_secret", None)
+    monkeypatch.setattr(Config, "FAQ_FAST_PATH_ENABLED", False)
+    monkeypatch.setattr(Config, "RESPONSE_CACHE_ENABLED", False)
+    return create_app(make_assistant(ScriptedClient(reply="Trabaja con Angular y Spring Boot.")))
+
+
+def test_chat_with_an_issued_session(app):
+    status, _, body = call(app, "POST", "/api/sessions")
+    assert status == 201
+    session_id = json.loads(body)["session_id"]
+    status, headers, body = call(app, "POST", "/api/chat", {"message": "¿Con qué trabaja?", "session_id": session_id})
+    assert status == 200
+    assert json.loads(body)["reply"].startswith("Trabaja con Angular y Spring Boot.")
+    assert headers["x-session-id"] == session_id
+
+
+def test_stream_sends_deltas_that_add_up_to_the_reply(app):
+    status, headers, body = call(app, "POST", "/api/chat/stream", {"message": "¿Con qué trabaja?"})
+    assert status == 200 and headers["content-type"].startswith("text/event-stream")
+    events = sse_events(body)
+    assert events[0][0] == "session" and events[-1][0] == "done"
+    deltas = "".join(data["text"] for event, data in events if event == "delta")
+    assert deltas == events[-1][1]["reply"]
+    assert deltas.startswith("Trabaja con Angular y Spring Boot.")
+
+
+@pytest.mark.parametrize("body, status", [
+    ([1, 2], 400),
+    ({"message": "  "}, 400),
+    ({"message": "x" * 100000}, 413),
+])
+def test_invalid_requests_are_rejected(app, body, status):
+    assert call(app, "POST", "/api/chat", body)[0] == status
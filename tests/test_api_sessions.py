@@ -0,0 +1,105 @@
+"""
+API: solo se aceptan identificadores de sesión emitidos por el servidor
+"""
+import asyncio
+from types import SimpleNamespace
+import pytest
+from src.api import sessions
+from src.api.app import RequestError, check_worker_config, parse_chat_request
+from src.api.sessions import SessionIssuer, new_session_id
+from src.config import Config
+
+
+@pytest.fixture(autouse=True)
+def secret_file(tmp_path, monkeypatch):
+    monkeypatch.setattr(Config, "API_SESSION_SECRET", None)
+    monkeypatch.setattr(Config, "API_SESSION_SECRET_FILE", str(tmp_path / "api_session_secret"))
+    monkeypatch.setattr(sessions, "_secret", None)
+    return tmp_path / "api_session_secret"
+
+
+class FakeRequest:
+    def __init__(self, body, headers=None, client="10.0.0.1"):
+        self.body = body
+        self.headers = headers or {}
+        self.client = SimpleNamespace(host=client, port=40000)
+
+    async def json(self):
+        return self.body
+
+
+class AllProfiles:
+    def exists(self, profile_id):
+        return True
+
+
+def parse(body, headers=None, issuer=None, client="10.0.0.1"):
+    request = FakeRequest(body, headers, client)
+    return asyncio.run(parse_chat_request(request, AllProfiles(), issuer or SessionIssuer()))
+
+
+def test_issued_session_id_is_accepted():
+    session_id = new_session_id()
+    assert parse({"message": "hola", "session_id": session_id})[2] == session_id
+    assert parse({"message": "hola"}, {"X-Session-Id": session_id})[2] == session_id
+
+
+def test_missing_session_id_gets_a_signed_one():
+    session_id = parse({"message": "hola"})[2]
+    assert parse({"message": "hola", "session_id": session_id})[2] == session_id
+
+
+@pytest.mark.parametrize("session_id", ["s1", "default", "a" * 32 + "-" + "0" * 24])
+def test_client_chosen_session_id_is_rejected(session_id):
+    with pytest.raises(RequestError) as error:
+        parse({"message": "hola", "session_id": session_id})
+    assert error.value.status_code == 403
+
+
+def test_session_id_signed_with_another_secret_is_rejected(monkeypatch):
+    session_id = new_session_id()
+    monkeypatch.setattr(Config, "API_SESSION_SECRET", "otro-secreto")
+    with pytest.raises(RequestError):
+        parse({"message": "hola", "session_id": session_id})
+
+
+def test_secret_is_persisted_and_shared(secret_file, monkeypatch):
+    session_id = new_session_id()
+    assert secret_file.read_text().strip()
+    monkeypatch.setattr(sessions, "_secret", None)  # Otro worker o un reinicio
+    assert parse({"message": "hola", "session_id": session_id})[2] == session_id
+
+
+def test_several_workers_need_shared_sessions(monkeypatch):
+    monkeypatch.setattr(Config, "API_WORKERS", 4)
+    monkeypatch.setattr(Config, "SESSION_BACKEND", "memory")
+    with pytest.raises(RuntimeError):
+        check_worker_config()
+    monkeypatch.setattr(Config, "SESSION_BACKEND", "sqlite")
+    check_worker_config()
+
+
+def test_new_sessions_are_limited_per_client():
+    issuer = SessionIssuer(rate_per_minute=1, burst=3)
+    assert all(issuer.issue("10.0.0.1", now=100.0) for _ in range(3))
+    assert issuer.issue("10.0.0.1", now=100.0) is None
+    assert issuer.issue("10.0.0.2", now=100.0) is not None
+    assert issuer.issue("10.0.0.1", now=160.0) is not None  # Un token por minuto
+
+
+def test_chat_without_session_id_counts_against_the_client_limit():
+    issuer = SessionIssuer(rate_per_minute=1, burst=2)
+    parse({"message": "hola"}, issuer=issuer)
+    parse({"message": "hola"}, issuer=issuer)
+    with pytest.raises(RequestError) as error:
+        parse({"message": "hola"}, issuer=issuer)
+    assert error.value.status_code == 429
+    session_id = parse({"message": "hola"}, issuer=issuer, client="10.0.0.9")[2]
+    assert parse({"message": "hola", "session_id": session_id}, issuer=issuer)[2] == session_id
+
+
+def test_forgotten_clients_are_bounded():
+    issuer = SessionIssuer(max_clients=2)
+    for n in range(5):
+        issuer.issue(f"10.0.0.{n}")
+    assert list(issuer._buckets) == ["10.0.0.3", "10.0.0.4"]
@@ -0,0 +1,64 @@
+"""
+Banco de pruebas offline: el OpenAI falso, el sumidero SMTP y la prueba de carga completa
+"""
+import json
+import smtplib
+import subprocess
+import sys
+from email.message import EmailMessage
+import openai
+import pytest
+from benchmarks.fake_openai import SHORT_ANSWER
+from benchmarks.smtp_sink import SMTPSink
+
+TOOLS = [{"type": "function", "function": {"name": "record_unknown_question", "parameters": {"type": "object"}}}]
+
+
+def client(server):
+    return openai.OpenAI(base_url=server.base_url, api_key="x", max_retries=0)
+
+
+def test_fake_openai_streams_like_the_api(fake_openai):
+    stream = client(fake_openai).chat.completions.create(
+        model="gpt-4o-mini", messages=[{"role": "user", "content": "Hola"}], tools=TOOLS, stream=True
+    )
+    text = "".join(chunk.choices[0].delta.content or "" for chunk in stream if chunk.choices)
+    assert text == SHORT_ANSWER
+    assert fake_openai.calls["stream"] == 1
+
+
+def test_fake_openai_requests_tools_and_fails_on_demand(fake_openai):
+    response = client(fake_openai).chat.completions.create(
+        model="gpt-4o-mini", messages=[{"role": "user", "content": "¿Tiene mascota?"}], tools=TOOLS
+    )
+    assert response.choices[0].message.tool_calls[0].function.name == "record_unknown_question"
+
+    fake_openai.settings.error_rate = 1.0
+    with pytest.raises(openai.InternalServerError):
+        client(fake_openai).chat.completions.create(model="gpt-4o-mini", messages=[], tools=TOOLS)
+    assert fake_openai.calls["errors"] == 1
+
+
+def test_smtp_sink_accepts_authenticated_mail():
+    sink = SMTPSink().start()
+    try:
+        message = EmailMessage()
+        message["From"], message["To"], message["Subject"] = "ana@example.com", "diego@example.com", "Hola"
+        message.set_content("Prueba")
+        with smtplib.SMTP(*sink.address, timeout=5) as server:
+            server.login("usuario", "clave")
+            server.send_message(message)
+        assert (sink.messages, sink.logins) == (1, 1)
+    finally:
+        sink.stop()
+
+
+def test_load_test_runs_offline(tmp_path):
+    report_path = tmp_path / "informe.json"
+    subprocess.run(
+        [sys.executable, "-m", "benchmarks.load_test", "--sessions", "2", "--turns", "1", "--json", str(report_path)],
+        capture_output=True, check=True, timeout=120
+    )
+    report = json.loads(report_path.read_text(encoding="utf-8"))
+    assert report["turns"] == 2 and report["errors"] == 0
+    assert report["llm_calls"]["total"] > 0
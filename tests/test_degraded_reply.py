@@ -0,0 +1,49 @@
+"""
+Respuestas de los caminos de descarte: nunca deben tumbar el turno
+"""
+import asyncio
+from src.core.assistant import RATE_LIMITED_REPLY, BUSY_REPLY
+from tests.conftest import FailingClient
+
+
+def test_rate_limited_second_message_with_retrieval_disabled(make_assistant, monkeypatch):
+    from src.config import Config
+    monkeypatch.setattr(Config, "RETRIEVAL_ENABLED", False)
+    monkeypatch.setattr(Config, "FAQ_FAST_PATH_ENABLED", False)
+    monkeypatch.setattr(Config, "RESPONSE_CACHE_ENABLED", False)
+    monkeypatch.setattr(Config, "SESSION_RATE_BURST", 1)
+    monkeypatch.setattr(Config, "SESSION_RATE_PER_MINUTE", 0.001)
+    assistant = make_assistant()
+    assistant.chat("¿Ha trabajado con Kubernetes?", [], session_id="s1")
+    reply = assistant.chat("¿Y con Terraform en producción?", [], session_id="s1")
+    assert reply == RATE_LIMITED_REPLY
+
+
+def test_degraded_reply_falls_back_when_profile_breaks(make_assistant, monkeypatch):
+    assistant = make_assistant()
+    state = assistant.sessions.get("s1")
+
+    def broken(state):
+        raise RuntimeError("artefactos corruptos")
+    monkeypatch.setattr(assistant, "_profile", broken)
+    assert assistant._degraded_reply("¿Qué estudios tiene?", state, BUSY_REPLY) == BUSY_REPLY
+
+
+def test_busy_reply_async(make_assistant, monkeypatch):
+    from src.config import Config
+    monkeypatch.setattr(Config, "FAQ_FAST_PATH_ENABLED", False)
+    assistant = make_assistant(FailingClient())
+
+    async def refuse():
+        return False
+    monkeypatch.setattr(assistant.admission, "aacquire", refuse)
+
+    def broken(state):
+        raise RuntimeError("artefactos corruptos")
+    monkeypatch.setattr(assistant, "_profile", broken)
+
+    async def run():
+        message = "¿Conoce Rust?"
+        turn = assistant._allm_turn(message, [], assistant.sessions.get("s2"), assistant._classify(message))
+        return [partial async for partial in turn]
+    assert asyncio.run(run()) == [BUSY_REPLY]
@@ -0,0 +1,65 @@
+"""
+Cola de emails: los estados finales y el diario no crecen sin límite
+"""
+import json
+import pytest
+from src.config import Config
+from src.tools.email_queue import EmailQueue, STATUS_QUEUED, STATUS_SENT, STATUS_FAILED
+
+
+@pytest.fixture
+def email_queue(tmp_path):
+    email_queue = EmailQueue(str(tmp_path / "journal.jsonl"))
+    yield email_queue
+    email_queue.stop()
+
+
+def test_finished_statuses_are_capped(email_queue, monkeypatch):
+    monkeypatch.setattr(Config, "EMAIL_STATUS_MAX_ENTRIES", 3)
+    for n in range(10):
+        email_queue._set_status(f"e{n}", STATUS_QUEUED)
+        email_queue._set_status(f"e{n}", STATUS_SENT if n % 2 else STATUS_FAILED, attempts=1)
+    assert list(email_queue._finished) == ["e7", "e8", "e9"]
+    assert not email_queue._statuses
+    assert email_queue.status("e0") is None
+    assert email_queue.status("e9")["status"] == STATUS_SENT
+
+
+def test_finished_statuses_expire(email_queue, monkeypatch):
+    email_queue._set_status("old", STATUS_SENT)
+    monkeypatch.setattr(Config, "EMAIL_STATUS_TTL_SECONDS", -1)
+    email_queue._set_status("new", STATUS_SENT)
+    assert email_queue.status("old") is None
+
+
+def test_pending_status_is_kept(email_queue, monkeypatch):
+    monkeypatch.setattr(Config, "EMAIL_STATUS_MAX_ENTRIES", 1)
+    email_queue._set_status("pending", STATUS_QUEUED)
+    for n in range(5):
+        email_queue._set_status(f"e{n}", STATUS_SENT)
+    assert email_queue.status("pending")["status"] == STATUS_QUEUED
+
+
+def journal_lines(email_queue):
+    with open(email_queue.journal_path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+def test_journal_is_compacted_after_finished_entries(email_queue, monkeypatch):
+    monkeypatch.setattr(Config, "EMAIL_JOURNAL_COMPACT_ENTRIES", 3)
+    for n in range(5):
+        email_queue._journal({"type": "queued", "id": f"e{n}", "subject": "Hola"})
+    for n in range(3):
+        email_queue._set_status(f"e{n}", STATUS_SENT, attempts=1, journal=True)
+    assert [record["id"] for record in journal_lines(email_queue)] == ["e3", "e4"]
+    email_queue._set_status("e3", STATUS_FAILED, attempts=5, journal=True)
+    assert len(journal_lines(email_queue)) == 3
+
+
+def test_journal_is_compacted_when_it_grows(email_queue, monkeypatch):
+    monkeypatch.setattr(Config, "EMAIL_JOURNAL_COMPACT_BYTES", 1)
+    email_queue._journal({"type": "queued", "id": "pending", "subject": "Hola"})
+    email_queue._journal({"type": "queued", "id": "done", "subject": "Hola"})
+    assert len(journal_lines(email_queue)) == 2  # Sin emails terminados no hay nada que compactar
+    email_queue._set_status("done", STATUS_SENT, attempts=1, journal=True)
+    assert [record["id"] for record in journal_lines(email_queue)] == ["pending"]
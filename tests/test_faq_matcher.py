@@ -0,0 +1,37 @@
+"""
+Emparejador de la FAQ: negaciones y coincidencias de una sola palabra
+"""
+import pytest
+from src.core.faq_matcher import FaqMatcher
+from src.core.text_utils import tokenize, is_negated
+
+
+@pytest.fixture(scope="module")
+def matcher():
+    with open("data/me/faq.json", encoding="utf-8") as f:
+        return FaqMatcher(f.read())
+
+
+@pytest.mark.parametrize("question", ["¿Qué tipo de proyectos ha realizado?", "¿En qué tecnologías trabaja?"])
+def test_matches_known_questions(matcher, question):
+    assert matcher.match(question) is not None
+
+
+@pytest.mark.parametrize("question", [
+    "¿Qué tipo de proyectos NO ha realizado?",
+    "¿En qué tecnologías no trabaja?",
+    "¿Nunca ha trabajado en remoto?"
+])
+def test_negated_questions_do_not_match_positive_entries(matcher, question):
+    assert matcher.match(question) is None
+
+
+@pytest.mark.parametrize("question", ["Diego", "tecnologías"])
+def test_single_keyword_does_not_match(matcher, question):
+    assert matcher.match(question) is None
+
+
+def test_tokenize_keeps_negation_on_request():
+    assert "no" not in tokenize("¿Qué NO ha hecho?")
+    assert "no" in tokenize("¿Qué NO ha hecho?", keep_negation=True)
+    assert is_negated("¿Qué NO ha hecho?") and not is_negated("¿Qué ha hecho?")
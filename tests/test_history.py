@@ -0,0 +1,75 @@
+"""
+Ventana del historial: turnos literales, resumen por bloques y presupuesto de tokens
+"""
+import os
+import subprocess
+import sys
+from src.core.history import HistoryManager, SUMMARY_HEADER, estimate_message_tokens, local_summary
+from src.core.session_store import SessionState
+
+
+def test_summary_is_local_by_default():
+    # En un intérprete nuevo: Config se evalúa al importarse
+    env = {key: value for key, value in os.environ.items() if key != "HISTORY_SUMMARY_USE_LLM"}
+    code = "from src.config import Config; print(Config.HISTORY_SUMMARY_USE_LLM)"
+    result = subprocess.run([sys.executable, "-c", code], env=env, capture_output=True, text=True, check=True)
+    assert result.stdout.strip() == "False"
+
+
+def conversation(turns):
+    history = []
+    for n in range(turns):
+        history.append({"role": "user", "content": f"Pregunta {n} sobre sus proyectos"})
+        history.append({"role": "assistant", "content": f"Respuesta {n} con detalles"})
+    return history
+
+
+def test_recent_turns_are_sent_literally_and_older_ones_summarized():
+    summaries = []
+
+    def summarize(previous, messages):
+        summaries.append(len(messages))
+        return local_summary(previous, messages)
+    manager = HistoryManager(summarize=summarize, token_budget=10000, keep_turns=2, batch_turns=2)
+    state = SessionState()
+    history = conversation(5)
+    messages = manager.window(history, state)
+    assert messages[0]["content"].startswith(SUMMARY_HEADER)
+    assert "Pregunta 0" in messages[0]["content"]
+    assert messages[1:] == history[-4:]
+    assert summaries == [6]
+
+
+def test_summary_is_recomputed_in_batches():
+    calls = []
+    manager = HistoryManager(
+        summarize=lambda previous, messages: calls.append(messages) or local_summary(previous, messages),
+        token_budget=10000, keep_turns=2, batch_turns=2
+    )
+    state = SessionState()
+    history = conversation(5)
+    manager.window(history, state)
+    for turns in (6, 7):
+        manager.window(conversation(turns), state)
+    assert len(calls) == 1  # La ventana puede crecer batch_turns turnos antes de volver a resumir
+    manager.window(conversation(9), state)
+    assert len(calls) == 2
+
+
+def test_edited_history_resets_the_summary():
+    manager = HistoryManager(token_budget=10000, keep_turns=1, batch_turns=1)
+    state = SessionState()
+    manager.window(conversation(4), state)
+    assert state.summarized_count
+    retried = [{"role": "user", "content": "Otra conversación"}, {"role": "assistant", "content": "Vale"}]
+    messages = manager.window(retried, state)
+    assert messages == retried
+    assert state.history_summary == ""
+
+
+def test_window_respects_the_token_budget():
+    manager = HistoryManager(token_budget=60, keep_turns=4, batch_turns=4)
+    state = SessionState()
+    history = conversation(2) + [{"role": "user", "content": "palabra " * 200}]
+    messages = manager.window(history, state)
+    assert sum(estimate_message_tokens(message) for message in messages) <= 60
@@ -0,0 +1,72 @@
+"""
+Enrutado: intenciones de una sola pasada y una única clasificación por turno
+"""
+import asyncio
+import time
+from src.config import Config
+from src.core.intent_router import (
+    IntentRouter, INTENT_CONFIRMATION, INTENT_CONTACT, INTENT_EMAIL_MESSAGE, INTENT_EMAIL_ONLY, INTENT_NONE
+)
+from tests.conftest import FailingClient
+
+
+def count_classify(assistant, monkeypatch):
+    calls = []
+    classify = assistant.intent_router.classify
+
+    def counting(message):
+        calls.append(message)
+        return classify(message)
+    monkeypatch.setattr(assistant.intent_router, "classify", counting)
+    return calls
+
+
+def test_llm_turn_classifies_once(make_assistant, monkeypatch):
+    monkeypatch.setattr(Config, "FAQ_FAST_PATH_ENABLED", False)
+    monkeypatch.setattr(Config, "RESPONSE_CACHE_ENABLED", False)
+    llm = FailingClient()
+    assistant = make_assistant(llm)
+    calls = count_classify(assistant, monkeypatch)
+    assistant.chat("¿Qué opina de los lenguajes funcionales?", [], session_id="s1")
+    assert llm.calls > 0
+    assert len(calls) == 1
+
+
+def test_async_llm_turn_classifies_once(make_assistant, monkeypatch):
+    monkeypatch.setattr(Config, "FAQ_FAST_PATH_ENABLED", False)
+    monkeypatch.setattr(Config, "RESPONSE_CACHE_ENABLED", False)
+    llm = FailingClient()
+    assistant = make_assistant(llm)
+    calls = count_classify(assistant, monkeypatch)
+
+    asyncio.run(assistant.achat("¿Qué opina de los lenguajes funcionales?", [], session_id="s1"))
+    assert llm.calls > 0
+    assert len(calls) == 1
+
+
+def test_email_and_message_are_extracted():
+    router = IntentRouter()
+    routed = router.classify("Email: <ana@example.com> Mensaje: Hola, tengo una oferta")
+    assert (routed.intent, routed.email, routed.body) == (INTENT_EMAIL_MESSAGE, "ana@example.com", "Hola, tengo una oferta")
+    routed = router.classify("Me interesa tu perfil para un puesto\nana@example.com")
+    assert (routed.intent, routed.body) == (INTENT_EMAIL_MESSAGE, "Me interesa tu perfil para un puesto")
+    assert router.classify("ana@example.com").intent == INTENT_EMAIL_ONLY
+
+
+def test_contact_triggers_and_short_replies():
+    router = IntentRouter()
+    routed = router.classify("Hola, ¿puedo escribirte sobre un proyecto?")
+    assert routed.intent == INTENT_CONTACT and routed.contact_request
+    assert router.classify("  Sí ").intent == INTENT_CONFIRMATION
+    assert router.classify("Sí").confirms_send
+    assert not router.classify("vale").confirms_send
+    assert router.classify("¿Qué es escribir código limpio?").intent == INTENT_NONE
+
+
+def test_long_input_is_only_scanned_up_to_the_limit():
+    router = IntentRouter(max_chars=200)
+    pasted = "texto " * 50000 + "puedo escribirte ana@example.com"
+    started = time.perf_counter()
+    routed = router.classify(pasted)
+    assert time.perf_counter() - started < 0.1
+    assert routed.intent == INTENT_NONE
@@ -0,0 +1,44 @@
+"""
+Almacén de leads: normalización de preguntas y migración de los ficheros de texto
+"""
+import sqlite3
+import threading
+from src.config import Config
+from src.core.text_utils import normalize_text
+from src.tools.lead_store import LeadStore, normalize_question
+
+
+def test_question_key_matches_shared_normalization():
+    question = "¿Qué  tecnologías usa Diego? ¡Ñandú 2024!"
+    assert normalize_question(question) == normalize_text(question) == "que tecnologias usa diego nandu 2024"
+
+
+def test_concurrent_migration_imports_once(tmp_path, monkeypatch):
+    leads_file = tmp_path / "leads.txt"
+    leads_file.write_text("".join(f"user{n}@example.com | Usuario {n} | nota\n" for n in range(200)), encoding="utf-8")
+    monkeypatch.setattr(Config, "LEADS_FILE", str(leads_file))
+    monkeypatch.setattr(Config, "UNKNOWN_QUESTIONS_FILE", None)
+    db_path = str(tmp_path / "leads.db")
+    LeadStore(db_path).stop()  # Crea el esquema; se vacía para repetir la importación en paralelo
+    with sqlite3.connect(db_path) as conn:
+        conn.execute("DELETE FROM meta")
+        conn.execute("DELETE FROM leads")
+
+    stores = []
+    barrier = threading.Barrier(6)
+
+    def start():
+        barrier.wait()
+        stores.append(LeadStore(db_path))
+
+    threads = [threading.Thread(target=start) for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    for store in stores:
+        store.stop()
+
+    assert len(stores) == 6
+    assert stores[0].count_leads() == 200
+    assert {lead["times_seen"] for lead in stores[0].leads(limit=500)} == {1}
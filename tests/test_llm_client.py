@@ -0,0 +1,45 @@
+"""
+Clientes LLM: interfaz de los backends y grabación/reproducción con cassettes
+"""
+import pytest
+from src.config import Config
+from src.core.llm_client import (
+    Cassette, CassetteMiss, LLMClient, OpenAIClient, RecordingClient, ReplayClient, request_key
+)
+
+
+def test_backend_must_implement_both_calls():
+    class SyncOnly(LLMClient):
+        def create(self, **request):
+            return None
+
+    with pytest.raises(TypeError):
+        SyncOnly()
+
+
+def test_request_key_ignores_key_order_and_empty_fields():
+    a = {"model": "m", "messages": [{"role": "user", "content": "Hola", "name": None}], "stream": True}
+    b = {"stream": True, "messages": [{"content": "Hola", "role": "user"}], "model": "m"}
+    assert request_key(a) == request_key(b)
+    assert request_key(a) != request_key({**b, "model": "otro"})
+
+
+def test_recorded_turns_replay_identically_without_network(make_assistant, fake_openai, tmp_path, monkeypatch):
+    monkeypatch.setattr(Config, "FAQ_FAST_PATH_ENABLED", False)
+    monkeypatch.setattr(Config, "RESPONSE_CACHE_ENABLED", False)
+    path = str(tmp_path / "llm.jsonl.gz")
+    questions = ["¿Qué tecnologías domina?", "¿Tiene mascota?"]
+
+    recorder = RecordingClient(OpenAIClient(base_url=fake_openai.base_url, api_key="x"), Cassette(path))
+    recorded = [make_assistant(recorder).chat(q, [], session_id=f"s{n}") for n, q in enumerate(questions)]
+    recorder.close()
+    calls = fake_openai.calls["total"]
+    assert calls >= len(questions) + 1  # Una ronda extra por la herramienta
+
+    replayer = ReplayClient(Cassette(path).load())
+    replayed = [make_assistant(replayer).chat(q, [], session_id=f"s{n}") for n, q in enumerate(questions)]
+    assert replayed == recorded
+    assert fake_openai.calls["total"] == calls
+    assert replayer.stats() == {"backend": "replay", "hits": calls, "misses": 0}
+    with pytest.raises(CassetteMiss):
+        replayer.create(model="gpt-4o-mini", messages=[{"role": "user", "content": "no grabada"}])
@@ -0,0 +1,64 @@
+"""
+Métricas: formato de Prometheus, trazas por turno y endpoint /metrics
+"""
+import asyncio
+import urllib.request
+from types import SimpleNamespace
+from src.observability import metrics
+from src.observability.metrics import MetricsRegistry, MetricsServer, begin_turn, end_turn, mark_path, span
+
+
+def test_registry_renders_prometheus_text():
+    registry = MetricsRegistry()
+    calls = registry.counter("demo_calls_total", "Llamadas", ["status"])
+    latency = registry.histogram("demo_seconds", "Latencia", buckets=(0.1, 1.0))
+    calls.inc(status="ok")
+    calls.inc(2, status="error")
+    for value in (0.05, 0.5, 3.0):
+        latency.observe(value)
+    lines = registry.render().splitlines()
+    assert "# TYPE demo_calls_total counter" in lines
+    assert 'demo_calls_total{status="error"} 2' in lines
+    assert 'demo_seconds_bucket{le="0.1"} 1' in lines
+    assert 'demo_seconds_bucket{le="1.0"} 2' in lines
+    assert 'demo_seconds_bucket{le="+Inf"} 3' in lines
+    assert "demo_seconds_count 3" in lines
+
+
+def test_turn_trace_collects_stages_from_worker_threads():
+    async def turn():
+        trace = begin_turn()
+        with span("route"):
+            pass
+
+        def blocking():
+            with span("faq"):
+                mark_path("faq")
+        await asyncio.to_thread(blocking)
+        end_turn(trace)
+        return trace
+
+    trace = asyncio.run(turn())
+    assert [stage for stage, _ in trace.spans] == ["route", "faq"]
+    assert trace.path == "faq"
+
+
+def test_llm_tokens_are_counted_per_purpose():
+    before = metrics.LLM_TOKENS.value(purpose="summary", kind="completion")
+    metrics.record_llm_call("summary", SimpleNamespace(prompt_tokens=120, completion_tokens=30))
+    assert metrics.LLM_TOKENS.value(purpose="summary", kind="completion") == before + 30
+
+
+def test_metrics_endpoint_serves_the_registry():
+    registry = MetricsRegistry()
+    registry.counter("demo_total", "Demo").inc()
+    server = MetricsServer(port=0, registry=registry).start()
+    try:
+        host, port = server.address
+        with urllib.request.urlopen(f"http://{host}:{port}/metrics", timeout=5) as response:
+            assert response.headers["Content-Type"].startswith("text/plain; version=0.0.4")
+            assert "demo_total 1" in response.read().decode("utf-8")
+        with urllib.request.urlopen(f"http://{host}:{port}/healthz", timeout=5) as response:
+            assert response.status == 200
+    finally:
+        server.stop()
@@ -0,0 +1,38 @@
+"""
+Enrutado de modelos: niveles por defecto y escalado
+"""
+import os
+import subprocess
+import sys
+from src.core.intent_router import INTENT_NONE
+from src.core.model_router import ModelRouter
+
+TIERS = {"fast": "modelo-barato", "standard": "modelo-estandar"}
+ROUTES = {"chat": ("standard", 256), "chat.simple": ("fast", 160), "subject": ("fast", 50)}
+
+
+def test_fast_tier_defaults_to_the_configured_model():
+    # En un intérprete nuevo: Config se evalúa al importarse
+    env = {key: value for key, value in os.environ.items() if key not in ("MODEL_FAST", "MODEL_STANDARD")}
+    code = "from src.config import Config; print(set(Config.MODEL_TIERS.values()) == {Config.OPENAI_MODEL})"
+    result = subprocess.run([sys.executable, "-c", code], env=env, capture_output=True, text=True, check=True)
+    assert result.stdout.strip() == "True"
+
+
+def test_simple_turn_escalates_with_the_standard_budget():
+    router = ModelRouter(TIERS, ROUTES, enabled=True)
+    choice = router.route_turn("Hola", INTENT_NONE, 0.0)
+    assert (choice.tier, choice.max_tokens) == ("fast", 160)
+    escalated = router.escalate(choice)
+    assert (escalated.tier, escalated.model, escalated.max_tokens) == ("standard", "modelo-estandar", 256)
+    assert router.escalate(escalated) is None
+
+
+def test_auxiliary_call_keeps_its_budget_when_escalating():
+    router = ModelRouter(TIERS, ROUTES, enabled=True)
+    assert router.escalate(router.route("subject")).max_tokens == 50
+
+
+def test_tiers_with_the_same_model_do_not_escalate():
+    router = ModelRouter({"fast": "gpt-4o-mini", "standard": "gpt-4o-mini"}, ROUTES, enabled=True)
+    assert router.escalate(router.route("chat.simple")) is None
@@ -0,0 +1,36 @@
+"""
+Respuestas sin LLM (modo degradado)
+"""
+import asyncio
+from src.core.faq_matcher import FaqMatcher
+from src.core.offline_answerer import OfflineAnswerer, OFFLINE_PREFIX
+
+FAQ = '{"faq": [{"pregunta": "¿Qué estudios tiene?", "respuesta": "DAW con media superior a 9."}]}'
+
+
+def test_answer_without_index_uses_only_faq():
+    answerer = OfflineAnswerer()
+    faq = FaqMatcher(FAQ)
+    assert answerer.answer("¿Qué estudios tiene?", faq, None) == "DAW con media superior a 9."
+    assert answerer.answer("¿Sabe Kubernetes?", faq, None) is None
+
+
+def test_llm_failure_with_retrieval_disabled_degrades(make_assistant, monkeypatch):
+    from src.config import Config
+    monkeypatch.setattr(Config, "RETRIEVAL_ENABLED", False)
+    monkeypatch.setattr(Config, "FAQ_FAST_PATH_ENABLED", False)
+    assistant = make_assistant()
+    assert assistant.profiles.get().prompt_builder.artifacts().index is None
+
+    assert assistant.chat("¿Ha trabajado con Kubernetes en producción?", [], session_id="s1")
+    assert assistant.llm.calls > 0
+
+    assert asyncio.run(assistant.achat("¿Conoce Rust?", [], session_id="s2"))
+
+
+def test_offline_reply_with_retrieval_uses_profile_sections(make_assistant, monkeypatch):
+    from src.config import Config
+    monkeypatch.setattr(Config, "FAQ_FAST_PATH_ENABLED", False)
+    assistant = make_assistant()
+    reply = assistant.chat("¿Qué experiencia tiene con Angular y Spring Boot?", [], session_id="s1")
+    assert reply.startswith(OFFLINE_PREFIX)
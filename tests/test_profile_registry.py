@@ -0,0 +1,52 @@
+"""
+Varios perfiles en un proceso: carga bajo demanda, contenidos compartidos y expulsión LRU
+"""
+import pytest
+from benchmarks.load_test import create_profiles
+from src.config import Config
+from src.core.profile_registry import ProfileRegistry, UnknownProfileError
+from tests.conftest import ScriptedClient
+
+
+@pytest.fixture
+def profile_ids(isolated_config):
+    return create_profiles(Config.PROFILES_DIR, 3)
+
+
+def test_profiles_are_loaded_on_demand_and_share_equal_contents(profile_ids):
+    registry = ProfileRegistry()
+    assert set(profile_ids) <= set(registry.ids())
+    assert registry.get("p0", load=False) is None
+    first, second = registry.get("p0"), registry.get("p1")
+    assert first.name == "Persona 0" and second.name == "Persona 1"
+    assert first.data_loader.snapshot.content("contexto") is second.data_loader.snapshot.content("contexto")
+    assert registry.stats()["loaded"] == 2
+    with pytest.raises(UnknownProfileError):
+        registry.get("nadie")
+
+
+def test_least_recently_used_artifacts_are_evicted(profile_ids):
+    registry = ProfileRegistry()
+    p0 = registry.get("p0")
+    p0.prompt_builder.artifacts()
+    registry.max_bytes = int(p0.resident_bytes() * 1.5)
+
+    p1 = registry.get("p1")
+    p1.prompt_builder.artifacts()
+    assert not p0.resident() and p1.resident()
+
+    prompt = registry.get("p0").prompt_builder.get_system_prompt()  # Se recarga desde data/cache/
+    assert "Persona 0" in prompt and p0.resident() and not p1.resident()
+    assert registry.stats()["evictions"] == 2
+
+
+def test_each_profile_answers_with_its_own_prompt(make_assistant, profile_ids, monkeypatch):
+    monkeypatch.setattr(Config, "FAQ_FAST_PATH_ENABLED", False)
+    monkeypatch.setattr(Config, "RESPONSE_CACHE_ENABLED", False)
+    llm = ScriptedClient()
+    assistant = make_assistant(llm)
+    assistant.chat("¿Qué tecnologías usa?", [], session_id="s1", profile_id="p0")
+    assistant.chat("¿Qué tecnologías usa?", [], session_id="s1", profile_id="p1")
+    prompts = [request["messages"][0]["content"] for request in llm.requests]
+    assert "Persona 0" in prompts[0] and "Persona 1" in prompts[1]
+    assert assistant.sessions.get("p0:s1").profile_id == "p0"
@@ -0,0 +1,51 @@
+"""
+Recarga en caliente: solo tras un cambio estable y con publicación atómica de artefactos
+"""
+import json
+import shutil
+import pytest
+from src.core.data_loader import DataLoader
+from src.core.profile_watcher import ProfileWatcher
+from src.core.prompt_builder import PromptBuilder
+
+
+@pytest.fixture
+def profile(isolated_config, tmp_path):
+    directory = tmp_path / "perfil"
+    shutil.copytree("data/me", directory)
+    loader = DataLoader(str(directory))
+    builder = PromptBuilder(loader, "Diego")
+    reloads = []
+    watcher = ProfileWatcher(loader, on_reload=[builder.rebuild, lambda: reloads.append(loader.snapshot.version)])
+    return directory, loader, builder, watcher, reloads
+
+
+def edit_context(directory, value):
+    path = directory / "contexto-asistente.json"
+    data = json.loads(path.read_text(encoding="utf-8"))
+    data["nota_de_prueba"] = value
+    path.write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+
+
+def test_change_is_applied_once_it_is_stable(profile):
+    directory, loader, builder, watcher, reloads = profile
+    edit_context(directory, "disponible en enero")
+    watcher.poll()
+    assert not reloads  # Podría estar a medio escribir
+    watcher.poll()
+    assert reloads == [loader.snapshot.version]
+    assert "disponible en enero" in loader.snapshot.content("contexto")
+    watcher.poll()
+    assert len(reloads) == 1
+
+
+def test_artifacts_in_use_are_not_mutated_by_a_reload(profile):
+    directory, loader, builder, watcher, _ = profile
+    before = builder.artifacts()
+    cv_before = loader.snapshot.content("cv")
+    edit_context(directory, "disponible en enero")
+    assert watcher.check_now() == {"contexto"}
+    after = builder.cached()
+    assert after is not before and after.data_version != before.data_version
+    assert "disponible en enero" not in before.system_prompt
+    assert loader.snapshot.content("cv") is cv_before  # Las fuentes sin cambios no se recargan
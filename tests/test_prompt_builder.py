@@ -0,0 +1,39 @@
+"""
+Prompt del sistema: prefijo estable entre turnos y compilado una vez por versión de datos
+"""
+import pytest
+from src.config import Config
+from src.core.prompt_builder import PromptBuilder
+from tests.conftest import ScriptedClient
+
+
+@pytest.fixture
+def llm_assistant(make_assistant, monkeypatch):
+    monkeypatch.setattr(Config, "FAQ_FAST_PATH_ENABLED", False)
+    monkeypatch.setattr(Config, "RESPONSE_CACHE_ENABLED", False)
+    llm = ScriptedClient()
+    return make_assistant(llm), llm
+
+
+def test_system_prompt_is_identical_across_turns_and_sessions(llm_assistant):
+    assistant, llm = llm_assistant
+    assistant.chat("¿Qué proyectos ha hecho con Angular?", [], session_id="a")
+    assistant.chat("Mi email es ana@example.com", [], session_id="b")
+    history = [
+        {"role": "user", "content": "¿Qué proyectos ha hecho con Angular?"},
+        {"role": "assistant", "content": "Varios."},
+    ]
+    assistant.chat("¿Y con Spring Boot?", history, session_id="a")
+    system_prompts = {request["messages"][0]["content"] for request in llm.requests}
+    assert len(llm.requests) == 2 and len(system_prompts) == 1
+
+
+def test_compiled_prompt_is_reused_from_disk(llm_assistant, monkeypatch):
+    assistant, _ = llm_assistant
+    profile = assistant.profiles.get(None)
+    prompt = profile.prompt_builder.get_system_prompt()
+    assert profile.prompt_builder.artifacts() is profile.prompt_builder.artifacts()
+
+    builder = PromptBuilder(profile.data_loader, profile.name, role=profile.prompt_builder.role)
+    monkeypatch.setattr(builder, "_render", lambda *args: pytest.fail("el prompt se volvió a renderizar"))
+    assert builder.get_system_prompt() == prompt
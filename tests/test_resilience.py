@@ -0,0 +1,148 @@
+"""
+Reintentos, circuit breaker y respuestas sin LLM cuando el proveedor cae
+"""
+import asyncio
+import time
+import pytest
+from src.core.resilience import CircuitBreaker, CircuitOpenError, ResilientClient, backoff_delay
+from tests.conftest import FailingClient, ScriptedClient
+
+
+@pytest.fixture
+def fast_retries(monkeypatch):
+    from src.config import Config
+    monkeypatch.setattr(Config, "LLM_RETRY_BACKOFF_SECONDS", 0.001)
+    monkeypatch.setattr(Config, "LLM_RETRY_BACKOFF_MAX_SECONDS", 0.001)
+
+
+def breaker(**overrides):
+    options = dict(window=10, min_calls=4, failure_rate=0.5, slow_call_seconds=5.0, slow_call_rate=0.9,
+                   open_seconds=60.0)
+    options.update(overrides)
+    return CircuitBreaker(**options)
+
+
+def test_breaker_opens_on_failure_rate():
+    circuit = breaker()
+    for failed in (True, False, True):
+        circuit.record(failed, 0.1)
+    assert circuit.state == "closed"
+    circuit.record(True, 0.1)
+    assert circuit.state == "open"
+    assert not circuit.available()
+    assert not circuit.allow()
+    assert circuit.trips == 1
+
+
+def test_breaker_opens_on_slow_calls():
+    circuit = breaker(slow_call_seconds=1.0, slow_call_rate=0.75)
+    for _ in range(4):
+        circuit.record(False, 2.0)
+    assert circuit.state == "open"
+
+
+def test_half_open_lets_a_single_probe_through(monkeypatch):
+    circuit = breaker(min_calls=1)
+    circuit.record(True, 0.1)
+    opened = time.monotonic()
+    monkeypatch.setattr(time, "monotonic", lambda: opened + 61.0)
+    assert circuit.state == "half_open"
+    assert circuit.allow()
+    assert not circuit.allow()
+    assert not circuit.available()
+    circuit.record(False, 0.1)
+    assert circuit.state == "closed"
+
+
+def test_failed_probe_reopens(monkeypatch):
+    circuit = breaker(min_calls=1)
+    circuit.record(True, 0.1)
+    opened = time.monotonic()
+    monkeypatch.setattr(time, "monotonic", lambda: opened + 61.0)
+    assert circuit.allow()
+    circuit.record(True, 0.1)
+    assert circuit.state == "open"
+    assert circuit.trips == 2
+
+
+def test_released_probe_can_be_retried(monkeypatch):
+    circuit = breaker(min_calls=1)
+    circuit.record(True, 0.1)
+    opened = time.monotonic()
+    monkeypatch.setattr(time, "monotonic", lambda: opened + 61.0)
+    assert circuit.allow()
+    circuit.release()
+    assert circuit.allow()
+
+
+def test_backoff_delay_is_capped():
+    for attempt in range(10):
+        assert 0 <= backoff_delay(attempt, base=0.5, cap=4.0) <= 4.0
+
+
+def test_transient_errors_are_retried_then_raised(fast_retries):
+    inner = FailingClient()
+    client = ResilientClient(inner, breaker=breaker(min_calls=100), max_retries=2, timeout=5.0)
+    with pytest.raises(ConnectionError):
+        client.create(model="m", messages=[])
+    assert inner.calls == 3
+    assert client.retries == 2
+
+
+def test_open_circuit_rejects_without_calling_the_provider(fast_retries):
+    inner = FailingClient()
+    client = ResilientClient(inner, breaker=breaker(min_calls=2), max_retries=5, timeout=5.0)
+    with pytest.raises(ConnectionError):
+        client.create(model="m", messages=[])
+    # Se deja de reintentar en cuanto el circuito se abre
+    assert inner.calls == 2
+    assert not client.available()
+    with pytest.raises(CircuitOpenError):
+        client.create(model="m", messages=[])
+    assert inner.calls == 2
+
+
+def test_async_retries_and_opens(fast_retries):
+    inner = FailingClient()
+    client = ResilientClient(inner, breaker=breaker(min_calls=2), max_retries=5, timeout=5.0)
+    with pytest.raises(ConnectionError):
+        asyncio.run(client.acreate(model="m", messages=[]))
+    with pytest.raises(CircuitOpenError):
+        asyncio.run(client.acreate(model="m", messages=[]))
+    assert inner.calls == 2
+
+
+def test_non_transient_errors_are_not_retried(fast_retries):
+    class BadRequestClient(FailingClient):
+        def create(self, **request):
+            self.calls += 1
+            raise ValueError("petición inválida")
+
+    inner = BadRequestClient()
+    circuit = breaker(min_calls=1)
+    client = ResilientClient(inner, breaker=circuit, max_retries=5, timeout=5.0)
+    with pytest.raises(ValueError):
+        client.create(model="m", messages=[])
+    assert inner.calls == 1
+    assert circuit.state == "closed"
+
+
+def test_success_passes_the_stream_through(fast_retries):
+    client = ResilientClient(ScriptedClient(reply="Hola"), breaker=breaker(), max_retries=2, timeout=5.0)
+    stream = client.create(model="m", messages=[], stream=True)
+    assert "".join(chunk.choices[0].delta.content or "" for chunk in stream) == "Hola"
+    assert client.stats()["circuit"]["window_failures"] == 0
+
+
+def test_open_circuit_gets_an_offline_reply(make_assistant, fast_retries, monkeypatch):
+    from src.config import Config
+    monkeypatch.setattr(Config, "FAQ_FAST_PATH_ENABLED", False)
+    monkeypatch.setattr(Config, "RESPONSE_CACHE_ENABLED", False)
+    inner = FailingClient()
+    client = ResilientClient(inner, breaker=breaker(min_calls=1), max_retries=0, timeout=5.0)
+    assistant = make_assistant(client)
+    first = assistant.chat("¿Ha trabajado con Kubernetes?", [], session_id="s1")
+    calls = inner.calls
+    second = assistant.chat("¿Y con Terraform en producción?", [], session_id="s2")
+    assert first and second
+    assert inner.calls == calls
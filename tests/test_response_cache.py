@@ -0,0 +1,56 @@
+"""
+Caché de respuestas: nivel aproximado, negaciones y candidatos acotados
+"""
+from src.config import Config
+from src.core.response_cache import ResponseCache, hash_vectorize
+
+VERSION = "v1"
+
+
+def test_fuzzy_hit_for_reworded_question():
+    cache = ResponseCache()
+    cache.put("¿Qué experiencia tiene con Angular y Spring Boot?", [], VERSION, "Mucha")
+    assert cache.get("Qué experiencia tiene con Angular y Spring Boot", [], VERSION) == "Mucha"
+    assert cache.get("¿Qué experiencia tiene en Angular y Spring Boot?", [], VERSION) == "Mucha"
+
+
+def test_negated_question_does_not_share_answer():
+    cache = ResponseCache()
+    cache.put("¿Qué tecnologías usa en sus proyectos de backend?", [], VERSION, "Spring Boot")
+    assert cache.get("¿Qué tecnologías no usa en sus proyectos de backend?", [], VERSION) is None
+    cache.put("¿Qué tecnologías no usa en sus proyectos de backend?", [], VERSION, "PHP")
+    assert cache.get("¿Qué tecnologías usa en sus proyectos de backend?", [], VERSION) == "Spring Boot"
+    assert cache.get("¿Qué tecnologías no usa en sus proyectos de backend?", [], VERSION) == "PHP"
+
+
+def test_candidate_set_is_bounded(monkeypatch):
+    monkeypatch.setattr(Config, "RESPONSE_CACHE_FUZZY_CANDIDATES", 8)
+    cache = ResponseCache(max_entries=5000)
+    for n in range(500):
+        cache.put(f"¿Qué experiencia tiene con la tecnología número {n}?", [], VERSION, f"r{n}")
+    context_key = cache.key("x", [], VERSION).partition(":")[0]
+    candidates = cache._candidates(context_key, hash_vectorize("¿Qué experiencia tiene con Kotlin?"))
+    assert len(candidates) == 8
+
+
+def test_eviction_cleans_postings():
+    cache = ResponseCache(max_entries=2)
+    for n in range(5):
+        cache.put(f"pregunta distinta {n} sobre proyectos", [], VERSION, f"r{n}")
+    indexed = set().union(*cache._postings.values())
+    assert indexed == set(cache._entries)
+
+
+def test_earlier_context_is_part_of_the_key():
+    def conversation(topic):
+        return [
+            {"role": "user", "content": f"Háblame de su proyecto de {topic}"},
+            {"role": "assistant", "content": "Claro."},
+            {"role": "user", "content": "Vale"},
+            {"role": "assistant", "content": "¿Algo más?"},
+        ]
+    cache = ResponseCache()
+    cache.put("¿Qué tecnologías usó en ese proyecto?", conversation("robótica"), VERSION, "ROS y C++")
+    assert cache.get("¿Qué tecnologías usó en ese proyecto?", conversation("robótica"), VERSION) == "ROS y C++"
+    assert cache.get("¿Qué tecnologías usó en ese proyecto?", conversation("banca"), VERSION) is None
+    assert cache.get("¿Qué tecnologías utilizó en ese proyecto?", conversation("banca"), VERSION) is None
@@ -0,0 +1,47 @@
+"""
+Recuperación BM25: troceado por secciones y fragmentos relevantes por pregunta
+"""
+import json
+from src.config import Config
+from src.core.retrieval import ProfileIndex, chunk_json
+from tests.conftest import ScriptedClient
+
+CHUNKS = [
+    {"id": "cv.datos", "text": "Datos: Diego Arnanz, desarrollador en Madrid"},
+    {"id": "cv.experiencia", "text": "Experiencia: backend con Spring Boot y Java en banca"},
+    {"id": "cv.frontend", "text": "Frontend: aplicaciones Angular con TypeScript y RxJS"},
+    {"id": "contexto.aficiones", "text": "Aficiones: escalada, ajedrez y fotografía de montaña"},
+]
+
+
+def test_search_ranks_the_matching_section_first():
+    index = ProfileIndex([dict(chunk) for chunk in CHUNKS], "v1")
+    results = index.search("¿Qué ha hecho con Angular?", top_k=2)
+    assert results[0][1]["id"] == "cv.frontend"
+    assert index.search("¿Practica escalada?", top_k=1)[0][1]["id"] == "contexto.aficiones"
+
+
+def test_search_skips_excluded_sections_and_unknown_terms():
+    index = ProfileIndex([dict(chunk) for chunk in CHUNKS], "v1")
+    assert all(not chunk["id"].startswith("cv.") for _, chunk in index.search("Angular escalada", exclude=("cv.",)))
+    assert index.search("kubernetes terraform") == []
+
+
+def test_long_sections_are_split_by_key():
+    content = json.dumps({"experiencia": {"banca": "Spring Boot " * 40, "retail": "Angular " * 40}, "nombre": "Diego"})
+    ids = [chunk["id"] for chunk in chunk_json("cv", content, max_chars=200)]
+    assert ids == ["cv.experiencia.banca", "cv.experiencia.retail", "cv.nombre"]
+
+
+def test_relevant_sections_follow_the_stable_prefix(make_assistant, monkeypatch):
+    monkeypatch.setattr(Config, "FAQ_FAST_PATH_ENABLED", False)
+    monkeypatch.setattr(Config, "RESPONSE_CACHE_ENABLED", False)
+    llm = ScriptedClient()
+    assistant = make_assistant(llm)
+    assistant.chat("¿Qué experiencia tiene con Spring Boot?", [], session_id="s1")
+    messages = llm.requests[0]["messages"]
+    assert "Secciones relevantes" not in messages[0]["content"]
+    assert any(
+        message["role"] == "system" and message["content"].startswith("## Secciones relevantes")
+        for message in messages[1:]
+    )
@@ -0,0 +1,38 @@
+"""
+Estado por sesión: aislamiento entre visitantes, LRU, TTL y persistencia en SQLite
+"""
+from src.core.session_store import InMemorySessionStore, SQLiteSessionStore, SessionState
+
+
+def test_sessions_do_not_share_email_flow(make_assistant):
+    assistant = make_assistant()
+    assistant.chat("Mi email es ana@example.com", [], session_id="a")
+    assert assistant.sessions.get("a").waiting_for_message == "ana@example.com"
+    assert assistant.sessions.get("b").waiting_for_message is None
+
+
+def test_memory_store_evicts_least_recently_used():
+    store = InMemorySessionStore(max_sessions=2, ttl_seconds=60)
+    for session_id in ("a", "b"):
+        store.save(session_id, SessionState(interaction_count=1))
+    store.get("a")
+    store.save("c", SessionState(interaction_count=1))
+    assert len(store) == 2
+    assert store.get("a").interaction_count == 1
+    assert store.get("b").interaction_count == 0
+
+
+def test_memory_store_expires_idle_sessions():
+    store = InMemorySessionStore(max_sessions=10, ttl_seconds=60)
+    store.save("a", SessionState(interaction_count=3))
+    store._sessions["a"].updated_at -= 120
+    assert store.get("a").interaction_count == 0
+
+
+def test_sqlite_store_is_shared_between_instances(tmp_path):
+    db_path = str(tmp_path / "sessions.db")
+    SQLiteSessionStore(db_path, ttl_seconds=60).save("a", SessionState(waiting_for_message="ana@example.com"))
+    other = SQLiteSessionStore(db_path, ttl_seconds=60)
+    assert other.get("a").waiting_for_message == "ana@example.com"
+    other.delete("a")
+    assert len(other) == 0
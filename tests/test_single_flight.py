@@ -0,0 +1,77 @@
+"""
+Coalescencia: turnos idénticos simultáneos comparten una sola llamada al LLM
+"""
+import asyncio
+import threading
+from src.config import Config
+from src.core.single_flight import SingleFlight
+from tests.conftest import ScriptedClient
+
+
+class SlowClient(ScriptedClient):
+    """Cliente que tarda en responder, para que los turnos coincidan en el tiempo"""
+
+    async def acreate(self, **request):
+        await asyncio.sleep(0.2)
+        return await super().acreate(**request)
+
+
+def test_followers_wait_for_the_leader():
+    flights = SingleFlight()
+    flight, leader = flights.join("k")
+    same, follower_leads = flights.join("k")
+    assert leader and not follower_leads and same is flight
+
+    woken = []
+    thread = threading.Thread(target=lambda: woken.append(flight.wait(5)))
+    thread.start()
+
+    async def follower():
+        return await flight.await_done(5)
+    loop_result = []
+    loop_thread = threading.Thread(target=lambda: loop_result.append(asyncio.run(follower())))
+    loop_thread.start()
+
+    flights.finish(flight)
+    thread.join(5)
+    loop_thread.join(5)
+    assert woken == [True] and loop_result == [True]
+    assert flights.join("k")[1]  # Terminado el turno, el siguiente vuelve a ser líder
+    assert flights.stats()["followers"] == 1
+
+
+def test_follower_gives_up_after_the_timeout():
+    flights = SingleFlight()
+    flight, _ = flights.join("k")
+    assert asyncio.run(flight.await_done(0.01)) is False
+
+
+def test_identical_concurrent_turns_share_one_llm_call(make_assistant, monkeypatch):
+    monkeypatch.setattr(Config, "FAQ_FAST_PATH_ENABLED", False)
+    monkeypatch.setattr(Config, "COALESCE_ENABLED", True)
+    llm = SlowClient(reply="Tiene experiencia con Kotlin en Android.")
+    assistant = make_assistant(llm)
+
+    async def burst():
+        return await asyncio.gather(*(
+            assistant.achat("¿Ha programado en Kotlin?", [], session_id=f"s{n}") for n in range(5)
+        ))
+    replies = asyncio.run(burst())
+    assert len(llm.requests) == 1
+    assert len(set(replies)) == 1 and replies[0].startswith("Tiene experiencia con Kotlin")
+    assert assistant.single_flight.stats()["followers"] == 4
+
+
+def test_different_questions_are_not_coalesced(make_assistant, monkeypatch):
+    monkeypatch.setattr(Config, "FAQ_FAST_PATH_ENABLED", False)
+    monkeypatch.setattr(Config, "COALESCE_ENABLED", True)
+    llm = SlowClient()
+    assistant = make_assistant(llm)
+
+    async def burst():
+        await asyncio.gather(
+            assistant.achat("¿Ha programado en Kotlin?", [], session_id="a"),
+            assistant.achat("¿Ha programado en Haskell?", [], session_id="b"),
+        )
+    asyncio.run(burst())
+    assert len(llm.requests) == 2
@@ -0,0 +1,34 @@
+"""
+Conexión SMTP: siempre se autentica con las credenciales configuradas
+"""
+import smtplib
+import pytest
+from benchmarks.smtp_sink import SMTPSink
+from src.config import Config
+from src.tools.email_tools import open_smtp_connection
+
+
+@pytest.fixture
+def sink(monkeypatch):
+    sink = SMTPSink().start()
+    host, port = sink.address
+    monkeypatch.setattr(Config, "SMTP_HOST", host)
+    monkeypatch.setattr(Config, "SMTP_PORT", port)
+    monkeypatch.setattr(Config, "SMTP_STARTTLS", False)
+    monkeypatch.setattr(Config, "SMTP_EMAIL", "diego@example.com")
+    monkeypatch.setattr(Config, "SMTP_PASSWORD", "fake")
+    yield sink
+    sink.stop()
+
+
+def test_connection_logs_in(sink):
+    server = open_smtp_connection()
+    server.quit()
+    assert sink.logins == 1
+
+
+def test_connection_fails_without_auth(sink, monkeypatch):
+    monkeypatch.setattr(smtplib.SMTP, "has_extn", lambda self, name: name.lower() != "auth")
+    with pytest.raises(smtplib.SMTPNotSupportedError):
+        open_smtp_connection()
+    assert sink.logins == 0
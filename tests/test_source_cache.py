@@ -0,0 +1,84 @@
+"""
+Caché de fuentes: reutilización por mtime y hash, y extracción de PDFs grandes en procesos
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor
+from src.config import Config
+from src.core import source_cache
+
+
+def write_pdf(path, pages):
+    """PDF mínimo con una línea de texto por página"""
+    objects = ["<< /Type /Catalog /Pages 2 0 R >>", None, "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for text in pages:
+        stream = f"BT /F1 12 Tf 72 720 Td ({text}) Tj ET"
+        objects.append(f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream")
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents {len(objects)} 0 R "
+            f"/Resources << /Font << /F1 3 0 R >> >> >>"
+        )
+        kids.append(f"{len(objects)} 0 R")
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {len(kids)} >>"
+    out = b"%PDF-1.4\n"
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += f"{number} 0 obj\n{body}\nendobj\n".encode("latin-1")
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    out += "".join(f"{offset:010d} 00000 n \n" for offset in offsets).encode()
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+    path.write_bytes(out)
+
+
+def test_large_pdf_is_extracted_in_spawned_processes(tmp_path, monkeypatch):
+    pages = [f"Pagina {n}" for n in range(6)]
+    write_pdf(tmp_path / "cv.pdf", pages)
+    monkeypatch.setattr(Config, "PDF_PARALLEL_MIN_PAGES", 2)
+    monkeypatch.setattr(Config, "PDF_MAX_WORKERS", 2)
+    monkeypatch.setattr(os, "cpu_count", lambda: 2)
+    start_methods = []
+
+    def pool(max_workers, mp_context=None):
+        start_methods.append(mp_context.get_start_method() if mp_context else None)
+        return ProcessPoolExecutor(max_workers=max_workers, mp_context=mp_context)
+    monkeypatch.setattr(source_cache, "ProcessPoolExecutor", pool)
+
+    assert source_cache.extract_pdf_text(str(tmp_path / "cv.pdf")) == "\n".join(pages)
+    assert start_methods == ["spawn"]
+
+
+def counting_extract(calls):
+    def extract(path):
+        calls.append(path)
+        with open(path, encoding="utf-8") as f:
+            return f.read().upper()
+    return extract
+
+
+def test_unchanged_source_is_not_extracted_again(tmp_path):
+    source = tmp_path / "contexto.json"
+    source.write_text('{"nombre": "diego"}', encoding="utf-8")
+    calls = []
+    cache = source_cache.SourceCache(str(tmp_path / "cache"))
+    assert cache.get(str(source), "json", counting_extract(calls)) == '{"NOMBRE": "DIEGO"}'
+    restarted = source_cache.SourceCache(str(tmp_path / "cache"))
+    assert restarted.get(str(source), "json", counting_extract(calls)) == '{"NOMBRE": "DIEGO"}'
+    assert len(calls) == 1
+
+
+def test_touched_source_reuses_extraction_by_hash(tmp_path):
+    source = tmp_path / "contexto.json"
+    source.write_text('{"nombre": "diego"}', encoding="utf-8")
+    calls = []
+    cache = source_cache.SourceCache(str(tmp_path / "cache"))
+    cache.get(str(source), "json", counting_extract(calls))
+    stat = source.stat()
+    os.utime(source, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    cache.get(str(source), "json", counting_extract(calls))
+    assert len(calls) == 1
+
+    source.write_text('{"nombre": "ana"}', encoding="utf-8")
+    assert cache.get(str(source), "json", counting_extract(calls)) == '{"NOMBRE": "ANA"}'
+    assert len(calls) == 2
@@ -0,0 +1,72 @@
+"""
+Arranque rápido: importaciones diferidas y readiness separada de liveness
+"""
+import json
+import subprocess
+import sys
+import urllib.error
+import urllib.request
+from src.config import Config
+from src.core.startup import Startup
+from src.observability.metrics import MetricsRegistry, MetricsServer
+
+
+def test_heavy_packages_are_not_imported_with_the_assistant():
+    code = (
+        "import sys; from src.core import PersonalAssistant; import src.api; "
+        "print(sorted(m for m in ('openai', 'pypdf', 'gradio') if m in sys.modules))"
+    )
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    assert result.stdout.strip() == "[]"
+
+
+def test_ready_only_after_required_stages():
+    startup = Startup()
+    startup.expect("profile")
+    assert startup.status()["status"] == "starting"
+    with startup.stage("llm_client", required=False):
+        raise ImportError("sin openai")
+    assert not startup.ready()
+    with startup.stage("profile"):
+        pass
+    status = startup.status()
+    assert status["status"] == "ready" and status["errors"] == {}
+
+
+def test_failed_required_stage_is_reported():
+    startup = Startup()
+    startup.expect("profile")
+    with startup.stage("profile"):
+        raise FileNotFoundError("data/me/cv.json")
+    assert startup.status()["status"] == "failed"
+    assert startup.wait(0) is False
+
+
+def test_readyz_returns_503_until_ready():
+    startup = Startup()
+    startup.expect("profile")
+    server = MetricsServer(port=0, registry=MetricsRegistry(), readiness=startup.status).start()
+    host, port = server.address
+    url = f"http://{host}:{port}"
+    try:
+        with urllib.request.urlopen(f"{url}/healthz", timeout=5) as response:
+            assert response.status == 200
+        try:
+            urllib.request.urlopen(f"{url}/readyz", timeout=5)
+            raise AssertionError("/readyz debería responder 503 durante el arranque")
+        except urllib.error.HTTPError as e:
+            assert e.code == 503 and json.loads(e.read())["pending"] == ["profile"]
+
+        with startup.stage("profile"):
+            pass
+        with urllib.request.urlopen(f"{url}/readyz", timeout=5) as response:
+            assert response.status == 200 and json.loads(response.read())["status"] == "ready"
+    finally:
+        server.stop()
+
+
+def test_background_startup_becomes_ready(make_assistant, monkeypatch):
+    monkeypatch.setattr(Config, "STARTUP_BACKGROUND", True)
+    assistant = make_assistant()
+    assert assistant.startup.wait(30)
+    assert assistant.startup.status()["status"] == "ready"
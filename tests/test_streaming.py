@@ -0,0 +1,113 @@
+"""
+Streaming: una respuesta cortada por max_tokens termina en una frase completa
+"""
+import asyncio
+import threading
+from types import SimpleNamespace
+from src.config import Config
+from src.core.model_router import ModelRouter
+from src.core.streaming import StreamAccumulator
+from tests.conftest import ScriptedClient, tool_call_chunks
+
+
+def chunk(content=None, finish_reason=None):
+    delta = SimpleNamespace(content=content, tool_calls=None)
+    return SimpleNamespace(usage=None, choices=[SimpleNamespace(delta=delta, finish_reason=finish_reason)])
+
+
+def stream(assistant, parts, finish_reason, available_space=1000):
+    accumulator = StreamAccumulator(available_space, assistant._cut_at_sentence)
+    for part in parts:
+        accumulator.feed(chunk(part))
+    accumulator.feed(chunk(finish_reason=finish_reason))
+    return accumulator.result()[0]
+
+
+def test_length_finish_trims_to_last_sentence_under_budget(make_assistant):
+    assistant = make_assistant()
+    text = stream(assistant, ["Trabajo con Python. ", "Uso Django y ", "también Fast"], "length")
+    assert text == "Trabajo con Python."
+
+
+def test_length_finish_without_sentence_end_drops_partial_word(make_assistant):
+    assistant = make_assistant()
+    assert stream(assistant, ["Trabajo con Python y Fast"], "length") == "Trabajo con Python y..."
+
+
+def test_stop_finish_keeps_full_text(make_assistant):
+    assistant = make_assistant()
+    text = stream(assistant, ["Trabajo con Python. ", "Uso Django"], "stop")
+    assert text == "Trabajo con Python. Uso Django"
+
+
+def test_budget_cut_still_prefers_sentence_end(make_assistant):
+    assistant = make_assistant()
+    text = "Primera frase completa aquí. Segunda frase que no cabe entera"
+    assert assistant._cut_at_sentence(text, 40) == "Primera frase completa aquí."
+
+
+def test_chat_returns_the_final_reply_and_chat_stream_yields_partials(make_assistant):
+    assistant = make_assistant()
+    message = "Email: ana@example.com Mensaje: Me gustaría hablar de una oferta"
+    reply = assistant.chat(message, [], session_id="s1")
+    assert isinstance(reply, str) and reply.startswith("📧 Mensaje listo")
+    partials = list(assistant.chat_stream("no", [], session_id="s2"))
+    assert partials and all(isinstance(partial, str) for partial in partials)
+
+
+def escalating_assistant(make_assistant, monkeypatch):
+    monkeypatch.setattr(Config, "FAQ_FAST_PATH_ENABLED", False)
+    monkeypatch.setattr(Config, "RESPONSE_CACHE_ENABLED", False)
+    llm = ScriptedClient(failing_models={"modelo-barato"})
+    assistant = make_assistant(llm)
+    assistant.model_router = ModelRouter(
+        {"fast": "modelo-barato", "standard": "modelo-estandar"},
+        {"chat": ("standard", 256), "chat.simple": ("fast", 160)},
+        enabled=True
+    )
+    return assistant, llm
+
+
+def test_sync_and_async_streams_escalate_the_same_way(make_assistant, monkeypatch):
+    assistant, llm = escalating_assistant(make_assistant, monkeypatch)
+    sync_reply = assistant.chat("Hola, ¿qué tal?", [], session_id="s1")
+    sync_models = [request["model"] for request in llm.requests]
+
+    llm.requests.clear()
+    async_reply = asyncio.run(assistant.achat("Hola, ¿qué tal?", [], session_id="s2"))
+    async_models = [request["model"] for request in llm.requests]
+
+    assert sync_models == async_models == ["modelo-barato", "modelo-estandar"]
+    assert sync_reply == async_reply
+    assert sync_reply.startswith("Diego trabaja con Python y Django.")
+    assert llm.requests[-1]["max_tokens"] == 256
+
+
+def test_async_local_paths_run_off_the_event_loop(make_assistant, monkeypatch):
+    assistant = make_assistant()
+    threads = []
+    local_reply = assistant._local_reply
+
+    def recording(*args):
+        threads.append(threading.current_thread())
+        return local_reply(*args)
+    monkeypatch.setattr(assistant, "_local_reply", recording)
+
+    async def run():
+        await assistant.achat("¿Dónde estudió Diego?", [], session_id="s1")
+        return threading.current_thread()
+    loop_thread = asyncio.run(run())
+    assert threads and threads[0] is not loop_thread
+
+
+def test_async_turn_runs_tools_and_answers(make_assistant, monkeypatch):
+    monkeypatch.setattr(Config, "FAQ_FAST_PATH_ENABLED", False)
+    monkeypatch.setattr(Config, "RESPONSE_CACHE_ENABLED", False)
+    question = {"question": "¿Ha trabajado con Rust embebido?"}
+    llm = ScriptedClient(reply="No lo sé, lo he anotado.", script=[tool_call_chunks("record_unknown_question", question)])
+    assistant = make_assistant(llm)
+    reply = asyncio.run(assistant.achat("¿Ha trabajado con Rust embebido?", [], session_id="s1"))
+    assert reply.startswith("No lo sé, lo he anotado.")
+    tool_messages = [message for message in llm.requests[1]["messages"] if message.get("role") == "tool"]
+    assert [message["tool_call_id"] for message in tool_messages] == ["call_1"]
+    assert "error" not in tool_messages[0]["content"]
@@ -0,0 +1,24 @@
+"""
+Refinamiento del asunto: cada sesión recibe el suyo aunque el mensaje coincida
+"""
+import src.core.assistant as assistant_module
+
+MESSAGE = "Email: ana@empresa.com Mensaje: Hola, tenemos una propuesta de proyecto para ti"
+
+
+def test_same_body_in_two_sessions_keeps_each_refinement(make_assistant, monkeypatch):
+    from src.config import Config
+    monkeypatch.setattr(Config, "SUBJECT_LLM_REFINEMENT", True)
+    sent = []
+    monkeypatch.setattr(assistant_module, "send_email_to_me", lambda **email: sent.append(email) or {"status": "ok"})
+    assistant = make_assistant()
+    monkeypatch.setattr(assistant, "_llm_subject", lambda message, history, name: f"Asunto con {len(history)} mensajes")
+
+    history_a = [{"role": "user", "content": "Hola"}, {"role": "assistant", "content": "¡Hola!"}]
+    assistant.chat(MESSAGE, history_a, session_id="a")
+    assistant.chat(MESSAGE, [], session_id="b")
+    assistant.chat("sí", [], session_id="a")
+    assistant.chat("sí", [], session_id="b")
+
+    assert [email["subject"] for email in sent] == ["Asunto con 2 mensajes", "Asunto con 0 mensajes"]
+    assert assistant.sessions.get("a").subject_refinement_id is None
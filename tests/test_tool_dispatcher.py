@@ -0,0 +1,90 @@
+"""
+Despachador de herramientas: ejecución concurrente, timeouts, errores y rondas acotadas
+"""
+import asyncio
+import json
+import time
+from types import SimpleNamespace
+import pytest
+from src.config import Config
+from src.tools.dispatcher import ToolDispatcher
+from tests.conftest import ScriptedClient, tool_call_chunks
+
+
+def tool_call(name, call_id, **arguments):
+    return SimpleNamespace(id=call_id, function=SimpleNamespace(name=name, arguments=json.dumps(arguments)))
+
+
+@pytest.fixture
+def dispatcher():
+    dispatcher = ToolDispatcher(max_workers=4)
+    dispatcher.register("sleep", lambda seconds: time.sleep(seconds) or {"slept": seconds})
+    yield dispatcher
+    dispatcher.shutdown()
+
+
+def test_async_dispatch_keeps_the_event_loop_free(dispatcher):
+    async def run():
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+        task = asyncio.create_task(ticker())
+        results = await dispatcher.adispatch([tool_call("sleep", "a", seconds=0.2), tool_call("sleep", "b", seconds=0.2)])
+        task.cancel()
+        return results, ticks
+
+    started = time.monotonic()
+    results, ticks = asyncio.run(run())
+    assert time.monotonic() - started < 0.35  # Las dos herramientas a la vez
+    assert ticks >= 5
+    assert [message["tool_call_id"] for message in results] == ["a", "b"]
+
+
+def results(messages):
+    return {message["tool_call_id"]: json.loads(message["content"]) for message in messages}
+
+
+def test_calls_run_in_parallel_and_keep_their_order(dispatcher):
+    started = time.monotonic()
+    messages = dispatcher.dispatch([tool_call("sleep", "a", seconds=0.2), tool_call("sleep", "b", seconds=0.1)])
+    assert time.monotonic() - started < 0.3
+    assert [message["tool_call_id"] for message in messages] == ["a", "b"]
+    assert dispatcher.stats()["sleep"]["calls"] == 2
+
+
+def test_slow_tool_times_out_without_blocking_the_turn(dispatcher):
+    dispatcher.register("slow", lambda: time.sleep(1) or {}, timeout=0.05)
+    started = time.monotonic()
+    outcome = results(dispatcher.dispatch([tool_call("slow", "a"), tool_call("sleep", "b", seconds=0)]))
+    assert time.monotonic() - started < 0.5
+    assert outcome["a"]["error"] == "timeout"
+    assert outcome["b"] == {"slept": 0}
+    assert dispatcher.stats()["slow"]["timeouts"] == 1
+
+
+def test_request_deadline_bounds_every_tool(dispatcher):
+    outcome = results(dispatcher.dispatch([tool_call("sleep", "a", seconds=1)], deadline=time.monotonic() + 0.05))
+    assert outcome["a"]["error"] == "timeout"
+
+
+def test_errors_and_unknown_tools_are_reported_to_the_model(dispatcher):
+    dispatcher.register("broken", lambda: 1 / 0)
+    outcome = results(dispatcher.dispatch([tool_call("broken", "a"), tool_call("missing", "b")]))
+    assert outcome["a"]["error"].startswith("ZeroDivisionError")
+    assert outcome["b"]["error"] == "Herramienta desconocida: missing"
+
+
+def test_tool_loop_is_bounded(make_assistant, monkeypatch):
+    monkeypatch.setattr(Config, "FAQ_FAST_PATH_ENABLED", False)
+    monkeypatch.setattr(Config, "RESPONSE_CACHE_ENABLED", False)
+    monkeypatch.setattr(Config, "TOOL_MAX_ROUNDS", 2)
+    question = {"question": "¿Ha trabajado con Rust?"}
+    script = [tool_call_chunks("record_unknown_question", question, f"call_{n}") for n in range(5)]
+    llm = ScriptedClient(reply="Respuesta final.", script=script)
+    make_assistant(llm).chat("¿Ha trabajado con Rust?", [], session_id="s1")
+    assert len(llm.requests) == 3
+    assert llm.requests[-1]["tool_choice"] == "none"